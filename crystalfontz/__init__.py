@@ -6,8 +6,12 @@ from crystalfontz.client import Client, connection, create_connection
 from crystalfontz.command import Command
 from crystalfontz.config import Config
 from crystalfontz.cursor import CursorStyle
+from crystalfontz.demand import DemandTracker, ReportDemand
 from crystalfontz.device import Device, DeviceStatus
+from crystalfontz.discover import discover, DiscoveredDevice
+from crystalfontz.dispatch import DispatchStats, ReportDispatcher
 from crystalfontz.effects import DanceParty, Effect, EffectClient, Marquee, Screensaver
+from crystalfontz.emulator import create_emulated_connection, Emulator
 from crystalfontz.error import (
     ConnectionError,
     CrystalfontzError,
@@ -15,8 +19,10 @@ from crystalfontz.error import (
     DeviceError,
     DeviceLookupError,
     EncodeError,
+    ProfileError,
     UnknownResponseError,
 )
+from crystalfontz.facts import DeviceFacts, Fact
 from crystalfontz.gpio import (
     GPIO_HIGH,
     GPIO_LOW,
@@ -36,9 +42,23 @@ from crystalfontz.keys import (
     KP_RIGHT,
     KP_UP,
 )
+from crystalfontz.lag import LagMonitor
+from crystalfontz.latency import KeyLatency
 from crystalfontz.lcd import LcdRegister
+from crystalfontz.metrics import CommandMetrics, Histogram, Metrics
 from crystalfontz.packet import Packet
+from crystalfontz.pool import (
+    create_pool,
+    device_pool,
+    DeviceHealth,
+    DevicePool,
+    LoggingPoolReportHandler,
+    NoopPoolReportHandler,
+    PoolReportHandler,
+)
+from crystalfontz.profiling import Profiler
 from crystalfontz.receiver import Receiver
+from crystalfontz.recorder import FlightRecorder
 from crystalfontz.report import LoggingReportHandler, NoopReportHandler, ReportHandler
 from crystalfontz.response import (
     AtxPowerSwitchFunctionalitySet,
@@ -71,6 +91,14 @@ from crystalfontz.response import (
     Versions,
     WatchdogConfigured,
 )
+from crystalfontz.spans import SpanRecorder
+from crystalfontz.stream import ReportStream
+from crystalfontz.supervisor import (
+    create_supervisor,
+    device_supervisor,
+    DeviceSupervisor,
+)
+from crystalfontz.sync import SyncClient
 from crystalfontz.temperature import TemperatureDisplayItem, TemperatureUnit
 from crystalfontz.watchdog import WATCHDOG_DISABLED
 
@@ -85,12 +113,16 @@ __all__: List[str] = [
     "ClearedScreen",
     "Client",
     "Command",
+    "CommandMetrics",
     "CommandSentToLcdController",
     "Config",
     "connection",
     "ConnectionError",
     "ContrastSet",
     "create_connection",
+    "create_emulated_connection",
+    "create_pool",
+    "create_supervisor",
     "CrystalfontzError",
     "CursorPositionSet",
     "CursorStyle",
@@ -98,20 +130,34 @@ __all__: List[str] = [
     "DanceParty",
     "DataSent",
     "DecodeError",
+    "DemandTracker",
     "Device",
+    "device_pool",
+    "device_supervisor",
     "DeviceError",
+    "DeviceFacts",
+    "DeviceHealth",
     "DeviceLookupError",
+    "DevicePool",
     "DeviceStatus",
+    "DeviceSupervisor",
+    "discover",
+    "DiscoveredDevice",
+    "DispatchStats",
     "Effect",
     "EffectClient",
+    "Emulator",
     "EncodeError",
+    "Fact",
     "FAST_BAUD_RATE",
+    "FlightRecorder",
     "GPIO_HIGH",
     "GPIO_LOW",
     "GpioDriveMode",
     "GpioFunction",
     "GpioSettings",
     "GpioState",
+    "Histogram",
     "KP_DOWN",
     "KP_ENTER",
     "KP_EXIT",
@@ -120,29 +166,42 @@ __all__: List[str] = [
     "KP_UP",
     "KeyActivity",
     "KeyActivityReport",
+    "KeyLatency",
     "KeyReportingConfigured",
     "KeyState",
     "KeyStates",
     "KeypadPolled",
+    "LagMonitor",
     "LcdRegister",
     "Line1Set",
     "Line2Set",
     "LiveTemperatureDisplaySetUp",
+    "LoggingPoolReportHandler",
     "LoggingReportHandler",
     "Marquee",
+    "Metrics",
+    "NoopPoolReportHandler",
     "NoopReportHandler",
     "Packet",
     "LcdMemory",
     "Pong",
+    "PoolReportHandler",
     "PowerResponse",
+    "ProfileError",
+    "Profiler",
     "RawResponse",
     "Receiver",
+    "ReportDemand",
+    "ReportDispatcher",
     "ReportHandler",
+    "ReportStream",
     "Response",
     "SLOW_BAUD_RATE",
     "Screensaver",
+    "SpanRecorder",
     "SpecialCharacterDataSet",
     "StatusRead",
+    "SyncClient",
     "TemperatureDisplayItem",
     "TemperatureReport",
     "TemperatureReportingSetUp",
@@ -34,8 +34,11 @@ from crystalfontz.client import (
 )
 from crystalfontz.config import Config, GLOBAL_FILE
 from crystalfontz.cursor import CursorStyle
+from crystalfontz.discover import discover as discover_devices
+from crystalfontz.discover import DISCOVERY_TIMEOUT
 from crystalfontz.effects import Effect
 from crystalfontz.error import CrystalfontzError
+from crystalfontz.event_loop import EVENT_LOOPS, EventLoopType, run
 from crystalfontz.format import format_json_bytes, OutputMode
 from crystalfontz.gpio import GpioDriveMode, GpioFunction, GpioSettings
 from crystalfontz.keys import (
@@ -50,6 +53,7 @@ from crystalfontz.keys import (
 from crystalfontz.lcd import LcdRegister
 from crystalfontz.report import CliReportHandler, NoopReportHandler, ReportHandler
 from crystalfontz.temperature import TemperatureDisplayItem, TemperatureUnit
+from crystalfontz.trace import enable_logging
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +85,7 @@ class Obj:
     timeout: Optional[float]
     retry_times: Optional[int]
     baud_rate: BaudRate
+    event_loop: EventLoopType
     effect_options: Optional[EffectOptions] = None
 
 
@@ -362,13 +367,18 @@ SyncCommand = Callable[..., None]
 
 def async_command(fn: AsyncCommand) -> SyncCommand:
     """
-    Run an async command handler.
+    Run an async command handler on the selected event loop.
     """
 
     @functools.wraps(fn)
     def wrapped(*args, **kwargs) -> None:
+        ctx = click.get_current_context(silent=True)
+        obj = ctx.find_object(Obj) if ctx else None
         try:
-            asyncio.run(fn(*args, **kwargs))
+            if obj:
+                run(fn(*args, **kwargs), obj.event_loop)
+            else:
+                run(fn(*args, **kwargs))
         except KeyboardInterrupt:
             pass
 
@@ -378,6 +388,7 @@ def async_command(fn: AsyncCommand) -> SyncCommand:
 def pass_client(
     run_forever: bool = False,
     report_handler_cls: Type[ReportHandler] = NoopReportHandler,
+    key_latency_option: Optional[str] = None,
 ) -> Callable[[AsyncCommand], AsyncCommand]:
     def decorator(fn: AsyncCommand) -> AsyncCommand:
         @click.pass_obj
@@ -394,6 +405,11 @@ def pass_client(
 
             report_handler = report_handler_cls()
 
+            # Measure key latency if the command's option asks for it
+            key_latency = (
+                bool(kwargs.get(key_latency_option)) if key_latency_option else False
+            )
+
             # Set the output mode on the report handler
             if isinstance(report_handler, CliReportHandler):
                 report_handler.mode = output
@@ -416,8 +432,9 @@ def pass_client(
                     timeout=to,
                     retry_times=retries,
                     baud_rate=baud_rate,
+                    key_latency=key_latency,
                 )
-            except SerialException as exc:
+            except (SerialException, CrystalfontzError) as exc:
                 click.echo(exc)
                 sys.exit(1)
 
@@ -478,7 +495,7 @@ def pass_config(fn: Callable[..., R]) -> Callable[..., R]:
 @click.option(
     "--port",
     envvar="CRYSTALFONTZ_PORT",
-    help="The serial port the device is connected to",
+    help="The serial port the device is connected to, or a tcp:// or rfc2217:// URL",
 )
 @click.option(
     "--model",
@@ -521,6 +538,12 @@ def pass_config(fn: Callable[..., R]) -> Callable[..., R]:
     envvar="CRYSTALFONTZ_BAUD_RATE",
     help="The baud rate to use when connecting to the device",
 )
+@click.option(
+    "--event-loop",
+    type=click.Choice(EVENT_LOOPS),
+    envvar="CRYSTALFONTZ_EVENT_LOOP",
+    help="The event loop to run on. uvloop must be installed separately",
+)
 @click.version_option()
 @click.pass_context
 def main(
@@ -536,6 +559,7 @@ def main(
     timeout: Optional[float],
     retry_times: Optional[int],
     baud: Optional[str],
+    event_loop: Optional[EventLoopType],
 ) -> None:
     """
     Control your Crystalfontz device.
@@ -563,9 +587,12 @@ def main(
         timeout=timeout or config.timeout,
         retry_times=retry_times if retry_times is not None else config.retry_times,
         baud_rate=baud_rate or config.baud_rate,
+        event_loop=event_loop or config.event_loop,
     )
 
     logging.basicConfig(level=getattr(logging, log_level))
+    if log_level == "DEBUG":
+        enable_logging()
 
 
 @main.group()
@@ -671,22 +698,92 @@ async def detect(
         echo(config)
 
 
+@main.command()
+@click.argument("ports", nargs=-1)
+@click.option(
+    "--probe-timeout",
+    type=float,
+    default=DISCOVERY_TIMEOUT,
+    help="How long to wait for each device to respond to a ping",
+)
+@click.option(
+    "--save/--no-save",
+    default=False,
+    help="Save the first discovered device to the configuration",
+)
+@async_command
+@click.pass_obj
+async def discover(
+    obj: Obj, ports: Tuple[str, ...], probe_timeout: float, save: bool
+) -> None:
+    """
+    Discover devices attached to serial ports.
+
+    By default, ports in /dev/serial/by-id, /dev/ttyUSB* and /dev/ttyACM* are
+    probed. Each port is pinged at both baud rates, and devices which respond
+    are identified by their versions.
+    """
+
+    echo.mode = obj.output
+
+    devices = await discover_devices(
+        ports or None, baud_rate=obj.baud_rate, timeout=probe_timeout
+    )
+
+    if obj.output == "json":
+        echo([device.as_dict() for device in devices])
+    else:
+        for device in devices:
+            echo(device)
+
+    if not devices:
+        logger.warning("No devices found")
+        sys.exit(1)
+
+    if save:
+        device = devices[0]
+        config = obj.config
+        config.port = device.port
+        config.baud_rate = device.baud_rate
+        config.model = device.model
+        config.hardware_rev = device.hardware_rev
+        config.firmware_rev = device.firmware_rev
+        config.to_file()
+
+
 @main.command()
 @click.option("--for", "for_", type=float, help="Amount of time to listen for reports")
+@click.option(
+    "--latency/--no-latency",
+    default=False,
+    help="Print the distribution of key press latency when done listening",
+)
 @async_command
-@pass_client(run_forever=True, report_handler_cls=CliReportHandler)
-async def listen(client: Client, for_: Optional[float]) -> None:
+@pass_client(
+    run_forever=True, report_handler_cls=CliReportHandler, key_latency_option="latency"
+)
+async def listen(client: Client, for_: Optional[float], latency: bool) -> None:
     """
     Listen for key activity and temperature reports.
 
     To configure which reports to receive, use
     'python -m crystalfontz keypad reporting' and
     'python -m crystalfontz temperature reporting' respectively.
+
+    With --latency, the time from each key activity report arriving to its
+    handler finishing is printed when listening stops - either after --for
+    seconds, or on Ctrl-C.
     """
 
-    if for_ is not None:
-        await asyncio.sleep(for_)
-        client.close()
+    try:
+        if for_ is not None:
+            await asyncio.sleep(for_)
+            client.close()
+        elif latency:
+            await client.closed
+    finally:
+        if latency and client.key_latency is not None:
+            echo(client.key_latency)
 
 
 @main.command(help="0 (0x00): Ping command")
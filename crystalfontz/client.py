@@ -32,6 +32,7 @@ import functools
 import logging
 import random
 from string import ascii_lowercase
+import time
 import traceback
 from typing import (
     Any,
@@ -44,6 +45,7 @@ from typing import (
     List,
     Optional,
     Self,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -52,9 +54,6 @@ from typing import (
 )
 import warnings
 
-from serial import EIGHTBITS, PARITY_NONE, STOPBITS_ONE
-from serial_asyncio import create_serial_connection, SerialTransport
-
 from crystalfontz.atx import AtxPowerSwitchFunctionalitySettings
 from crystalfontz.baud import BaudRate, OTHER_BAUD_RATE, SLOW_BAUD_RATE
 from crystalfontz.character import SpecialCharacter
@@ -93,7 +92,17 @@ from crystalfontz.command import (
     WriteUserFlashArea,
 )
 from crystalfontz.cursor import CursorStyle
+from crystalfontz.demand import DemandTracker, ReportDemand
 from crystalfontz.device import Device, DeviceStatus, lookup_device
+from crystalfontz.dispatch import (
+    DEFAULT_REPORT_CONCURRENCY,
+    DEFAULT_REPORT_ORDERING,
+    DispatchStats,
+    key_activity_key,
+    Ordering,
+    ReportDispatcher,
+    temperature_key,
+)
 from crystalfontz.effects import DanceParty, Marquee, Screensaver
 from crystalfontz.error import (
     ConnectionError,
@@ -101,11 +110,22 @@ from crystalfontz.error import (
     DeviceError,
     ResponseDecodeError,
 )
+from crystalfontz.facts import DeviceFacts, Fact, FACT_COMMANDS, FACTS
 from crystalfontz.gpio import GpioSettings
 from crystalfontz.keys import KeyPress
+from crystalfontz.lag import LagMonitor
+from crystalfontz.latency import KeyLatency
 from crystalfontz.lcd import LcdRegister
+from crystalfontz.metrics import Metrics
 from crystalfontz.packet import Packet, parse_packet, serialize_packet
-from crystalfontz.receiver import Receiver
+from crystalfontz.receiver import (
+    CoalesceKey,
+    DEFAULT_DROP_POLICY,
+    DropPolicy,
+    Predicate,
+    Receiver,
+)
+from crystalfontz.recorder import FlightRecorder
 from crystalfontz.report import NoopReportHandler, ReportHandler
 from crystalfontz.response import (
     AtxPowerSwitchFunctionalitySet,
@@ -143,7 +163,16 @@ from crystalfontz.response import (
     Versions,
     WatchdogConfigured,
 )
+from crystalfontz.spans import active_trace, Trace
+from crystalfontz.stream import DEFAULT_STREAM_SIZE, ReportStream
 from crystalfontz.temperature import TemperatureDisplayItem
+from crystalfontz.trace import emit, hooks
+from crystalfontz.transport import (
+    create_transport,
+    DEFAULT_TRANSPORT,
+    Transport,
+    TransportType,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -157,6 +186,14 @@ DEFAULT_TIMEOUT = 0.250
 # is necessary.
 DEFAULT_RETRY_TIMES = 0
 
+# Reports are queued for the ReportHandler, which may fall behind. Queues are
+# bounded so that a slow handler can't cause unbounded memory growth. Key activity
+# keeps the most recent reports, while temperature keeps only the latest reading
+# for each sensor.
+DEFAULT_REPORT_QUEUE_SIZE = 64
+KEY_ACTIVITY_DROP_POLICY: DropPolicy = "drop-oldest"
+TEMPERATURE_DROP_POLICY: DropPolicy = "coalesce-latest"
+
 R = TypeVar("R", bound=Response)
 Result = Tuple[Exception, None] | Tuple[None, R]
 ReportHandlerMethod = Callable[[R], Coroutine[None, None, None]]
@@ -194,6 +231,9 @@ def retry(
                 if not times:
                     raise exc
                 times -= 1
+                metrics: Optional[Metrics] = getattr(self, "metrics", None)
+                if metrics is not None:
+                    metrics.retries += 1
                 continue
 
     return wrapper
@@ -223,19 +263,49 @@ class Client(asyncio.Protocol):
         timeout: float,
         retry_times: int,
         loop: asyncio.AbstractEventLoop,
+        report_queue_size: int = DEFAULT_REPORT_QUEUE_SIZE,
+        report_concurrency: int = DEFAULT_REPORT_CONCURRENCY,
+        report_ordering: Ordering = DEFAULT_REPORT_ORDERING,
+        demand_reporting: bool = False,
+        metrics: bool = False,
+        flight_recorder: Optional[FlightRecorder] = None,
+        monitor_loop: bool = False,
+        key_latency: bool = False,
     ) -> None:
 
         self.device: Device = device
         self.report_handler: ReportHandler = report_handler
         self._default_timeout: float = timeout
         self._default_retry_times: int = retry_times
+        self._report_queue_size: int = report_queue_size
+        self._report_concurrency: int = report_concurrency
+        self._report_ordering: Ordering = report_ordering
+        self._demand: Optional[DemandTracker] = None
+        if demand_reporting:
+            self._demand = DemandTracker(self, loop=loop)
 
         self._buffer: bytes = b""
         self.loop: asyncio.AbstractEventLoop = loop
-        self._transport: Optional[SerialTransport] = None
+        self._transport: Optional[Transport] = None
         self._connection_made: asyncio.Future[None] = self.loop.create_future()
         self._closed: asyncio.Future[None] = self.loop.create_future()
 
+        self.facts: DeviceFacts = DeviceFacts()
+        self.metrics: Optional[Metrics] = Metrics() if metrics else None
+        if self.metrics is not None:
+            self.metrics.gauges["queue_depth"] = self._queue_depth
+        self.flight_recorder: Optional[FlightRecorder] = flight_recorder
+        self.lag_monitor: Optional[LagMonitor] = None
+        if monitor_loop:
+            self.lag_monitor = LagMonitor(timeout, loop=loop)
+            if self.metrics is not None:
+                self.metrics.loop_lag = self.lag_monitor.lag
+                self.metrics.slow_callbacks = self.lag_monitor.slow_callback_counts
+        self.key_latency: Optional[KeyLatency] = KeyLatency() if key_latency else None
+        # Whether to stamp responses with when they arrived. Measuring key latency
+        # needs the stamps, but otherwise they're opt-in.
+        self.stamp_responses: bool = key_latency
+
         self._lock: asyncio.Lock = asyncio.Lock()
         self._expect: Optional[Type[Response]] = None
         self._receivers: Dict[Type[Response], List[Receiver[Response]]] = defaultdict(
@@ -273,56 +343,113 @@ class Client(asyncio.Protocol):
         The transport's baud rate.
         """
 
-        if not self._transport or not self._transport.serial:
+        if not self._transport:
             raise ConnectionError("Uninitialized transport has no baud rate")
-        return self._transport.serial.baudrate
+        return self._transport.baud_rate
 
     @baud_rate.setter
     def baud_rate(self: Self, baud_rate: BaudRate) -> None:
-        if not self._transport or not self._transport.serial:
+        if not self._transport:
             raise ConnectionError("Uninitialized transport has no baud rate")
-        self._transport.serial.baudrate = baud_rate
+        self._transport.baud_rate = baud_rate
 
     #
-    # pyserial callbacks
+    # Transport callbacks
     #
 
-    def _is_serial_transport(
+    def _is_transport(
         self: Self, transport: asyncio.BaseTransport
-    ) -> TypeGuard[SerialTransport]:
-        return isinstance(transport, SerialTransport)
+    ) -> TypeGuard[Transport]:
+        return isinstance(transport, Transport)
 
     def connection_made(self: Self, transport: asyncio.BaseTransport) -> None:
-        if not self._is_serial_transport(transport):
-            raise ConnectionError("Transport is not a SerialTransport")
+        if not self._is_transport(transport):
+            raise ConnectionError("Transport is not a crystalfontz Transport")
 
         self._transport = transport
         self._running = True
 
-        self._key_activity_queue: Receiver[KeyActivityReport] = self.subscribe(
-            KeyActivityReport, expect=False
+        self._key_activity_queue: Receiver[KeyActivityReport] = Receiver(
+            set(),
+            maxsize=self._report_queue_size,
+            policy=KEY_ACTIVITY_DROP_POLICY,
         )
-        self._temperature_queue: Receiver[TemperatureReport] = self.subscribe(
-            TemperatureReport, expect=False
+        self._temperature_queue: Receiver[TemperatureReport] = Receiver(
+            set(),
+            maxsize=self._report_queue_size,
+            policy=TEMPERATURE_DROP_POLICY,
+            key=temperature_key,
+        )
+
+        # A NoopReportHandler doesn't listen for reports, so there's no reason to
+        # decode them on its behalf
+        if not isinstance(self.report_handler, NoopReportHandler):
+            self.subscribe(
+                KeyActivityReport, expect=False, receiver=self._key_activity_queue
+            )
+            self.subscribe(
+                TemperatureReport, expect=False, receiver=self._temperature_queue
+            )
+
+        self._key_activity_dispatcher: ReportDispatcher[KeyActivityReport] = (
+            ReportDispatcher(
+                "key_activity",
+                (
+                    self.key_latency.wrap(self.report_handler.on_key_activity)
+                    if self.key_latency is not None
+                    else self.report_handler.on_key_activity
+                ),
+                concurrency=self._report_concurrency,
+                ordering=self._report_ordering,
+                key=key_activity_key,
+                loop=self.loop,
+                on_error=self._report_handler_error,
+            )
+        )
+        self._temperature_dispatcher: ReportDispatcher[TemperatureReport] = (
+            ReportDispatcher(
+                "temperature",
+                self.report_handler.on_temperature,
+                concurrency=self._report_concurrency,
+                ordering=self._report_ordering,
+                key=temperature_key,
+                loop=self.loop,
+                on_error=self._report_handler_error,
+            )
         )
 
         self._key_activity_task: asyncio.Task[None] = self.loop.create_task(
             self._handle_report(
                 "key_activity",
                 self._key_activity_queue,
-                self.report_handler.on_key_activity,
+                self._key_activity_dispatcher,
             )
         )
         self._temperature_task: asyncio.Task[None] = self.loop.create_task(
             self._handle_report(
                 "temperature",
                 self._temperature_queue,
-                self.report_handler.on_temperature,
+                self._temperature_dispatcher,
             )
         )
 
+        if self._demand:
+            self._demand.add(self.report_handler.demand(self.device))
+
+        if self.lag_monitor:
+            self.lag_monitor.start()
+
         self._connection_made.set_result(None)
 
+    def _queue_depth(self: Self) -> float:
+        return float(
+            sum(
+                rcv.qsize()
+                for receivers in self._receivers.values()
+                for rcv in receivers
+            )
+        )
+
     def connection_lost(self: Self, exc: Optional[Exception]) -> None:
         self._running = False
         try:
@@ -333,6 +460,70 @@ class Client(asyncio.Protocol):
         else:
             self._close()
 
+    @property
+    def dropped_reports(self: Self) -> Dict[str, int]:
+        """
+        The number of reports dropped because the ReportHandler fell behind, by
+        report type.
+        """
+
+        return dict(
+            key_activity=self._key_activity_queue.dropped,
+            temperature=self._temperature_queue.dropped,
+        )
+
+    @property
+    def report_demand(self: Self) -> Optional[DemandTracker]:
+        """
+        The client's demand tracker, if demand-driven reporting is enabled.
+        """
+
+        return self._demand
+
+    def add_report_demand(self: Self, demand: ReportDemand) -> Optional[int]:
+        """
+        Add demand for reports. If demand-driven reporting is enabled, the device
+        will be configured to send these reports, and a token which may be passed
+        to `client.remove_report_demand` is returned. Otherwise, this method does
+        nothing.
+        """
+
+        if not self._demand:
+            return None
+        return self._demand.add(demand)
+
+    def remove_report_demand(self: Self, token: Optional[int]) -> None:
+        """
+        Remove demand for reports added with `client.add_report_demand`.
+        """
+
+        if self._demand and token is not None:
+            self._demand.remove(token)
+
+    @property
+    def report_stats(self: Self) -> Dict[str, DispatchStats]:
+        """
+        Report dispatch statistics - handler latency, backlog and so on - by
+        report type.
+        """
+
+        return dict(
+            key_activity=self._report_stats(
+                self._key_activity_queue, self._key_activity_dispatcher
+            ),
+            temperature=self._report_stats(
+                self._temperature_queue, self._temperature_dispatcher
+            ),
+        )
+
+    def _report_stats(
+        self: Self, queue: Receiver[R], dispatcher: ReportDispatcher[R]
+    ) -> DispatchStats:
+        stats = dispatcher.stats()
+        stats.backlog = queue.qsize()
+        stats.dropped = queue.dropped
+        return stats
+
     @property
     def closed(self: Self) -> asyncio.Future:
         """
@@ -354,6 +545,11 @@ class Client(asyncio.Protocol):
     def _close(self: Self, exc: Optional[Exception] = None) -> None:
         self._running = False
 
+        if self._demand:
+            self._demand.close()
+        if self.lag_monitor:
+            self.lag_monitor.stop()
+
         # A clean exit requires that we cancel these tasks and then wait
         # for them to finish before killing the event loop
         self._key_activity_task.cancel()
@@ -405,19 +601,30 @@ class Client(asyncio.Protocol):
             self.closed.set_result(None)
 
     def data_received(self: Self, data: bytes) -> None:
+        metrics = self.metrics
+        on_resync = None
+        if metrics is not None:
+            metrics.bytes_in += len(data)
+            on_resync = metrics.resync
+        if self.flight_recorder is not None:
+            self.flight_recorder.rx(data)
+
+        received_at = time.monotonic() if self.stamp_responses else None
+
         try:
             self._buffer += data
 
-            packet, buff = parse_packet(self._buffer)
+            packet, buff = parse_packet(self._buffer, on_resync)
             self._buffer = buff
 
             while packet:
-                self._packet_received(packet)
-                packet, buff = parse_packet(self._buffer)
+                self._packet_received(packet, received_at)
+                packet, buff = parse_packet(self._buffer, on_resync)
                 self._buffer = buff
         except Exception as exc:
             # Exceptions here would have come from the packet parser, not
             # the packet handler
+            self._record_error(exc)
             self._error(exc)
 
     def _error(self: Self, exc: Exception) -> None:
@@ -426,8 +633,15 @@ class Client(asyncio.Protocol):
         else:
             self._close(exc)
 
-    def _packet_received(self: Self, packet: Packet) -> None:
-        logging.debug(f"Packet received: {packet}")
+    def _packet_received(
+        self: Self, packet: Packet, received_at: Optional[float] = None
+    ) -> None:
+        if self.metrics is not None:
+            self.metrics.packets_in += 1
+            if packet[0] >> 6 == 0b10 and packet[0] in RESPONSE_CLASSES:
+                self.metrics.report(RESPONSE_CLASSES[packet[0]].__name__)
+        if self._is_ignored(packet[0]):
+            return
         try:
             res = Response.from_packet(packet)
             raw_res = (
@@ -442,10 +656,24 @@ class Client(asyncio.Protocol):
         except Exception as exc:
             self._error(exc)
         else:
+            if self.stamp_responses:
+                res.received_at = (
+                    received_at if received_at is not None else time.monotonic()
+                )
+            if hooks.decode:
+                emit(hooks.decode, packet, res)
             self._emit(type(res), (None, res))
             if raw_res:
                 self._emit(RawResponse, (None, raw_res))
 
+    def _is_ignored(self: Self, code: int) -> bool:
+        # Reports start with bits 0b10. Reports which nothing is listening for are
+        # dropped without being decoded.
+        if code >> 6 != 0b10 or self._receivers.get(RawResponse):
+            return False
+        cls = RESPONSE_CLASSES.get(code)
+        return cls is not None and not self._receivers.get(cls)
+
     def _emit(self: Self, response_cls: Type[Response], item: Result[Response]) -> None:
         if response_cls in self._receivers:
             for rcv in self._receivers[response_cls]:
@@ -453,11 +681,19 @@ class Client(asyncio.Protocol):
         elif item[0]:
             self._error(item[0])
 
+    def _record_error(self: Self, exc: Exception) -> None:
+        if self.flight_recorder is not None:
+            self.flight_recorder.dump_on_error(exc, self.loop)
+
     def _emit_response_decode_error(self: Self, exc: ResponseDecodeError) -> None:
+        self._record_error(exc)
         # We know the intended response type, so send it to any subscribers
         self._emit(exc.response_cls, (exc, None))
 
     def _emit_device_error(self: Self, exc: DeviceError) -> None:
+        self._record_error(exc)
+        if self.metrics is not None:
+            self.metrics.device_errors += 1
         if exc.expected_response in RESPONSE_CLASSES:
             self._emit(RESPONSE_CLASSES[exc.expected_response], (exc, None))
         else:
@@ -467,18 +703,45 @@ class Client(asyncio.Protocol):
     # Event subscriptions
     #
 
-    def subscribe(self: Self, cls: Type[R], expect: bool = True) -> Receiver[R]:
+    def subscribe(
+        self: Self,
+        cls: Type[R],
+        expect: bool = True,
+        maxsize: int = 0,
+        policy: DropPolicy = DEFAULT_DROP_POLICY,
+        key: Optional[CoalesceKey] = None,
+        predicate: Optional[Predicate] = None,
+        receiver: Optional[Receiver[R]] = None,
+    ) -> Receiver[R]:
         """
         Subscribe to results of a given response class. Returns a
         `Receiver[Response]`.
 
+        By default, the receiver is unbounded. If `maxsize` is set, results
+        arriving while the receiver is full are handled according to `policy`. For
+        the "coalesce-latest" policy, `key` determines which results replace each
+        other, and defaults to the result's type. If `predicate` is set, only
+        results for which it's true are queued.
+
+        Passing an existing `receiver` subscribes it to another response class,
+        ignoring the other arguments.
+
         This is a low level method. Most use cases not met by individual command
         methods or a ReportHandler are best handled with `client.expect`.
         """
 
-        receiving: Set[Receiver[Any]] = self._receiving if expect else set()
-
-        rcv: Receiver[R] = Receiver(receiving)
+        rcv: Receiver[R]
+        if receiver:
+            rcv = receiver
+        else:
+            receiving: Set[Receiver[Any]] = self._receiving if expect else set()
+            rcv = Receiver(
+                receiving,
+                maxsize=maxsize,
+                policy=policy,
+                key=key,
+                predicate=predicate,
+            )
         key = cast(Type[Response], cls)
         value = cast(Receiver[Response], rcv)
         self._receivers[key].append(value)
@@ -503,6 +766,43 @@ class Client(asyncio.Protocol):
         cast_value = cast(List[Receiver[Response]], value)
         self._receivers[key] = cast_value
 
+    def reports(
+        self: Self,
+        *classes: Type[Response],
+        keys: Optional[Iterable[KeyPress]] = None,
+        sensors: Optional[Iterable[int]] = None,
+        maxsize: int = DEFAULT_STREAM_SIZE,
+        policy: DropPolicy = DEFAULT_DROP_POLICY,
+        key: Optional[CoalesceKey] = None,
+    ) -> ReportStream:
+        """
+        Stream reports of the given classes - by default, key activity and
+        temperature reports. Returns a `ReportStream`, which is an async iterator:
+
+        ```py
+        async with client.reports(KeyActivityReport, keys=[KP_UP]) as reports:
+            async for report in reports:
+                print(report)
+        ```
+
+        If `keys` is set, only key activity reports for those keys are streamed.
+        Likewise, if `sensors` is set, only temperature reports for those sensor
+        indexes are streamed. The stream's queue holds up to `maxsize` reports,
+        after which reports are dropped according to `policy`.
+
+        See `crystalfontz.stream` for details.
+        """
+
+        return ReportStream(
+            self,
+            classes if classes else (KeyActivityReport, TemperatureReport),
+            keys=keys,
+            sensors=sensors,
+            maxsize=maxsize,
+            policy=policy,
+            key=key,
+        )
+
     @timeout
     async def expect(self: Self, cls: Type[R], timeout: Optional[float] = None) -> R:
         """
@@ -515,9 +815,12 @@ class Client(asyncio.Protocol):
         methods.
         """
         q = self.subscribe(cls)
-        exc, res = await q.get()
+        try:
+            exc, res = await q.get()
+        finally:
+            # Unsubscribe even if timed out, or the receiver would be leaked
+            self.unsubscribe(cls, q)
         q.task_done()
-        self.unsubscribe(cls, q)
         if exc:
             raise exc
         elif res:
@@ -545,15 +848,148 @@ class Client(asyncio.Protocol):
         This is a low level method. Most use cases are met by individual command
         methods.
         """
+        trace = active_trace()
+        queued = time.perf_counter() if trace else 0.0
+
         async with self._lock:
+            if self.metrics is None and trace is None:
+                self.send_packet(command.to_packet())
+                res = await self.expect(response_cls, timeout=timeout)
+                if self.key_latency is not None:
+                    self.key_latency.acknowledged(command)
+                return res
+
+            start = time.perf_counter()
             self.send_packet(command.to_packet())
-            return await self.expect(response_cls, timeout=timeout)
+            written = time.perf_counter()
+            try:
+                res = await self.expect(response_cls, timeout=timeout)
+            except BaseException as exc:
+                self._command_done(command, trace, queued, start, written, exc)
+                raise
+            self._command_done(command, trace, queued, start, written)
+            return res
+
+    async def send_commands(
+        self: Self,
+        commands: Sequence[Tuple[Command, Type[Response]]],
+        timeout: Optional[float] = None,
+    ) -> List[Result[Response]]:
+        """
+        Send several `Command`s at once, then wait for their expected `Response`s.
+        Returns a list of (exception, response) results, in the order the commands
+        were given.
+
+        Rather than waiting for each response before sending the next command,
+        every command is written in a single write, and responses are collected as
+        they arrive. This takes one round trip instead of one per command. Because
+        responses are matched to commands by type, each command must expect a
+        different response class.
+
+        Each command gets `timeout` seconds for its response, counted from when the
+        batch is sent. Commands which fail are not retried.
+
+        This is a low level method. Most use cases are met by individual command
+        methods.
+        """
+
+        classes = [cls for _, cls in commands]
+        if len(set(classes)) != len(classes):
+            raise ValueError("Pipelined commands must expect distinct responses")
+
+        to = timeout if timeout is not None else self._default_timeout
+        # Responses arrive one after another, so later responses need longer
+        deadline = to * len(commands)
+        trace = active_trace()
+        queued = time.perf_counter() if trace else 0.0
+
+        async with self._lock:
+            receivers = [self.subscribe(cls) for cls in classes]
+            try:
+                start = time.perf_counter()
+                self._write(
+                    b"".join(
+                        serialize_packet(command.to_packet()) for command, _ in commands
+                    ),
+                    len(commands),
+                )
+                written = time.perf_counter()
+
+                async def receive(
+                    command: Command, rcv: Receiver[Response]
+                ) -> Result[Response]:
+                    try:
+                        async with asyncio.timeout(deadline):
+                            result = await rcv.get()
+                    except TimeoutError as exc:
+                        result = (exc, None)
+                    else:
+                        rcv.task_done()
+                    self._command_done(
+                        command, trace, queued, start, written, result[0]
+                    )
+                    return result
+
+                return list(
+                    await asyncio.gather(
+                        *[
+                            receive(command, rcv)
+                            for (command, _), rcv in zip(commands, receivers)
+                        ]
+                    )
+                )
+            finally:
+                for cls, rcv in zip(classes, receivers):
+                    self.unsubscribe(cls, rcv)
 
     def send_packet(self: Self, packet: Packet) -> None:
+        self._write(serialize_packet(packet))
+
+    # Every write to the device goes through here, so that it's counted and
+    # recorded
+    def _write(self: Self, buff: bytes, packets: int = 1) -> None:
         if not self._transport:
             raise ConnectionError("Must be connected to send data")
-        buff = serialize_packet(packet)
         self._transport.write(buff)
+        if self.metrics is not None:
+            self.metrics.bytes_out += len(buff)
+            self.metrics.packets_out += packets
+        if self.flight_recorder is not None:
+            self.flight_recorder.tx(buff)
+
+    # Record a command's metrics and spans, once its response arrives or it
+    # fails
+    def _command_done(
+        self: Self,
+        command: Command,
+        trace: Optional[Trace],
+        queued: float,
+        start: float,
+        written: float,
+        exc: Optional[BaseException] = None,
+    ) -> None:
+        end = time.perf_counter()
+        name = type(command).__name__
+
+        if self.metrics is not None:
+            metrics = self.metrics.command(name)
+            if exc is None:
+                metrics.latency.record(end - start)
+            elif isinstance(exc, TimeoutError):
+                metrics.timeouts += 1
+            elif isinstance(exc, Exception):
+                metrics.errors += 1
+
+        if trace:
+            trace.add("queue", queued, start, command=name)
+            trace.add("write", start, written, command=name)
+            if exc is not None:
+                trace.add("ack", written, end, command=name, error=type(exc).__name__)
+            else:
+                trace.add("ack", written, end, command=name)
+
+        if exc is None and self.key_latency is not None:
+            self.key_latency.acknowledged(command)
 
     async def ping(
         self: Self,
@@ -638,6 +1074,51 @@ class Client(asyncio.Protocol):
             GetVersions(), Versions, timeout=timeout, retry_times=retry_times
         )
 
+    async def warm_up(
+        self: Self,
+        facts: Iterable[Fact] = FACTS,
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> DeviceFacts:
+        """
+        Fetch facts about the device with pipelined commands, and cache them in
+        `client.facts`. Facts whose commands fail are fetched again with individual
+        commands, which honor `retry_times`. See `crystalfontz.facts` for details.
+        """
+
+        names: List[Fact] = list(dict.fromkeys(facts))
+        commands: List[Tuple[Command, Type[Response]]] = [
+            (FACT_COMMANDS[name][0](), FACT_COMMANDS[name][1]) for name in names
+        ]
+
+        results = await self.send_commands(commands, timeout=timeout)
+
+        for name, (exc, res) in zip(names, results):
+            if exc:
+                logger.debug(f"Failed to fetch {name} in warm-up: {exc}")
+                fact = await self._fetch_fact(name, timeout, retry_times)
+            elif name == "status":
+                fact = self.device.status(cast(StatusRead, res).data)
+            else:
+                fact = res
+            setattr(self.facts, name, fact)
+
+        return self.facts
+
+    async def _fetch_fact(
+        self: Self,
+        name: Fact,
+        timeout: Optional[float],
+        retry_times: Optional[int],
+    ) -> Any:
+        method = {
+            "versions": self.versions,
+            "status": self.read_status,
+            "user_flash_area": self.read_user_flash_area,
+            "keypad": self.poll_keypad,
+        }[name]
+        return await method(timeout=timeout, retry_times=retry_times)
+
     async def detect_device(
         self: Self,
         timeout: Optional[float] = None,
@@ -1306,32 +1787,42 @@ class Client(asyncio.Protocol):
         self: Self,
         name: str,
         queue: Receiver[R],
-        handler: ReportHandlerMethod,
+        dispatcher: ReportDispatcher[R],
     ) -> None:
-        while True:
-            if not self._running:
-                logging.debug(f"{name} background task exiting")
-                return
+        try:
+            while True:
+                if not self._running:
+                    logger.debug(f"{name} background task exiting")
+                    return
 
-            logging.debug(f"{name} background task getting a new report")
-            exc, report = await queue.get()
+                exc, report = await queue.get()
 
-            if exc:
-                logging.debug(f"{name} background task encountered an exception: {exc}")
-                if not self.closed.done():
-                    self.closed.set_exception(exc)
-                    queue.task_done()
+                if exc:
+                    logger.debug(
+                        f"{name} background task encountered an exception: {exc}"
+                    )
+                    if not self.closed.done():
+                        self.closed.set_exception(exc)
+                        queue.task_done()
+                    else:
+                        queue.task_done()
+                        raise exc
+                elif report:
+                    if hooks.dispatch:
+                        emit(hooks.dispatch, name, report)
+                    await dispatcher.dispatch(report, queue.task_done)
                 else:
-                    queue.task_done()
-                    raise exc
-            elif report:
-                logging.debug(f"{name} background task is calling {handler.__name__}")
-                await handler(report)
-                queue.task_done()
-            else:
-                raise CrystalfontzError(
-                    "assert: result has either exception or response"
-                )
+                    raise CrystalfontzError(
+                        "assert: result has either exception or response"
+                    )
+        finally:
+            dispatcher.cancel()
+
+    def _report_handler_error(self: Self, exc: Exception) -> None:
+        # Surface the exception right away, rather than when the next report
+        # is dispatched - it would be lost if the client closed first
+        if not self.closed.done():
+            self.closed.set_exception(exc)
 
     #
     # Effects
@@ -1411,10 +1902,69 @@ async def create_connection(
     retry_times: int = DEFAULT_RETRY_TIMES,
     loop: Optional[asyncio.AbstractEventLoop] = None,
     baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    hotplug: bool = False,
+    report_queue_size: int = DEFAULT_REPORT_QUEUE_SIZE,
+    report_concurrency: int = DEFAULT_REPORT_CONCURRENCY,
+    report_ordering: Ordering = DEFAULT_REPORT_ORDERING,
+    demand_reporting: bool = False,
+    warm_up: Optional[Iterable[Fact]] = None,
+    metrics: bool = False,
+    flight_recorder: Optional[FlightRecorder] = None,
+    monitor_loop: bool = False,
+    key_latency: bool = False,
 ) -> Client:
     """
     Create a connection to the specified device. Returns a Client object.
 
+    By default, the connection uses a `pyserial-asyncio` transport. Passing
+    `transport="fd"` will instead use a lightweight transport which reads and writes
+    the tty's file descriptor directly. If the port is a `tcp://host:port` or
+    `rfc2217://host:port` URL, the client will connect to a serial server over the
+    network. See `crystalfontz.transport` for details.
+
+    If `hotplug` is true, the client will survive the device being unplugged. When
+    the device is plugged back in, the port is reopened. This doesn't apply to
+    network connections, which always reconnect.
+
+    Reports are queued for the report handler in bounded queues of
+    `report_queue_size` reports. If the handler falls behind, the oldest key
+    activity reports are dropped, and temperature reports are coalesced so that
+    only the latest reading for each sensor is queued. Dropped reports are counted
+    in `client.dropped_reports`. A size of 0 makes the queues unbounded, so that
+    no reports are dropped or coalesced.
+
+    By default, reports of each type are handled one at a time. Setting
+    `report_concurrency` runs up to that many handlers concurrently for each
+    report type. With the default `report_ordering` of "per-key", reports for the
+    same key or temperature sensor are still handled in order; an ordering of
+    "none" drops that guarantee. Handler latency and backlog are available in
+    `client.report_stats`. See `crystalfontz.dispatch` for details.
+
+    If `demand_reporting` is true, the client configures the device to send only
+    the key activity and temperature reports which its report handler and report
+    streams want. See `crystalfontz.demand` for details.
+
+    If `warm_up` is set, the client fetches those facts - such as "versions" and
+    "status" - with pipelined commands before returning, and caches them in
+    `client.facts`. See `crystalfontz.facts` for details.
+
+    If `metrics` is true, the client records command latencies and counts
+    errors, retries and traffic in `client.metrics`. See `crystalfontz.metrics`
+    for details.
+
+    If `flight_recorder` is set, every frame sent and received is recorded in
+    it, and the recording is dumped to a file when the client sees an error. See
+    `crystalfontz.recorder` for details.
+
+    If `monitor_loop` is true, the client samples event loop lag, and warns when
+    it approaches the command timeout. See `crystalfontz.lag` for details.
+
+    If `key_latency` is true, the client measures the time from a key activity
+    report arriving to its handler finishing, and to the display update it sends
+    being acknowledged, in `client.key_latency`. See `crystalfontz.latency` for
+    details.
+
     To close the connection, call `client.close()`. The `client.closed` property is a
     Future that will resolve when the client is closed (either due to a call to
     `client.close()` or an error) and should be awaited.
@@ -1430,7 +1980,7 @@ async def create_connection(
 
     logger.info(f"Connecting to {port} at {baud_rate} baud")
 
-    _, client = await create_serial_connection(
+    _, client = await create_transport(
         _loop,
         lambda: Client(
             device=device,
@@ -1438,16 +1988,36 @@ async def create_connection(
             timeout=timeout,
             retry_times=retry_times,
             loop=_loop,
+            report_queue_size=report_queue_size,
+            report_concurrency=report_concurrency,
+            report_ordering=report_ordering,
+            demand_reporting=demand_reporting,
+            metrics=metrics,
+            flight_recorder=flight_recorder,
+            monitor_loop=monitor_loop,
+            key_latency=key_latency,
         ),
         port,
-        baudrate=baud_rate,
-        bytesize=EIGHTBITS,
-        parity=PARITY_NONE,
-        stopbits=STOPBITS_ONE,
+        baud_rate=baud_rate,
+        transport=transport,
+        hotplug=hotplug,
     )
 
     await client._connection_made
 
+    if warm_up is not None:
+        try:
+            await client.warm_up(warm_up)
+        except Exception:
+            client.close()
+            # Wait for the client to finish closing, so its tasks aren't
+            # abandoned. The warm-up error is the one worth raising.
+            try:
+                await client.closed
+            except Exception as exc:
+                logger.debug(f"Client closed with an exception after warm-up: {exc}")
+            raise
+
     return client
 
 
@@ -1463,6 +2033,17 @@ async def connection(
     retry_times: int = DEFAULT_RETRY_TIMES,
     loop: Optional[asyncio.AbstractEventLoop] = None,
     baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    hotplug: bool = False,
+    report_queue_size: int = DEFAULT_REPORT_QUEUE_SIZE,
+    report_concurrency: int = DEFAULT_REPORT_CONCURRENCY,
+    report_ordering: Ordering = DEFAULT_REPORT_ORDERING,
+    demand_reporting: bool = False,
+    warm_up: Optional[Iterable[Fact]] = None,
+    metrics: bool = False,
+    flight_recorder: Optional[FlightRecorder] = None,
+    monitor_loop: bool = False,
+    key_latency: bool = False,
 ) -> AsyncGenerator[Client, None]:
     """
     Create a connection to the specified device, with an associated context.
@@ -1482,6 +2063,17 @@ async def connection(
         retry_times=retry_times,
         loop=loop,
         baud_rate=baud_rate,
+        transport=transport,
+        hotplug=hotplug,
+        report_queue_size=report_queue_size,
+        report_concurrency=report_concurrency,
+        report_ordering=report_ordering,
+        demand_reporting=demand_reporting,
+        warm_up=warm_up,
+        metrics=metrics,
+        flight_recorder=flight_recorder,
+        monitor_loop=monitor_loop,
+        key_latency=key_latency,
     )
 
     yield client
@@ -8,6 +8,9 @@ from configurence import BaseConfig, config, field, global_file
 
 from crystalfontz.baud import BaudRate, FAST_BAUD_RATE, SLOW_BAUD_RATE
 from crystalfontz.client import DEFAULT_RETRY_TIMES, DEFAULT_TIMEOUT
+from crystalfontz.event_loop import DEFAULT_EVENT_LOOP, EventLoopType, load_event_loop
+from crystalfontz.exporter import DEFAULT_METRICS_INTERVAL
+from crystalfontz.recorder import DEFAULT_FLIGHT_RECORDER_SIZE
 
 APP_NAME = "crystalfontz"
 GLOBAL_FILE = global_file(APP_NAME)
@@ -42,3 +45,23 @@ class Config(BaseConfig):
     )
     timeout: float = field(default=DEFAULT_TIMEOUT, env_var="TIMEOUT")
     retry_times: int = field(default=DEFAULT_RETRY_TIMES, env_var="RETRY_TIMES")
+    event_loop: EventLoopType = field(
+        default=DEFAULT_EVENT_LOOP, env_var="EVENT_LOOP", load=load_event_loop
+    )
+    hotplug: bool = field(default=False, env_var="HOTPLUG")
+    demand_reporting: bool = field(default=False, env_var="DEMAND_REPORTING")
+    metrics_port: Optional[int] = field(default=None, env_var="METRICS_PORT")
+    metrics_textfile: Optional[str] = field(default=None, env_var="METRICS_TEXTFILE")
+    metrics_interval: float = field(
+        default=DEFAULT_METRICS_INTERVAL, env_var="METRICS_INTERVAL"
+    )
+    flight_recorder_size: int = field(
+        default=DEFAULT_FLIGHT_RECORDER_SIZE, env_var="FLIGHT_RECORDER_SIZE"
+    )
+    flight_recorder_dir: Optional[str] = field(
+        default=None, env_var="FLIGHT_RECORDER_DIR"
+    )
+    monitor_loop: bool = field(default=False, env_var="MONITOR_LOOP")
+    profile_dir: Optional[str] = field(default=None, env_var="PROFILE_DIR")
+    trace_requests: bool = field(default=False, env_var="TRACE_REQUESTS")
+    trace_file: Optional[str] = field(default=None, env_var="TRACE_FILE")
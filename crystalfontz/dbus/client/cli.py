@@ -63,6 +63,13 @@ from crystalfontz.dbus.select import (
 from crystalfontz.effects import DanceParty, Marquee, Screensaver
 from crystalfontz.gpio import GpioDriveMode, GpioFunction
 from crystalfontz.lcd import LcdRegister
+from crystalfontz.profiling import (
+    DEFAULT_DIFF_LIMIT,
+    DEFAULT_PROFILE_MODE,
+    DEFAULT_TRACEMALLOC_FRAMES,
+    PROFILE_MODES,
+    ProfileMode,
+)
 from crystalfontz.temperature import (
     TemperatureDigits,
     TemperatureDisplayItem,
@@ -403,6 +410,130 @@ async def listen(
     await report_handler.done
 
 
+@main.command(name="dump-flight-recorder")
+@async_command
+@pass_client
+async def dump_flight_recorder(client: DbusClient) -> None:
+    """
+    Write the service's most recent packets to a file, and print its path.
+    """
+
+    path = await client.dump_flight_recorder()
+    echo(path)
+
+
+@main.command(name="dump-traces")
+@async_command
+@pass_client
+async def dump_traces(client: DbusClient) -> None:
+    """
+    Write the service's recently traced requests to a file in the Chrome trace
+    event format, and print its path.
+    """
+
+    path = await client.dump_traces()
+    echo(path)
+
+
+@main.group(help="Profile the service's CPU and memory use")
+def profile() -> None:
+    pass
+
+
+@profile.command(name="cpu")
+@click.option(
+    "--for",
+    "for_",
+    type=float,
+    default=10.0,
+    show_default=True,
+    help="Amount of time to profile for",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(PROFILE_MODES),
+    default=DEFAULT_PROFILE_MODE,
+    show_default=True,
+    help="Profile deterministically with cProfile, or by sampling stacks",
+)
+@async_command
+@pass_client
+async def profile_cpu(client: DbusClient, for_: float, mode: ProfileMode) -> None:
+    """
+    Profile the service, and print the path of the resulting pstats file.
+    """
+
+    path = await client.profile_cpu(for_, mode)
+    echo(path)
+
+
+@profile.group(help="Trace the service's memory allocations")
+def memory() -> None:
+    pass
+
+
+@memory.command(name="start")
+@click.option(
+    "--frames",
+    type=int,
+    default=DEFAULT_TRACEMALLOC_FRAMES,
+    show_default=True,
+    help="Frames of traceback to store for each allocation",
+)
+@async_command
+@pass_client
+async def start_memory_tracing(client: DbusClient, frames: int) -> None:
+    """
+    Start tracing memory allocations.
+    """
+
+    await client.start_memory_tracing(frames)
+
+
+@memory.command(name="stop")
+@async_command
+@pass_client
+async def stop_memory_tracing(client: DbusClient) -> None:
+    """
+    Stop tracing memory allocations, and discard snapshots.
+    """
+
+    await client.stop_memory_tracing()
+
+
+@memory.command(name="snapshot")
+@async_command
+@pass_client
+async def take_memory_snapshot(client: DbusClient) -> None:
+    """
+    Take a memory snapshot, and print its id.
+    """
+
+    echo(await client.take_memory_snapshot())
+
+
+@memory.command(name="diff")
+@click.argument("before", type=int)
+@click.argument("after", type=int)
+@click.option(
+    "--limit",
+    type=int,
+    default=DEFAULT_DIFF_LIMIT,
+    show_default=True,
+    help="Number of source lines to show",
+)
+@async_command
+@pass_client
+async def diff_memory_snapshots(
+    client: DbusClient, before: int, after: int, limit: int
+) -> None:
+    """
+    Show the source lines whose allocations grew most between two snapshots.
+    """
+
+    click.echo(await client.diff_memory_snapshots(before, after, limit), nl=False)
+
+
 @main.command(help="0 (0x00): Ping command")
 @click.argument("payload", type=BYTES)
 @async_command
@@ -1,6 +1,8 @@
 import asyncio
+import functools
+import inspect
 import logging
-from typing import List, Optional, Self
+from typing import Any, Callable, cast, Coroutine, List, Optional, Self, TypeVar
 
 from sdbus import (  # pyright: ignore [reportMissingModuleSource];; dbus_signal_async,
     dbus_method_async,
@@ -84,7 +86,17 @@ from crystalfontz.dbus.domain.response import (
 )
 from crystalfontz.dbus.domain.temperature import TemperatureDisplayItemT
 from crystalfontz.dbus.report import DbusReportHandler
-from crystalfontz.error import ConnectionError
+from crystalfontz.error import ConnectionError, CrystalfontzError
+from crystalfontz.exporter import LabeledCounter, MetricsFormat, render
+from crystalfontz.profiling import (
+    DEFAULT_DIFF_LIMIT,
+    DEFAULT_PROFILE_MODE,
+    DEFAULT_TRACEMALLOC_FRAMES,
+    ProfileMode,
+    Profiler,
+)
+from crystalfontz.recorder import FlightRecorder
+from crystalfontz.spans import JsonLinesExporter, SpanRecorder, write_chrome_trace
 
 Ok = bool
 
@@ -98,11 +110,63 @@ async def load_client(
 ) -> Client:
     config: Config = Config.from_file(config_file)
 
-    client = await create_connection(config.port, report_handler=report_handler)
+    client = await create_connection(
+        config.port,
+        report_handler=report_handler,
+        hotplug=config.hotplug,
+        demand_reporting=config.demand_reporting,
+        metrics=config.metrics_port is not None or config.metrics_textfile is not None,
+        flight_recorder=(
+            FlightRecorder(
+                size=config.flight_recorder_size,
+                directory=config.flight_recorder_dir,
+            )
+            if config.flight_recorder_size
+            else None
+        ),
+        monitor_loop=config.monitor_loop,
+    )
 
     return client
 
 
+F = TypeVar("F", bound=Callable[..., Coroutine[Any, Any, Any]])
+
+
+def instrumented(fn: F) -> F:
+    """
+    Count calls to, and errors from, a DBus method. When request tracing is
+    enabled, also trace each call.
+    """
+
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(self: "DbusInterface", *args: Any) -> Any:
+        self.calls.inc(name)
+        try:
+            if self.span_recorder is None:
+                return await fn(self, *args)
+            with self.span_recorder.trace(f"dbus.{name}") as trace:
+                try:
+                    return await fn(self, *args)
+                finally:
+                    trace.finish()
+                    # Time outside of the client's spans is spent unpacking
+                    # arguments and packing results
+                    if trace.spans and trace.end is not None:
+                        first, last = trace.spans[0], trace.spans[-1]
+                        trace.add("dbus.unpack", trace.start, first.start)
+                        trace.add("dbus.pack", last.end, trace.end)
+        except Exception:
+            self.call_errors.inc(name)
+            raise
+
+    # sdbus reads argument names from the method's signature
+    setattr(wrapper, "__signature__", inspect.signature(fn))
+    return cast(F, wrapper)
+
+
 class DbusInterface(  # type: ignore
     DbusInterfaceCommonAsync, interface_name=DBUS_NAME  # type: ignore
 ):
@@ -121,10 +185,34 @@ class DbusInterface(  # type: ignore
         self.client: Client = client
         self._client_lock: asyncio.Lock = asyncio.Lock()
         self.report_handler = report_handler
+        self.profiler: Profiler = Profiler(directory=self._config.profile_dir)
+
+        self.span_recorder: Optional[SpanRecorder] = None
+        if self._config.trace_requests or self._config.trace_file:
+            self.span_recorder = SpanRecorder()
+            if self._config.trace_file:
+                self.span_recorder.exporters.append(
+                    JsonLinesExporter(self._config.trace_file)
+                )
+
+        self.calls: LabeledCounter = LabeledCounter(
+            "dbus_calls", "method", "DBus method calls"
+        )
+        self.call_errors: LabeledCounter = LabeledCounter(
+            "dbus_errors", "method", "DBus method calls which failed"
+        )
 
         if self.report_handler:
             self.report_handler.iface = self
 
+    def collect_metrics(self: Self, format_: MetricsFormat = "openmetrics") -> str:
+        """
+        Render the client's metrics and DBus call counts in the OpenMetrics text
+        format, or in the Prometheus text format.
+        """
+
+        return render(self.client.metrics, [self.calls, self.call_errors], format_)
+
     @dbus_property_async(ConfigM.t)
     def config(self: Self) -> ConfigT:
         """
@@ -151,6 +239,7 @@ class DbusInterface(  # type: ignore
         return self.client.closed
 
     @dbus_method_async(PingM.t, PongM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def ping(
         self: Self,
         payload: bytes,
@@ -167,6 +256,7 @@ class DbusInterface(  # type: ignore
         return PongM.pack(pong)
 
     @dbus_method_async(SimpleCommandM.t, OkM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def test_connection(
         self: Self, timeout: TimeoutT, retry_times: RetryTimesT
     ) -> Ok:
@@ -184,6 +274,7 @@ class DbusInterface(  # type: ignore
             return True
 
     @dbus_method_async(SimpleCommandM.t, BaudRateM.t)
+    @instrumented
     async def detect_baud_rate(
         self: Self, timeout: TimeoutT, retry_times: RetryTimesT
     ) -> BaudRateT:
@@ -205,6 +296,7 @@ class DbusInterface(  # type: ignore
         return self.client.baud_rate
 
     @dbus_method_async(SimpleCommandM.t, VersionsM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def versions(
         self: Self,
         timeout: TimeoutT,
@@ -223,6 +315,7 @@ class DbusInterface(  # type: ignore
         return VersionsM.pack(versions)
 
     @dbus_method_async(SimpleCommandM.t, DeviceM.t)
+    @instrumented
     async def detect_device(self: Self, timeout: TimeoutT, retry_times: int) -> DeviceT:
         """
         Get model, hardware and firmware versions from the device, then configure the
@@ -236,6 +329,7 @@ class DbusInterface(  # type: ignore
         return DeviceM.pack(self.client.device)
 
     @dbus_method_async(WriteUserFlashAreaM.t, NoneM.t)
+    @instrumented
     async def write_user_flash_area(
         self: Self, data: bytes, timeout: TimeoutT, retry_times: int
     ) -> None:
@@ -256,6 +350,7 @@ class DbusInterface(  # type: ignore
     @dbus_method_async(
         SimpleCommandM.t, UserFlashAreaReadM.t, flags=DbusUnprivilegedFlag
     )
+    @instrumented
     async def read_user_flash_area(
         self: Self,
         timeout: TimeoutT,
@@ -275,6 +370,7 @@ class DbusInterface(  # type: ignore
         return UserFlashAreaReadM.pack(res)
 
     @dbus_method_async(SimpleCommandM.t, NoneM.t)
+    @instrumented
     async def store_boot_state(
         self: Self,
         timeout: TimeoutT,
@@ -311,6 +407,7 @@ class DbusInterface(  # type: ignore
         await self.client.store_boot_state(*SimpleCommandM.unpack(timeout, retry_times))
 
     @dbus_method_async(SimpleCommandM.t, NoneM.t)
+    @instrumented
     async def reboot_lcd(
         self: Self,
         timeout: TimeoutT,
@@ -329,6 +426,7 @@ class DbusInterface(  # type: ignore
         await self.client.reboot_lcd(*SimpleCommandM.unpack(timeout, retry_times))
 
     @dbus_method_async(SimpleCommandM.t, NoneM.t)
+    @instrumented
     async def reset_host(
         self: Self,
         timeout: TimeoutT,
@@ -346,6 +444,7 @@ class DbusInterface(  # type: ignore
         await self.client.reset_host(*SimpleCommandM.unpack(timeout, retry_times))
 
     @dbus_method_async(SimpleCommandM.t, NoneM.t)
+    @instrumented
     async def shutdown_host(
         self: Self,
         timeout: TimeoutT,
@@ -364,6 +463,7 @@ class DbusInterface(  # type: ignore
         await self.client.shutdown_host(*SimpleCommandM.unpack(timeout, retry_times))
 
     @dbus_method_async(SimpleCommandM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def clear_screen(
         self: Self,
         timeout: TimeoutT,
@@ -379,6 +479,7 @@ class DbusInterface(  # type: ignore
         await self.client.clear_screen(*SimpleCommandM.unpack(timeout, retry_times))
 
     @dbus_method_async(SetLineM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_line_1(
         self: Self,
         line: bytes,
@@ -398,6 +499,7 @@ class DbusInterface(  # type: ignore
         await self.client.set_line_1(*SetLineM.unpack(line, timeout, retry_times))
 
     @dbus_method_async(SetLineM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_line_2(
         self: Self,
         line: bytes,
@@ -417,6 +519,7 @@ class DbusInterface(  # type: ignore
         await self.client.set_line_2(*SetLineM.unpack(line, timeout, retry_times))
 
     @dbus_method_async(SetSpecialCharacterDataM.t, NoneM.t)
+    @instrumented
     async def set_special_character_data(
         self: Self,
         index: IndexT,
@@ -437,6 +540,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetSpecialCharacterEncodingM.t, NoneM.t)
+    @instrumented
     async def set_special_character_encoding(
         self: Self,
         character: str,
@@ -452,6 +556,7 @@ class DbusInterface(  # type: ignore
         self.client.device.character_rom.set_encoding(character, index)
 
     @dbus_method_async(ReadLcdMemoryM.t, LcdMemoryM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def read_lcd_memory(
         self: Self,
         address: AddressT,
@@ -472,6 +577,7 @@ class DbusInterface(  # type: ignore
         return LcdMemoryM.pack(memory)
 
     @dbus_method_async(SetCursorPositionM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_cursor_position(
         self: Self,
         row: int,
@@ -491,6 +597,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetCursorStyleM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_cursor_style(
         self: Self,
         style: int,
@@ -509,6 +616,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetContrastM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_contrast(
         self: Self,
         contrast: float,
@@ -526,6 +634,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetBacklightM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def set_backlight(
         self: Self,
         lcd_brightness: float,
@@ -548,6 +657,7 @@ class DbusInterface(  # type: ignore
     @dbus_method_async(
         ReadDowDeviceInformationM.t, DowDeviceInformationM.t, flags=DbusUnprivilegedFlag
     )
+    @instrumented
     async def read_dow_device_information(
         self: Self,
         index: int,
@@ -572,6 +682,7 @@ class DbusInterface(  # type: ignore
         return DowDeviceInformationM.pack(info)
 
     @dbus_method_async(SetupTemperatureReportingM.t, NoneM.t)
+    @instrumented
     async def setup_temperature_reporting(
         self: Self,
         enabled: List[int],
@@ -595,6 +706,7 @@ class DbusInterface(  # type: ignore
     @dbus_method_async(
         DowTransactionM.t, DowTransactionResultM.t, flags=DbusUnprivilegedFlag
     )
+    @instrumented
     async def dow_transaction(
         self: Self,
         index: int,
@@ -625,6 +737,7 @@ class DbusInterface(  # type: ignore
     @dbus_method_async(
         SetupLiveTemperatureDisplayM.t, NoneM.t, flags=DbusUnprivilegedFlag
     )
+    @instrumented
     async def setup_live_temperature_display(
         self: Self,
         slot: int,
@@ -648,6 +761,7 @@ class DbusInterface(  # type: ignore
     @dbus_method_async(
         SendCommandToLcdControllerM.t, NoneM.t, flags=DbusUnprivilegedFlag
     )
+    @instrumented
     async def send_command_to_lcd_controller(
         self: Self,
         location: LcdRegisterT,
@@ -669,6 +783,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(ConfigureKeyReportingM.t, NoneM.t)
+    @instrumented
     async def configure_key_reporting(
         self: Self,
         when_pressed: List[KeyPressT],
@@ -694,6 +809,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SimpleCommandM.t, KeypadPolledM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def poll_keypad(
         self: Self,
         timeout: TimeoutT,
@@ -715,6 +831,7 @@ class DbusInterface(  # type: ignore
         return KeypadPolledM.pack(polled)
 
     @dbus_method_async(SetAtxPowerSwitchFunctionalityM.t, NoneM.t)
+    @instrumented
     async def set_atx_power_switch_functionality(
         self: Self,
         settings: AtxPowerSwitchFunctionalitySettingsT,
@@ -740,6 +857,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(ConfigureWatchdogM.t, NoneM.t)
+    @instrumented
     async def configure_watchdog(
         self: Self,
         timeout_seconds: ByteT,
@@ -768,6 +886,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SimpleCommandM.t, DeviceStatusM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def read_status(
         self: Self,
         timeout: TimeoutT,
@@ -790,6 +909,7 @@ class DbusInterface(  # type: ignore
         return DeviceStatusM.pack(status, self.client.device)
 
     @dbus_method_async(SendDataM.t, NoneM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def send_data(
         self: Self,
         row: PositionT,
@@ -809,6 +929,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetBaudRateM.t, NoneM.t)
+    @instrumented
     async def set_baud_rate(
         self: Self,
         baud_rate: BaudRateT,
@@ -833,6 +954,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(SetGpioM.t, NoneM.t)
+    @instrumented
     async def set_gpio(
         self: Self,
         index: IndexT,
@@ -861,6 +983,7 @@ class DbusInterface(  # type: ignore
         )
 
     @dbus_method_async(ReadGpioM.t, GpioReadM.t, flags=DbusUnprivilegedFlag)
+    @instrumented
     async def read_gpio(
         self: Self,
         index: IndexT,
@@ -882,6 +1005,109 @@ class DbusInterface(  # type: ignore
 
         return GpioReadM.pack(read)
 
+    @dbus_method_async(NoneM.t, "s")
+    @instrumented
+    async def dump_flight_recorder(self: Self) -> str:
+        """
+        Write the most recent frames sent to and received from the device to a
+        file, and return its path.
+
+        This is a privileged API, as it writes to the service's filesystem.
+        """
+
+        if self.client.flight_recorder is None:
+            raise CrystalfontzError("Flight recorder is disabled")
+        return await self.client.flight_recorder.dump_async(reason="DBus request")
+
+    @dbus_method_async(NoneM.t, "s")
+    @instrumented
+    async def dump_traces(self: Self) -> str:
+        """
+        Write recently traced requests to a file in the Chrome trace event format,
+        and return its path. The file may be loaded into Perfetto or
+        `chrome://tracing`. Request tracing must be enabled with `trace_requests`.
+
+        This is a privileged API, as it writes to the service's filesystem.
+        """
+
+        if self.span_recorder is None:
+            raise CrystalfontzError("Request tracing is disabled")
+
+        loop = asyncio.get_running_loop()
+        traces = list(self.span_recorder.traces)
+        path = await loop.run_in_executor(
+            None, self.profiler.create_file, "traces", ".json"
+        )
+        await loop.run_in_executor(None, write_chrome_trace, path, traces)
+        return path
+
+    @dbus_method_async("ds", "s")
+    @instrumented
+    async def profile_cpu(self: Self, duration: float, mode: str) -> str:
+        """
+        Profile the service for `duration` seconds, and return the path of the
+        resulting pstats file. The mode is either "cprofile" (the default) or
+        "sampling". See `crystalfontz.profiling` for details.
+
+        This call doesn't return until profiling is done, so `duration` must be
+        shorter than the DBus method call timeout.
+
+        This is a privileged API, as it writes to the service's filesystem.
+        """
+
+        return await self.profiler.profile_cpu(
+            duration, cast(ProfileMode, mode or DEFAULT_PROFILE_MODE)
+        )
+
+    @dbus_method_async("q", NoneM.t)
+    @instrumented
+    async def start_memory_tracing(self: Self, frames: int) -> None:
+        """
+        Start tracing memory allocations with `tracemalloc`, storing `frames`
+        frames of traceback for each. A value of 0 uses the default of 1.
+
+        This is a privileged API, as tracing slows down the service.
+        """
+
+        self.profiler.start_tracing(frames or DEFAULT_TRACEMALLOC_FRAMES)
+
+    @dbus_method_async(NoneM.t, NoneM.t)
+    @instrumented
+    async def stop_memory_tracing(self: Self) -> None:
+        """
+        Stop tracing memory allocations, and discard snapshots.
+
+        This is a privileged API.
+        """
+
+        self.profiler.stop_tracing()
+
+    @dbus_method_async(NoneM.t, "u")
+    @instrumented
+    async def take_memory_snapshot(self: Self) -> int:
+        """
+        Take a `tracemalloc` snapshot, and return its id. Memory tracing must be
+        started first.
+
+        This is a privileged API.
+        """
+
+        return await self.profiler.take_snapshot()
+
+    @dbus_method_async("uuq", "s")
+    @instrumented
+    async def diff_memory_snapshots(
+        self: Self, before: int, after: int, limit: int
+    ) -> str:
+        """
+        Compare two memory snapshots, and return a report of the source lines
+        whose allocations grew the most. A limit of 0 uses the default of 10.
+
+        This is a privileged API.
+        """
+
+        return await self.profiler.diff(before, after, limit or DEFAULT_DIFF_LIMIT)
+
     @dbus_signal_async(KeyActivityReportM.t)
     def key_activity_reports(self: Self) -> KeyActivityReportT:
         """
@@ -13,12 +13,13 @@ another program.
 """
 
 import logging
-from typing import Optional
+from typing import List, Optional, Union
 
 from sdbus import (  # pyright: ignore [reportMissingModuleSource]
     request_default_bus_name_async,
 )
 
+from crystalfontz.config import Config
 from crystalfontz.dbus.error import handle_dbus_error
 from crystalfontz.dbus.interface import (
     DBUS_NAME,
@@ -26,6 +27,7 @@ from crystalfontz.dbus.interface import (
     load_client,
 )
 from crystalfontz.dbus.report import DbusInterfaceReportHandler
+from crystalfontz.exporter import HttpExporter, TextfileExporter
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +55,37 @@ async def service(config_file: Optional[str] = None) -> DbusInterface:
     return iface
 
 
+Exporter = Union[HttpExporter, TextfileExporter]
+
+
+async def start_exporters(
+    iface: DbusInterface, config_file: Optional[str] = None
+) -> List[Exporter]:
+    """
+    Start exporting metrics, as configured by the supplied config file. Returns
+    the exporters which were started.
+    """
+
+    config: Config = Config.from_file(config_file)
+    exporters: List[Exporter] = []
+
+    if config.metrics_port is not None:
+        exporters.append(HttpExporter(iface.collect_metrics, config.metrics_port))
+    if config.metrics_textfile is not None:
+        exporters.append(
+            TextfileExporter(
+                lambda: iface.collect_metrics("prometheus"),
+                config.metrics_textfile,
+                interval=config.metrics_interval,
+            )
+        )
+
+    for exporter in exporters:
+        await exporter.start()
+
+    return exporters
+
+
 async def serve(config_file: Optional[str] = None) -> None:
     """
     Create and serve configure DBus service with a supplied config file.
@@ -60,8 +93,19 @@ async def serve(config_file: Optional[str] = None) -> None:
 
     async with handle_dbus_error(logger):
         srv = await service(config_file)
+        exporters = await start_exporters(srv, config_file)
+
+        recorder = srv.client.flight_recorder
+        if recorder is not None:
+            recorder.add_signal_handler(srv.client.loop)
 
-        await srv.closed
+        try:
+            await srv.closed
+        finally:
+            if recorder is not None:
+                recorder.remove_signal_handler(srv.client.loop)
+            for exporter in exporters:
+                await exporter.close()
 
 
-__all__ = ["service", "serve"]
+__all__ = ["service", "serve", "start_exporters"]
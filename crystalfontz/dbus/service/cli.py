@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import os
 from typing import Optional
@@ -6,13 +5,15 @@ from typing import Optional
 import click
 
 from crystalfontz.cli import LogLevel
-from crystalfontz.config import GLOBAL_FILE
+from crystalfontz.config import Config, GLOBAL_FILE
 from crystalfontz.dbus.select import (
     select_default_bus,
     select_session_bus,
     select_system_bus,
 )
 from crystalfontz.dbus.service import serve
+from crystalfontz.event_loop import EVENT_LOOPS, EventLoopType, run
+from crystalfontz.trace import enable_logging
 
 logger = logging.getLogger(__name__)
 
@@ -46,14 +47,26 @@ logger = logging.getLogger(__name__)
     default=None,
     help="Connect to either the user or system bus",
 )
+@click.option(
+    "--event-loop",
+    type=click.Choice(EVENT_LOOPS),
+    envvar="CRYSTALFONTZ_EVENT_LOOP",
+    help="The event loop to run on. uvloop must be installed separately",
+)
 def main(
-    global_: bool, config_file: str, log_level: LogLevel, user: Optional[bool]
+    global_: bool,
+    config_file: str,
+    log_level: LogLevel,
+    user: Optional[bool],
+    event_loop: Optional[EventLoopType],
 ) -> None:
     """
     Expose the Crystalfontz device as a DBus service.
     """
 
     logging.basicConfig(level=getattr(logging, log_level))
+    if log_level == "DEBUG":
+        enable_logging()
 
     file = None
     if config_file:
@@ -72,4 +85,7 @@ def main(
     else:
         select_default_bus()
 
-    asyncio.run(serve(file))
+    if not event_loop:
+        event_loop = Config.from_file(file).event_loop
+
+    run(serve(file), event_loop)
@@ -0,0 +1,271 @@
+"""
+Demand-driven report configuration.
+
+The device sends key activity and temperature reports according to the last call
+to `configure_key_reporting` and `setup_temperature_reporting`, whether or not
+anything on the host wants them - and every report costs parsing and queueing.
+When demand-driven reporting is enabled, the client tracks which reports its
+report handler and report streams want, and configures the device to send only
+those.
+
+Changes in demand are debounced, so that opening or closing many streams at once
+results in a single round of configuration commands. Commands are only sent when
+the device's configuration would actually change.
+
+Temperature sensors are identified by the indexes in `TemperatureReport.index`,
+which count from 0. The device's temperature reporting settings count from 1, and
+the tracker converts between the two.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+    Protocol,
+    Self,
+    Set,
+    Type,
+)
+
+from crystalfontz.device import Device
+from crystalfontz.keys import ACTIVITY_KEYPRESSES, KeyPress
+from crystalfontz.response import (
+    KeyActivityReport,
+    KeyReportingConfigured,
+    Response,
+    TemperatureReport,
+    TemperatureReportingSetUp,
+)
+
+logger = logging.getLogger(__name__)
+
+# Wait this long after a change in demand before configuring the device
+DEMAND_DEBOUNCE = 0.05
+
+ALL_KEYS: FrozenSet[KeyPress] = frozenset(ACTIVITY_KEYPRESSES)
+
+
+@dataclass(frozen=True)
+class ReportDemand:
+    """
+    The reports wanted by a consumer.
+
+    Attributes:
+        when_pressed (FrozenSet[KeyPress]): Keys to report presses for.
+        when_released (FrozenSet[KeyPress]): Keys to report releases for.
+        sensors (FrozenSet[int]): Temperature sensor indexes to report.
+    """
+
+    when_pressed: FrozenSet[KeyPress] = field(default_factory=frozenset)
+    when_released: FrozenSet[KeyPress] = field(default_factory=frozenset)
+    sensors: FrozenSet[int] = field(default_factory=frozenset)
+
+    @classmethod
+    def everything(cls: Type[Self], device: Device) -> Self:
+        """
+        Demand every report the device supports.
+        """
+
+        return cls(
+            when_pressed=ALL_KEYS,
+            when_released=ALL_KEYS,
+            sensors=frozenset(range(device.n_temperature_sensors)),
+        )
+
+    @classmethod
+    def for_reports(
+        cls: Type[Self],
+        classes: Iterable[Type[Response]],
+        device: Device,
+        keys: Optional[Iterable[KeyPress]] = None,
+        sensors: Optional[Iterable[int]] = None,
+    ) -> Self:
+        """
+        Demand reports of the given classes, optionally filtered by key and
+        sensor index.
+        """
+
+        classes = set(classes)
+        key_set: FrozenSet[KeyPress] = frozenset()
+        sensor_set: FrozenSet[int] = frozenset()
+
+        if KeyActivityReport in classes:
+            key_set = frozenset(keys) if keys is not None else ALL_KEYS
+        if TemperatureReport in classes:
+            sensor_set = (
+                frozenset(sensors)
+                if sensors is not None
+                else frozenset(range(device.n_temperature_sensors))
+            )
+
+        return cls(when_pressed=key_set, when_released=key_set, sensors=sensor_set)
+
+    def __or__(self: Self, other: "ReportDemand") -> "ReportDemand":
+        return ReportDemand(
+            when_pressed=self.when_pressed | other.when_pressed,
+            when_released=self.when_released | other.when_released,
+            sensors=self.sensors | other.sensors,
+        )
+
+
+class DemandClient(Protocol):
+    """
+    A protocol for any client used by a demand tracker.
+    """
+
+    device: Device
+
+    async def configure_key_reporting(
+        self: Self,
+        when_pressed: Set[KeyPress],
+        when_released: Set[KeyPress],
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> KeyReportingConfigured: ...
+
+    async def setup_temperature_reporting(
+        self: Self,
+        enabled: Iterable[int],
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> TemperatureReportingSetUp: ...
+
+
+class DemandTracker:
+    """
+    Track demand for reports, and configure the device to send only the reports
+    which are wanted.
+    """
+
+    def __init__(
+        self: Self,
+        client: DemandClient,
+        debounce: float = DEMAND_DEBOUNCE,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.client: DemandClient = client
+        self.debounce: float = debounce
+        self.loop: asyncio.AbstractEventLoop = (
+            loop if loop else asyncio.get_running_loop()
+        )
+
+        self._demands: Dict[int, ReportDemand] = dict()
+        self._next_token: int = 0
+        self._applied: Optional[ReportDemand] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closed: bool = False
+
+    @property
+    def demand(self: Self) -> ReportDemand:
+        """
+        The union of all current demand.
+        """
+
+        demand = ReportDemand()
+        for d in self._demands.values():
+            demand = demand | d
+        return demand
+
+    @property
+    def applied(self: Self) -> Optional[ReportDemand]:
+        """
+        The demand the device was last configured for, if any.
+        """
+
+        return self._applied
+
+    def add(self: Self, demand: ReportDemand) -> int:
+        """
+        Add demand for reports. Returns a token, which may be passed to `remove`.
+        """
+
+        token = self._next_token
+        self._next_token += 1
+        self._demands[token] = demand
+        self._schedule()
+        return token
+
+    def remove(self: Self, token: int) -> None:
+        """
+        Remove demand previously added with `add`.
+        """
+
+        if self._demands.pop(token, None) is not None:
+            self._schedule()
+
+    def _schedule(self: Self) -> None:
+        if self._closed:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._timer = self.loop.call_later(self.debounce, self._start)
+
+    def _start(self: Self) -> None:
+        self._timer = None
+        if self._task and not self._task.done():
+            # A configuration is in progress. Check again once it's finished.
+            self._task.add_done_callback(lambda _: self._schedule())
+            return
+        self._task = self.loop.create_task(self._apply())
+
+    async def flush(self: Self) -> None:
+        """
+        Configure the device for the current demand immediately, rather than
+        waiting for the debounce interval to elapse.
+        """
+
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._task and not self._task.done():
+            await self._task
+        await self._apply()
+
+    async def _apply(self: Self) -> None:
+        demand = self.demand
+        applied = self._applied
+
+        try:
+            if (
+                not applied
+                or applied.when_pressed != demand.when_pressed
+                or applied.when_released != demand.when_released
+            ):
+                logger.debug(
+                    f"Configuring key reporting for {len(demand.when_pressed)} keys"
+                )
+                await self.client.configure_key_reporting(
+                    set(demand.when_pressed), set(demand.when_released)
+                )
+            if self.client.device.n_temperature_sensors and (
+                not applied or applied.sensors != demand.sensors
+            ):
+                logger.debug(
+                    "Configuring temperature reporting for "
+                    f"{len(demand.sensors)} sensors"
+                )
+                await self.client.setup_temperature_reporting(
+                    [index + 1 for index in demand.sensors]
+                )
+        except Exception as exc:
+            logger.warning(f"Failed to configure reporting: {exc}")
+            self._applied = None
+        else:
+            self._applied = demand
+
+    def close(self: Self) -> None:
+        """
+        Stop tracking demand.
+        """
+
+        self._closed = True
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._task:
+            self._task.cancel()
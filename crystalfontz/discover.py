@@ -0,0 +1,188 @@
+"""
+Discover crystalfontz devices connected to the host.
+
+Discovery enumerates candidate serial ports - links in `/dev/serial/by-id`, plus
+any `/dev/ttyUSB*` and `/dev/ttyACM*` devices not already covered by one - and
+probes every candidate concurrently. Each probe pings the port at both supported
+baud rates with a short timeout and, if the device responds, identifies it by
+requesting its versions. Because probes run concurrently, discovery takes about
+as long as probing a single port.
+
+# Example
+
+```py
+import asyncio
+
+from crystalfontz import discover
+
+
+async def main():
+    for device in await discover():
+        print(device.port, device.model, device.baud_rate)
+
+asyncio.run(main())
+```
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+import glob
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Self, Set
+
+from crystalfontz.baud import BaudRate, SLOW_BAUD_RATE
+from crystalfontz.client import create_connection
+from crystalfontz.transport import DEFAULT_TRANSPORT, TransportType
+
+logger = logging.getLogger(__name__)
+
+BY_ID_DIR = "/dev/serial/by-id"
+PORT_PATTERNS: List[str] = ["/dev/ttyUSB*", "/dev/ttyACM*"]
+
+# A device typically answers a ping within a few tens of milliseconds. Probes use
+# a short timeout, so that ports without a device attached fail fast.
+DISCOVERY_TIMEOUT = 0.1
+
+
+@dataclass
+class DiscoveredDevice:
+    """
+    A device found during discovery.
+
+    Attributes:
+        port (str): The port the device was found on. Ports in
+            `/dev/serial/by-id` are preferred, as they're stable across reboots.
+        path (str): The underlying device path, such as `/dev/ttyUSB0`.
+        baud_rate (BaudRate): The baud rate the device responded at.
+        model (str): The device model.
+        hardware_rev (str): The device's hardware revision.
+        firmware_rev (str): The device's firmware revision.
+    """
+
+    port: str
+    path: str
+    baud_rate: BaudRate
+    model: str
+    hardware_rev: str
+    firmware_rev: str
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"{self.port}\t{self.model}\t{self.hardware_rev}\t"
+            f"{self.firmware_rev}\t{self.baud_rate}"
+        )
+
+
+def candidate_ports(
+    by_id_dir: str = BY_ID_DIR, patterns: Iterable[str] = PORT_PATTERNS
+) -> List[str]:
+    """
+    List serial ports which may have a device attached. Links in `by_id_dir` are
+    listed first, followed by any ports matching `patterns` which aren't the
+    target of one of those links.
+    """
+
+    ports: List[str] = []
+    seen: Set[str] = set()
+
+    if os.path.isdir(by_id_dir):
+        for name in sorted(os.listdir(by_id_dir)):
+            link = os.path.join(by_id_dir, name)
+            path = os.path.realpath(link)
+            if path not in seen:
+                seen.add(path)
+                ports.append(link)
+
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if os.path.realpath(path) not in seen:
+                seen.add(os.path.realpath(path))
+                ports.append(path)
+
+    return ports
+
+
+async def probe(
+    port: str,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    timeout: float = DISCOVERY_TIMEOUT,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> Optional[DiscoveredDevice]:
+    """
+    Probe a single port for a device. The port is tested at `baud_rate` first,
+    and then at the other supported baud rate. Returns None if no device
+    responds.
+    """
+
+    try:
+        client = await create_connection(
+            port,
+            timeout=timeout,
+            retry_times=0,
+            loop=loop,
+            baud_rate=baud_rate,
+            transport=transport,
+        )
+    except Exception as exc:
+        logger.debug(f"Failed to open {port}: {exc}")
+        return None
+
+    try:
+        await client.detect_baud_rate()
+        versions = await client.versions()
+    except Exception as exc:
+        logger.debug(f"No device found on {port}: {exc}")
+        return None
+    else:
+        logger.info(f"Found {versions.model} on {port} at {client.baud_rate} baud")
+        return DiscoveredDevice(
+            port=port,
+            path=os.path.realpath(port),
+            baud_rate=client.baud_rate,
+            model=versions.model,
+            hardware_rev=versions.hardware_rev,
+            firmware_rev=versions.firmware_rev,
+        )
+    finally:
+        client.close()
+        try:
+            await client.closed
+        except Exception as exc:
+            logger.debug(exc)
+
+
+async def discover(
+    ports: Optional[Iterable[str]] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    timeout: float = DISCOVERY_TIMEOUT,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> List[DiscoveredDevice]:
+    """
+    Discover devices attached to the host. By default, every port returned by
+    `candidate_ports` is probed. Returns the devices found, in port order.
+    """
+
+    candidates = list(ports) if ports is not None else candidate_ports()
+
+    logger.info(f"Probing {len(candidates)} ports...")
+
+    results = await asyncio.gather(
+        *[
+            probe(
+                port,
+                baud_rate=baud_rate,
+                timeout=timeout,
+                transport=transport,
+                loop=loop,
+            )
+            for port in candidates
+        ]
+    )
+
+    return [device for device in results if device]
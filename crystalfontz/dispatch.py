@@ -0,0 +1,284 @@
+"""
+Dispatch reports to report handlers.
+
+By default, reports of each type are handled one at a time, in the order they're
+received. This means that a slow report handler - for instance, one which emits a
+DBus signal or writes to disk - delays every report of that type which follows
+it. A `ReportDispatcher` instead runs handlers on a bounded pool of concurrent
+tasks, so that handler cost doesn't turn into input lag.
+
+Dispatchers support two orderings:
+
+- "per-key" handles reports with the same key in order, while reports with
+  different keys are handled concurrently. Key activity reports are keyed by the
+  key, so that a key's release is never handled before its press. Temperature
+  reports are keyed by sensor index.
+- "none" handles every report concurrently, with no ordering guarantees.
+
+With a concurrency of 1, either ordering handles reports one at a time, in the
+order they're received.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+import logging
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Literal,
+    Optional,
+    Self,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from crystalfontz.response import KeyActivityReport, Response, TemperatureReport
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R", bound=Response)
+
+Ordering = Literal["per-key"] | Literal["none"]
+
+DEFAULT_REPORT_CONCURRENCY = 1
+DEFAULT_REPORT_ORDERING: Ordering = "per-key"
+
+DispatchKey = Callable[[Any], Hashable]
+
+
+def key_activity_key(report: KeyActivityReport) -> Hashable:
+    return report.activity.keypress
+
+
+def temperature_key(report: TemperatureReport) -> Hashable:
+    return report.index
+
+
+@dataclass
+class DispatchStats:
+    """
+    Statistics for a report dispatcher.
+
+    Attributes:
+        dispatched (int): The number of reports dispatched.
+        completed (int): The number of reports handled successfully.
+        failed (int): The number of reports whose handler raised an exception.
+        in_flight (int): The number of handlers currently running.
+        pending (int): The number of reports waiting on an earlier report with the
+            same key.
+        backlog (int): The number of reports queued and not yet dispatched.
+        dropped (int): The number of reports dropped from the queue.
+        mean_wait (float): The mean time, in seconds, between a report being
+            dispatched and its handler starting.
+        max_wait (float): The maximum time between a report being dispatched and
+            its handler starting.
+        mean_latency (float): The mean time, in seconds, between a report being
+            dispatched and its handler finishing.
+        max_latency (float): The maximum time between a report being dispatched
+            and its handler finishing.
+    """
+
+    dispatched: int = 0
+    completed: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    pending: int = 0
+    backlog: int = 0
+    dropped: int = 0
+    mean_wait: float = 0.0
+    max_wait: float = 0.0
+    mean_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ReportDispatcher(Generic[R]):
+    """
+    Dispatch reports to a handler on a bounded pool of concurrent tasks.
+
+    `dispatch` waits until there's capacity for another report, so that reports
+    which can't be handled yet stay in the client's bounded report queue - where
+    its drop policy applies - rather than piling up in the dispatcher.
+
+    If a handler raises an exception, it's logged and passed to `on_error`. If
+    there's no `on_error` callback, the next call to `dispatch` raises it.
+    """
+
+    def __init__(
+        self: Self,
+        name: str,
+        handler: Callable[[R], Coroutine[None, None, None]],
+        concurrency: int = DEFAULT_REPORT_CONCURRENCY,
+        ordering: Ordering = DEFAULT_REPORT_ORDERING,
+        key: Optional[DispatchKey] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.name: str = name
+        self.handler: Callable[[R], Coroutine[None, None, None]] = handler
+        self.concurrency: int = concurrency
+        self.ordering: Ordering = ordering
+        self._key: DispatchKey = key if key else type
+        self.on_error: Optional[Callable[[Exception], None]] = on_error
+        self.loop: asyncio.AbstractEventLoop = (
+            loop if loop else asyncio.get_running_loop()
+        )
+
+        self._capacity: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self._lanes: Dict[Hashable, Deque[Tuple[R, float, Callable[[], None]]]] = dict()
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._exc: Optional[BaseException] = None
+
+        self._dispatched: int = 0
+        self._completed: int = 0
+        self._failed: int = 0
+        self._in_flight: int = 0
+        self._total_wait: float = 0.0
+        self._max_wait: float = 0.0
+        self._total_latency: float = 0.0
+        self._max_latency: float = 0.0
+
+    async def dispatch(
+        self: Self, report: R, done: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Dispatch a report, waiting for capacity if every worker is busy. `done` is
+        called once the report's handler finishes.
+        """
+
+        self._raise()
+        await self._capacity.acquire()
+        self._raise()
+
+        self._dispatched += 1
+        item = (report, self.loop.time(), done if done else _noop)
+
+        if self.ordering == "none":
+            self._spawn(deque([item]))
+            return
+
+        key = self._key(report)
+        lane = self._lanes.get(key)
+        if lane is not None:
+            # A report with this key is being handled - handle this one after it
+            lane.append(item)
+            return
+
+        lane = deque([item])
+        self._lanes[key] = lane
+        self._spawn(lane, key)
+
+    def _spawn(
+        self: Self,
+        lane: Deque[Tuple[R, float, Callable[[], None]]],
+        key: Optional[Hashable] = None,
+    ) -> None:
+        task = self.loop.create_task(self._run(lane, key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self: Self,
+        lane: Deque[Tuple[R, float, Callable[[], None]]],
+        key: Optional[Hashable],
+    ) -> None:
+        try:
+            while lane:
+                report, dispatched_at, done = lane[0]
+                await self._handle(report, dispatched_at)
+                lane.popleft()
+                done()
+                self._capacity.release()
+        finally:
+            if key is not None and self._lanes.get(key) is lane:
+                del self._lanes[key]
+
+    async def _handle(self: Self, report: R, dispatched_at: float) -> None:
+        started_at = self.loop.time()
+        wait = started_at - dispatched_at
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+        self._in_flight += 1
+        try:
+            await self.handler(report)
+        except Exception as exc:
+            self._failed += 1
+            logger.exception(f"{self.name} handler raised an exception: {exc}")
+            if self.on_error:
+                self.on_error(exc)
+            elif not self._exc:
+                self._exc = exc
+        else:
+            self._completed += 1
+        finally:
+            self._in_flight -= 1
+
+        latency = self.loop.time() - dispatched_at
+        self._total_latency += latency
+        self._max_latency = max(self._max_latency, latency)
+
+    def _raise(self: Self) -> None:
+        if self._exc:
+            exc = self._exc
+            self._exc = None
+            raise exc
+
+    @property
+    def pending(self: Self) -> int:
+        """
+        The number of reports waiting on an earlier report with the same key.
+        """
+
+        return sum(len(lane) - 1 for lane in self._lanes.values())
+
+    def stats(self: Self) -> DispatchStats:
+        """
+        Get statistics for this dispatcher.
+        """
+
+        handled = self._completed + self._failed
+
+        return DispatchStats(
+            dispatched=self._dispatched,
+            completed=self._completed,
+            failed=self._failed,
+            in_flight=self._in_flight,
+            pending=self.pending,
+            mean_wait=self._total_wait / handled if handled else 0.0,
+            max_wait=self._max_wait,
+            mean_latency=self._total_latency / handled if handled else 0.0,
+            max_latency=self._max_latency,
+        )
+
+    async def join(self: Self) -> None:
+        """
+        Wait for every dispatched report to be handled.
+        """
+
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def cancel(self: Self) -> None:
+        """
+        Cancel any running handlers.
+        """
+
+        for task in list(self._tasks):
+            task.cancel()
+
+
+def _noop() -> None:
+    pass
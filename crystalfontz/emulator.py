@@ -0,0 +1,982 @@
+"""
+A virtual CFA533, for testing the client without hardware.
+
+The `Emulator` implements the CFA533's command set - the commands in
+`crystalfontz.command` - keeping the state a real device would: display and
+CGRAM contents, cursor, contrast and backlight, user flash, boot state, key and
+temperature reporting, DOW devices, GPIO and baud rate. Invalid commands get
+the device's error responses, and key presses and temperature readings are sent
+as reports.
+
+It can also behave like a device on a real serial line:
+
+- `latency` and `jitter` delay each response, as the device's processing time
+- `baud_timing` delays every frame by its time on the wire, at 10 bits per byte,
+  and frames sent in either direction queue behind each other
+- `error_rate` answers commands with error responses, and `drop_rate` leaves
+  them unanswered
+- `noise_rate` inserts bytes of line noise before a frame, which the client has
+  to resynchronize past, and `corruption_rate` flips a bit in a frame, which
+  costs the client that frame
+
+Frames sent at a baud rate other than the emulator's are discarded, as they'd be
+garbled on a real line.
+
+An emulator attaches to a client in one of two ways:
+
+- in-process, with `create_emulated_connection`, which connects a `Client` to an
+  `EmulatorTransport`. No I/O is involved.
+- behind a pseudo-terminal, with `Emulator.open_pty`. The pty's port may be
+  opened like any serial port, with either the "serial" or "fd" transport.
+
+Running `python -m crystalfontz.emulator` opens a pty and prints its port.
+
+# Example
+
+```py
+emulator = Emulator(temperature_sensors=4, baud_timing=True)
+client = await create_emulated_connection(emulator)
+
+await client.send_data(0, 0, "Hello world!")
+assert emulator.lines[0] == b"Hello world!    "
+
+emulator.tap(KP_UP)
+```
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import os
+import random
+import struct
+import sys
+from typing import Any, Callable, Dict, List, Optional, Self, Tuple
+
+import click
+
+from crystalfontz.baud import BaudRate, FAST_BAUD_RATE, SLOW_BAUD_RATE
+from crystalfontz.client import Client, DEFAULT_RETRY_TIMES, DEFAULT_TIMEOUT
+from crystalfontz.device import CFA533, Device
+from crystalfontz.error import CrystalfontzError
+from crystalfontz.keys import (
+    KeyActivity,
+    KeyPress,
+    KP_DOWN,
+    KP_ENTER,
+    KP_EXIT,
+    KP_LEFT,
+    KP_RIGHT,
+    KP_UP,
+)
+from crystalfontz.packet import Packet, parse_packet, serialize_packet
+from crystalfontz.report import NoopReportHandler, ReportHandler
+from crystalfontz.transport import Transport
+
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = None
+    tty = None
+
+logger = logging.getLogger(__name__)
+
+# A byte on the wire is a start bit, 8 data bits and a stop bit
+BITS_PER_BYTE = 10
+
+# The CFA533 sends temperature reports once a second
+DEFAULT_TEMPERATURE_INTERVAL = 1.0
+
+USER_FLASH_SIZE = 16
+N_SPECIAL_CHARACTERS = 8
+N_DOW_DEVICES = 32
+N_GPIO_PINS = 13
+N_LIVE_DISPLAY_SLOTS = 8
+
+# HD44780 DDRAM has 40 characters per line, with line 2 starting at 0x40
+DDRAM_SIZE = 0x80
+LINE_ADDRESSES = [0x00, 0x40]
+
+# DS18B20 temperature sensors have this family code
+DS18B20_FAMILY = 0x28
+DOW_READ_SCRATCHPAD = 0xBE
+
+ALL_KEYS = KP_UP | KP_ENTER | KP_EXIT | KP_LEFT | KP_RIGHT | KP_DOWN
+
+PRESS_ACTIVITIES: Dict[KeyPress, KeyActivity] = {
+    KP_UP: KeyActivity.KEY_UP_PRESS,
+    KP_DOWN: KeyActivity.KEY_DOWN_PRESS,
+    KP_LEFT: KeyActivity.KEY_LEFT_PRESS,
+    KP_RIGHT: KeyActivity.KEY_RIGHT_PRESS,
+    KP_ENTER: KeyActivity.KEY_ENTER_PRESS,
+    KP_EXIT: KeyActivity.KEY_EXIT_PRESS,
+}
+
+RELEASE_ACTIVITIES: Dict[KeyPress, KeyActivity] = {
+    KP_UP: KeyActivity.KEY_UP_RELEASE,
+    KP_DOWN: KeyActivity.KEY_DOWN_RELEASE,
+    KP_LEFT: KeyActivity.KEY_LEFT_RELEASE,
+    KP_RIGHT: KeyActivity.KEY_RIGHT_RELEASE,
+    KP_ENTER: KeyActivity.KEY_ENTER_RELEASE,
+    KP_EXIT: KeyActivity.KEY_EXIT_RELEASE,
+}
+
+# Called with a frame, and the baud rate it was sent at
+Deliver = Callable[[bytes, BaudRate], None]
+
+
+class InvalidCommand(Exception):
+    """
+    Raised by a command handler when the device would answer with an error.
+    """
+
+    pass
+
+
+def dow_crc8(data: bytes) -> int:
+    """
+    The Dallas/Maxim 1-wire CRC.
+    """
+
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            mix = (crc ^ byte) & 0x01
+            crc >>= 1
+            if mix:
+                crc ^= 0x8C
+            byte >>= 1
+    return crc
+
+
+def ds18b20_rom_id(serial: int) -> bytes:
+    """
+    A ROM ID for a DS18B20 with the given serial number.
+    """
+
+    rom = bytes([DS18B20_FAMILY]) + serial.to_bytes(6, "little")
+    return rom + bytes([dow_crc8(rom)])
+
+
+@dataclass
+class DisplayState:
+    """
+    The parts of the device's state which are saved as its boot state.
+    """
+
+    ddram: bytearray = field(default_factory=lambda: bytearray(b" " * DDRAM_SIZE))
+    cgram: bytearray = field(
+        default_factory=lambda: bytearray(N_SPECIAL_CHARACTERS * 8)
+    )
+    cursor: Tuple[int, int] = (0, 0)
+    cursor_style: int = 0
+    contrast: int = 120
+    legacy_contrast: int = 16
+    lcd_brightness: int = 100
+    keypad_brightness: int = 100
+    when_pressed: int = ALL_KEYS
+    when_released: int = ALL_KEYS
+    temperature_reporting: int = 0
+    live_display: Dict[int, bytes] = field(default_factory=dict)
+    atx: bytes = b"\x00"
+    watchdog: int = 0
+    baud_rate: BaudRate = SLOW_BAUD_RATE
+
+    def copy(self: Self) -> "DisplayState":
+        return DisplayState(
+            ddram=bytearray(self.ddram),
+            cgram=bytearray(self.cgram),
+            cursor=self.cursor,
+            cursor_style=self.cursor_style,
+            contrast=self.contrast,
+            legacy_contrast=self.legacy_contrast,
+            lcd_brightness=self.lcd_brightness,
+            keypad_brightness=self.keypad_brightness,
+            when_pressed=self.when_pressed,
+            when_released=self.when_released,
+            temperature_reporting=self.temperature_reporting,
+            live_display=dict(self.live_display),
+            atx=self.atx,
+            watchdog=self.watchdog,
+            baud_rate=self.baud_rate,
+        )
+
+
+@dataclass
+class GpioPin:
+    level: int = 0
+    settings: int = 0
+    falling: bool = False
+    rising: bool = False
+
+
+class Emulator:
+    """
+    A virtual CFA533.
+    """
+
+    def __init__(
+        self: Self,
+        device: Optional[Device] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+        baud_timing: bool = False,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        noise_rate: float = 0.0,
+        corruption_rate: float = 0.0,
+        temperature_sensors: int = 0,
+        temperature_interval: float = DEFAULT_TEMPERATURE_INTERVAL,
+        seed: Optional[int] = None,
+    ) -> None:
+        if temperature_sensors > N_DOW_DEVICES:
+            raise ValueError(f"At most {N_DOW_DEVICES} temperature sensors")
+
+        self.device: Device = device if device else CFA533()
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.baud_timing: bool = baud_timing
+        self.error_rate: float = error_rate
+        self.drop_rate: float = drop_rate
+        self.noise_rate: float = noise_rate
+        self.corruption_rate: float = corruption_rate
+        self.temperature_interval: float = temperature_interval
+        self.random: random.Random = random.Random(seed)
+
+        self.state: DisplayState = DisplayState(baud_rate=baud_rate)
+        self.boot_state: DisplayState = self.state.copy()
+        self.user_flash: bytes = bytes(USER_FLASH_SIZE)
+        self.pressed: int = 0
+        self.pressed_since: int = 0
+        self.released_since: int = 0
+        self.gpio: Dict[int, GpioPin] = {i: GpioPin() for i in range(N_GPIO_PINS)}
+        self.dow_devices: Dict[int, bytes] = {
+            i: ds18b20_rom_id(i + 1) for i in range(temperature_sensors)
+        }
+        self.temperatures: Dict[int, float] = {
+            i: 20.0 + i / 2 for i in range(temperature_sensors)
+        }
+
+        self.commands: Dict[int, int] = dict()
+        self.host_resets: int = 0
+        self.host_shutdowns: int = 0
+        self.garbled: int = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._deliver: Optional[Deliver] = None
+        self._buffer: bytes = b""
+        self._rx_free: float = 0.0
+        self._tx_free: float = 0.0
+        self._temperature_timer: Optional[asyncio.TimerHandle] = None
+
+        self._handlers: Dict[int, Callable[[bytes], Optional[bytes]]] = {
+            0x00: self._ping,
+            0x01: self._versions,
+            0x02: self._write_user_flash_area,
+            0x03: self._read_user_flash_area,
+            0x04: self._store_boot_state,
+            0x05: self._power,
+            0x06: self._clear_screen,
+            0x07: lambda data: self._set_line(0, data),
+            0x08: lambda data: self._set_line(1, data),
+            0x09: self._set_special_character_data,
+            0x0A: self._read_lcd_memory,
+            0x0B: self._set_cursor_position,
+            0x0C: self._set_cursor_style,
+            0x0D: self._set_contrast,
+            0x0E: self._set_backlight,
+            0x12: self._read_dow_device_information,
+            0x13: self._setup_temperature_reporting,
+            0x14: self._dow_transaction,
+            0x15: self._setup_live_temperature_display,
+            0x16: self._send_command_to_lcd_controller,
+            0x17: self._configure_key_reporting,
+            0x18: self._poll_keypad,
+            0x1C: self._set_atx_power_switch_functionality,
+            0x1D: self._configure_watchdog,
+            0x1E: self._read_status,
+            0x1F: self._send_data,
+            0x21: self._set_baud_rate,
+            0x22: self._set_gpio,
+            0x23: self._read_gpio,
+        }
+
+    #
+    # Attaching to a host
+    #
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        """
+        The baud rate the emulator is talking at.
+        """
+
+        return self.state.baud_rate
+
+    def attach(self: Self, loop: asyncio.AbstractEventLoop, deliver: Deliver) -> None:
+        """
+        Attach the emulator to a host. Frames the emulator sends are passed to
+        `deliver`, along with the baud rate they were sent at.
+        """
+
+        self._loop = loop
+        self._deliver = deliver
+        self._rx_free = self._tx_free = loop.time()
+        self._schedule_temperature_reports()
+
+    def detach(self: Self) -> None:
+        if self._temperature_timer:
+            self._temperature_timer.cancel()
+            self._temperature_timer = None
+        self._deliver = None
+
+    def _wire_time(self: Self, size: int) -> float:
+        if not self.baud_timing:
+            return 0.0
+        return size * BITS_PER_BYTE / self.baud_rate
+
+    def receive(self: Self, data: bytes, baud_rate: BaudRate) -> None:
+        """
+        Receive bytes sent by the host at a baud rate.
+        """
+
+        if baud_rate != self.baud_rate:
+            self.garbled += len(data)
+            return
+
+        assert self._loop is not None, "Emulator is not attached"
+        # Bytes arrive once they've made it across the wire
+        self._rx_free = max(self._loop.time(), self._rx_free) + self._wire_time(
+            len(data)
+        )
+        arrived = self._rx_free
+
+        self._buffer += data
+        packet, self._buffer = parse_packet(self._buffer)
+        while packet:
+            self._receive_packet(packet, arrived)
+            packet, self._buffer = parse_packet(self._buffer)
+
+    def _receive_packet(self: Self, packet: Packet, arrived: float) -> None:
+        code = packet[0]
+        self.commands[code] = self.commands.get(code, 0) + 1
+
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            return
+
+        # The response goes out at the rate the command came in at, even if
+        # the command changes it
+        baud_rate = self.baud_rate
+        if self.error_rate and self.random.random() < self.error_rate:
+            response: Optional[Packet] = (0xC0 | code, b"")
+        else:
+            response = self.handle(packet)
+        if response is None:
+            return
+
+        delay = self.latency
+        if self.jitter:
+            delay += self.random.uniform(0, self.jitter)
+        self._send(serialize_packet(response), arrived + delay, baud_rate)
+
+    def _send(
+        self: Self,
+        frame: bytes,
+        at: Optional[float] = None,
+        baud_rate: Optional[BaudRate] = None,
+    ) -> None:
+        if self._loop is None or self._deliver is None:
+            return
+
+        if self.corruption_rate and self.random.random() < self.corruption_rate:
+            index = self.random.randrange(len(frame))
+            flipped = frame[index] ^ (1 << self.random.randrange(8))
+            frame = frame[:index] + bytes([flipped]) + frame[index + 1 :]
+        if self.noise_rate and self.random.random() < self.noise_rate:
+            noise = bytes(
+                self.random.randrange(256) for _ in range(self.random.randint(1, 4))
+            )
+            frame = noise + frame
+
+        now = self._loop.time()
+        start = max(at if at is not None else now, self._tx_free, now)
+        self._tx_free = start + self._wire_time(len(frame))
+        self._loop.call_at(
+            self._tx_free,
+            self._deliver,
+            frame,
+            baud_rate if baud_rate is not None else self.baud_rate,
+        )
+
+    #
+    # Simulating the user and the environment
+    #
+
+    def press(self: Self, key: KeyPress) -> None:
+        """
+        Press a key, sending a report if press reporting is enabled for it.
+        """
+
+        self.pressed |= key
+        self.pressed_since |= key
+        if self.state.when_pressed & key:
+            self._report(PRESS_ACTIVITIES[key])
+
+    def release(self: Self, key: KeyPress) -> None:
+        """
+        Release a key, sending a report if release reporting is enabled for it.
+        """
+
+        self.pressed &= ~key
+        self.released_since |= key
+        if self.state.when_released & key:
+            self._report(RELEASE_ACTIVITIES[key])
+
+    def tap(self: Self, key: KeyPress) -> None:
+        """
+        Press and release a key.
+        """
+
+        self.press(key)
+        self.release(key)
+
+    def _report(self: Self, activity: KeyActivity) -> None:
+        self._send(serialize_packet((0x80, bytes([activity.to_byte()]))))
+
+    def set_temperature(self: Self, index: int, celsius: float) -> None:
+        """
+        Set the temperature read by a sensor.
+        """
+
+        if index not in self.dow_devices:
+            raise ValueError(f"No temperature sensor at index {index}")
+        self.temperatures[index] = celsius
+
+    def _schedule_temperature_reports(self: Self) -> None:
+        if self._loop is None or not self.temperature_interval:
+            return
+        self._temperature_timer = self._loop.call_later(
+            self.temperature_interval, self._send_temperature_reports
+        )
+
+    def _send_temperature_reports(self: Self) -> None:
+        for index in sorted(self.temperatures):
+            if self.state.temperature_reporting & (1 << index):
+                self._send(
+                    serialize_packet((0x82, bytes([index]) + self._reading(index)))
+                )
+        self._schedule_temperature_reports()
+
+    def _reading(self: Self, index: int) -> bytes:
+        # Temperature in 1/16ths of a degree, and a good DOW CRC status
+        return struct.pack(">H", int(self.temperatures[index] * 16) & 0xFFFF) + b"\x01"
+
+    #
+    # The device's display
+    #
+
+    @property
+    def lines(self: Self) -> List[bytes]:
+        """
+        The contents of each visible line of the display.
+        """
+
+        return [
+            bytes(self.state.ddram[address : address + self.device.columns])
+            for address in LINE_ADDRESSES[: self.device.lines]
+        ]
+
+    def _write(self: Self, row: int, column: int, data: bytes) -> None:
+        address = LINE_ADDRESSES[row] + column
+        data = data[: self.device.columns - column]
+        self.state.ddram[address : address + len(data)] = data
+
+    #
+    # Commands
+    #
+
+    def handle(self: Self, packet: Packet) -> Optional[Packet]:
+        """
+        Handle a command packet, returning the device's response.
+        """
+
+        code, data = packet
+        handler = self._handlers.get(code)
+        if handler is None:
+            return (0xC0 | code, b"")
+
+        try:
+            payload = handler(data)
+        except InvalidCommand as exc:
+            logger.debug(f"Command 0x{code:02X} is invalid: {exc}")
+            return (0xC0 | code, b"")
+
+        if payload is None:
+            return None
+        return (0x40 | code, payload)
+
+    def _ping(self: Self, data: bytes) -> bytes:
+        if len(data) > 16:
+            raise InvalidCommand("payload too long")
+        return data
+
+    def _versions(self: Self, data: bytes) -> bytes:
+        device = self.device
+        return f"{device.model}:{device.hardware_rev},{device.firmware_rev}".encode(
+            "ascii"
+        )
+
+    def _write_user_flash_area(self: Self, data: bytes) -> bytes:
+        if len(data) != USER_FLASH_SIZE:
+            raise InvalidCommand(f"all {USER_FLASH_SIZE} bytes must be written")
+        self.user_flash = data
+        return b""
+
+    def _read_user_flash_area(self: Self, data: bytes) -> bytes:
+        return self.user_flash
+
+    def _store_boot_state(self: Self, data: bytes) -> bytes:
+        self.boot_state = self.state.copy()
+        return b""
+
+    def _power(self: Self, data: bytes) -> bytes:
+        if data == bytes([8, 18, 99]):
+            # Reboot after acknowledging, at the baud rate the command came in at
+            self.state = self.boot_state.copy()
+            self.pressed_since = self.released_since = 0
+        elif data == bytes([12, 28, 97]):
+            self.host_resets += 1
+        elif data == bytes([3, 11, 95]):
+            self.host_shutdowns += 1
+        else:
+            raise InvalidCommand("bad power sequence")
+        return b""
+
+    def _clear_screen(self: Self, data: bytes) -> bytes:
+        self.state.ddram[:] = b" " * DDRAM_SIZE
+        self.state.cursor = (0, 0)
+        return b""
+
+    def _set_line(self: Self, row: int, data: bytes) -> bytes:
+        if len(data) != self.device.columns:
+            raise InvalidCommand("line must fill the display")
+        self._write(row, 0, data)
+        return b""
+
+    def _set_special_character_data(self: Self, data: bytes) -> bytes:
+        if len(data) != 9 or data[0] >= N_SPECIAL_CHARACTERS:
+            raise InvalidCommand("bad special character")
+        index = data[0]
+        self.state.cgram[index * 8 : index * 8 + 8] = data[1:]
+        return b""
+
+    def _read_lcd_memory(self: Self, data: bytes) -> bytes:
+        if len(data) != 1:
+            raise InvalidCommand("expected an address")
+        address = data[0]
+        memory: bytes
+        if address & 0x80:
+            offset = address & 0x7F
+            memory = bytes(self.state.ddram[offset : offset + 8])
+        elif address >= 0x40:
+            offset = address - 0x40
+            memory = bytes(self.state.cgram[offset : offset + 8])
+        else:
+            memory = b""
+        return bytes([address]) + memory.ljust(8, b"\x00")
+
+    def _set_cursor_position(self: Self, data: bytes) -> bytes:
+        if len(data) != 2:
+            raise InvalidCommand("expected a column and row")
+        column, row = data
+        if column >= self.device.columns or row >= self.device.lines:
+            raise InvalidCommand("cursor out of range")
+        self.state.cursor = (row, column)
+        return b""
+
+    def _set_cursor_style(self: Self, data: bytes) -> bytes:
+        if len(data) != 1 or data[0] > 4:
+            raise InvalidCommand("bad cursor style")
+        self.state.cursor_style = data[0]
+        return b""
+
+    def _set_contrast(self: Self, data: bytes) -> bytes:
+        if len(data) == 1:
+            if data[0] > 50:
+                raise InvalidCommand("legacy contrast out of range")
+            self.state.legacy_contrast = data[0]
+            self.state.contrast = data[0] * 255 // 50
+        elif len(data) == 2:
+            # Enhanced contrast - the first byte is ignored
+            self.state.contrast = data[1]
+            self.state.legacy_contrast = data[1] * 50 // 255
+        else:
+            raise InvalidCommand("bad contrast")
+        return b""
+
+    def _set_backlight(self: Self, data: bytes) -> bytes:
+        if not (1 <= len(data) <= 2) or any(b > 100 for b in data):
+            raise InvalidCommand("bad brightness")
+        self.state.lcd_brightness = data[0]
+        self.state.keypad_brightness = data[1] if len(data) == 2 else data[0]
+        return b""
+
+    def _read_dow_device_information(self: Self, data: bytes) -> bytes:
+        if len(data) != 1 or data[0] >= N_DOW_DEVICES:
+            raise InvalidCommand("bad DOW index")
+        return bytes([data[0]]) + self.dow_devices.get(data[0], bytes(8))
+
+    def _setup_temperature_reporting(self: Self, data: bytes) -> bytes:
+        if len(data) != N_DOW_DEVICES // 8:
+            raise InvalidCommand("bad temperature settings")
+        enabled = int.from_bytes(data, "little")
+        for index in range(N_DOW_DEVICES):
+            if enabled & (1 << index) and index not in self.temperatures:
+                raise InvalidCommand(f"no temperature sensor at index {index}")
+        self.state.temperature_reporting = enabled
+        return b""
+
+    def _dow_transaction(self: Self, data: bytes) -> bytes:
+        if len(data) < 2 or data[0] >= N_DOW_DEVICES or data[1] > 14:
+            raise InvalidCommand("bad DOW transaction")
+        index, bytes_to_read, written = data[0], data[1], data[2:]
+        if written[:1] == bytes([DOW_READ_SCRATCHPAD]) and index in self.temperatures:
+            reading = self._reading(index)[:2]
+            # Temperature, alarm thresholds, 12 bit resolution, reserved bytes
+            scratchpad = reading[::-1] + b"\x4b\x46\x7f\xff\x0c\x10"
+            scratchpad += bytes([dow_crc8(scratchpad)])
+            read = scratchpad[:bytes_to_read]
+        else:
+            # Nothing drives the bus, so it reads high
+            read = b"\xff" * bytes_to_read
+        return bytes([index]) + read + bytes([dow_crc8(read)])
+
+    def _setup_live_temperature_display(self: Self, data: bytes) -> bytes:
+        if len(data) not in (2, 6) or data[0] >= N_LIVE_DISPLAY_SLOTS:
+            raise InvalidCommand("bad live temperature display item")
+        if len(data) == 2:
+            self.state.live_display.pop(data[0], None)
+        else:
+            if data[1] not in self.temperatures:
+                raise InvalidCommand(f"no temperature sensor at index {data[1]}")
+            self.state.live_display[data[0]] = data[1:]
+        return b""
+
+    def _send_command_to_lcd_controller(self: Self, data: bytes) -> bytes:
+        if len(data) != 2 or data[0] > 1:
+            raise InvalidCommand("bad LCD controller command")
+        return b""
+
+    def _configure_key_reporting(self: Self, data: bytes) -> bytes:
+        if len(data) != 2 or any(mask & ~ALL_KEYS for mask in data):
+            raise InvalidCommand("bad key masks")
+        self.state.when_pressed, self.state.when_released = data
+        return b""
+
+    def _poll_keypad(self: Self, data: bytes) -> bytes:
+        states = bytes([self.pressed, self.pressed_since, self.released_since])
+        self.pressed_since = self.released_since = 0
+        return states
+
+    def _set_atx_power_switch_functionality(self: Self, data: bytes) -> bytes:
+        if not (1 <= len(data) <= 2):
+            raise InvalidCommand("bad ATX settings")
+        self.state.atx = data
+        return b""
+
+    def _configure_watchdog(self: Self, data: bytes) -> bytes:
+        if len(data) != 1:
+            raise InvalidCommand("bad watchdog timeout")
+        self.state.watchdog = data[0]
+        return b""
+
+    def _read_status(self: Self, data: bytes) -> bytes:
+        state = self.state
+        return (
+            b"\x00"
+            + state.temperature_reporting.to_bytes(4, "little")
+            + bytes(
+                [
+                    self.pressed_since,
+                    self.released_since,
+                    state.atx[0],
+                    state.watchdog,
+                    state.contrast,
+                    state.keypad_brightness,
+                    0,
+                    0,
+                    state.legacy_contrast,
+                    state.lcd_brightness,
+                ]
+            )
+        )
+
+    def _send_data(self: Self, data: bytes) -> bytes:
+        if len(data) < 3:
+            raise InvalidCommand("no data to send")
+        column, row, text = data[0], data[1], data[2:]
+        if (
+            column >= self.device.columns
+            or row >= self.device.lines
+            or len(text) > self.device.columns
+        ):
+            raise InvalidCommand("data out of range")
+        self._write(row, column, text)
+        return b""
+
+    def _set_baud_rate(self: Self, data: bytes) -> bytes:
+        if len(data) != 1 or data[0] > 1:
+            raise InvalidCommand("bad baud rate")
+        # The acknowledgement is sent at the old rate, then the rate changes
+        self.state.baud_rate = FAST_BAUD_RATE if data[0] else SLOW_BAUD_RATE
+        return b""
+
+    def _set_gpio(self: Self, data: bytes) -> bytes:
+        if len(data) not in (2, 3) or data[0] >= N_GPIO_PINS or data[1] > 100:
+            raise InvalidCommand("bad GPIO settings")
+        pin = self.gpio[data[0]]
+        if bool(pin.level) != bool(data[1]):
+            if data[1]:
+                pin.rising = True
+            else:
+                pin.falling = True
+        pin.level = data[1]
+        if len(data) == 3:
+            pin.settings = data[2]
+        return b""
+
+    def _read_gpio(self: Self, data: bytes) -> bytes:
+        if len(data) != 1 or data[0] >= N_GPIO_PINS:
+            raise InvalidCommand("bad GPIO index")
+        pin = self.gpio[data[0]]
+        state = int(bool(pin.level)) | (pin.falling << 1) | (pin.rising << 2)
+        pin.falling = pin.rising = False
+        return bytes([data[0], state, pin.level, pin.settings])
+
+    #
+    # Attaching over a pty
+    #
+
+    def open_pty(self: Self, loop: asyncio.AbstractEventLoop) -> "EmulatorPty":
+        """
+        Attach the emulator behind a pseudo-terminal.
+        """
+
+        return EmulatorPty(loop, self)
+
+
+class EmulatorTransport(Transport):
+    """
+    An in-process transport connected to an `Emulator`.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        emulator: Emulator,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+    ) -> None:
+        super().__init__()
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.protocol: asyncio.Protocol = protocol
+        self.emulator: Emulator = emulator
+        self._baud_rate: BaudRate = baud_rate
+        self._closing: bool = False
+        emulator.attach(loop, self._deliver)
+        loop.call_soon(protocol.connection_made, self)
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self._baud_rate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        self._baud_rate = baud_rate
+
+    def _deliver(self: Self, frame: bytes, baud_rate: BaudRate) -> None:
+        if self._closing or baud_rate != self._baud_rate:
+            return
+        self.protocol.data_received(frame)
+
+    def write(self: Self, data: bytes | bytearray | memoryview) -> None:
+        if self._closing:
+            return
+        self.emulator.receive(bytes(data), self._baud_rate)
+
+    def is_closing(self: Self) -> bool:
+        return self._closing
+
+    def close(self: Self) -> None:
+        if not self._closing:
+            self._closing = True
+            self.emulator.detach()
+            self.loop.call_soon(self.protocol.connection_lost, None)
+
+
+class EmulatorPty:
+    """
+    A pseudo-terminal with an `Emulator` behind it. Open `port` as a serial port
+    to talk to the emulator.
+    """
+
+    def __init__(
+        self: Self, loop: asyncio.AbstractEventLoop, emulator: Emulator
+    ) -> None:
+        if termios is None or tty is None:
+            raise CrystalfontzError("Emulating a device over a pty requires termios")
+
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.emulator: Emulator = emulator
+        self.master, self.slave = os.openpty()
+        # Don't echo or translate anything before the client configures the line
+        tty.setraw(self.slave)
+        self.port: str = os.ttyname(self.slave)
+        os.set_blocking(self.master, False)
+        loop.add_reader(self.master, self._read_ready)
+        emulator.attach(loop, self._deliver)
+
+    def _line_baud_rate(self: Self) -> Optional[BaudRate]:
+        speed = termios.tcgetattr(self.master)[4]
+        if speed == termios.B19200:
+            return SLOW_BAUD_RATE
+        elif speed == termios.B115200:
+            return FAST_BAUD_RATE
+        return None
+
+    def _read_ready(self: Self) -> None:
+        try:
+            data = os.read(self.master, 1024)
+        except OSError:
+            return
+
+        baud_rate = self._line_baud_rate()
+        if baud_rate is None:
+            self.emulator.garbled += len(data)
+            return
+        self.emulator.receive(data, baud_rate)
+
+    def _deliver(self: Self, frame: bytes, baud_rate: BaudRate) -> None:
+        if self._line_baud_rate() != baud_rate:
+            return
+        try:
+            os.write(self.master, frame)
+        except OSError as exc:
+            logger.debug(f"Failed to write to pty: {exc}")
+
+    def close(self: Self) -> None:
+        self.emulator.detach()
+        self.loop.remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+async def create_emulated_connection(
+    emulator: Optional[Emulator] = None,
+    report_handler: Optional[ReportHandler] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retry_times: int = DEFAULT_RETRY_TIMES,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    **kwargs: Any,
+) -> Client:
+    """
+    Create a client connected to an emulator in-process. Additional keyword
+    arguments, such as `metrics`, are passed to the `Client`.
+    """
+
+    _loop = loop if loop else asyncio.get_running_loop()
+    _emulator = emulator if emulator else Emulator()
+
+    client = Client(
+        device=_emulator.device,
+        report_handler=report_handler if report_handler else NoopReportHandler(),
+        timeout=timeout,
+        retry_times=retry_times,
+        loop=_loop,
+        **kwargs,
+    )
+    EmulatorTransport(_loop, client, _emulator, baud_rate)
+    await client._connection_made
+    return client
+
+
+@click.command()
+@click.option(
+    "--baud",
+    type=click.Choice([str(SLOW_BAUD_RATE), str(FAST_BAUD_RATE)]),
+    default=str(SLOW_BAUD_RATE),
+    help="The emulated device's baud rate",
+)
+@click.option(
+    "--baud-timing/--no-baud-timing",
+    default=True,
+    help="Delay frames by their time on the wire",
+)
+@click.option("--latency", type=float, default=0.0, help="Response latency, in seconds")
+@click.option("--jitter", type=float, default=0.0, help="Random extra latency")
+@click.option("--error-rate", type=float, default=0.0, help="Fraction of error replies")
+@click.option(
+    "--drop-rate", type=float, default=0.0, help="Fraction of dropped replies"
+)
+@click.option("--noise-rate", type=float, default=0.0, help="Fraction of noisy frames")
+@click.option(
+    "--corruption-rate", type=float, default=0.0, help="Fraction of corrupted frames"
+)
+@click.option(
+    "--temperature-sensors", type=int, default=0, help="Number of DS18B20 sensors"
+)
+@click.option("--seed", type=int, help="Seed for injected errors and noise")
+@click.option("--link", type=click.Path(), help="Symlink this path to the pty")
+def main(
+    baud: str,
+    baud_timing: bool,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    drop_rate: float,
+    noise_rate: float,
+    corruption_rate: float,
+    temperature_sensors: int,
+    seed: Optional[int],
+    link: Optional[str],
+) -> None:
+    """
+    Emulate a CFA533 behind a pseudo-terminal, and print its port.
+    """
+
+    emulator = Emulator(
+        latency=latency,
+        jitter=jitter,
+        baud_rate=FAST_BAUD_RATE if int(baud) == FAST_BAUD_RATE else SLOW_BAUD_RATE,
+        baud_timing=baud_timing,
+        error_rate=error_rate,
+        drop_rate=drop_rate,
+        noise_rate=noise_rate,
+        corruption_rate=corruption_rate,
+        temperature_sensors=temperature_sensors,
+        seed=seed,
+    )
+
+    async def run() -> None:
+        pty = emulator.open_pty(asyncio.get_running_loop())
+        if link:
+            os.symlink(pty.port, link)
+        click.echo(link if link else pty.port)
+        try:
+            await asyncio.Future()
+        finally:
+            if link:
+                os.unlink(link)
+            pty.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,14 @@ class DeviceLookupError(CrystalfontzError):
     pass
 
 
+class ProfileError(CrystalfontzError):
+    """
+    An error while profiling.
+    """
+
+    pass
+
+
 class UnknownResponseError(DecodeError):
     """
     An error raised when the response code is unrecognized.
@@ -0,0 +1,66 @@
+"""
+Select and run the event loop used by the CLI and the DBus service.
+
+By default, the standard asyncio event loop is used. If
+[uvloop](https://github.com/MagicStack/uvloop) is installed, it may be selected
+instead - either with the `--event-loop` CLI flag, the `CRYSTALFONTZ_EVENT_LOOP`
+environment variable, or the `event_loop` config field. uvloop may be installed
+with the `uvloop` extra:
+
+```bash
+pip install crystalfontz[uvloop]
+```
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, cast, Coroutine, List, Literal, Optional, TypeVar
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+EventLoopType = Literal["asyncio"] | Literal["uvloop"]
+
+DEFAULT_EVENT_LOOP: EventLoopType = "asyncio"
+EVENT_LOOPS: List[EventLoopType] = ["asyncio", "uvloop"]
+
+LoopFactory = Callable[[], asyncio.AbstractEventLoop]
+T = TypeVar("T")
+
+
+def load_event_loop(value: str) -> EventLoopType:
+    if value in EVENT_LOOPS:
+        return cast(EventLoopType, value)
+    raise ValueError(
+        f"{value} is not a supported event loop. "
+        f"Supported event loops are {', '.join(EVENT_LOOPS)}"
+    )
+
+
+def loop_factory(event_loop: EventLoopType) -> Optional[LoopFactory]:
+    """
+    Get a factory for the selected event loop. Returns None for the default asyncio
+    event loop, or if uvloop is selected but not installed.
+    """
+
+    if event_loop == "uvloop":
+        if uvloop is None:
+            logger.warning("uvloop is not installed. Falling back to asyncio.")
+            return None
+        return uvloop.new_event_loop
+    return None
+
+
+def run(
+    main: Coroutine[Any, Any, T], event_loop: EventLoopType = DEFAULT_EVENT_LOOP
+) -> T:
+    """
+    Run a coroutine on the selected event loop. This is analogous to `asyncio.run`.
+    """
+
+    with asyncio.Runner(loop_factory=loop_factory(event_loop)) as runner:
+        return runner.run(main)
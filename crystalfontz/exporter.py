@@ -0,0 +1,324 @@
+"""
+Export client metrics for Prometheus and compatible scrapers.
+
+Metrics may be served over HTTP on a local port, or written to a file on an
+interval for the node exporter's textfile collector. Neither blocks the event
+loop: the HTTP server is an asyncio server, and files are written from a thread.
+
+Metrics are served over HTTP in the OpenMetrics text format. The textfile
+collector only understands the older Prometheus text format (version 0.0.4), so
+files should be rendered in that format instead.
+
+Metrics are collected from a `Metrics` registry - see `crystalfontz.metrics` -
+plus any additional counters, such as DBus method calls.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, List, Literal, Optional, Self
+
+from crystalfontz.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "crystalfontz"
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+MetricsFormat = Literal["openmetrics"] | Literal["prometheus"]
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_INTERVAL = 15.0
+
+QUANTILES: List[float] = [0.5, 0.9, 0.99, 0.999]
+
+
+@dataclass
+class LabeledCounter:
+    """
+    A counter with a single label, such as DBus method calls by method.
+
+    Attributes:
+        name (str): The metric name, without the prefix or `_total` suffix.
+        label (str): The label name.
+        help (str): A description of the metric.
+        values (Dict[str, int]): Counts by label value.
+    """
+
+    name: str
+    label: str
+    help: str
+    values: Dict[str, int] = field(default_factory=dict)
+
+    def inc(self: Self, value: str) -> None:
+        self.values[value] = self.values.get(value, 0) + 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Writer:
+    def __init__(self: Self, format_: MetricsFormat) -> None:
+        self.format: MetricsFormat = format_
+        self.lines: List[str] = []
+
+    def family(self: Self, name: str, type_: str, help_: str, unit: str = "") -> None:
+        if self.format == "prometheus":
+            # Prometheus names counters by their samples, and has no units
+            if type_ == "counter":
+                name = f"{name}_total"
+            unit = ""
+        self.lines.append(f"# TYPE {PREFIX}_{name} {type_}")
+        if unit:
+            self.lines.append(f"# UNIT {PREFIX}_{name} {unit}")
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_}")
+
+    def sample(
+        self: Self, name: str, value: float, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        label_str = ""
+        if labels:
+            label_str = (
+                "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+            )
+        self.lines.append(f"{PREFIX}_{name}{label_str} {value}")
+
+    def counter(
+        self: Self,
+        name: str,
+        help_: str,
+        value: float,
+        unit: str = "",
+    ) -> None:
+        self.family(name, "counter", help_, unit)
+        self.sample(f"{name}_total", value)
+
+
+def render(
+    metrics: Optional[Metrics],
+    counters: Optional[List[LabeledCounter]] = None,
+    format_: MetricsFormat = "openmetrics",
+) -> str:
+    """
+    Render metrics in the OpenMetrics text format, or in the Prometheus text
+    format if `format_` is "prometheus".
+    """
+
+    w = _Writer(format_)
+
+    if metrics is not None:
+        w.family(
+            "command_latency_seconds",
+            "summary",
+            "Time between sending a command and receiving its response",
+            "seconds",
+        )
+        for name, command in sorted(metrics.commands.items()):
+            latency = command.latency
+            for q in QUANTILES:
+                w.sample(
+                    "command_latency_seconds",
+                    latency.percentile(q * 100),
+                    dict(command=name, quantile=str(q)),
+                )
+            w.sample("command_latency_seconds_count", latency.count, dict(command=name))
+            w.sample("command_latency_seconds_sum", latency.sum, dict(command=name))
+
+        w.family("command_timeouts", "counter", "Command attempts which timed out")
+        for name, command in sorted(metrics.commands.items()):
+            w.sample("command_timeouts_total", command.timeouts, dict(command=name))
+
+        w.family("command_errors", "counter", "Command attempts which failed")
+        for name, command in sorted(metrics.commands.items()):
+            w.sample("command_errors_total", command.errors, dict(command=name))
+
+        w.family("reports", "counter", "Reports received from the device")
+        for name, count in sorted(metrics.reports.items()):
+            w.sample("reports_total", count, dict(report=name))
+
+        w.counter("retries", "Command retries", metrics.retries)
+        w.counter("crc_errors", "Bytes discarded due to a bad CRC", metrics.crc_errors)
+        w.counter(
+            "resync_bytes",
+            "Bytes discarded while synchronizing with the packet stream",
+            metrics.resync_bytes,
+            "bytes",
+        )
+        w.counter(
+            "device_errors", "Error responses from the device", metrics.device_errors
+        )
+        w.counter("received_bytes", "Bytes received", metrics.bytes_in, "bytes")
+        w.counter("sent_bytes", "Bytes sent", metrics.bytes_out, "bytes")
+        w.counter("packets_received", "Packets received", metrics.packets_in)
+        w.counter("packets_sent", "Packets sent", metrics.packets_out)
+
+        if metrics.loop_lag is not None:
+            lag = metrics.loop_lag
+            w.family(
+                "loop_lag_seconds",
+                "summary",
+                "How late the event loop ran a scheduled callback",
+                "seconds",
+            )
+            for q in QUANTILES:
+                w.sample(
+                    "loop_lag_seconds", lag.percentile(q * 100), dict(quantile=str(q))
+                )
+            w.sample("loop_lag_seconds_count", lag.count)
+            w.sample("loop_lag_seconds_sum", lag.sum)
+
+            w.family(
+                "slow_callbacks", "counter", "Callbacks which blocked the event loop"
+            )
+            for name, count in sorted(metrics.slow_callbacks.items()):
+                w.sample("slow_callbacks_total", count, dict(callback=name))
+
+        for name, value in sorted(metrics.sample().items()):
+            w.family(name, "gauge", name.replace("_", " ").capitalize())
+            w.sample(name, value)
+
+    for counter in counters or []:
+        w.family(counter.name, "counter", counter.help)
+        for value, count in sorted(counter.values.items()):
+            w.sample(f"{counter.name}_total", count, {counter.label: value})
+
+    if format_ == "openmetrics":
+        w.lines.append("# EOF")
+    return "\n".join(w.lines) + "\n" if w.lines else ""
+
+
+Collect = Callable[[], str]
+
+
+class HttpExporter:
+    """
+    Serve metrics over HTTP. Every path serves metrics, though scrapers typically
+    request `/metrics`.
+    """
+
+    def __init__(
+        self: Self,
+        collect: Collect,
+        port: int,
+        host: str = DEFAULT_METRICS_HOST,
+    ) -> None:
+        self.collect: Collect = collect
+        self.host: str = host
+        self.port: int = port
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self: Self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # If the port was 0, the OS chose one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def _handle(
+        self: Self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request = await reader.readline()
+            # Drain the headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            if not request.startswith(b"GET "):
+                status = "405 Method Not Allowed"
+                body = b""
+            else:
+                status = "200 OK"
+                body = self.collect().encode("utf-8")
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {CONTENT_TYPE}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n"
+                    "\r\n"
+                ).encode("ascii")
+                + body
+            )
+            await writer.drain()
+        except Exception as exc:
+            logger.debug(f"Failed to serve metrics: {exc}")
+        finally:
+            writer.close()
+
+    async def close(self: Self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def _write_file(path: str, text: str) -> None:
+    # Write atomically, so the collector never reads a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".crystalfontz-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+class TextfileExporter:
+    """
+    Write metrics to a file on an interval, for the node exporter's textfile
+    collector. The file is written from a thread, and replaced atomically.
+
+    The textfile collector reads the Prometheus text format, so `collect` should
+    render metrics with `format_="prometheus"`.
+    """
+
+    def __init__(
+        self: Self,
+        collect: Collect,
+        path: str,
+        interval: float = DEFAULT_METRICS_INTERVAL,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.collect: Collect = collect
+        self.path: str = path
+        self.interval: float = interval
+        self.loop: asyncio.AbstractEventLoop = (
+            loop if loop else asyncio.get_running_loop()
+        )
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self: Self) -> None:
+        await self.write()
+        self._task = self.loop.create_task(self._run())
+        logger.info(f"Writing metrics to {self.path} every {self.interval}s")
+
+    async def write(self: Self) -> None:
+        """
+        Write metrics to the file now.
+        """
+
+        text = self.collect()
+        await self.loop.run_in_executor(None, _write_file, self.path, text)
+
+    async def _run(self: Self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.write()
+            except Exception as exc:
+                logger.warning(f"Failed to write metrics to {self.path}: {exc}")
+
+    async def close(self: Self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,77 @@
+"""
+Facts about a device, fetched once when a connection is warmed up.
+
+Applications typically fetch a handful of facts - versions, status and so on -
+right after connecting, one round trip at a time. Warming up a connection fetches
+a declared set of facts with pipelined commands, so startup takes one round of
+I/O instead of several sequential round trips. The results are cached in
+`client.facts`.
+
+# Example
+
+```py
+from crystalfontz import connection
+
+async with connection("/dev/ttyUSB0", warm_up=["versions", "status"]) as client:
+    print(client.facts.versions)
+    print(client.facts.status)
+```
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Tuple, Type
+
+from crystalfontz.command import (
+    Command,
+    GetVersions,
+    PollKeypad,
+    ReadStatus,
+    ReadUserFlashArea,
+)
+from crystalfontz.device import DeviceStatus
+from crystalfontz.response import (
+    KeypadPolled,
+    Response,
+    StatusRead,
+    UserFlashAreaRead,
+    Versions,
+)
+
+Fact = (
+    Literal["versions"]
+    | Literal["status"]
+    | Literal["user_flash_area"]
+    | Literal["keypad"]
+)
+
+FACTS: List[Fact] = ["versions", "status", "user_flash_area", "keypad"]
+
+# The command which fetches each fact, and its expected response
+FACT_COMMANDS: Dict[Fact, Tuple[Type[Command], Type[Response]]] = {
+    "versions": (GetVersions, Versions),
+    "status": (ReadStatus, StatusRead),
+    "user_flash_area": (ReadUserFlashArea, UserFlashAreaRead),
+    "keypad": (PollKeypad, KeypadPolled),
+}
+
+
+@dataclass
+class DeviceFacts:
+    """
+    Facts about a device, cached when a connection is warmed up. Facts which
+    weren't fetched are None.
+
+    Attributes:
+        versions (Optional[Versions]): The device's model, hardware and firmware
+            versions.
+        status (Optional[DeviceStatus]): The device's reporting and status
+            information.
+        user_flash_area (Optional[UserFlashAreaRead]): The contents of the user
+            flash area.
+        keypad (Optional[KeypadPolled]): The state of the keypad.
+    """
+
+    versions: Optional[Versions] = None
+    status: Optional[DeviceStatus] = None
+    user_flash_area: Optional[UserFlashAreaRead] = None
+    keypad: Optional[KeypadPolled] = None
@@ -0,0 +1,213 @@
+"""
+Watch for serial device nodes appearing, using Linux's inotify API.
+
+When a USB serial adapter is unplugged, its device node - for instance,
+`/dev/ttyUSB0` or a link in `/dev/serial/by-id` - is removed. When it's plugged
+back in, the node is recreated. A `DeviceWatcher` watches the node's parent
+directories for changes, so that a connection can be reopened as soon as the node
+reappears, rather than on a retry timer.
+
+inotify is accessed through libc with `ctypes`, so there are no dependencies on
+udev or any third party packages. On platforms without inotify, watchers fall back
+to polling.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+from typing import Dict, List, Optional, Self, Tuple
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Events which may indicate that a device node is ready to open. Nodes are
+# typically created by udev, which then updates their permissions - so a node may
+# not be usable until an IN_ATTRIB event arrives.
+WATCH_MASK = IN_CREATE | IN_MOVED_TO | IN_ATTRIB | IN_DELETE_SELF | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# If inotify is unavailable, or in case an event is missed, check for the device
+# at this interval.
+POLL_INTERVAL = 1.0
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    name = ctypes.util.find_library("c")
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+class Inotify:
+    """
+    A minimal wrapper around an inotify file descriptor.
+    """
+
+    def __init__(self: Self) -> None:
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd: int = fd
+
+    def fileno(self: Self) -> int:
+        return self.fd
+
+    def add_watch(self: Self, path: str, mask: int = WATCH_MASK) -> int:
+        """
+        Watch a path. Returns the watch descriptor.
+        """
+
+        assert _libc is not None
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read(self: Self) -> List[Tuple[int, int, str]]:
+        """
+        Read pending events. Returns a list of (watch descriptor, mask, name)
+        tuples.
+        """
+
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return []
+
+        events: List[Tuple[int, int, str]] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, size = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + size].rstrip(b"\0")
+            offset += size
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self: Self) -> None:
+        os.close(self.fd)
+
+
+def _ancestors(path: str) -> List[str]:
+    # The directories which must exist for path to exist, from the top down.
+    # For a link in /dev/serial/by-id, this includes /dev/serial, which is
+    # removed when the last USB serial device is unplugged.
+    dirs: List[str] = []
+    parent = os.path.dirname(os.path.abspath(path))
+    while True:
+        dirs.append(parent)
+        if parent == os.path.dirname(parent) or parent == "/dev":
+            break
+        parent = os.path.dirname(parent)
+    return list(reversed(dirs))
+
+
+class DeviceWatcher:
+    """
+    Wait for a device node to appear.
+
+    The watcher watches the node's parent directories, adding watches for
+    intermediate directories as they're created. Every event triggers a check for
+    the node, so that waiters are woken within milliseconds of it appearing.
+    """
+
+    def __init__(
+        self: Self,
+        path: str,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
+        self.path: str = path
+        self.loop: asyncio.AbstractEventLoop = (
+            loop if loop else asyncio.get_running_loop()
+        )
+        self.poll_interval: float = poll_interval
+        self._watches: Dict[int, str] = dict()
+        self._changed: asyncio.Event = asyncio.Event()
+
+        self._inotify: Optional[Inotify] = None
+        try:
+            self._inotify = Inotify()
+        except OSError as exc:
+            logger.warning(f"Can not watch for {path} with inotify: {exc}")
+        else:
+            self.loop.add_reader(self._inotify.fd, self._read_ready)
+            self._add_watches()
+
+    def _add_watches(self: Self) -> None:
+        if not self._inotify:
+            return
+        watched = set(self._watches.values())
+        for directory in _ancestors(self.path):
+            if directory in watched:
+                continue
+            try:
+                wd = self._inotify.add_watch(directory)
+            except OSError:
+                # The directory doesn't exist yet. Its parent is watched, so we'll
+                # add it when it's created.
+                break
+            self._watches[wd] = directory
+
+    def _read_ready(self: Self) -> None:
+        assert self._inotify is not None
+        for wd, mask, _ in self._inotify.read():
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self._watches.pop(wd, None)
+        self._add_watches()
+        self._changed.set()
+
+    async def wait(self: Self) -> None:
+        """
+        Wait until the device node exists.
+        """
+
+        while not os.path.exists(self.path):
+            await self.changed()
+
+    async def changed(self: Self) -> None:
+        """
+        Wait for a change to one of the watched directories, or for the poll
+        interval to elapse.
+        """
+
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+        except TimeoutError:
+            pass
+
+    def close(self: Self) -> None:
+        """
+        Stop watching.
+        """
+
+        if self._inotify:
+            self.loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
@@ -167,6 +167,31 @@ class KeyActivity(Enum):
     def to_byte(self: Self) -> int:
         return self.value
 
+    @property
+    def keypress(self: Self) -> KeyPress:
+        """
+        The key this activity is for.
+        """
+
+        return ACTIVITY_KEYPRESSES[(self.value - 1) % len(ACTIVITY_KEYPRESSES)]
+
+    @property
+    def pressed(self: Self) -> bool:
+        """
+        Whether this activity is a key press, rather than a release.
+        """
+
+        return self.value <= len(ACTIVITY_KEYPRESSES)
+
+
+ACTIVITY_KEYPRESSES: List[KeyPress] = [
+    KP_UP,
+    KP_DOWN,
+    KP_LEFT,
+    KP_RIGHT,
+    KP_ENTER,
+    KP_EXIT,
+]
 
 KEY_ACTIVITIES: List[KeyActivity] = [
     KeyActivity.KEY_UP_PRESS,
@@ -0,0 +1,211 @@
+"""
+Monitor event loop lag.
+
+Commands time out after 250ms by default. When one times out, the device may have
+been slow - or the event loop may have been blocked by a report handler, DBus
+marshalling or garbage collection, so the response sat unread. A lag monitor
+tells the two apart.
+
+The monitor schedules a callback every `interval` seconds, and records how late
+it runs in a histogram. When lag approaches the command timeout, a warning is
+logged.
+
+When asyncio's debug mode is enabled - for instance, with `PYTHONASYNCIODEBUG=1`
+or `python -X dev` - asyncio logs callbacks which run for too long. The monitor
+collects these, and attributes lag warnings to the callbacks responsible. Debug
+mode has its own overhead, so it's not enabled by the monitor itself.
+
+# Example
+
+```py
+async with connection("/dev/ttyUSB0", monitor_loop=True, metrics=True) as client:
+    ...
+    print(client.lag_monitor.lag.percentile(99))
+```
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+import logging
+import re
+from typing import Deque, Dict, List, Optional, Self
+
+from crystalfontz.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAG_INTERVAL = 0.1
+
+# Warn when lag exceeds this fraction of the command timeout
+LAG_WARNING_RATIO = 0.5
+
+# Don't warn more often than this
+LAG_WARNING_INTERVAL = 5.0
+
+MAX_SLOW_CALLBACKS = 32
+
+# The message asyncio logs for slow callbacks in debug mode
+SLOW_CALLBACK_MESSAGE = "Executing %s took %.3f seconds"
+
+
+@dataclass
+class SlowCallback:
+    """
+    A callback which blocked the event loop.
+
+    Attributes:
+        callback (str): A description of the callback, as formatted by asyncio.
+        duration (float): How long the callback ran for, in seconds.
+        time (float): When the callback finished, in event loop time.
+    """
+
+    callback: str
+    duration: float
+    time: float
+
+
+def callback_name(description: str) -> str:
+    """
+    Get a stable name for a callback from asyncio's description of it, dropping
+    addresses, task names and source locations.
+    """
+
+    coro = re.search(r"coro=<([\w.<>]+)\(", description)
+    if coro:
+        return coro.group(1)
+    handle = re.match(r"<(?:Timer)?Handle (?:when=\S+ )?([\w.<>]+)\(", description)
+    if handle:
+        return handle.group(1)
+    return re.sub(r" at 0x[0-9a-f]+", "", description)
+
+
+class _SlowCallbackHandler(logging.Handler):
+    def __init__(self: Self, monitor: "LagMonitor") -> None:
+        super().__init__()
+        self.monitor: LagMonitor = monitor
+
+    def emit(self: Self, record: logging.LogRecord) -> None:
+        if record.msg != SLOW_CALLBACK_MESSAGE or not isinstance(record.args, tuple):
+            return
+        description, duration = record.args
+        self.monitor.slow_callback(str(description), float(duration))
+
+
+class LagMonitor:
+    """
+    Sample event loop lag, and attribute it to slow callbacks when asyncio's
+    debug mode is enabled.
+    """
+
+    def __init__(
+        self: Self,
+        timeout: float,
+        interval: float = DEFAULT_LAG_INTERVAL,
+        warning_ratio: float = LAG_WARNING_RATIO,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.timeout: float = timeout
+        self.interval: float = interval
+        self.threshold: float = timeout * warning_ratio
+        self.loop: asyncio.AbstractEventLoop = (
+            loop if loop else asyncio.get_running_loop()
+        )
+
+        self.lag: Histogram = Histogram()
+        self.slow_callbacks: Deque[SlowCallback] = deque(maxlen=MAX_SLOW_CALLBACKS)
+        self.slow_callback_counts: Dict[str, int] = dict()
+        self.warnings: int = 0
+
+        self._expected: float = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._handler: Optional[_SlowCallbackHandler] = None
+        self._last_tick: float = 0.0
+        self._last_warning: Optional[float] = None
+
+    @property
+    def running(self: Self) -> bool:
+        return self._handle is not None
+
+    def start(self: Self) -> None:
+        """
+        Start sampling.
+        """
+
+        if self.running:
+            return
+
+        if self.loop.get_debug():
+            # Report callbacks slow enough to cause a warning
+            self.loop.slow_callback_duration = min(
+                self.loop.slow_callback_duration, self.threshold
+            )
+            self._handler = _SlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._handler)
+
+        self._last_tick = self.loop.time()
+        self._schedule()
+
+    def stop(self: Self) -> None:
+        """
+        Stop sampling.
+        """
+
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if self._handler:
+            logging.getLogger("asyncio").removeHandler(self._handler)
+            self._handler = None
+
+    def _schedule(self: Self) -> None:
+        self._expected = self.loop.time() + self.interval
+        self._handle = self.loop.call_at(self._expected, self._tick)
+
+    def _tick(self: Self) -> None:
+        now = self.loop.time()
+        # Timers may fire up to a clock resolution early
+        lag = max(now - self._expected, 0.0)
+        self.lag.record(lag)
+
+        if lag >= self.threshold:
+            self._warn(lag, now)
+
+        self._last_tick = now
+        self._schedule()
+
+    def _warn(self: Self, lag: float, now: float) -> None:
+        self.warnings += 1
+        if (
+            self._last_warning is not None
+            and now - self._last_warning < LAG_WARNING_INTERVAL
+        ):
+            return
+        self._last_warning = now
+
+        message = (
+            f"Event loop lagged {lag * 1000:.0f}ms "
+            f"(command timeout is {self.timeout * 1000:.0f}ms)"
+        )
+        culprits = self.culprits(self._last_tick)
+        if culprits:
+            message += "; slow callbacks: " + ", ".join(
+                f"{cb.callback} ({cb.duration * 1000:.0f}ms)" for cb in culprits
+            )
+        logger.warning(message)
+
+    def slow_callback(self: Self, description: str, duration: float) -> None:
+        """
+        Record a callback which blocked the event loop.
+        """
+
+        name = callback_name(description)
+        self.slow_callbacks.append(SlowCallback(name, duration, self.loop.time()))
+        self.slow_callback_counts[name] = self.slow_callback_counts.get(name, 0) + 1
+
+    def culprits(self: Self, since: float) -> List[SlowCallback]:
+        """
+        Slow callbacks which finished after `since`, in event loop time.
+        """
+
+        return [cb for cb in self.slow_callbacks if cb.time >= since]
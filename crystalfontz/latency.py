@@ -0,0 +1,174 @@
+"""
+Measure how long a key press takes to show up on the display.
+
+When key latency measurement is enabled - by passing `key_latency=True` to
+`create_connection` or `connection` - every response is stamped with
+`received_at`, the `time.monotonic` time at which the frame carrying it arrived.
+The client times each key activity report against that stamp:
+
+- `wait`: from the frame arriving to its handler starting
+- `handler`: from the frame arriving to its handler finishing
+- `display`: from the frame arriving to the device acknowledging the last
+  display update sent by the handler - that is, input to photon
+
+Display updates are the commands in `DISPLAY_COMMANDS`, sent from within the
+handler, including from tasks it creates. Reports whose handler doesn't update
+the display are counted, but don't contribute to the `display` histogram.
+
+# Example
+
+```py
+async with connection(
+    "/dev/ttyUSB0", report_handler=handler, key_latency=True
+) as client:
+    await asyncio.sleep(60)
+    print(client.key_latency.display.percentile(99))
+```
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional, Self, Tuple, Type
+
+from crystalfontz.command import (
+    ClearScreen,
+    Command,
+    SendCommandToLcdController,
+    SendData,
+    SetBacklight,
+    SetContrast,
+    SetCursorPosition,
+    SetCursorStyle,
+    SetLine1,
+    SetLine2,
+    SetSpecialCharacterData,
+)
+from crystalfontz.metrics import Histogram, PERCENTILES
+from crystalfontz.response import KeyActivityReport
+
+DISPLAY_COMMANDS: Tuple[Type[Command], ...] = (
+    ClearScreen,
+    SetLine1,
+    SetLine2,
+    SetSpecialCharacterData,
+    SetCursorPosition,
+    SetCursorStyle,
+    SetContrast,
+    SetBacklight,
+    SendCommandToLcdController,
+    SendData,
+)
+
+KeyActivityHandler = Callable[[KeyActivityReport], Coroutine[None, None, None]]
+
+
+@dataclass
+class KeyTiming:
+    """
+    Timing for a key activity report which is being handled.
+
+    Attributes:
+        received_at (float): When the report's frame arrived.
+        displayed_at (Optional[float]): When the last display update sent while
+            handling the report was acknowledged, if any.
+    """
+
+    received_at: float
+    displayed_at: Optional[float] = None
+
+
+_handling: ContextVar[Optional[KeyTiming]] = ContextVar(
+    "crystalfontz_key_timing", default=None
+)
+
+
+class KeyLatency:
+    """
+    Histograms of key press-to-handler and key press-to-display latency.
+    """
+
+    def __init__(self: Self) -> None:
+        self.wait: Histogram = Histogram()
+        self.handler: Histogram = Histogram()
+        self.display: Histogram = Histogram()
+        self.reports: int = 0
+        self.undisplayed: int = 0
+
+    def wrap(self: Self, handler: KeyActivityHandler) -> KeyActivityHandler:
+        """
+        Wrap a key activity handler, so that each report it handles is timed.
+        """
+
+        async def timed(report: KeyActivityReport) -> None:
+            received_at = report.received_at
+            if received_at is None:
+                await handler(report)
+                return
+
+            timing = KeyTiming(received_at)
+            self.wait.record(time.monotonic() - received_at)
+            token = _handling.set(timing)
+            try:
+                await handler(report)
+            finally:
+                _handling.reset(token)
+                self._handled(timing)
+
+        return timed
+
+    def _handled(self: Self, timing: KeyTiming) -> None:
+        self.reports += 1
+        self.handler.record(time.monotonic() - timing.received_at)
+        if timing.displayed_at is not None:
+            self.display.record(timing.displayed_at - timing.received_at)
+        else:
+            self.undisplayed += 1
+
+    @staticmethod
+    def acknowledged(command: Command) -> None:
+        """
+        Note that a command was acknowledged. If it updates the display and was
+        sent while handling a key activity report, the report is considered
+        displayed.
+        """
+
+        timing = _handling.get()
+        if timing is not None and isinstance(command, DISPLAY_COMMANDS):
+            timing.displayed_at = time.monotonic()
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return dict(
+            reports=self.reports,
+            undisplayed=self.undisplayed,
+            wait=self.wait.as_dict(),
+            handler=self.handler.as_dict(),
+            display=self.display.as_dict(),
+        )
+
+    def __repr__(self: Self) -> str:
+        header = ["stage", "count", "mean"] + [f"p{p:g}" for p in PERCENTILES] + ["max"]
+        rows = [header]
+        for name, histogram in [
+            ("wait", self.wait),
+            ("handler", self.handler),
+            ("display", self.display),
+        ]:
+            values = (
+                [histogram.mean]
+                + [histogram.percentile(p) for p in PERCENTILES]
+                + [histogram.max or 0.0]
+            )
+            rows.append(
+                [name, str(histogram.count)] + [f"{v * 1000:.2f}ms" for v in values]
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = [
+            "  ".join(cell.rjust(width) for cell, width in zip(row, widths))
+            for row in rows
+        ]
+        lines.append(
+            f"{self.reports} key reports, {self.undisplayed} without a display update"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,239 @@
+"""
+Metrics for a client.
+
+When metrics are enabled - by passing `metrics=True` to `create_connection` or
+`connection` - the client records command latencies and counts errors, retries,
+bytes and reports in `client.metrics`. When metrics are disabled,
+`client.metrics` is None, and nothing is recorded.
+
+Latencies are recorded in HDR-style histograms. Values are bucketed with a fixed
+number of significant bits, so that each bucket is within a few percent of the
+values it holds, no matter how large they are. Recording a value is a couple of
+integer operations and a dict update.
+
+# Example
+
+```py
+async with connection("/dev/ttyUSB0", metrics=True) as client:
+    await client.ping(b"hello")
+    latency = client.metrics.commands["Ping"].latency
+    print(latency.percentile(99))
+```
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Self, Tuple
+
+# Values are recorded in microseconds, with this many significant bits. 5 bits
+# gives a worst-case relative error of about 3%.
+SIGNIFICANT_BITS = 5
+
+PERCENTILES: List[float] = [50.0, 90.0, 99.0, 99.9]
+
+
+class Histogram:
+    """
+    An HDR-style histogram of durations, in seconds.
+    """
+
+    def __init__(self: Self, significant_bits: int = SIGNIFICANT_BITS) -> None:
+        self.significant_bits: int = significant_bits
+        self._counts: Dict[int, int] = dict()
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self: Self, value: float) -> None:
+        """
+        Record a duration, in seconds.
+        """
+
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        us = int(value * 1_000_000)
+        shift = us.bit_length() - self.significant_bits
+        if shift > 0:
+            # Drop the insignificant bits, tagging the bucket with the shift. Keys
+            # sort in the same order as the values they hold.
+            key = (shift << self.significant_bits) | (us >> shift)
+        else:
+            key = us
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _bucket(self: Self, key: int) -> Tuple[float, float]:
+        # The range of microseconds covered by a bucket
+        shift = key >> self.significant_bits
+        if not shift:
+            return (float(key), float(key))
+        value = key & ((1 << self.significant_bits) - 1)
+        low = value << shift
+        return (float(low), float(low + (1 << shift) - 1))
+
+    def buckets(self: Self) -> Iterator[Tuple[float, int]]:
+        """
+        Iterate over (upper bound in seconds, count) pairs, in increasing order.
+        """
+
+        for key in sorted(self._counts):
+            _, high = self._bucket(key)
+            yield (high / 1_000_000, self._counts[key])
+
+    def percentile(self: Self, percentile: float) -> float:
+        """
+        Estimate a percentile, in seconds. Returns 0 if nothing's been recorded.
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = percentile / 100 * self.count
+        seen = 0
+        for key in sorted(self._counts):
+            seen += self._counts[key]
+            if seen >= rank:
+                low, high = self._bucket(key)
+                value = (low + high) / 2 / 1_000_000
+                # The estimate can't be outside the recorded range
+                assert self.min is not None and self.max is not None
+                return min(max(value, self.min), self.max)
+
+        assert self.max is not None
+        return self.max
+
+    @property
+    def mean(self: Self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            sum=self.sum,
+            min=self.min,
+            max=self.max,
+            mean=self.mean,
+            percentiles={str(p): self.percentile(p) for p in PERCENTILES},
+        )
+
+
+@dataclass
+class CommandMetrics:
+    """
+    Metrics for a command type.
+
+    Attributes:
+        latency (Histogram): Time between sending the command and receiving its
+            response, for successful commands.
+        timeouts (int): The number of attempts which timed out.
+        errors (int): The number of attempts which failed with another error.
+    """
+
+    latency: Histogram = field(default_factory=Histogram)
+    timeouts: int = 0
+    errors: int = 0
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return dict(
+            latency=self.latency.as_dict(),
+            timeouts=self.timeouts,
+            errors=self.errors,
+        )
+
+
+class Metrics:
+    """
+    A registry of metrics for a client.
+
+    Attributes:
+        commands (Dict[str, CommandMetrics]): Metrics for each command type, by
+            class name.
+        reports (Dict[str, int]): The number of reports received, by class name.
+        retries (int): The number of times a command was retried.
+        crc_errors (int): The number of bytes discarded due to a bad CRC.
+        resync_bytes (int): The total number of bytes discarded while
+            synchronizing with the packet stream.
+        device_errors (int): The number of error responses from the device.
+        bytes_in (int): The number of bytes received.
+        bytes_out (int): The number of bytes sent.
+        packets_in (int): The number of packets received.
+        packets_out (int): The number of packets sent.
+        gauges (Dict[str, Callable[[], float]]): Functions which sample current
+            values, such as queue depth.
+        loop_lag (Optional[Histogram]): Event loop lag, when the loop is
+            monitored. See `crystalfontz.lag`.
+        slow_callbacks (Dict[str, int]): The number of times each callback
+            blocked the event loop, when the loop is monitored in debug mode.
+    """
+
+    def __init__(self: Self) -> None:
+        self.commands: Dict[str, CommandMetrics] = dict()
+        self.reports: Dict[str, int] = dict()
+        self.retries: int = 0
+        self.crc_errors: int = 0
+        self.resync_bytes: int = 0
+        self.device_errors: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.packets_in: int = 0
+        self.packets_out: int = 0
+        self.gauges: Dict[str, Callable[[], float]] = dict()
+        self.loop_lag: Optional[Histogram] = None
+        self.slow_callbacks: Dict[str, int] = dict()
+
+    def command(self: Self, name: str) -> CommandMetrics:
+        """
+        Get metrics for a command type, creating them if necessary.
+        """
+
+        metrics = self.commands.get(name)
+        if metrics is None:
+            metrics = CommandMetrics()
+            self.commands[name] = metrics
+        return metrics
+
+    def report(self: Self, name: str) -> None:
+        """
+        Count a received report.
+        """
+
+        self.reports[name] = self.reports.get(name, 0) + 1
+
+    def resync(self: Self, reason: str) -> None:
+        """
+        Count a byte discarded while synchronizing with the packet stream.
+        """
+
+        self.resync_bytes += 1
+        if reason == "crc":
+            self.crc_errors += 1
+
+    def sample(self: Self) -> Dict[str, float]:
+        """
+        Sample every gauge.
+        """
+
+        return {name: gauge() for name, gauge in self.gauges.items()}
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return dict(
+            commands={
+                name: metrics.as_dict() for name, metrics in self.commands.items()
+            },
+            reports=dict(self.reports),
+            retries=self.retries,
+            crc_errors=self.crc_errors,
+            resync_bytes=self.resync_bytes,
+            device_errors=self.device_errors,
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            packets_in=self.packets_in,
+            packets_out=self.packets_out,
+            gauges=self.sample(),
+            loop_lag=self.loop_lag.as_dict() if self.loop_lag else None,
+            slow_callbacks=dict(self.slow_callbacks),
+        )
@@ -1,12 +1,10 @@
 # -*- coding: utf-8 -*-
 
-import logging
 import struct
-from typing import Optional, Tuple
+from typing import Callable, Literal, Optional, Tuple
 
 from crystalfontz.error import CrcError, EncodeError
-
-logger = logging.getLogger(__name__)
+from crystalfontz.trace import emit, hooks
 
 # See: https://github.com/crystalfontz/cfa_linux_examples/blob/master/include/cf_packet.c  # noqa E501
 CRC_TABLE = [
@@ -291,6 +289,9 @@ MAX_DATA_LEN = 18
 
 Packet = Tuple[int, bytes]
 
+# Why a byte was discarded while synchronizing with the packet stream
+ResyncReason = Literal["length"] | Literal["crc"]
+
 
 def serialize_packet(packet: Packet) -> bytes:
     """
@@ -301,21 +302,31 @@ def serialize_packet(packet: Packet) -> bytes:
     if len(data) > MAX_DATA_LEN:
         raise EncodeError(f"Too much data ({len(data)} > {MAX_DATA_LEN}")
     pkt = cmd.to_bytes(1, "big") + len(data).to_bytes(1, "big") + data
-    crc = make_crc(pkt)
+    buff = pkt + make_crc(pkt)
 
-    logger.debug(f"Sending packet: {pkt + crc}")
+    if hooks.tx:
+        emit(hooks.tx, buff)
 
-    return pkt + crc
+    return buff
 
 
-def parse_packet(buffer: bytes) -> Tuple[Optional[Packet], bytes]:
+def parse_packet(
+    buffer: bytes, on_resync: Optional[Callable[[ResyncReason], None]] = None
+) -> Tuple[Optional[Packet], bytes]:
     """
     Parse bytes as packets.
+
+    When the buffer doesn't start with a valid packet, its first byte is
+    discarded and parsing is retried. If `on_resync` is given, it's called with
+    the reason for each discarded byte.
     """
 
-    def synchronize(message: str) -> Tuple[Optional[Packet], bytes]:
-        logger.debug(message)
-        return parse_packet(buffer[1:])
+    def synchronize(reason: ResyncReason) -> Tuple[Optional[Packet], bytes]:
+        if hooks.resync:
+            emit(hooks.resync, reason, buffer)
+        if on_resync:
+            on_resync(reason)
+        return parse_packet(buffer[1:], on_resync)
 
     # There must be at least 4 bytes - command, 0, "", CRC
     if len(buffer) < 4:
@@ -325,7 +336,7 @@ def parse_packet(buffer: bytes) -> Tuple[Optional[Packet], bytes]:
     length = buffer[1]
 
     if length > MAX_DATA_LEN:
-        return synchronize(f"Message length {length} > {MAX_DATA_LEN}")
+        return synchronize("length")
 
     # Given a length, the buffer should have that many bytes, plus the two for
     # command and length respectively, plus a 16 bit CRC. If we don't have
@@ -341,10 +352,11 @@ def parse_packet(buffer: bytes) -> Tuple[Optional[Packet], bytes]:
         expected = make_crc(buffer[0 : length + 2])
 
         if crc == expected:
-            logger.debug(f"Received packet: {buffer[0 : length + 4]}")
+            if hooks.rx:
+                emit(hooks.rx, buffer[0 : length + 4])
             return ((cmd, data), rest)
-    except CrcError as exc:
-        return synchronize(str(exc))
+    except CrcError:
+        return synchronize("crc")
 
     # Garbage crc - throw out the byte and try again
-    return synchronize(f"Invalid CRC: {crc}")
+    return synchronize("crc")
@@ -0,0 +1,591 @@
+"""
+Drive many crystalfontz devices from a single event loop.
+
+A `DevicePool` holds a `Client` for each of a number of named ports. Ports are
+opened concurrently, and commands may be sent to a single device or fanned out
+to every device in the pool. Reports from every device are passed to a single
+`PoolReportHandler`, tagged with the name of the device they came from.
+
+# Example
+
+```py
+import asyncio
+
+from crystalfontz import device_pool
+
+
+async def main():
+    async with device_pool(
+        {"bay-1": "/dev/ttyUSB0", "bay-2": "/dev/ttyUSB1"}
+    ) as pool:
+        await pool.send_data(0, 0, "Hello world!")
+        statuses = await pool.read_status()
+
+asyncio.run(main())
+```
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import logging
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Concatenate,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    ParamSpec,
+    Self,
+    Tuple,
+    TypeVar,
+)
+
+from crystalfontz.baud import BaudRate, SLOW_BAUD_RATE
+from crystalfontz.client import (
+    Client,
+    create_connection,
+    DEFAULT_RETRY_TIMES,
+    DEFAULT_TIMEOUT,
+)
+from crystalfontz.device import Device, DeviceStatus
+from crystalfontz.error import ConnectionError
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import (
+    DataSent,
+    KeyActivityReport,
+    Pong,
+    TemperatureReport,
+)
+from crystalfontz.transport import DEFAULT_TRANSPORT, TransportType
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# The outcome of a command sent to a single device in the pool
+PoolResult = Tuple[Exception, None] | Tuple[None, T]
+
+
+class PoolReportHandler(ABC):
+    """
+    Handle reporting for a pool of devices. Reports are tagged with the name of
+    the device which issued them.
+    """
+
+    @abstractmethod
+    async def on_key_activity(
+        self: Self, device: str, report: KeyActivityReport
+    ) -> None:
+        """
+        This method is called on any new key activity report.
+        """
+
+        raise NotImplementedError("on_key_activity")
+
+    @abstractmethod
+    async def on_temperature(
+        self: Self, device: str, report: TemperatureReport
+    ) -> None:
+        """
+        This method is called on any new temperature report.
+        """
+
+        raise NotImplementedError("on_temperature")
+
+
+class NoopPoolReportHandler(PoolReportHandler):
+    """
+    A pool report handler which does nothing.
+    """
+
+    async def on_key_activity(
+        self: Self, device: str, report: KeyActivityReport
+    ) -> None:
+        pass
+
+    async def on_temperature(
+        self: Self, device: str, report: TemperatureReport
+    ) -> None:
+        pass
+
+
+class LoggingPoolReportHandler(PoolReportHandler):
+    """
+    A pool report handler which logs, using Python's logging module.
+    """
+
+    def __init__(self: Self) -> None:
+        self.logger = logging.getLogger(__name__)
+
+    async def on_key_activity(
+        self: Self, device: str, report: KeyActivityReport
+    ) -> None:
+        self.logger.info(f"{device}: {report}")
+
+    async def on_temperature(
+        self: Self, device: str, report: TemperatureReport
+    ) -> None:
+        self.logger.info(f"{device}: {report}")
+
+
+@dataclass
+class DeviceHealth:
+    """
+    The health of a single device in a pool.
+
+    Attributes:
+        name (str): The name of the device.
+        port (str): The device's port.
+        connected (bool): Whether the device is currently connected.
+        last_ok (float | None): The loop time of the last successful command.
+        last_report (float | None): The loop time of the last report received.
+        last_error (Exception | None): The most recent error, if any.
+        commands (int): The number of commands sent to the device.
+        failures (int): The number of commands which failed.
+        consecutive_failures (int): The number of commands which failed since the
+            last successful command.
+        reports (int): The number of reports received from the device.
+        restarts (int): The number of times the device's connection was restarted.
+    """
+
+    name: str
+    port: str
+    connected: bool = False
+    last_ok: Optional[float] = None
+    last_report: Optional[float] = None
+    last_error: Optional[Exception] = None
+    commands: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    reports: int = 0
+    restarts: int = 0
+
+    @property
+    def healthy(self: Self) -> bool:
+        """
+        Whether the device is connected, and its last command succeeded.
+        """
+
+        return self.connected and not self.consecutive_failures
+
+
+class _TaggedReportHandler(ReportHandler):
+    # Forwards a single client's reports to the pool's handler
+
+    def __init__(self: Self, pool: "Pool", name: str) -> None:
+        self.pool = pool
+        self.name = name
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        self.pool._report_received(self.name)
+        await self.pool.report_handler.on_key_activity(self.name, report)
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        self.pool._report_received(self.name)
+        await self.pool.report_handler.on_temperature(self.name, report)
+
+
+class Pool(ABC):
+    """
+    A pool of crystalfontz devices, addressed by name.
+
+    Commands may be sent to a single device with `pool.call`, or to every device
+    at once with `pool.broadcast`, which returns a result for each device. A
+    failure on one device doesn't affect the others. Instead, it's recorded in
+    that device's health, which is available through `pool.health`.
+    """
+
+    def __init__(
+        self: Self,
+        ports: Mapping[str, str],
+        report_handler: PoolReportHandler,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self.ports: Dict[str, str] = dict(ports)
+        self.report_handler: PoolReportHandler = report_handler
+        self.loop: asyncio.AbstractEventLoop = loop
+        self._health: Dict[str, DeviceHealth] = {
+            name: DeviceHealth(name=name, port=port) for name, port in ports.items()
+        }
+
+    @property
+    @abstractmethod
+    def names(self: Self) -> List[str]:
+        """
+        The names of every connected device in the pool.
+        """
+
+        raise NotImplementedError("names")
+
+    def __len__(self: Self) -> int:
+        return len(self.names)
+
+    #
+    # Connecting
+    #
+
+    @abstractmethod
+    async def open(
+        self: Self,
+        model: str = "CFA533",
+        hardware_rev: Optional[str] = None,
+        firmware_rev: Optional[str] = None,
+        device: Optional[Device] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_times: int = DEFAULT_RETRY_TIMES,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+        transport: TransportType = DEFAULT_TRANSPORT,
+    ) -> None:
+        """
+        Open every port in the pool concurrently. Ports which fail to open are
+        logged and recorded in their device's health, rather than raised.
+        """
+
+        raise NotImplementedError("open")
+
+    @abstractmethod
+    def close(self: Self) -> None:
+        """
+        Close every connection in the pool.
+        """
+
+        raise NotImplementedError("close")
+
+    @abstractmethod
+    async def closed(self: Self) -> None:
+        """
+        Wait for every connection in the pool to close. Errors which caused a
+        connection to close are recorded in that device's health.
+        """
+
+        raise NotImplementedError("closed")
+
+    #
+    # Commands
+    #
+
+    @abstractmethod
+    async def call(
+        self: Self,
+        name: str,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """
+        Call a `Client` method on a single device. For example:
+
+        ```py
+        pong = await pool.call("bay-1", Client.ping, b"ping!")
+        ```
+        """
+
+        raise NotImplementedError("call")
+
+    #
+    # Health
+    #
+
+    def health(self: Self) -> Dict[str, DeviceHealth]:
+        """
+        The health of every device in the pool, by name.
+        """
+
+        return dict(self._health)
+
+    def _report_received(self: Self, name: str) -> None:
+        health = self._health[name]
+        health.reports += 1
+        health.last_report = self.loop.time()
+
+    async def _call(
+        self: Self,
+        name: str,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> PoolResult[T]:
+        health = self._health[name]
+        health.commands += 1
+        try:
+            rv = await self.call(name, method, *args, **kwargs)
+        except Exception as exc:
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = exc
+            return (exc, None)
+        else:
+            health.consecutive_failures = 0
+            health.last_ok = self.loop.time()
+            return (None, rv)
+
+    #
+    # Fan-out
+    #
+
+    async def broadcast(
+        self: Self,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> Dict[str, PoolResult[T]]:
+        """
+        Call a `Client` method on every connected device concurrently. Returns a
+        result for each device, by name. For example:
+
+        ```py
+        results = await pool.broadcast(Client.set_backlight, 0.5)
+        ```
+        """
+
+        names = self.names
+        results = await asyncio.gather(
+            *[self._call(name, method, *args, **kwargs) for name in names]
+        )
+        return dict(zip(names, results))
+
+    async def ping(
+        self: Self,
+        payload: bytes,
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> Dict[str, PoolResult[Pong]]:
+        """
+        Ping every device in the pool. This is a convenient way to refresh each
+        device's health.
+        """
+
+        return await self.broadcast(
+            Client.ping, payload, timeout=timeout, retry_times=retry_times
+        )
+
+    async def send_data(
+        self: Self,
+        row: int,
+        column: int,
+        data: str | bytes,
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> Dict[str, PoolResult[DataSent]]:
+        """
+        Send the same data to every device in the pool.
+        """
+
+        return await self.broadcast(
+            Client.send_data,
+            row,
+            column,
+            data,
+            timeout=timeout,
+            retry_times=retry_times,
+        )
+
+    async def read_status(
+        self: Self,
+        timeout: Optional[float] = None,
+        retry_times: Optional[int] = None,
+    ) -> Dict[str, PoolResult[DeviceStatus]]:
+        """
+        Read the status of every device in the pool.
+        """
+
+        return await self.broadcast(
+            Client.read_status, timeout=timeout, retry_times=retry_times
+        )
+
+
+class DevicePool(Pool):
+    """
+    A pool of crystalfontz clients, sharing a single event loop. Typically created
+    through a call to `device_pool` or `create_pool`.
+
+    Individual clients are available by name through `pool.clients`, or by
+    indexing the pool directly.
+    """
+
+    def __init__(
+        self: Self,
+        ports: Mapping[str, str],
+        report_handler: PoolReportHandler,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        super().__init__(ports, report_handler, loop)
+        self.clients: Dict[str, Client] = dict()
+
+    def __getitem__(self: Self, name: str) -> Client:
+        if name not in self.clients:
+            raise ConnectionError(f"Device {name} is not connected")
+        return self.clients[name]
+
+    @property
+    def names(self: Self) -> List[str]:
+        return list(self.clients.keys())
+
+    async def open(
+        self: Self,
+        model: str = "CFA533",
+        hardware_rev: Optional[str] = None,
+        firmware_rev: Optional[str] = None,
+        device: Optional[Device] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_times: int = DEFAULT_RETRY_TIMES,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+        transport: TransportType = DEFAULT_TRANSPORT,
+    ) -> None:
+        async def open_one(name: str, port: str) -> None:
+            try:
+                client = await create_connection(
+                    port,
+                    model=model,
+                    hardware_rev=hardware_rev,
+                    firmware_rev=firmware_rev,
+                    device=device,
+                    report_handler=_TaggedReportHandler(self, name),
+                    timeout=timeout,
+                    retry_times=retry_times,
+                    loop=self.loop,
+                    baud_rate=baud_rate,
+                    transport=transport,
+                )
+            except Exception as exc:
+                logger.warning(f"Failed to connect to {name} ({port}): {exc}")
+                self._health[name].last_error = exc
+            else:
+                self.clients[name] = client
+                self._health[name].connected = True
+                client.closed.add_done_callback(
+                    lambda closed: self._client_closed(name, closed)
+                )
+
+        await asyncio.gather(
+            *[open_one(name, port) for name, port in self.ports.items()]
+        )
+
+    def _client_closed(self: Self, name: str, closed: asyncio.Future[None]) -> None:
+        health = self._health[name]
+        health.connected = False
+        if not closed.cancelled() and closed.exception():
+            health.last_error = closed.exception()
+        self.clients.pop(name, None)
+
+    def close(self: Self) -> None:
+        for client in list(self.clients.values()):
+            client.close()
+
+    async def closed(self: Self) -> None:
+        await asyncio.gather(
+            *[client.closed for client in list(self.clients.values())],
+            return_exceptions=True,
+        )
+
+    async def call(
+        self: Self,
+        name: str,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        return await method(self[name], *args, **kwargs)
+
+
+def _named_ports(ports: Mapping[str, str] | Iterable[str]) -> Mapping[str, str]:
+    if isinstance(ports, Mapping):
+        return ports
+    return {port: port for port in ports}
+
+
+async def create_pool(
+    ports: Mapping[str, str] | Iterable[str],
+    model: str = "CFA533",
+    hardware_rev: Optional[str] = None,
+    firmware_rev: Optional[str] = None,
+    device: Optional[Device] = None,
+    report_handler: Optional[PoolReportHandler] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retry_times: int = DEFAULT_RETRY_TIMES,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+) -> DevicePool:
+    """
+    Create a pool of connections to the specified devices. Returns a DevicePool
+    object.
+
+    Ports may either be a mapping of device names to ports, or a list of ports. In
+    the latter case, each device is named after its port. All other arguments are
+    shared by every connection, and are the same as for `create_connection`.
+
+    To close the pool, call `pool.close()` and then await `pool.closed()`.
+    """
+
+    _loop = loop if loop else asyncio.get_running_loop()
+
+    pool = DevicePool(
+        _named_ports(ports),
+        report_handler=report_handler or NoopPoolReportHandler(),
+        loop=_loop,
+    )
+
+    await pool.open(
+        model=model,
+        hardware_rev=hardware_rev,
+        firmware_rev=firmware_rev,
+        device=device,
+        timeout=timeout,
+        retry_times=retry_times,
+        baud_rate=baud_rate,
+        transport=transport,
+    )
+
+    return pool
+
+
+@asynccontextmanager
+async def device_pool(
+    ports: Mapping[str, str] | Iterable[str],
+    model: str = "CFA533",
+    hardware_rev: Optional[str] = None,
+    firmware_rev: Optional[str] = None,
+    device: Optional[Device] = None,
+    report_handler: Optional[PoolReportHandler] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retry_times: int = DEFAULT_RETRY_TIMES,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+) -> AsyncGenerator[DevicePool, None]:
+    """
+    Create a pool of connections to the specified devices, with an associated
+    context.
+
+    This context will automatically close every connection on exit and wait for
+    the connections to close.
+    """
+
+    pool = await create_pool(
+        ports,
+        model=model,
+        hardware_rev=hardware_rev,
+        firmware_rev=firmware_rev,
+        device=device,
+        report_handler=report_handler,
+        timeout=timeout,
+        retry_times=retry_times,
+        loop=loop,
+        baud_rate=baud_rate,
+        transport=transport,
+    )
+
+    try:
+        yield pool
+    finally:
+        pool.close()
+        await pool.closed()
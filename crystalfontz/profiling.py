@@ -0,0 +1,331 @@
+"""
+On-demand CPU and memory profiling for long-running processes.
+
+A `Profiler` profiles the event loop thread for a number of seconds, and writes
+the results to a `pstats` file, which can be read with `python -m pstats` or
+tools like snakeviz. Two modes are supported:
+
+- "cprofile": a deterministic profile with `cProfile`. This is exact, but slows
+  down everything the event loop runs while it's enabled.
+- "sampling": a thread samples the event loop thread's stack on an interval.
+  Times are estimated from sample counts, and call counts are sample counts, but
+  the overhead is low enough for production.
+
+A profiler also manages `tracemalloc` snapshots, so that memory growth can be
+tracked down by diffing snapshots taken some time apart. Snapshots are taken and
+compared in a thread, so that they don't block the event loop.
+
+Files are written to the profiler's `directory`, which defaults to the system's
+temporary directory. They're created with unguessable names, and existing files
+are never reused.
+
+The DBus service exposes these as privileged methods.
+"""
+
+import asyncio
+import cProfile
+from datetime import datetime
+import linecache
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import Dict, List, Literal, Optional, Self, Tuple
+
+from crystalfontz.error import ProfileError
+
+logger = logging.getLogger(__name__)
+
+ProfileMode = Literal["cprofile"] | Literal["sampling"]
+
+PROFILE_MODES: List[ProfileMode] = ["cprofile", "sampling"]
+DEFAULT_PROFILE_MODE: ProfileMode = "cprofile"
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_TRACEMALLOC_FRAMES = 1
+DEFAULT_DIFF_LIMIT = 10
+
+# Keep at most this many tracemalloc snapshots in memory
+MAX_SNAPSHOTS = 8
+
+# A function, as identified by pstats
+FunctionKey = Tuple[str, int, str]
+
+
+def _function_key(frame: FrameType) -> FunctionKey:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class SampledStats:
+    """
+    Stack samples, aggregated in the format used by `pstats`.
+    """
+
+    def __init__(self: Self) -> None:
+        self.samples: int = 0
+        self.elapsed: float = 0.0
+        # Per function: samples as the leaf, samples anywhere in the stack, and
+        # samples by caller
+        self._own: Dict[FunctionKey, int] = dict()
+        self._total: Dict[FunctionKey, int] = dict()
+        self._callers: Dict[FunctionKey, Dict[FunctionKey, int]] = dict()
+
+    def add(self: Self, frame: FrameType) -> None:
+        """
+        Record a sample of a stack, given its innermost frame.
+        """
+
+        self.samples += 1
+        leaf = _function_key(frame)
+        self._own[leaf] = self._own.get(leaf, 0) + 1
+
+        seen = set()
+        current: Optional[FrameType] = frame
+        while current is not None:
+            key = _function_key(current)
+            # Recursive functions count once per sample
+            if key not in seen:
+                seen.add(key)
+                self._total[key] = self._total.get(key, 0) + 1
+            parent = current.f_back
+            if parent is not None:
+                callers = self._callers.setdefault(key, dict())
+                caller = _function_key(parent)
+                callers[caller] = callers.get(caller, 0) + 1
+            current = parent
+
+    def stats(self: Self) -> Dict[FunctionKey, Tuple[int, int, float, float, Dict]]:
+        """
+        Convert samples to a `pstats` dict, estimating times from the share of
+        samples each function appears in.
+        """
+
+        per_sample = self.elapsed / self.samples if self.samples else 0.0
+        return {
+            key: (
+                total,
+                total,
+                self._own.get(key, 0) * per_sample,
+                total * per_sample,
+                dict(self._callers.get(key, dict())),
+            )
+            for key, total in self._total.items()
+        }
+
+
+def _write_stats(path: str, stats: Dict) -> None:
+    with open(path, "wb") as f:
+        marshal.dump(stats, f)
+
+
+def sample_thread(
+    thread_id: int,
+    duration: float,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+) -> SampledStats:
+    """
+    Sample a thread's stack every `interval` seconds for `duration` seconds. This
+    blocks, and must be called from another thread.
+    """
+
+    sampled = SampledStats()
+    start = time.monotonic()
+    end = start + duration
+
+    while time.monotonic() < end:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        sampled.add(frame)
+        del frame
+        time.sleep(interval)
+
+    sampled.elapsed = time.monotonic() - start
+    return sampled
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+
+
+def format_snapshot_diff(
+    before: tracemalloc.Snapshot,
+    after: tracemalloc.Snapshot,
+    limit: int = DEFAULT_DIFF_LIMIT,
+) -> str:
+    """
+    Format the source lines whose allocations grew the most between two
+    snapshots.
+    """
+
+    stats = after.compare_to(before, "lineno")
+    total = sum(stat.size_diff for stat in stats)
+    lines: List[str] = [f"Total: {total / 1024:+.1f} KiB"]
+
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{frame.filename}:{frame.lineno}: {stat.size_diff / 1024:+.1f} KiB "
+            f"({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB total)"
+        )
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        if source:
+            lines.append(f"    {source}")
+
+    return "\n".join(lines) + "\n"
+
+
+class Profiler:
+    """
+    Profile CPU time and memory on demand.
+    """
+
+    def __init__(
+        self: Self,
+        directory: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.directory: str = directory if directory else tempfile.gettempdir()
+        self.loop: Optional[asyncio.AbstractEventLoop] = loop
+        self._profiling: bool = False
+        self._snapshots: Dict[int, tracemalloc.Snapshot] = dict()
+        self._next_snapshot: int = 1
+
+    @property
+    def profiling(self: Self) -> bool:
+        """
+        Whether a CPU profile is in progress.
+        """
+
+        return self._profiling
+
+    def create_file(self: Self, kind: str, suffix: str) -> str:
+        """
+        Create an empty file in the profiler's directory, and return its path.
+        This blocks, and should be called from a thread.
+        """
+
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        fd, path = tempfile.mkstemp(
+            prefix=f"crystalfontz-{kind}-{stamp}-", suffix=suffix, dir=self.directory
+        )
+        os.close(fd)
+        return path
+
+    async def profile_cpu(
+        self: Self,
+        duration: float,
+        mode: ProfileMode = DEFAULT_PROFILE_MODE,
+        path: Optional[str] = None,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> str:
+        """
+        Profile the event loop for `duration` seconds, and write a `pstats` file.
+        Returns the file's path.
+        """
+
+        if mode not in PROFILE_MODES:
+            raise ProfileError(f"Unknown profile mode: {mode}")
+        if duration <= 0:
+            raise ProfileError("Profile duration must be positive")
+        if self._profiling:
+            raise ProfileError("A profile is already in progress")
+
+        loop = self.loop if self.loop else asyncio.get_running_loop()
+        self._profiling = True
+        logger.info(f"Profiling ({mode}) for {duration}s")
+
+        try:
+            if not path:
+                path = await loop.run_in_executor(None, self.create_file, mode, ".prof")
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await asyncio.sleep(duration)
+                finally:
+                    profile.disable()
+                await loop.run_in_executor(None, profile.dump_stats, path)
+            else:
+                sampled = await loop.run_in_executor(
+                    None, sample_thread, threading.get_ident(), duration, interval
+                )
+                await loop.run_in_executor(None, _write_stats, path, sampled.stats())
+        finally:
+            self._profiling = False
+
+        logger.info(f"Wrote profile to {path}")
+        return path
+
+    @property
+    def tracing(self: Self) -> bool:
+        """
+        Whether `tracemalloc` is tracing allocations.
+        """
+
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self: Self, frames: int = DEFAULT_TRACEMALLOC_FRAMES) -> None:
+        """
+        Start tracing memory allocations, storing `frames` frames of traceback
+        for each.
+        """
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop_tracing(self: Self) -> None:
+        """
+        Stop tracing memory allocations, and discard snapshots.
+        """
+
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    async def take_snapshot(self: Self) -> int:
+        """
+        Take a `tracemalloc` snapshot. Returns an id for use with `diff`. Only
+        the most recent snapshots are kept.
+        """
+
+        if not tracemalloc.is_tracing():
+            raise ProfileError("Memory tracing must be started first")
+
+        loop = self.loop if self.loop else asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(None, _take_snapshot)
+        snapshot_id = self._next_snapshot
+        self._next_snapshot += 1
+        self._snapshots[snapshot_id] = snapshot
+
+        while len(self._snapshots) > MAX_SNAPSHOTS:
+            del self._snapshots[min(self._snapshots)]
+
+        return snapshot_id
+
+    async def diff(
+        self: Self, before: int, after: int, limit: int = DEFAULT_DIFF_LIMIT
+    ) -> str:
+        """
+        Compare two snapshots, and format the lines whose allocations grew most.
+        """
+
+        for snapshot_id in (before, after):
+            if snapshot_id not in self._snapshots:
+                raise ProfileError(f"Unknown snapshot: {snapshot_id}")
+
+        loop = self.loop if self.loop else asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            format_snapshot_diff,
+            self._snapshots[before],
+            self._snapshots[after],
+            limit,
+        )
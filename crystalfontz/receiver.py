@@ -1,16 +1,59 @@
 import asyncio
-from typing import Any, Self, Set, Tuple, TypeVar
+from typing import Any, Callable, Hashable, Literal, Optional, Self, Set, Tuple, TypeVar
 
 from crystalfontz.response import Response
 
 R = TypeVar("R", bound=Response)
 Result = Tuple[Exception, None] | Tuple[None, R]
 
+# What a bounded receiver does with a new result when it's full:
+#
+# - "drop-oldest" discards the oldest queued result to make room
+# - "drop-newest" discards the new result
+# - "coalesce-latest" replaces any queued result with the same key, so that only
+#   the latest result for each key is queued. If there is no such result, the
+#   oldest queued result is discarded.
+#
+# Queued exceptions are never discarded to make room for a response. Unbounded
+# receivers never drop or coalesce results.
+DropPolicy = (
+    Literal["drop-oldest"] | Literal["drop-newest"] | Literal["coalesce-latest"]
+)
+
+DEFAULT_DROP_POLICY: DropPolicy = "drop-oldest"
+
+CoalesceKey = Callable[[Any], Hashable]
+
+Predicate = Callable[[Any], bool]
+
 
 class Receiver(asyncio.Queue[Result[R]]):
-    def __init__(self: Self, receiving: "Set[Receiver[Any]]", maxsize=0) -> None:
+    """
+    A queue of results for a subscription.
+
+    By default, receivers are unbounded. When created with a `maxsize`, a full
+    receiver applies its drop policy rather than raising `asyncio.QueueFull`, and
+    counts dropped results in `receiver.dropped`. Exceptions are never dropped in
+    favor of responses.
+
+    When created with a `predicate`, responses for which the predicate is false
+    are discarded before they're queued.
+    """
+
+    def __init__(
+        self: Self,
+        receiving: "Set[Receiver[Any]]",
+        maxsize: int = 0,
+        policy: DropPolicy = DEFAULT_DROP_POLICY,
+        key: Optional[CoalesceKey] = None,
+        predicate: Optional[Predicate] = None,
+    ) -> None:
         super().__init__(maxsize)
         self._receiving = receiving
+        self.policy: DropPolicy = policy
+        self._key: CoalesceKey = key if key else type
+        self._predicate: Optional[Predicate] = predicate
+        self.dropped: int = 0
 
     def _set_receiving(self: Self) -> None:
         self._receiving.add(self)
@@ -18,8 +61,62 @@ class Receiver(asyncio.Queue[Result[R]]):
     def _set_not_receiving(self: Self) -> None:
         self._receiving.discard(self)
 
+    def put_nowait(self: Self, item: Result[R]) -> None:
+        exc, res = item
+
+        if res is not None and self._predicate and not self._predicate(res):
+            return
+
+        if self.maxsize <= 0:
+            super().put_nowait(item)
+            return
+
+        if self.policy == "coalesce-latest" and res is not None:
+            if self._coalesce(res, item):
+                return
+
+        if self.full():
+            if self.policy == "drop-newest" and exc is None:
+                self.dropped += 1
+                return
+            if not self._drop_oldest(exc is not None):
+                # The queue is full of exceptions
+                self.dropped += 1
+                return
+
+        super().put_nowait(item)
+
+    def _coalesce(self: Self, res: R, item: Result[R]) -> bool:
+        # Replace a queued result with the same key in place, preserving its
+        # position in the queue
+        queue: Any = getattr(self, "_queue")
+        key = self._key(res)
+        for i, (queued_exc, queued_res) in enumerate(queue):
+            if queued_exc is None and self._key(queued_res) == key:
+                queue[i] = item
+                self.dropped += 1
+                return True
+        return False
+
+    def _drop_oldest(self: Self, for_exc: bool) -> bool:
+        # Drop the oldest queued response. Only an exception may take the place
+        # of another exception.
+        queue: Any = getattr(self, "_queue")
+        for i, (queued_exc, _) in enumerate(queue):
+            if queued_exc is None:
+                del queue[i]
+                break
+        else:
+            if not for_exc:
+                return False
+            queue.popleft()
+        self.task_done()
+        self.dropped += 1
+        return True
+
     async def get(self: Self) -> Result[R]:
         self._set_receiving()
-        rv = await super().get()
-        self._set_not_receiving()
-        return rv
+        try:
+            return await super().get()
+        finally:
+            self._set_not_receiving()
@@ -0,0 +1,247 @@
+"""
+An in-memory flight recorder of recent packets.
+
+When a client fails with a `DeviceError` or `ResponseDecodeError`, debug logs are
+usually the only evidence of what happened on the wire - and debug logging is
+too expensive to leave on. A flight recorder keeps the last few hundred frames
+sent and received, with monotonic timestamps, in a fixed-size ring buffer.
+Recording a frame is a single deque append.
+
+The recording is dumped to a file when the client sees an error, when the
+process receives `SIGUSR1` (if `add_signal_handler` was called), or on demand.
+Files are written from a thread, so dumping never blocks the event loop.
+
+Dumping on errors requires a `directory`, which should be owned by the process
+writing to it. Other dumps fall back to the system's temporary directory. Dump
+files are created with unguessable names, never following or overwriting an
+existing file, and only the newest `keep` dumps in the directory are kept.
+
+# Example
+
+```py
+from crystalfontz import connection, FlightRecorder
+
+recorder = FlightRecorder(size=512, directory="/var/log/crystalfontz")
+
+async with connection("/dev/ttyUSB0", flight_recorder=recorder) as client:
+    recorder.add_signal_handler(client.loop)
+    ...
+```
+"""
+
+import asyncio
+from collections import deque
+from datetime import datetime
+import logging
+import os
+import signal
+import tempfile
+import time
+from typing import Deque, List, Literal, Optional, Self, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLIGHT_RECORDER_SIZE = 256
+
+# Don't dump more often than this when errors come in bursts
+DUMP_INTERVAL = 1.0
+
+# Keep this many dumps in the dump directory, removing older ones
+DEFAULT_KEEP_DUMPS = 10
+
+DUMP_PREFIX = "crystalfontz-flight-"
+
+Direction = Literal["tx"] | Literal["rx"]
+
+# A frame is a (monotonic time, direction, data) tuple. Received frames are the
+# chunks read from the transport, so they include any noise between packets.
+Frame = Tuple[float, Direction, bytes]
+
+
+def format_frames(frames: List[Frame], reason: Optional[str] = None) -> str:
+    """
+    Format frames as text, one frame per line. Times are relative to the most
+    recent frame.
+    """
+
+    now = time.monotonic()
+    lines: List[str] = [
+        "# crystalfontz flight recorder",
+        f"# dumped at {datetime.now().isoformat()} (monotonic {now:.6f})",
+    ]
+    if reason:
+        lines.append(f"# reason: {reason}")
+    lines.append(f"# {len(frames)} frames")
+
+    last = frames[-1][0] if frames else now
+    for ts, direction, data in frames:
+        lines.append(f"{ts - last:+.6f} {direction} {data.hex(' ')}")
+
+    return "\n".join(lines) + "\n"
+
+
+class FlightRecorder:
+    """
+    A fixed-size ring buffer of the most recent frames sent and received.
+    """
+
+    def __init__(
+        self: Self,
+        size: int = DEFAULT_FLIGHT_RECORDER_SIZE,
+        directory: Optional[str] = None,
+        interval: float = DUMP_INTERVAL,
+        keep: int = DEFAULT_KEEP_DUMPS,
+    ) -> None:
+        self.size: int = size
+        self.directory: Optional[str] = directory
+        self.interval: float = interval
+        self.keep: int = keep
+        self.frames: Deque[Frame] = deque(maxlen=size)
+        self._last_dump: Optional[float] = None
+
+    def tx(self: Self, data: bytes) -> None:
+        """
+        Record a frame sent to the device.
+        """
+
+        self.frames.append((time.monotonic(), "tx", data))
+
+    def rx(self: Self, data: bytes) -> None:
+        """
+        Record a frame received from the device.
+        """
+
+        self.frames.append((time.monotonic(), "rx", data))
+
+    def snapshot(self: Self) -> List[Frame]:
+        """
+        Copy the current contents of the ring buffer.
+        """
+
+        return list(self.frames)
+
+    def dump(
+        self: Self, path: Optional[str] = None, reason: Optional[str] = None
+    ) -> str:
+        """
+        Write the recording to a file, and return its path. This blocks - in
+        async code, use `dump_async`.
+        """
+
+        return _write_dump(
+            format_frames(self.snapshot(), reason), path, self.directory, self.keep
+        )
+
+    async def dump_async(
+        self: Self,
+        path: Optional[str] = None,
+        reason: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> str:
+        """
+        Write the recording to a file from a thread, and return its path.
+        """
+
+        _loop = loop if loop else asyncio.get_running_loop()
+        # Take the snapshot on the event loop, so frames aren't appended while
+        # the thread is reading them
+        text = format_frames(self.snapshot(), reason)
+        written = await _loop.run_in_executor(
+            None, _write_dump, text, path, self.directory, self.keep
+        )
+        logger.info(f"Dumped flight recorder to {written}")
+        return written
+
+    def dump_on_error(
+        self: Self, exc: BaseException, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """
+        Dump the recording in the background after an error. Dumps are rate
+        limited, so that a burst of errors results in a single file. Nothing is
+        dumped unless a `directory` is configured.
+        """
+
+        if self.directory is None:
+            return
+
+        now = time.monotonic()
+        if self._last_dump is not None and now - self._last_dump < self.interval:
+            return
+        self._last_dump = now
+        self._schedule_dump(f"{type(exc).__name__}: {exc}", loop)
+
+    def _schedule_dump(
+        self: Self, reason: str, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        task = loop.create_task(self.dump_async(reason=reason, loop=loop))
+        task.add_done_callback(_log_dump_failure)
+
+    def add_signal_handler(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        sig: signal.Signals = signal.SIGUSR1,
+    ) -> None:
+        """
+        Dump the recording whenever the process receives `sig`.
+        """
+
+        loop.add_signal_handler(sig, self._schedule_dump, sig.name, loop)
+
+    def remove_signal_handler(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        sig: signal.Signals = signal.SIGUSR1,
+    ) -> None:
+        loop.remove_signal_handler(sig)
+
+
+def _write_dump(
+    text: str,
+    path: Optional[str] = None,
+    directory: Optional[str] = None,
+    keep: int = DEFAULT_KEEP_DUMPS,
+) -> str:
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    directory = directory if directory else tempfile.gettempdir()
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    # mkstemp creates the file exclusively, with a random name, so an existing
+    # file or symlink is never written through
+    fd, path = tempfile.mkstemp(
+        prefix=f"{DUMP_PREFIX}{stamp}-", suffix=".log", dir=directory
+    )
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    _prune_dumps(directory, keep)
+    return path
+
+
+def _prune_dumps(directory: str, keep: int) -> None:
+    uid = os.getuid()
+    dumps: List[Tuple[float, str]] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith(DUMP_PREFIX):
+                continue
+            st = entry.stat(follow_symlinks=False)
+            # Only remove our own dumps
+            if entry.is_file(follow_symlinks=False) and st.st_uid == uid:
+                dumps.append((st.st_mtime, entry.path))
+
+    dumps.sort()
+    for _, path in dumps[: max(len(dumps) - keep, 0)]:
+        try:
+            os.unlink(path)
+        except OSError as exc:
+            logger.debug(f"Failed to remove old flight recorder dump {path}: {exc}")
+
+
+def _log_dump_failure(task: asyncio.Task[str]) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc:
+        logger.warning(f"Failed to dump flight recorder: {exc}")
@@ -3,6 +3,8 @@ import json
 import logging
 from typing import Optional, Self
 
+from crystalfontz.demand import ReportDemand
+from crystalfontz.device import Device
 from crystalfontz.format import OutputMode
 from crystalfontz.response import KeyActivityReport, TemperatureReport
 
@@ -28,12 +30,24 @@ class ReportHandler(ABC):
 
         raise NotImplementedError("on_temperature")
 
+    def demand(self: Self, device: Device) -> ReportDemand:
+        """
+        The reports this handler wants. When demand-driven reporting is enabled,
+        the device is configured to send these reports. By default, this is every
+        key activity and temperature report the device supports.
+        """
+
+        return ReportDemand.everything(device)
+
 
 class NoopReportHandler(ReportHandler):
     """
     A report handler which does nothing.
     """
 
+    def demand(self: Self, device: Device) -> ReportDemand:
+        return ReportDemand()
+
     async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
         pass
 
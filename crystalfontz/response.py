@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from dataclasses import asdict
 import struct
 import textwrap
-from typing import Any, Callable, cast, Dict, Self, Type, TypeVar
+from typing import Any, Callable, cast, Dict, Optional, Self, Type, TypeVar
 
 from crystalfontz.error import (
     DecodeError,
@@ -27,8 +27,15 @@ class Response(ABC):
 
     To implement a new response type, subclass this class and implement the
     __init__ method.
+
+    Attributes:
+        received_at (Optional[float]): When the frame carrying the response
+            arrived, in `time.monotonic` seconds. Set by the client when
+            `client.stamp_responses` is true, as it is when measuring key latency.
     """
 
+    received_at: Optional[float] = None
+
     @classmethod
     @abstractmethod
     def from_bytes(cls: Type[Self], data: bytes) -> Self:
@@ -0,0 +1,285 @@
+"""
+Correlate a request's time across every stage, from DBus call to serial frame.
+
+A `Trace` follows a single request, and carries an id. While a trace is active -
+see `SpanRecorder.trace` - the client times each stage of sending a command as a
+`Span`:
+
+- `queue`: waiting for the client's command lock
+- `write`: serializing and writing the command's packet
+- `ack`: waiting for the device's response, including wire time
+
+The DBus service starts a trace for every method call when `trace_requests` is
+set. It adds `dbus.unpack` and `dbus.pack` spans, covering the time before the
+first command and after the last.
+
+Finished traces are kept in memory, and passed to exporters. Traces may be
+exported as JSON lines, one span per line, or in the Chrome trace event format,
+which can be loaded into Perfetto or `chrome://tracing`.
+
+# Example
+
+```py
+recorder = SpanRecorder()
+recorder.exporters.append(JsonLinesExporter("/tmp/spans.jsonl"))
+
+with recorder.trace("startup"):
+    await client.versions()
+```
+"""
+
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Self,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TRACES = 1024
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("crystalfontz_trace", default=None)
+
+
+def active_trace() -> Optional["Trace"]:
+    """
+    The trace for the current request, if any.
+    """
+
+    return _current.get()
+
+
+@dataclass
+class Span:
+    """
+    A timed stage of a request.
+
+    Attributes:
+        name (str): The name of the stage.
+        start (float): When the stage started, in `time.perf_counter` seconds.
+        end (float): When the stage ended, in `time.perf_counter` seconds.
+        attrs (Dict[str, Any]): Additional attributes, such as the command name.
+    """
+
+    name: str
+    start: float
+    end: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self: Self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """
+    A request, and the spans timing its stages.
+    """
+
+    def __init__(self: Self, name: str, **attrs: Any) -> None:
+        self.id: str = os.urandom(8).hex()
+        self.name: str = name
+        self.attrs: Dict[str, Any] = attrs
+        self.time: float = time.time()
+        self.start: float = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.spans: List[Span] = []
+
+    def add(self: Self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """
+        Add a span, with times in `time.perf_counter` seconds.
+        """
+
+        self.spans.append(Span(name, start, end, attrs))
+
+    def finish(self: Self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration(self: Self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def as_lines(self: Self) -> List[Dict[str, Any]]:
+        """
+        Represent the trace as one dict per span, starting with the whole request.
+        Start times are relative to the start of the request.
+        """
+
+        root: Dict[str, Any] = dict(
+            trace_id=self.id,
+            trace=self.name,
+            span=self.name,
+            time=self.time,
+            start=0.0,
+            duration=self.duration,
+            **self.attrs,
+        )
+        if self.error:
+            root["error"] = self.error
+
+        return [root] + [
+            dict(
+                trace_id=self.id,
+                trace=self.name,
+                span=span.name,
+                start=span.start - self.start,
+                duration=span.duration,
+                **span.attrs,
+            )
+            for span in self.spans
+        ]
+
+
+Exporter = Callable[[Trace], None]
+
+
+class SpanRecorder:
+    """
+    Start traces, and keep the most recently finished ones.
+    """
+
+    def __init__(self: Self, maxlen: int = DEFAULT_MAX_TRACES) -> None:
+        self.traces: Deque[Trace] = deque(maxlen=maxlen)
+        self.exporters: List[Exporter] = []
+
+    @contextmanager
+    def trace(self: Self, name: str, **attrs: Any) -> Generator[Trace, None, None]:
+        """
+        Trace a request. Commands sent while the trace is active - including from
+        coroutines awaited within it - add spans to it.
+        """
+
+        trace = Trace(name, **attrs)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except BaseException as exc:
+            trace.error = type(exc).__name__
+            raise
+        finally:
+            _current.reset(token)
+            trace.finish()
+            self.record(trace)
+
+    def record(self: Self, trace: Trace) -> None:
+        """
+        Keep a finished trace, and pass it to each exporter.
+        """
+
+        self.traces.append(trace)
+        for exporter in self.exporters:
+            exporter(trace)
+
+
+def format_json_lines(trace: Trace) -> str:
+    """
+    Format a trace as JSON lines, one span per line.
+    """
+
+    return "".join(json.dumps(line) + "\n" for line in trace.as_lines())
+
+
+def chrome_trace(traces: Iterable[Trace]) -> Dict[str, Any]:
+    """
+    Convert traces to the Chrome trace event format. Each trace is shown as its
+    own track.
+    """
+
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = []
+
+    for tid, trace in enumerate(traces, 1):
+        # Use wall clock time for the request, so traces line up with logs
+        base = trace.time * 1_000_000
+        args = dict(trace_id=trace.id, **trace.attrs)
+        if trace.error:
+            args["error"] = trace.error
+        events.append(
+            dict(
+                name=trace.name,
+                cat="request",
+                ph="X",
+                ts=base,
+                dur=trace.duration * 1_000_000,
+                pid=pid,
+                tid=tid,
+                args=args,
+            )
+        )
+        for span in trace.spans:
+            events.append(
+                dict(
+                    name=span.name,
+                    cat="stage",
+                    ph="X",
+                    ts=base + (span.start - trace.start) * 1_000_000,
+                    dur=span.duration * 1_000_000,
+                    pid=pid,
+                    tid=tid,
+                    args=dict(trace_id=trace.id, **span.attrs),
+                )
+            )
+
+    return dict(traceEvents=events, displayTimeUnit="ms")
+
+
+def _append(path: str, text: str, lock: threading.Lock) -> None:
+    with lock:
+        with open(path, "a") as f:
+            f.write(text)
+
+
+class JsonLinesExporter:
+    """
+    Append finished traces to a file as JSON lines. Lines are written from a
+    thread, so exporting doesn't block the event loop.
+    """
+
+    def __init__(self: Self, path: str) -> None:
+        self.path: str = path
+        self._lock: threading.Lock = threading.Lock()
+
+    def __call__(self: Self, trace: Trace) -> None:
+        text = format_json_lines(trace)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _append(self.path, text, self._lock)
+        else:
+            fut = loop.run_in_executor(None, _append, self.path, text, self._lock)
+            fut.add_done_callback(self._log_append_failure)
+
+    def _log_append_failure(self: Self, fut: asyncio.Future[None]) -> None:
+        if fut.cancelled():
+            return
+        exc = fut.exception()
+        if exc:
+            logger.warning(f"Failed to write trace to {self.path}: {exc}")
+
+
+def write_chrome_trace(path: str, traces: Iterable[Trace]) -> None:
+    """
+    Write traces to a file in the Chrome trace event format.
+    """
+
+    with open(path, "w") as f:
+        json.dump(chrome_trace(traces), f)
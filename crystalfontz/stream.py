@@ -0,0 +1,211 @@
+"""
+Stream reports with async iterators.
+
+`client.reports` returns a `ReportStream`, which yields reports of the requested
+types as they arrive:
+
+```py
+from crystalfontz import KeyActivityReport, KP_ENTER
+
+async with client.reports(KeyActivityReport, keys=[KP_ENTER]) as reports:
+    async for report in reports:
+        print(report)
+```
+
+Each stream has its own bounded queue, so any number of streams may consume
+reports concurrently without slowing each other down. Reports are filtered by key
+and sensor before they're queued. When the client closes, iteration stops.
+
+Reports are only decoded when there's something listening for them - a stream, a
+subscription, or a report handler other than `NoopReportHandler`. If the client
+has demand-driven reporting enabled, the device is also configured to only send
+the reports which streams and the report handler want.
+"""
+
+import asyncio
+from typing import (
+    Any,
+    Iterable,
+    Optional,
+    Protocol,
+    Self,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from crystalfontz.demand import ReportDemand
+from crystalfontz.device import Device
+from crystalfontz.keys import KeyPress
+from crystalfontz.receiver import (
+    CoalesceKey,
+    DEFAULT_DROP_POLICY,
+    DropPolicy,
+    Predicate,
+    Receiver,
+)
+from crystalfontz.response import KeyActivityReport, Response, TemperatureReport
+
+R = TypeVar("R", bound=Response)
+
+DEFAULT_STREAM_SIZE = 64
+
+
+class StreamClient(Protocol):
+    """
+    A protocol for any client used by report streams.
+    """
+
+    device: Device
+
+    @property
+    def closed(self: Self) -> asyncio.Future: ...
+
+    def add_report_demand(self: Self, demand: ReportDemand) -> Optional[int]: ...
+
+    def remove_report_demand(self: Self, token: Optional[int]) -> None: ...
+
+    def subscribe(
+        self: Self,
+        cls: Type[R],
+        expect: bool = True,
+        maxsize: int = 0,
+        policy: DropPolicy = DEFAULT_DROP_POLICY,
+        key: Optional[CoalesceKey] = None,
+        predicate: Optional[Predicate] = None,
+        receiver: Optional[Receiver[R]] = None,
+    ) -> Receiver[R]: ...
+
+    def unsubscribe(self: Self, cls: Type[R], receiver: Receiver[R]) -> None: ...
+
+
+def report_filter(
+    keys: Optional[Iterable[KeyPress]] = None,
+    sensors: Optional[Iterable[int]] = None,
+) -> Optional[Predicate]:
+    """
+    Create a predicate which accepts key activity reports for `keys` and
+    temperature reports for `sensors`. Other reports are always accepted. Returns
+    None if there's nothing to filter.
+    """
+
+    if keys is None and sensors is None:
+        return None
+
+    key_set: Optional[Set[KeyPress]] = set(keys) if keys is not None else None
+    sensor_set: Optional[Set[int]] = set(sensors) if sensors is not None else None
+
+    def predicate(report: Any) -> bool:
+        if key_set is not None and isinstance(report, KeyActivityReport):
+            return report.activity.keypress in key_set
+        if sensor_set is not None and isinstance(report, TemperatureReport):
+            return report.index in sensor_set
+        return True
+
+    return predicate
+
+
+class ReportStream:
+    """
+    An async iterator over reports of one or more types.
+
+    The stream subscribes when it's created, so no reports are missed between
+    creating the stream and iterating over it. Close the stream - or use it as an
+    async context manager - to unsubscribe. Iteration stops when the stream is
+    closed or the client closes.
+    """
+
+    def __init__(
+        self: Self,
+        client: StreamClient,
+        classes: Iterable[Type[Response]],
+        keys: Optional[Iterable[KeyPress]] = None,
+        sensors: Optional[Iterable[int]] = None,
+        maxsize: int = DEFAULT_STREAM_SIZE,
+        policy: DropPolicy = DEFAULT_DROP_POLICY,
+        key: Optional[CoalesceKey] = None,
+    ) -> None:
+        self.client: StreamClient = client
+        self.classes: Tuple[Type[Response], ...] = tuple(classes)
+        if not self.classes:
+            raise ValueError("At least one report type is required")
+
+        self._done: bool = False
+
+        # A single receiver is subscribed to every class, so that reports of
+        # different types are yielded in the order they were received
+        self._receiver: Receiver[Response] = Receiver(
+            set(),
+            maxsize=maxsize,
+            policy=policy,
+            key=key,
+            predicate=report_filter(keys, sensors),
+        )
+        for cls in self.classes:
+            self.client.subscribe(cls, expect=False, receiver=self._receiver)
+
+        self.client.closed.add_done_callback(self._client_closed)
+
+        self._demand_token: Optional[int] = self.client.add_report_demand(
+            ReportDemand.for_reports(
+                self.classes, self.client.device, keys=keys, sensors=sensors
+            )
+        )
+
+    def _client_closed(self: Self, _: asyncio.Future) -> None:
+        if not self._done:
+            self._end()
+
+    @property
+    def dropped(self: Self) -> int:
+        """
+        The number of reports dropped because the stream's consumer fell behind.
+        """
+
+        return self._receiver.dropped
+
+    def __aiter__(self: Self) -> Self:
+        return self
+
+    async def __anext__(self: Self) -> Response:
+        if self._done and self._receiver.empty():
+            raise StopAsyncIteration
+
+        exc, report = await self._receiver.get()
+        self._receiver.task_done()
+
+        if exc:
+            raise exc
+        if report is None:
+            # The stream ended while we were waiting
+            raise StopAsyncIteration
+        return report
+
+    def close(self: Self) -> None:
+        """
+        Unsubscribe and end iteration.
+        """
+
+        if self._done:
+            return
+
+        for cls in self.classes:
+            self.client.unsubscribe(cls, self._receiver)
+        self.client.closed.remove_done_callback(self._client_closed)
+        self.client.remove_report_demand(self._demand_token)
+        self._end()
+
+    def _end(self: Self) -> None:
+        self._done = True
+        # Wake any waiting consumer. The sentinel bypasses the drop policy.
+        if self._receiver.full():
+            self._receiver.get_nowait()
+            self._receiver.task_done()
+        asyncio.Queue.put_nowait(self._receiver, (None, None))
+
+    async def __aenter__(self: Self) -> Self:
+        return self
+
+    async def __aexit__(self: Self, *args: Any) -> None:
+        self.close()
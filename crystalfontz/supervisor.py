@@ -0,0 +1,563 @@
+"""
+Spread many crystalfontz devices across worker processes.
+
+A `DeviceSupervisor` runs one worker process per port, each with its own event
+loop and `Client`. Commands and reports are passed between the supervisor and
+its workers over a socket, as length-prefixed pickles. Workers which crash are
+restarted with exponential backoff.
+
+The supervisor has the same API as a `DevicePool`, except that clients aren't
+directly accessible. Instead, commands are sent to a device with `call`, or to
+every device with `broadcast`.
+
+# Example
+
+```py
+import asyncio
+
+from crystalfontz import device_supervisor
+
+
+async def main():
+    async with device_supervisor(
+        {"bay-1": "/dev/ttyUSB0", "bay-2": "/dev/ttyUSB1"}
+    ) as supervisor:
+        await supervisor.send_data(0, 0, "Hello world!")
+
+asyncio.run(main())
+```
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import multiprocessing
+from multiprocessing.process import BaseProcess
+import pickle
+import socket
+import struct
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Concatenate,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    ParamSpec,
+    Self,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from crystalfontz.baud import BaudRate, SLOW_BAUD_RATE
+from crystalfontz.client import (
+    Client,
+    create_connection,
+    DEFAULT_RETRY_TIMES,
+    DEFAULT_TIMEOUT,
+)
+from crystalfontz.device import Device
+from crystalfontz.error import ConnectionError, CrystalfontzError
+from crystalfontz.event_loop import DEFAULT_EVENT_LOOP, EventLoopType, run
+from crystalfontz.pool import (
+    _named_ports,
+    _TaggedReportHandler,
+    NoopPoolReportHandler,
+    Pool,
+    PoolReportHandler,
+)
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+from crystalfontz.transport import (
+    DEFAULT_TRANSPORT,
+    RECONNECT_MAX_DELAY,
+    RECONNECT_MIN_DELAY,
+    TransportType,
+)
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# How long to wait for a worker to connect to its device
+DEFAULT_STARTUP_TIMEOUT = 30.0
+
+# Messages are pickled tuples, prefixed with their length
+HEADER = struct.Struct(">I")
+
+# Supervisor to worker
+CALL = "call"
+CLOSE = "close"
+
+# Worker to supervisor
+READY = "ready"
+RESULT = "result"
+KEY_ACTIVITY = "key_activity"
+TEMPERATURE = "temperature"
+
+Message = Tuple[Any, ...]
+
+
+def _encode(message: Message) -> bytes:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(len(data)) + data
+
+
+async def _read_message(reader: asyncio.StreamReader) -> Optional[Message]:
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (size,) = HEADER.unpack(header)
+        return pickle.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def _portable(exc: Exception) -> Exception:
+    # Not every exception survives a round trip through pickle - for instance,
+    # exceptions with required constructor arguments beyond the message. Those
+    # are passed as a generic CrystalfontzError instead.
+    try:
+        pickle.loads(pickle.dumps(exc))
+    except Exception:
+        return CrystalfontzError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+#
+# Worker process
+#
+
+
+class _WorkerReportHandler(ReportHandler):
+    def __init__(self: Self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        self.writer.write(_encode((KEY_ACTIVITY, report)))
+        await self.writer.drain()
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        self.writer.write(_encode((TEMPERATURE, report)))
+        await self.writer.drain()
+
+
+async def _serve(port: str, sock: socket.socket, options: Dict[str, Any]) -> None:
+    reader, writer = await asyncio.open_connection(sock=sock)
+
+    try:
+        client = await create_connection(
+            port, report_handler=_WorkerReportHandler(writer), **options
+        )
+    except Exception as exc:
+        writer.write(_encode((READY, _portable(exc))))
+        await writer.drain()
+        writer.close()
+        return
+
+    writer.write(_encode((READY, None)))
+
+    tasks: Set[asyncio.Task[None]] = set()
+
+    async def call(
+        id_: int, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> None:
+        try:
+            rv = await getattr(client, method)(*args, **kwargs)
+            data = _encode((RESULT, id_, None, rv))
+        except Exception as exc:
+            data = _encode((RESULT, id_, _portable(exc), None))
+        writer.write(data)
+
+    async def receive() -> None:
+        while True:
+            message = await _read_message(reader)
+            if message is None or message[0] == CLOSE:
+                return
+            _, id_, method, args, kwargs = message
+            task = asyncio.create_task(call(id_, method, args, kwargs))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    # Run until either the supervisor asks us to close, or the client closes on
+    # its own - most likely due to an error
+    receiving = asyncio.create_task(receive())
+    await asyncio.wait([receiving, client.closed], return_when=asyncio.FIRST_COMPLETED)
+
+    receiving.cancel()
+    for task in list(tasks):
+        task.cancel()
+
+    if not client.closed.done():
+        client.close()
+    try:
+        await client.closed
+    except Exception as exc:
+        logger.error(f"Connection to {port} closed: {exc}")
+
+    writer.close()
+
+
+def _worker_main(
+    port: str,
+    sock: socket.socket,
+    options: Dict[str, Any],
+    event_loop: EventLoopType,
+) -> None:
+    run(_serve(port, sock, options), event_loop)
+
+
+#
+# Supervisor
+#
+
+
+class _Worker:
+    def __init__(
+        self: Self,
+        process: BaseProcess,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.process = process
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, asyncio.Future[Any]] = dict()
+        self.next_id: int = 0
+        self.reports: asyncio.Queue[Message] = asyncio.Queue()
+
+
+class DeviceSupervisor(Pool):
+    """
+    A pool of crystalfontz devices, with each device's client running in its own
+    worker process. Typically created through a call to `device_supervisor` or
+    `create_supervisor`.
+
+    Worker processes are started with the "spawn" method, so arguments such as the
+    `device` must be picklable. Report handlers run in the supervisor's process.
+    """
+
+    def __init__(
+        self: Self,
+        ports: Mapping[str, str],
+        report_handler: PoolReportHandler,
+        loop: asyncio.AbstractEventLoop,
+        event_loop: EventLoopType = DEFAULT_EVENT_LOOP,
+        restart_attempts: Optional[int] = None,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    ) -> None:
+        super().__init__(ports, report_handler, loop)
+        self.event_loop: EventLoopType = event_loop
+        self.startup_timeout: float = startup_timeout
+        self._restart_attempts: Optional[int] = restart_attempts
+        self._context = multiprocessing.get_context("spawn")
+        self._options: Dict[str, Any] = dict()
+        self._workers: Dict[str, _Worker] = dict()
+        self._tasks: Dict[str, asyncio.Task[None]] = dict()
+        self._closing: bool = False
+
+    @property
+    def names(self: Self) -> List[str]:
+        return list(self._workers.keys())
+
+    def process(self: Self, name: str) -> BaseProcess:
+        """
+        The worker process for a device.
+        """
+
+        return self._worker(name).process
+
+    def _worker(self: Self, name: str) -> _Worker:
+        if name not in self._workers:
+            raise ConnectionError(f"Device {name} is not connected")
+        return self._workers[name]
+
+    #
+    # Connecting
+    #
+
+    async def open(
+        self: Self,
+        model: str = "CFA533",
+        hardware_rev: Optional[str] = None,
+        firmware_rev: Optional[str] = None,
+        device: Optional[Device] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_times: int = DEFAULT_RETRY_TIMES,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+        transport: TransportType = DEFAULT_TRANSPORT,
+    ) -> None:
+        self._options = dict(
+            model=model,
+            hardware_rev=hardware_rev,
+            firmware_rev=firmware_rev,
+            device=device,
+            timeout=timeout,
+            retry_times=retry_times,
+            baud_rate=baud_rate,
+            transport=transport,
+        )
+
+        async def open_one(name: str) -> None:
+            try:
+                await self._start(name)
+            except Exception as exc:
+                logger.warning(
+                    f"Failed to connect to {name} ({self.ports[name]}): {exc}"
+                )
+                self._health[name].last_error = exc
+            else:
+                self._tasks[name] = self.loop.create_task(self._supervise(name))
+
+        await asyncio.gather(*[open_one(name) for name in self.ports])
+
+    async def _start(self: Self, name: str) -> None:
+        parent, child = socket.socketpair()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.ports[name], child, self._options, self.event_loop),
+            name=f"crystalfontz({name})",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+
+        reader, writer = await asyncio.open_connection(sock=parent)
+        try:
+            async with asyncio.timeout(self.startup_timeout):
+                message = await _read_message(reader)
+        except TimeoutError:
+            writer.close()
+            process.kill()
+            await self.loop.run_in_executor(None, process.join)
+            raise ConnectionError(
+                f"Worker for {name} didn't start within {self.startup_timeout}s"
+            )
+
+        if message is None or message[1] is not None:
+            writer.close()
+            await self.loop.run_in_executor(None, process.join)
+            if message is None:
+                raise ConnectionError(f"Worker for {name} exited during startup")
+            raise message[1]
+
+        self._workers[name] = _Worker(process, reader, writer)
+        self._health[name].connected = True
+
+    async def _supervise(self: Self, name: str) -> None:
+        delay: float = RECONNECT_MIN_DELAY
+        attempts: int = 0
+
+        while True:
+            await self._run(name)
+            if self._closing:
+                return
+
+            health = self._health[name]
+            while self._restart_attempts is None or attempts < self._restart_attempts:
+                attempts += 1
+                logger.warning(f"Worker for {name} exited, restarting in {delay}s")
+                await asyncio.sleep(delay)
+                if self._closing:
+                    return
+                try:
+                    await self._start(name)
+                except Exception as exc:
+                    health.last_error = exc
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                else:
+                    health.restarts += 1
+                    delay = RECONNECT_MIN_DELAY
+                    attempts = 0
+                    if self._closing:
+                        # The supervisor closed while the worker was starting,
+                        # so it missed the close message
+                        self._workers[name].writer.write(_encode((CLOSE,)))
+                    break
+            else:
+                logger.error(f"Giving up on restarting worker for {name}")
+                return
+
+    async def _run(self: Self, name: str) -> None:
+        worker = self._workers[name]
+        reports = self.loop.create_task(self._handle_reports(name, worker))
+
+        try:
+            while True:
+                message = await _read_message(worker.reader)
+                if message is None:
+                    break
+                kind = message[0]
+                if kind == RESULT:
+                    _, id_, exc, rv = message
+                    fut = worker.pending.pop(id_, None)
+                    if fut and not fut.done():
+                        if exc:
+                            fut.set_exception(exc)
+                        else:
+                            fut.set_result(rv)
+                else:
+                    worker.reports.put_nowait(message)
+        finally:
+            reports.cancel()
+            worker.writer.close()
+            del self._workers[name]
+            self._health[name].connected = False
+            for fut in worker.pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError(f"Worker for {name} exited"))
+            await self.loop.run_in_executor(None, worker.process.join)
+
+    async def _handle_reports(self: Self, name: str, worker: _Worker) -> None:
+        # Reports are handled in order, but separately from command results, so
+        # that a slow report handler doesn't hold up commands
+        handler = _TaggedReportHandler(self, name)
+        while True:
+            kind, report = await worker.reports.get()
+            try:
+                if kind == KEY_ACTIVITY:
+                    await handler.on_key_activity(report)
+                elif kind == TEMPERATURE:
+                    await handler.on_temperature(report)
+            except Exception as exc:
+                logger.error(f"Error while handling report from {name}: {exc}")
+
+    def close(self: Self) -> None:
+        self._closing = True
+        for worker in self._workers.values():
+            if not worker.writer.is_closing():
+                worker.writer.write(_encode((CLOSE,)))
+
+    async def closed(self: Self) -> None:
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    #
+    # Commands
+    #
+
+    async def call(
+        self: Self,
+        name: str,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        worker = self._worker(name)
+
+        id_ = worker.next_id
+        worker.next_id += 1
+        fut: asyncio.Future[T] = self.loop.create_future()
+        worker.pending[id_] = fut
+
+        worker.writer.write(_encode((CALL, id_, method.__name__, args, kwargs)))
+
+        return await fut
+
+
+async def create_supervisor(
+    ports: Mapping[str, str] | Iterable[str],
+    model: str = "CFA533",
+    hardware_rev: Optional[str] = None,
+    firmware_rev: Optional[str] = None,
+    device: Optional[Device] = None,
+    report_handler: Optional[PoolReportHandler] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retry_times: int = DEFAULT_RETRY_TIMES,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    event_loop: EventLoopType = DEFAULT_EVENT_LOOP,
+    restart_attempts: Optional[int] = None,
+    startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+) -> DeviceSupervisor:
+    """
+    Start a worker process for each of the specified devices. Returns a
+    DeviceSupervisor object.
+
+    Arguments are the same as for `create_pool`. In addition, `event_loop` selects
+    the event loop used by the workers, and `restart_attempts` limits how many
+    times in a row a crashed worker is restarted. By default, workers are always
+    restarted. Workers which don't connect to their device within
+    `startup_timeout` seconds are killed.
+
+    To close the supervisor, call `supervisor.close()` and then await
+    `supervisor.closed()`.
+    """
+
+    _loop = loop if loop else asyncio.get_running_loop()
+
+    supervisor = DeviceSupervisor(
+        _named_ports(ports),
+        report_handler=report_handler or NoopPoolReportHandler(),
+        loop=_loop,
+        event_loop=event_loop,
+        restart_attempts=restart_attempts,
+        startup_timeout=startup_timeout,
+    )
+
+    await supervisor.open(
+        model=model,
+        hardware_rev=hardware_rev,
+        firmware_rev=firmware_rev,
+        device=device,
+        timeout=timeout,
+        retry_times=retry_times,
+        baud_rate=baud_rate,
+        transport=transport,
+    )
+
+    return supervisor
+
+
+@asynccontextmanager
+async def device_supervisor(
+    ports: Mapping[str, str] | Iterable[str],
+    model: str = "CFA533",
+    hardware_rev: Optional[str] = None,
+    firmware_rev: Optional[str] = None,
+    device: Optional[Device] = None,
+    report_handler: Optional[PoolReportHandler] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retry_times: int = DEFAULT_RETRY_TIMES,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    baud_rate: BaudRate = SLOW_BAUD_RATE,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    event_loop: EventLoopType = DEFAULT_EVENT_LOOP,
+    restart_attempts: Optional[int] = None,
+    startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+) -> AsyncGenerator[DeviceSupervisor, None]:
+    """
+    Start a worker process for each of the specified devices, with an associated
+    context.
+
+    This context will automatically close every worker on exit and wait for them
+    to exit.
+    """
+
+    supervisor = await create_supervisor(
+        ports,
+        model=model,
+        hardware_rev=hardware_rev,
+        firmware_rev=firmware_rev,
+        device=device,
+        report_handler=report_handler,
+        timeout=timeout,
+        retry_times=retry_times,
+        loop=loop,
+        baud_rate=baud_rate,
+        transport=transport,
+        event_loop=event_loop,
+        restart_attempts=restart_attempts,
+        startup_timeout=startup_timeout,
+    )
+
+    try:
+        yield supervisor
+    finally:
+        supervisor.close()
+        await supervisor.closed()
@@ -0,0 +1,290 @@
+"""
+A synchronous, thread-safe facade over the asyncio `Client`.
+
+The `SyncClient` owns a background thread running an event loop, and connects an
+ordinary `Client` on that loop. Its command methods block until the command
+completes, and may be called from any thread except the background thread - for
+instance, from a report handler. For non-blocking use, `submit` schedules a
+command and returns a `concurrent.futures.Future`.
+
+# Example
+
+```py
+from crystalfontz import SyncClient
+
+with SyncClient("/dev/ttyUSB0") as client:
+    client.send_data(0, 0, "Hello world!")
+```
+"""
+
+import asyncio
+from collections import deque
+import concurrent.futures
+import functools
+import logging
+import threading
+from typing import (
+    Any,
+    Callable,
+    Concatenate,
+    Coroutine,
+    Deque,
+    Dict,
+    Optional,
+    ParamSpec,
+    Self,
+    Tuple,
+    TypeVar,
+)
+
+from crystalfontz.baud import BaudRate, SLOW_BAUD_RATE
+from crystalfontz.client import (
+    Client,
+    create_connection,
+    DEFAULT_RETRY_TIMES,
+    DEFAULT_TIMEOUT,
+)
+from crystalfontz.device import Device
+from crystalfontz.error import ConnectionError
+from crystalfontz.event_loop import DEFAULT_EVENT_LOOP, EventLoopType, loop_factory
+from crystalfontz.report import ReportHandler
+from crystalfontz.transport import DEFAULT_TRANSPORT, TransportType
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+ClientMethod = Callable[..., Coroutine[Any, Any, Any]]
+Submission = Tuple[
+    concurrent.futures.Future[Any], ClientMethod, Tuple[Any, ...], Dict[str, Any]
+]
+
+
+def _sync(
+    method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+) -> Callable[Concatenate["SyncClient", P], T]:
+    # Wrap a Client method so that it's submitted to the background loop, and
+    # block on the result.
+    @functools.wraps(method)
+    def wrapper(self: "SyncClient", *args: P.args, **kwargs: P.kwargs) -> T:
+        self._check_thread()
+        return self.submit(method, *args, **kwargs).result()
+
+    return wrapper
+
+
+class SyncClient:
+    """
+    A synchronous crystalfontz client. Accepts the same arguments as
+    `create_connection`, plus an `event_loop` to run the background loop on.
+
+    Command methods mirror those on `Client`, but block until the command
+    completes. They may be called concurrently from many threads. Calls arriving
+    while the background loop is busy are batched, so that the loop is woken once
+    per batch rather than once per call.
+
+    Report handlers are called on the background thread.
+    """
+
+    def __init__(
+        self: Self,
+        port: str,
+        model: str = "CFA533",
+        hardware_rev: Optional[str] = None,
+        firmware_rev: Optional[str] = None,
+        device: Optional[Device] = None,
+        report_handler: Optional[ReportHandler] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_times: int = DEFAULT_RETRY_TIMES,
+        baud_rate: BaudRate = SLOW_BAUD_RATE,
+        transport: TransportType = DEFAULT_TRANSPORT,
+        event_loop: EventLoopType = DEFAULT_EVENT_LOOP,
+    ) -> None:
+        factory = loop_factory(event_loop)
+        self.loop: asyncio.AbstractEventLoop = (
+            factory() if factory else asyncio.new_event_loop()
+        )
+
+        self._pending: Deque[Submission] = deque()
+        self._pending_lock: threading.Lock = threading.Lock()
+        self._closed: bool = False
+
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name=f"crystalfontz({port})", daemon=True
+        )
+        self._thread.start()
+
+        try:
+            self.client: Client = asyncio.run_coroutine_threadsafe(
+                create_connection(
+                    port,
+                    model=model,
+                    hardware_rev=hardware_rev,
+                    firmware_rev=firmware_rev,
+                    device=device,
+                    report_handler=report_handler,
+                    timeout=timeout,
+                    retry_times=retry_times,
+                    loop=self.loop,
+                    baud_rate=baud_rate,
+                    transport=transport,
+                ),
+                self.loop,
+            ).result()
+        except BaseException:
+            self._stop()
+            raise
+
+    def _run(self: Self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def _stop(self: Self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def _check_thread(self: Self) -> None:
+        # Blocking on the background loop from its own thread would deadlock
+        if threading.get_ident() == self._thread.ident:
+            raise RuntimeError(
+                "SyncClient methods can't be called from the background thread. "
+                "Use submit, or call the Client directly, instead."
+            )
+
+    #
+    # Submitting commands
+    #
+
+    def submit(
+        self: Self,
+        method: Callable[Concatenate[Client, P], Coroutine[Any, Any, T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> concurrent.futures.Future[T]:
+        """
+        Submit a `Client` method to be called on the background loop, without
+        waiting for it to complete. Returns a `concurrent.futures.Future`.
+
+        This method is thread-safe. For example:
+
+        ```py
+        future = client.submit(Client.send_data, 0, 0, "Hello world!")
+        ```
+        """
+
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+
+        with self._pending_lock:
+            if self._closed:
+                raise ConnectionError("Client is closed")
+            wake = not self._pending
+            self._pending.append((future, method, args, kwargs))
+
+        # Only the first submission in a batch needs to wake the loop. Later
+        # submissions will be picked up by the same drain.
+        if wake:
+            self.loop.call_soon_threadsafe(self._drain)
+
+        return future
+
+    def _drain(self: Self) -> None:
+        with self._pending_lock:
+            batch = list(self._pending)
+            self._pending.clear()
+
+        for future, method, args, kwargs in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            task = self.loop.create_task(method(self.client, *args, **kwargs))
+            task.add_done_callback(functools.partial(_resolve, future))
+
+    #
+    # Closing
+    #
+
+    def close(self: Self) -> None:
+        """
+        Close the connection, wait for it to finish closing and stop the
+        background loop. Raises any exception which caused the client to close.
+        """
+
+        self._check_thread()
+
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        async def close() -> None:
+            self.client.close()
+            await self.client.closed
+
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        finally:
+            self._stop()
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *exc_info: Any) -> None:
+        self.close()
+
+    #
+    # Commands
+    #
+
+    send_command = _sync(Client.send_command)
+    send_commands = _sync(Client.send_commands)
+    expect = _sync(Client.expect)
+    ping = _sync(Client.ping)
+    test_connection = _sync(Client.test_connection)
+    detect_baud_rate = _sync(Client.detect_baud_rate)
+    versions = _sync(Client.versions)
+    warm_up = _sync(Client.warm_up)
+    detect_device = _sync(Client.detect_device)
+    write_user_flash_area = _sync(Client.write_user_flash_area)
+    read_user_flash_area = _sync(Client.read_user_flash_area)
+    store_boot_state = _sync(Client.store_boot_state)
+    reboot_lcd = _sync(Client.reboot_lcd)
+    reset_host = _sync(Client.reset_host)
+    shutdown_host = _sync(Client.shutdown_host)
+    clear_screen = _sync(Client.clear_screen)
+    set_line_1 = _sync(Client.set_line_1)
+    set_line_2 = _sync(Client.set_line_2)
+    set_special_character_data = _sync(Client.set_special_character_data)
+    read_lcd_memory = _sync(Client.read_lcd_memory)
+    set_cursor_position = _sync(Client.set_cursor_position)
+    set_cursor_style = _sync(Client.set_cursor_style)
+    set_contrast = _sync(Client.set_contrast)
+    set_backlight = _sync(Client.set_backlight)
+    read_dow_device_information = _sync(Client.read_dow_device_information)
+    setup_temperature_reporting = _sync(Client.setup_temperature_reporting)
+    dow_transaction = _sync(Client.dow_transaction)
+    setup_live_temperature_display = _sync(Client.setup_live_temperature_display)
+    send_command_to_lcd_controller = _sync(Client.send_command_to_lcd_controller)
+    configure_key_reporting = _sync(Client.configure_key_reporting)
+    poll_keypad = _sync(Client.poll_keypad)
+    set_atx_power_switch_functionality = _sync(
+        Client.set_atx_power_switch_functionality
+    )
+    configure_watchdog = _sync(Client.configure_watchdog)
+    read_status = _sync(Client.read_status)
+    send_data = _sync(Client.send_data)
+    set_baud_rate = _sync(Client.set_baud_rate)
+    set_gpio = _sync(Client.set_gpio)
+    read_gpio = _sync(Client.read_gpio)
+
+
+def _resolve(future: concurrent.futures.Future[Any], task: asyncio.Task[Any]) -> None:
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
@@ -0,0 +1,131 @@
+"""
+A minimal telnet codec, sufficient for talking to RFC 2217 serial servers such as
+ser2net.
+
+RFC 2217 tunnels serial data over telnet, and uses the telnet COM-PORT-OPTION to
+configure the remote serial port. This module handles escaping and unescaping data,
+and separating telnet commands from the data stream. Negotiating options is left to
+the transport.
+"""
+
+from typing import List, Self, Tuple
+
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+
+BINARY = 0
+SGA = 3
+COM_PORT_OPTION = 44
+
+# COM-PORT-OPTION subnegotiation commands, client to server. Server responses
+# use the same codes, plus 100.
+SET_BAUDRATE = 1
+SET_DATASIZE = 2
+SET_PARITY = 3
+SET_STOPSIZE = 4
+SET_CONTROL = 5
+
+PARITY_NONE = 1
+STOPSIZE_ONE = 1
+CONTROL_NO_FLOW_CONTROL = 1
+
+# A telnet command. For option negotiation, this is the verb (DO, DONT, WILL or
+# WONT) and the option. For subnegotiation, this is SB and the raw payload.
+TelnetCommand = Tuple[int, int | bytes]
+
+_DATA = 0
+_IAC = 1
+_OPTION = 2
+_SB = 3
+_SB_IAC = 4
+
+
+def escape(data: bytes) -> bytes:
+    """
+    Escape IAC bytes in outgoing data.
+    """
+
+    return data.replace(b"\xff", b"\xff\xff")
+
+
+def negotiate(verb: int, option: int) -> bytes:
+    """
+    Encode an option negotiation command.
+    """
+
+    return bytes([IAC, verb, option])
+
+
+def subnegotiate(option: int, payload: bytes) -> bytes:
+    """
+    Encode a subnegotiation command.
+    """
+
+    return bytes([IAC, SB, option]) + escape(payload) + bytes([IAC, SE])
+
+
+class TelnetDecoder:
+    """
+    Split an incoming telnet stream into data and commands. The decoder is stateful,
+    so commands split across reads are handled correctly.
+    """
+
+    def __init__(self: Self) -> None:
+        self._state: int = _DATA
+        self._verb: int = 0
+        self._sb: bytearray = bytearray()
+
+    def decode(self: Self, data: bytes) -> Tuple[bytes, List[TelnetCommand]]:
+        """
+        Decode incoming bytes. Returns unescaped data and any telnet commands.
+        """
+
+        # Fast path - the vast majority of reads contain no commands
+        if self._state == _DATA and IAC not in data:
+            return data, []
+
+        out = bytearray()
+        commands: List[TelnetCommand] = []
+
+        for byte in data:
+            state = self._state
+            if state == _DATA:
+                if byte == IAC:
+                    self._state = _IAC
+                else:
+                    out.append(byte)
+            elif state == _IAC:
+                if byte == IAC:
+                    out.append(IAC)
+                    self._state = _DATA
+                elif byte in (DO, DONT, WILL, WONT):
+                    self._verb = byte
+                    self._state = _OPTION
+                elif byte == SB:
+                    self._sb.clear()
+                    self._state = _SB
+                else:
+                    # Other commands (NOP, GA, etc.) carry no payload
+                    self._state = _DATA
+            elif state == _OPTION:
+                commands.append((self._verb, byte))
+                self._state = _DATA
+            elif state == _SB:
+                if byte == IAC:
+                    self._state = _SB_IAC
+                else:
+                    self._sb.append(byte)
+            elif state == _SB_IAC:
+                if byte == SE:
+                    commands.append((SB, bytes(self._sb)))
+                    self._state = _DATA
+                else:
+                    self._sb.append(byte)
+                    self._state = _SB
+
+        return bytes(out), commands
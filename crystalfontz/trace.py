@@ -0,0 +1,172 @@
+"""
+Tracing hooks for the packet hot path.
+
+The client and packet codec emit events as packets are sent, received, decoded
+and dispatched. Hooks subscribe to these events. When nothing is subscribed to
+an event, emitting it costs a single truthiness check - nothing is formatted or
+allocated.
+
+Events, and the arguments their hooks are called with, are:
+
+- `tx`: `(data: bytes)` - a packet was serialized for sending
+- `rx`: `(data: bytes)` - a packet with a valid CRC was parsed
+- `resync`: `(reason: str, buffer: bytes)` - a byte was discarded while
+  synchronizing with the packet stream. The discarded byte is `buffer[0]`.
+- `decode`: `(packet: Packet, response: Response)` - a packet was decoded
+- `dispatch`: `(name: str, report: Response)` - a report was dispatched to the
+  report handler
+
+Debug logging of packets is implemented as a subscriber. It's enabled by the
+CLIs when the log level is `DEBUG`; other applications may call
+`enable_logging`.
+
+# Example
+
+```py
+from crystalfontz import trace
+
+def on_rx(data: bytes) -> None:
+    print(data.hex(" "))
+
+trace.subscribe("rx", on_rx)
+```
+"""
+
+import logging
+from typing import Any, Callable, List, Literal, Optional, Self
+
+logger = logging.getLogger(__name__)
+
+Event = (
+    Literal["tx"]
+    | Literal["rx"]
+    | Literal["resync"]
+    | Literal["decode"]
+    | Literal["dispatch"]
+)
+
+EVENTS: List[Event] = ["tx", "rx", "resync", "decode", "dispatch"]
+
+Hook = Callable[..., None]
+
+
+class Hooks:
+    """
+    Hooks subscribed to each event. Hot paths check the list for an event before
+    emitting it:
+
+    ```py
+    if hooks.rx:
+        emit(hooks.rx, data)
+    ```
+    """
+
+    __slots__ = EVENTS
+
+    def __init__(self: Self) -> None:
+        self.tx: List[Hook] = []
+        self.rx: List[Hook] = []
+        self.resync: List[Hook] = []
+        self.decode: List[Hook] = []
+        self.dispatch: List[Hook] = []
+
+
+hooks = Hooks()
+
+
+def subscribe(event: Event, hook: Hook) -> None:
+    """
+    Call `hook` whenever `event` is emitted.
+    """
+
+    if event not in EVENTS:
+        raise ValueError(f"Unknown trace event: {event}")
+    getattr(hooks, event).append(hook)
+
+
+def unsubscribe(event: Event, hook: Hook) -> None:
+    """
+    Stop calling `hook` when `event` is emitted.
+    """
+
+    subscribed: List[Hook] = getattr(hooks, event)
+    if hook in subscribed:
+        subscribed.remove(hook)
+
+
+def emit(subscribed: List[Hook], *args: Any) -> None:
+    """
+    Call every subscribed hook. A hook which raises is logged, and doesn't
+    interrupt the caller.
+    """
+
+    for hook in list(subscribed):
+        try:
+            hook(*args)
+        except Exception:
+            logger.exception(f"Trace hook {hook} failed")
+
+
+class LoggingSubscriber:
+    """
+    Log trace events at the `DEBUG` level. Messages are only formatted when the
+    logger is enabled for `DEBUG`.
+    """
+
+    def __init__(self: Self, log: Optional[logging.Logger] = None) -> None:
+        self.logger: logging.Logger = log if log else logger
+
+    def tx(self: Self, data: bytes) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Sending packet: {data}")
+
+    def rx(self: Self, data: bytes) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Received packet: {data}")
+
+    def resync(self: Self, reason: str, buffer: bytes) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Discarding byte {buffer[0]:#04x} ({reason})")
+
+    def decode(self: Self, packet: Any, response: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Packet received: {packet}")
+
+    def dispatch(self: Self, name: str, report: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"{name} background task is dispatching {report}")
+
+    def subscribe(self: Self) -> None:
+        for event in EVENTS:
+            subscribe(event, getattr(self, event))
+
+    def unsubscribe(self: Self) -> None:
+        for event in EVENTS:
+            unsubscribe(event, getattr(self, event))
+
+
+_logging_subscriber: Optional[LoggingSubscriber] = None
+
+
+def enable_logging(log: Optional[logging.Logger] = None) -> None:
+    """
+    Log every trace event at the `DEBUG` level.
+    """
+
+    global _logging_subscriber
+
+    disable_logging()
+    _logging_subscriber = LoggingSubscriber(log)
+    _logging_subscriber.subscribe()
+
+
+def disable_logging() -> None:
+    """
+    Stop logging trace events.
+    """
+
+    global _logging_subscriber
+
+    if _logging_subscriber:
+        _logging_subscriber.unsubscribe()
+        _logging_subscriber = None
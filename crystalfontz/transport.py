@@ -0,0 +1,924 @@
+"""
+Transports used by the `Client` to talk to a device.
+
+A transport is an `asyncio.Transport` which additionally knows how to get and set
+the baud rate of the underlying connection. Three backends are included:
+
+- `SerialTransport`, which is backed by `pyserial-asyncio`. This is the default,
+  and supports anything `pyserial` can open.
+- `FdTransport`, which opens the tty directly and reads and writes its file
+  descriptor with `loop.add_reader` and `loop.add_writer`. This avoids the
+  overhead of `pyserial`'s polling and per-read allocations, but only works with
+  local tty devices on POSIX systems.
+- `TcpTransport`, which connects to a serial server such as ser2net. This
+  transport is selected by using a `tcp://host:port` or `rfc2217://host:port` URL
+  as the port. It sets `TCP_NODELAY` and TCP keepalive on its socket, and
+  transparently reconnects if the connection drops.
+
+Local ports may also be wrapped in a `HotplugTransport`, which waits for the device
+to be plugged back in when it's unplugged, and then reopens the port.
+
+`pyserial` also supports `socket://` and `rfc2217://` URLs, but its URL handlers use
+blocking sockets which `pyserial-asyncio` polls. `TcpTransport` uses the event
+loop's native socket support instead.
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+import errno
+import io
+import logging
+import os
+import socket
+from typing import Any, Callable, List, Literal, Optional, Self, Set, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+from serial import EIGHTBITS, PARITY_NONE, serial_for_url, STOPBITS_ONE
+import serial_asyncio
+
+from crystalfontz.baud import BaudRate, FAST_BAUD_RATE, SLOW_BAUD_RATE
+from crystalfontz.error import ConnectionError
+from crystalfontz.hotplug import DeviceWatcher
+from crystalfontz.telnet import (
+    BINARY,
+    COM_PORT_OPTION,
+    CONTROL_NO_FLOW_CONTROL,
+    DO,
+    DONT,
+    escape,
+    negotiate,
+)
+from crystalfontz.telnet import PARITY_NONE as TELNET_PARITY_NONE
+from crystalfontz.telnet import (
+    SET_BAUDRATE,
+    SET_CONTROL,
+    SET_DATASIZE,
+    SET_PARITY,
+    SET_STOPSIZE,
+    SGA,
+    STOPSIZE_ONE,
+    subnegotiate,
+    TelnetCommand,
+    TelnetDecoder,
+    WILL,
+    WONT,
+)
+
+try:
+    import termios
+except ImportError:
+    termios = None
+
+logger = logging.getLogger(__name__)
+
+TransportType = Literal["serial"] | Literal["fd"]
+
+DEFAULT_TRANSPORT: TransportType = "serial"
+
+# The largest packet a CFA533 can send is 22 bytes. Reading more than that at
+# once lets us drain bursts of reports in a single system call.
+READ_SIZE = 1024
+
+NETWORK_SCHEMES = {"tcp", "rfc2217"}
+
+# TCP keepalive settings. A dead serial server will be noticed after roughly
+# KEEPALIVE_IDLE + KEEPALIVE_INTERVAL * KEEPALIVE_COUNT seconds.
+KEEPALIVE_IDLE = 10
+KEEPALIVE_INTERVAL = 5
+KEEPALIVE_COUNT = 3
+
+# Reconnects back off exponentially, starting at RECONNECT_MIN_DELAY seconds and
+# capping out at RECONNECT_MAX_DELAY seconds.
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = 5.0
+
+# Telnet options we're willing to enable when talking RFC 2217
+TELNET_OPTIONS = {BINARY, SGA, COM_PORT_OPTION}
+
+P = TypeVar("P", bound=asyncio.BaseProtocol)
+
+
+class Transport(asyncio.Transport, ABC):
+    """
+    A transport for a Crystalfontz device. In addition to the `asyncio.Transport`
+    API, transports expose the baud rate of the underlying connection.
+    """
+
+    @property
+    @abstractmethod
+    def baud_rate(self: Self) -> BaudRate:
+        """
+        The transport's baud rate.
+        """
+
+        raise NotImplementedError("baud_rate")
+
+    @baud_rate.setter
+    @abstractmethod
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        raise NotImplementedError("baud_rate")
+
+
+class SerialTransport(serial_asyncio.SerialTransport, Transport):
+    """
+    A transport backed by `pyserial-asyncio`.
+    """
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self.serial.baudrate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        self.serial.baudrate = baud_rate
+
+
+class FdTransport(Transport):
+    """
+    A transport which reads and writes a tty's file descriptor directly.
+
+    Reads are made into a single reusable buffer whenever the event loop reports
+    the file descriptor as readable. Writes are attempted immediately, and are
+    only buffered if the tty's output queue is full.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        port: str,
+        baud_rate: BaudRate,
+        read_size: int = READ_SIZE,
+    ) -> None:
+        if termios is None:
+            raise ConnectionError("FdTransport requires termios")
+
+        super().__init__(extra=dict(port=port))
+
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._protocol: asyncio.Protocol = protocol
+        self._port: str = port
+
+        self._fd: int = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            self._configure(baud_rate)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+        self._baud_rate: BaudRate = baud_rate
+        self._file: io.FileIO = io.FileIO(self._fd, "rb", closefd=False)
+        self._read_buffer: bytearray = bytearray(read_size)
+        self._read_view: memoryview = memoryview(self._read_buffer)
+        self._write_buffer: bytearray = bytearray()
+        self._has_reader: bool = False
+        self._has_writer: bool = False
+        self._closing: bool = False
+        self._closed: bool = False
+
+        loop.call_soon(protocol.connection_made, self)
+        loop.call_soon(self._add_reader)
+
+    def _configure(self: Self, baud_rate: BaudRate) -> None:
+        assert termios is not None
+
+        iflag, oflag, cflag, lflag, _, _, cc = termios.tcgetattr(self._fd)
+
+        # Raw mode, 8N1, no flow control
+        iflag &= ~(
+            termios.IGNBRK
+            | termios.BRKINT
+            | termios.PARMRK
+            | termios.ISTRIP
+            | termios.INLCR
+            | termios.IGNCR
+            | termios.ICRNL
+            | termios.IXON
+            | termios.IXOFF
+            | termios.IXANY
+        )
+        oflag &= ~termios.OPOST
+        lflag &= ~(
+            termios.ECHO
+            | termios.ECHONL
+            | termios.ICANON
+            | termios.ISIG
+            | termios.IEXTEN
+        )
+        cflag &= ~(termios.CSIZE | termios.PARENB | termios.CSTOPB)
+        cflag &= ~getattr(termios, "CRTSCTS", 0)
+        cflag |= termios.CS8 | termios.CREAD | termios.CLOCAL
+        cc[termios.VMIN] = 0
+        cc[termios.VTIME] = 0
+
+        speed = _termios_speed(baud_rate)
+
+        termios.tcsetattr(
+            self._fd,
+            termios.TCSANOW,
+            [iflag, oflag, cflag, lflag, speed, speed, cc],
+        )
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self._baud_rate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        assert termios is not None
+
+        attrs = termios.tcgetattr(self._fd)
+        speed = _termios_speed(baud_rate)
+        attrs[4] = speed
+        attrs[5] = speed
+        termios.tcsetattr(self._fd, termios.TCSADRAIN, attrs)
+        self._baud_rate = baud_rate
+
+    #
+    # Reading
+    #
+
+    def _add_reader(self: Self) -> None:
+        if self._closing or self._has_reader:
+            return
+        self._loop.add_reader(self._fd, self._read_ready)
+        self._has_reader = True
+
+    def _remove_reader(self: Self) -> None:
+        if self._has_reader:
+            self._loop.remove_reader(self._fd)
+            self._has_reader = False
+
+    def _read_ready(self: Self) -> None:
+        try:
+            n = self._file.readinto(self._read_view)
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            if exc.errno == errno.EIO:
+                # The device hung up - typically because it was unplugged
+                self._fatal_error(ConnectionError(f"{self._port} hung up"))
+            else:
+                self._fatal_error(exc)
+            return
+
+        if n is None:
+            # No data is available yet
+            return
+        elif n:
+            self._protocol.data_received(bytes(self._read_view[:n]))
+        else:
+            # The tty was readable but at end of file, which means the device
+            # hung up
+            self._fatal_error(ConnectionError(f"{self._port} hung up"))
+
+    def is_reading(self: Self) -> bool:
+        return self._has_reader
+
+    def pause_reading(self: Self) -> None:
+        self._remove_reader()
+
+    def resume_reading(self: Self) -> None:
+        self._add_reader()
+
+    #
+    # Writing
+    #
+
+    def write(self: Self, data: bytes | bytearray | memoryview) -> None:
+        if self._closing:
+            return
+
+        if not self._write_buffer:
+            try:
+                n = os.write(self._fd, data)
+            except BlockingIOError:
+                n = 0
+            except OSError as exc:
+                self._fatal_error(exc)
+                return
+
+            if n == len(data):
+                return
+
+            data = data[n:]
+            self._loop.add_writer(self._fd, self._write_ready)
+            self._has_writer = True
+
+        self._write_buffer += data
+
+    def _write_ready(self: Self) -> None:
+        try:
+            n = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            self._fatal_error(exc)
+            return
+
+        del self._write_buffer[:n]
+
+        if not self._write_buffer:
+            self._remove_writer()
+            if self._closing:
+                self._call_connection_lost(None)
+
+    def _remove_writer(self: Self) -> None:
+        if self._has_writer:
+            self._loop.remove_writer(self._fd)
+            self._has_writer = False
+
+    def can_write_eof(self: Self) -> bool:
+        return False
+
+    def get_write_buffer_size(self: Self) -> int:
+        return len(self._write_buffer)
+
+    #
+    # Closing
+    #
+
+    def is_closing(self: Self) -> bool:
+        return self._closing
+
+    def close(self: Self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._remove_reader()
+        if not self._write_buffer:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def abort(self: Self) -> None:
+        self._abort(None)
+
+    def _fatal_error(self: Self, exc: Exception) -> None:
+        logger.debug(f"Fatal error on {self._port}: {exc}")
+        self._abort(exc)
+
+    def _abort(self: Self, exc: Optional[Exception]) -> None:
+        self._closing = True
+        self._remove_reader()
+        self._remove_writer()
+        self._write_buffer.clear()
+        self._loop.call_soon(self._call_connection_lost, exc)
+
+    def _call_connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._remove_reader()
+        self._remove_writer()
+        try:
+            os.close(self._fd)
+        finally:
+            self._protocol.connection_lost(exc)
+
+
+class _InnerProtocol(asyncio.Protocol):
+    # Forwards events from an inner transport to a reconnecting outer transport
+
+    def __init__(self: Self, transport: "TcpTransport | HotplugTransport") -> None:
+        self._outer: TcpTransport | HotplugTransport = transport
+
+    def data_received(self: Self, data: bytes) -> None:
+        self._outer._data_received(data)
+
+    def connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        self._outer._inner_connection_lost(exc)
+
+
+class TcpTransport(Transport):
+    """
+    A transport which connects to a serial server over TCP, either as a raw socket
+    or using RFC 2217.
+
+    If the connection drops, the transport will reconnect with exponential backoff.
+    Data written while disconnected is discarded, so in-flight commands will time
+    out and may be retried. The protocol is only told that the connection was lost
+    if the transport is closed or if it runs out of reconnect attempts.
+
+    Raw TCP connections can't change the baud rate of the remote port, which is
+    configured on the serial server. RFC 2217 connections configure the remote
+    port's baud rate when connecting and whenever the baud rate is set.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        host: str,
+        port: int,
+        baud_rate: BaudRate,
+        rfc2217: bool = False,
+        reconnect: bool = True,
+        reconnect_attempts: Optional[int] = None,
+    ) -> None:
+        super().__init__(extra=dict(host=host, port=port))
+
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._protocol: asyncio.Protocol = protocol
+        self._host: str = host
+        self._port: int = port
+        self._baud_rate: BaudRate = baud_rate
+        self._rfc2217: bool = rfc2217
+        self._reconnect: bool = reconnect
+        self._reconnect_attempts: Optional[int] = reconnect_attempts
+
+        self._inner: Optional[asyncio.Transport] = None
+        self._decoder: TelnetDecoder = TelnetDecoder()
+        self._options: Set[Tuple[int, int]] = set()
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+        self._closing: bool = False
+        self._closed: bool = False
+
+    @property
+    def address(self: Self) -> str:
+        return f"{self._host}:{self._port}"
+
+    async def connect(self: Self) -> None:
+        """
+        Make the initial connection, then notify the protocol.
+        """
+
+        try:
+            await self._open()
+        except OSError as exc:
+            raise ConnectionError(f"Failed to connect to {self.address}") from exc
+        self._loop.call_soon(self._protocol.connection_made, self)
+
+    async def _open(self: Self) -> None:
+        inner, _ = await self._loop.create_connection(
+            lambda: _InnerProtocol(self), self._host, self._port
+        )
+
+        sock: Optional[socket.socket] = inner.get_extra_info("socket")
+        if sock is not None:
+            _configure_socket(sock)
+
+        self._inner = inner
+        self._decoder = TelnetDecoder()
+        self._options = set()
+
+        if self._rfc2217:
+            self._negotiate()
+
+    #
+    # RFC 2217
+    #
+
+    def _negotiate(self: Self) -> None:
+        commands: List[bytes] = [
+            self._request(WILL, COM_PORT_OPTION),
+            self._request(WILL, BINARY),
+            self._request(DO, BINARY),
+            self._request(DO, SGA),
+            self._set_baud_rate_command(self._baud_rate),
+            subnegotiate(COM_PORT_OPTION, bytes([SET_DATASIZE, 8])),
+            subnegotiate(COM_PORT_OPTION, bytes([SET_PARITY, TELNET_PARITY_NONE])),
+            subnegotiate(COM_PORT_OPTION, bytes([SET_STOPSIZE, STOPSIZE_ONE])),
+            subnegotiate(
+                COM_PORT_OPTION, bytes([SET_CONTROL, CONTROL_NO_FLOW_CONTROL])
+            ),
+        ]
+        self._write_raw(b"".join(commands))
+
+    def _request(self: Self, verb: int, option: int) -> bytes:
+        self._options.add((verb, option))
+        return negotiate(verb, option)
+
+    def _set_baud_rate_command(self: Self, baud_rate: BaudRate) -> bytes:
+        return subnegotiate(
+            COM_PORT_OPTION, bytes([SET_BAUDRATE]) + baud_rate.to_bytes(4, "big")
+        )
+
+    def _handle_commands(self: Self, commands: List[TelnetCommand]) -> None:
+        replies: List[bytes] = []
+
+        for verb, option in commands:
+            if not isinstance(option, int):
+                # Subnegotiation responses from the server are informational
+                continue
+
+            if verb == DO:
+                reply = WILL if option in TELNET_OPTIONS else WONT
+            elif verb == WILL:
+                reply = DO if option in TELNET_OPTIONS else DONT
+            else:
+                continue
+
+            if (reply, option) not in self._options:
+                replies.append(self._request(reply, option))
+
+        if replies:
+            self._write_raw(b"".join(replies))
+
+    #
+    # Baud rate
+    #
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self._baud_rate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        self._baud_rate = baud_rate
+        if self._rfc2217:
+            self._write_raw(self._set_baud_rate_command(baud_rate))
+        else:
+            logger.warning(
+                f"Can not set baud rate over raw TCP connection to {self.address}. "
+                "Configure the baud rate on the serial server instead."
+            )
+
+    #
+    # Reading and writing
+    #
+
+    def _data_received(self: Self, data: bytes) -> None:
+        if self._rfc2217:
+            data, commands = self._decoder.decode(data)
+            if commands:
+                self._handle_commands(commands)
+        if data:
+            self._protocol.data_received(data)
+
+    def write(self: Self, data: bytes | bytearray | memoryview) -> None:
+        if self._closing:
+            return
+        self._write_raw(escape(bytes(data)) if self._rfc2217 else data)
+
+    def _write_raw(self: Self, data: bytes | bytearray | memoryview) -> None:
+        if not self._inner:
+            logger.debug(f"Not connected to {self.address}, discarding {data!r}")
+            return
+        self._inner.write(data)
+
+    def is_reading(self: Self) -> bool:
+        return bool(self._inner and self._inner.is_reading())
+
+    def pause_reading(self: Self) -> None:
+        if self._inner:
+            self._inner.pause_reading()
+
+    def resume_reading(self: Self) -> None:
+        if self._inner:
+            self._inner.resume_reading()
+
+    def can_write_eof(self: Self) -> bool:
+        return False
+
+    def get_write_buffer_size(self: Self) -> int:
+        return self._inner.get_write_buffer_size() if self._inner else 0
+
+    #
+    # Reconnecting
+    #
+
+    def _inner_connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        self._inner = None
+
+        if self._closing or not self._reconnect:
+            self._call_connection_lost(exc)
+            return
+
+        logger.warning(f"Lost connection to {self.address}, reconnecting...")
+        self._reconnect_task = self._loop.create_task(self._reconnect_loop(exc))
+
+    async def _reconnect_loop(self: Self, exc: Optional[Exception]) -> None:
+        delay: float = RECONNECT_MIN_DELAY
+        attempts: int = 0
+
+        while self._reconnect_attempts is None or attempts < self._reconnect_attempts:
+            await asyncio.sleep(delay)
+            attempts += 1
+            try:
+                await self._open()
+            except OSError as open_exc:
+                logger.debug(f"Reconnect attempt {attempts} failed: {open_exc}")
+                exc = open_exc
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            else:
+                logger.info(f"Reconnected to {self.address}")
+                return
+
+        try:
+            raise ConnectionError(
+                f"Failed to reconnect to {self.address} after {attempts} attempts"
+            ) from exc
+        except ConnectionError as conn_exc:
+            self._call_connection_lost(conn_exc)
+
+    #
+    # Closing
+    #
+
+    def is_closing(self: Self) -> bool:
+        return self._closing
+
+    def close(self: Self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._cancel_reconnect()
+        if self._inner:
+            self._inner.close()
+        else:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def abort(self: Self) -> None:
+        self._closing = True
+        self._cancel_reconnect()
+        if self._inner:
+            self._inner.abort()
+        else:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def _cancel_reconnect(self: Self) -> None:
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
+    def _call_connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._closing = True
+        self._protocol.connection_lost(exc)
+
+
+class HotplugTransport(Transport):
+    """
+    A transport which reopens a local serial port when its device is unplugged and
+    plugged back in.
+
+    The underlying connection is either a `SerialTransport` or an `FdTransport`.
+    When it's lost, the transport waits for the device node to reappear using a
+    `DeviceWatcher`, which is notified by inotify, and reopens the port at the
+    current baud rate. As with `TcpTransport`, data written while disconnected is
+    discarded, and the protocol is only told that the connection was lost when the
+    transport is closed.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        port: str,
+        baud_rate: BaudRate,
+        transport: TransportType = DEFAULT_TRANSPORT,
+    ) -> None:
+        super().__init__(extra=dict(port=port))
+
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._protocol: asyncio.Protocol = protocol
+        self._port: str = port
+        self._baud_rate: BaudRate = baud_rate
+        self._transport_type: TransportType = transport
+
+        self._inner: Optional[Transport] = None
+        self._reconnect_task: Optional[asyncio.Task[None]] = None
+        self._closing: bool = False
+        self._closed: bool = False
+
+    def connect(self: Self) -> None:
+        """
+        Open the port, then notify the protocol.
+        """
+
+        self._open()
+        self._loop.call_soon(self._protocol.connection_made, self)
+
+    def _open(self: Self) -> None:
+        self._inner = _open_local_transport(
+            self._loop,
+            _InnerProtocol(self),
+            self._port,
+            self._baud_rate,
+            self._transport_type,
+        )
+
+    #
+    # Baud rate
+    #
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self._baud_rate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        self._baud_rate = baud_rate
+        if self._inner:
+            self._inner.baud_rate = baud_rate
+
+    #
+    # Reading and writing
+    #
+
+    def _data_received(self: Self, data: bytes) -> None:
+        self._protocol.data_received(data)
+
+    def write(self: Self, data: bytes | bytearray | memoryview) -> None:
+        if self._closing:
+            return
+        if not self._inner:
+            logger.debug(f"{self._port} is unplugged, discarding {data!r}")
+            return
+        self._inner.write(data)
+
+    def is_reading(self: Self) -> bool:
+        return bool(self._inner and self._inner.is_reading())
+
+    def pause_reading(self: Self) -> None:
+        if self._inner:
+            self._inner.pause_reading()
+
+    def resume_reading(self: Self) -> None:
+        if self._inner:
+            self._inner.resume_reading()
+
+    def can_write_eof(self: Self) -> bool:
+        return False
+
+    def get_write_buffer_size(self: Self) -> int:
+        return self._inner.get_write_buffer_size() if self._inner else 0
+
+    #
+    # Reconnecting
+    #
+
+    def _inner_connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        self._inner = None
+
+        if self._closing:
+            self._call_connection_lost(exc)
+            return
+
+        logger.warning(f"Lost connection to {self._port}, waiting for device...")
+        self._reconnect_task = self._loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self: Self) -> None:
+        watcher = DeviceWatcher(self._port, loop=self._loop)
+        try:
+            while True:
+                await watcher.wait()
+                try:
+                    self._open()
+                except OSError as exc:
+                    # The node may exist before it's ready to open - for
+                    # instance, before udev has set its permissions
+                    logger.debug(f"Failed to reopen {self._port}: {exc}")
+                    await watcher.changed()
+                else:
+                    logger.info(f"Reconnected to {self._port}")
+                    return
+        finally:
+            watcher.close()
+
+    #
+    # Closing
+    #
+
+    def is_closing(self: Self) -> bool:
+        return self._closing
+
+    def close(self: Self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._cancel_reconnect()
+        if self._inner:
+            self._inner.close()
+        else:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def abort(self: Self) -> None:
+        self._closing = True
+        self._cancel_reconnect()
+        if self._inner:
+            self._inner.abort()
+        else:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def _cancel_reconnect(self: Self) -> None:
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
+    def _call_connection_lost(self: Self, exc: Optional[Exception]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._closing = True
+        self._protocol.connection_lost(exc)
+
+
+def _configure_socket(sock: socket.socket) -> None:
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    # These options are platform-specific
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+    if hasattr(socket, "TCP_KEEPCNT"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+
+
+def parse_network_url(url: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Parse a `tcp://host:port` or `rfc2217://host:port` URL into its scheme, host and
+    port. Returns None if the URL isn't a network URL.
+    """
+
+    if "://" not in url:
+        return None
+
+    parts = urlsplit(url)
+
+    if parts.scheme not in NETWORK_SCHEMES:
+        return None
+
+    if not parts.hostname or not parts.port:
+        raise ValueError(f"{url} must include both a host and a port")
+
+    return parts.scheme, parts.hostname, parts.port
+
+
+def _termios_speed(baud_rate: BaudRate) -> int:
+    assert termios is not None
+
+    if baud_rate == SLOW_BAUD_RATE:
+        return termios.B19200
+    elif baud_rate == FAST_BAUD_RATE:
+        return termios.B115200
+    raise ValueError(f"Baud rate {baud_rate} is unsupported")
+
+
+async def create_transport(
+    loop: asyncio.AbstractEventLoop,
+    protocol_factory: Callable[[], P],
+    port: str,
+    baud_rate: BaudRate,
+    transport: TransportType = DEFAULT_TRANSPORT,
+    hotplug: bool = False,
+) -> Tuple[Transport, P]:
+    """
+    Create a transport of the given type, connected to the specified port. Returns
+    the transport and the protocol created by `protocol_factory`.
+
+    If the port is a `tcp://` or `rfc2217://` URL, a `TcpTransport` is created
+    regardless of the requested transport type. Otherwise, if `hotplug` is true,
+    the transport is wrapped in a `HotplugTransport`.
+    """
+
+    protocol = protocol_factory()
+    protocol_: Any = protocol
+
+    network = parse_network_url(port)
+
+    if network:
+        scheme, host, tcp_port = network
+        tcp = TcpTransport(
+            loop,
+            protocol_,
+            host,
+            tcp_port,
+            baud_rate,
+            rfc2217=scheme == "rfc2217",
+        )
+        await tcp.connect()
+        return tcp, protocol
+    elif hotplug:
+        hotplug_transport = HotplugTransport(
+            loop, protocol_, port, baud_rate, transport=transport
+        )
+        hotplug_transport.connect()
+        return hotplug_transport, protocol
+
+    return _open_local_transport(loop, protocol_, port, baud_rate, transport), protocol
+
+
+def _open_local_transport(
+    loop: asyncio.AbstractEventLoop,
+    protocol: asyncio.Protocol,
+    port: str,
+    baud_rate: BaudRate,
+    transport: TransportType,
+) -> Transport:
+    if transport == "serial":
+        serial_instance = serial_for_url(
+            port,
+            baudrate=baud_rate,
+            bytesize=EIGHTBITS,
+            parity=PARITY_NONE,
+            stopbits=STOPBITS_ONE,
+        )
+        return SerialTransport(loop, protocol, serial_instance)
+    elif transport == "fd":
+        return FdTransport(loop, protocol, port, baud_rate)
+
+    raise ValueError(f"Unknown transport: {transport}")
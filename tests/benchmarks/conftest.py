@@ -0,0 +1,16 @@
+from typing import Any
+
+import pytest
+
+from tests.benchmarks.scenarios import format_results, RESULTS
+
+
+def pytest_terminal_summary(
+    terminalreporter: Any, exitstatus: int, config: pytest.Config
+) -> None:
+    if not RESULTS:
+        return
+
+    terminalreporter.section("scenarios")
+    for line in format_results(RESULTS):
+        terminalreporter.write_line(line)
@@ -0,0 +1,272 @@
+"""
+End-to-end scenarios, which run real workloads through a `Client` connected to
+an emulated CFA533.
+
+The emulator times frames by their size on the wire, so results reflect the
+baud rate. Line noise and device latency are configured with environment
+variables:
+
+- `CRYSTALFONTZ_BENCHMARK_NOISE`: the fraction of frames preceded by line noise
+  (default 0)
+- `CRYSTALFONTZ_BENCHMARK_LATENCY`: seconds the device takes to respond
+  (default 0)
+- `CRYSTALFONTZ_BENCHMARK_JITTER`: random extra seconds of latency (default 0)
+
+Each scenario reports commands per second, p50 and p99 command latency, and
+CPU time per command. CPU time is for the whole process, so it includes the
+emulator's share.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Self, TypeVar
+
+from crystalfontz.baud import BaudRate
+from crystalfontz.character import SMILEY_FACE
+from crystalfontz.client import Client
+from crystalfontz.emulator import create_emulated_connection, Emulator
+from crystalfontz.keys import KP_DOWN, KP_ENTER, KP_EXIT, KP_LEFT, KP_RIGHT, KP_UP
+from crystalfontz.metrics import Histogram
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+T = TypeVar("T")
+
+NOISE = float(os.environ.get("CRYSTALFONTZ_BENCHMARK_NOISE", "0"))
+LATENCY = float(os.environ.get("CRYSTALFONTZ_BENCHMARK_LATENCY", "0"))
+JITTER = float(os.environ.get("CRYSTALFONTZ_BENCHMARK_JITTER", "0"))
+
+N_FRAMES = 10
+N_POLLS = 20
+N_SENSORS = 32
+N_TAPS = 100
+
+KEYS = [KP_UP, KP_DOWN, KP_LEFT, KP_RIGHT, KP_ENTER, KP_EXIT]
+
+
+class TimingReportHandler(ReportHandler):
+    """
+    Record how long each key activity report waits between its frame arriving
+    and its handler running.
+    """
+
+    def __init__(self: Self) -> None:
+        self.latency: Histogram = Histogram()
+        self.count: int = 0
+        self.expected: int = 0
+        self.done: Optional[asyncio.Event] = None
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        if report.received_at is not None:
+            self.latency.record(time.monotonic() - report.received_at)
+        self.count += 1
+        if self.done and self.count >= self.expected:
+            self.done.set()
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        pass
+
+
+@dataclass
+class ScenarioResult:
+    """
+    The result of running a scenario, over all of its rounds.
+    """
+
+    scenario: str
+    baud_rate: BaudRate
+    commands: int = 0
+    elapsed: float = 0.0
+    cpu: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+
+    @property
+    def commands_per_second(self: Self) -> float:
+        return self.commands / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def cpu_per_command(self: Self) -> float:
+        return self.cpu / self.commands if self.commands else 0.0
+
+    def as_dict(self: Self) -> Dict[str, Any]:
+        return dict(
+            commands=self.commands,
+            commands_per_second=self.commands_per_second,
+            p50=self.latency.percentile(50),
+            p99=self.latency.percentile(99),
+            cpu_per_command=self.cpu_per_command,
+        )
+
+
+class ScenarioRunner:
+    """
+    A client connected to an emulator, which times the commands a scenario
+    sends.
+    """
+
+    def __init__(
+        self: Self,
+        client: Client,
+        emulator: Emulator,
+        handler: TimingReportHandler,
+        result: ScenarioResult,
+    ) -> None:
+        self.client: Client = client
+        self.emulator: Emulator = emulator
+        self.handler: TimingReportHandler = handler
+        self.result: ScenarioResult = result
+
+    async def timed(self: Self, command: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        res = await command
+        self.result.latency.record(time.perf_counter() - start)
+        self.result.commands += 1
+        return res
+
+    async def run(self: Self, scenario: "Scenario") -> None:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        await scenario(self)
+        self.result.elapsed += time.perf_counter() - wall
+        self.result.cpu += time.process_time() - cpu
+
+
+Scenario = Callable[[ScenarioRunner], Awaitable[None]]
+
+
+async def full_screen_refresh(runner: ScenarioRunner) -> None:
+    """
+    Redraw both lines of the display, frame after frame.
+    """
+
+    client = runner.client
+    for frame in range(N_FRAMES):
+        await runner.timed(client.send_data(0, 0, f"Frame {frame:>10}"))
+        await runner.timed(client.send_data(1, 0, f"{frame:0>16}"))
+
+
+async def cgram_upload(runner: ScenarioRunner) -> None:
+    """
+    Upload a full set of special characters.
+    """
+
+    client = runner.client
+    for index in range(8):
+        await runner.timed(client.set_special_character_data(index, SMILEY_FACE))
+
+
+async def status_polling(runner: ScenarioRunner) -> None:
+    """
+    Poll the device's status.
+    """
+
+    for _ in range(N_POLLS):
+        await runner.timed(runner.client.read_status())
+
+
+async def dow_scan(runner: ScenarioRunner) -> None:
+    """
+    Read every DOW device's ROM ID, then read each sensor's scratchpad.
+    """
+
+    client = runner.client
+    for index in range(N_SENSORS):
+        await runner.timed(client.read_dow_device_information(index))
+    for index in range(N_SENSORS):
+        await runner.timed(client.dow_transaction(index, 9, b"\xbe"))
+
+
+async def report_flood(runner: ScenarioRunner) -> None:
+    """
+    Press and release keys as fast as the line allows. Latency is from each
+    report's frame arriving to its handler running, and each report counts as a
+    command.
+    """
+
+    handler = runner.handler
+    handler.count = 0
+    handler.expected = N_TAPS * 2
+    handler.done = asyncio.Event()
+
+    for tap in range(N_TAPS):
+        runner.emulator.tap(KEYS[tap % len(KEYS)])
+    await asyncio.wait_for(handler.done.wait(), timeout=30)
+
+    runner.result.commands += handler.count
+
+
+SCENARIOS: Dict[str, Scenario] = dict(
+    full_screen_refresh=full_screen_refresh,
+    cgram_upload=cgram_upload,
+    status_polling=status_polling,
+    dow_scan=dow_scan,
+    report_flood=report_flood,
+)
+
+
+async def scenario_runner(scenario: str, baud_rate: BaudRate) -> ScenarioRunner:
+    """
+    Connect a client to an emulator at a baud rate, configured from the
+    environment.
+    """
+
+    emulator = Emulator(
+        baud_rate=baud_rate,
+        baud_timing=True,
+        latency=LATENCY,
+        jitter=JITTER,
+        noise_rate=NOISE,
+        temperature_sensors=N_SENSORS,
+        temperature_interval=0,
+        seed=0,
+    )
+    handler = TimingReportHandler()
+    client = await create_emulated_connection(
+        emulator,
+        report_handler=handler,
+        timeout=1.0,
+        retry_times=3,
+        baud_rate=baud_rate,
+        # Queue the whole flood, rather than dropping reports
+        report_queue_size=N_TAPS * 2,
+    )
+    # Stamp reports with when they arrived, to time them
+    client.stamp_responses = True
+    result = ScenarioResult(scenario, baud_rate)
+    # Report latency is recorded with command latency
+    handler.latency = result.latency
+    return ScenarioRunner(client, emulator, handler, result)
+
+
+def format_results(results: List[ScenarioResult]) -> List[str]:
+    header = ["scenario", "baud", "commands", "cmds/s", "p50", "p99", "cpu/cmd"]
+    rows = [header]
+    for result in results:
+        rows.append(
+            [
+                result.scenario,
+                str(result.baud_rate),
+                str(result.commands),
+                f"{result.commands_per_second:.1f}",
+                f"{result.latency.percentile(50) * 1000:.3f}ms",
+                f"{result.latency.percentile(99) * 1000:.3f}ms",
+                f"{result.cpu_per_command * 1000:.3f}ms",
+            ]
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = [
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    ]
+    lines.append(f"noise={NOISE:g} latency={LATENCY:g}s jitter={JITTER:g}s")
+    return lines
+
+
+# Results from this session, reported when it finishes
+RESULTS: List[ScenarioResult] = []
@@ -0,0 +1,42 @@
+"""
+Benchmark encoding text for the character ROM, packing special characters for
+CGRAM, and decoding the device's status.
+"""
+
+import pytest
+
+from crystalfontz.character import inverse, SMILEY_FACE, x_bar
+from crystalfontz.device import CFA533, CFA533_CHARACTER_ROM, CFA533Status
+from crystalfontz.emulator import Emulator
+
+TEXTS = {
+    "ascii": "Hello world!1234",
+    "unicode": "αβ°C x̄=3.14 ñ→←",
+    "multi-codepoint": f"{x_bar}{inverse}" * 4,
+}
+
+
+@pytest.mark.parametrize("text", TEXTS.values(), ids=TEXTS.keys())
+def test_character_rom_encode(benchmark, text: str) -> None:
+    encoded = benchmark(CFA533_CHARACTER_ROM.encode, text)
+
+    assert len(encoded) <= 16
+
+
+def test_special_character_to_bytes(benchmark) -> None:
+    device = CFA533()
+
+    encoded = benchmark(SMILEY_FACE.to_bytes, device)
+
+    assert len(encoded) == 8
+
+
+def test_status_from_bytes(benchmark) -> None:
+    emulator = Emulator(temperature_sensors=4)
+    emulator.state.temperature_reporting = 0b0101
+    res = emulator.handle((0x1E, b""))
+    assert res is not None
+
+    status = benchmark(CFA533Status.from_bytes, res[1])
+
+    assert status.temperature_sensors_enabled == {1, 3}
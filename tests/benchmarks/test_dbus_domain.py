@@ -0,0 +1,139 @@
+"""
+Benchmark the DBus domain mappers, which pack responses for the service's
+replies and unpack arguments for its methods.
+"""
+
+from typing import Any, List, Tuple
+
+import pytest
+
+from crystalfontz.character import SMILEY_FACE
+from crystalfontz.config import Config
+from crystalfontz.dbus.domain import (
+    ConfigM,
+    DeviceStatusM,
+    DowDeviceInformationM,
+    DowTransactionResultM,
+    GpioReadM,
+    KeyActivityReportM,
+    KeypadPolledM,
+    LcdMemoryM,
+    PongM,
+    TemperatureReportM,
+    VersionsM,
+)
+from crystalfontz.dbus.domain.character import SpecialCharacterM
+from crystalfontz.dbus.domain.command import (
+    SendDataM,
+    SetBacklightM,
+    SetSpecialCharacterDataM,
+    SetupTemperatureReportingM,
+)
+from crystalfontz.device import CFA533
+from crystalfontz.emulator import Emulator
+from crystalfontz.packet import Packet
+from crystalfontz.response import Response
+
+# Response mappers, and a command which produces their response
+RESPONSES: List[Tuple[Any, Packet]] = [
+    (PongM, (0x00, b"ping!")),
+    (VersionsM, (0x01, b"")),
+    (LcdMemoryM, (0x0A, b"\x80")),
+    (DowDeviceInformationM, (0x12, b"\x00")),
+    (DowTransactionResultM, (0x14, b"\x00\x09\xbe")),
+    (KeypadPolledM, (0x18, b"")),
+    (GpioReadM, (0x23, b"\x00")),
+]
+
+REPORTS: List[Tuple[Any, Packet]] = [
+    (KeyActivityReportM, (0x80, b"\x01")),
+    (TemperatureReportM, (0x82, b"\x00\x01\x40\x01")),
+]
+
+
+def responses() -> List[Tuple[Any, Response]]:
+    emulator = Emulator(temperature_sensors=1)
+    decoded: List[Tuple[Any, Response]] = []
+    for map_cls, command in RESPONSES:
+        packet = emulator.handle(command)
+        assert packet is not None
+        decoded.append((map_cls, Response.from_packet(packet)))
+    for map_cls, packet in REPORTS:
+        decoded.append((map_cls, Response.from_packet(packet)))
+    return decoded
+
+
+RESPONSE_PARAMS = pytest.mark.parametrize(
+    "map_cls,response",
+    responses(),
+    ids=[map_cls.__name__ for map_cls, _ in RESPONSES + REPORTS],
+)
+
+
+@RESPONSE_PARAMS
+def test_pack_response(benchmark, map_cls: Any, response: Response) -> None:
+    benchmark(map_cls.pack, response)
+
+
+@RESPONSE_PARAMS
+def test_unpack_response(benchmark, map_cls: Any, response: Response) -> None:
+    packed = map_cls.pack(response)
+
+    unpacked = benchmark(map_cls.unpack, packed)
+
+    assert isinstance(unpacked, response.__class__)
+
+
+def test_pack_status(benchmark) -> None:
+    device = CFA533()
+    status = device.status(Emulator().handle((0x1E, b""))[1])  # type: ignore
+
+    benchmark(DeviceStatusM.pack, status, device)
+
+
+def test_unpack_status(benchmark) -> None:
+    device = CFA533()
+    status = device.status(Emulator().handle((0x1E, b""))[1])  # type: ignore
+    packed = DeviceStatusM.pack(status, device)
+
+    benchmark(DeviceStatusM.unpack, packed)
+
+
+def test_pack_special_character(benchmark) -> None:
+    benchmark(SpecialCharacterM.pack, SMILEY_FACE, CFA533())
+
+
+def test_unpack_special_character(benchmark) -> None:
+    packed = SpecialCharacterM.pack(SMILEY_FACE, CFA533())
+
+    benchmark(SpecialCharacterM.unpack, packed)
+
+
+def test_pack_config(benchmark) -> None:
+    config = Config(
+        file="/etc/crystalfontz.yaml",
+        port="/dev/ttyUSB0",
+        model="CFA533",
+        hardware_rev="h1.4",
+        firmware_rev="u1v2",
+    )
+
+    benchmark(ConfigM.pack, config)
+
+
+COMMANDS: List[Tuple[Any, List[Any]]] = [
+    (SendDataM, [0, 0, b"Hello world!"]),
+    (SetBacklightM, [0.5, -1.0]),
+    (SetupTemperatureReportingM, [list(range(1, 33))]),
+    (
+        SetSpecialCharacterDataM,
+        [0, SpecialCharacterM.pack(SMILEY_FACE, CFA533())],
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "map_cls,args", COMMANDS, ids=[map_cls.__name__ for map_cls, _ in COMMANDS]
+)
+def test_unpack_command(benchmark, map_cls: Any, args: List[Any]) -> None:
+    benchmark(map_cls.unpack, *args, 0.25, 3)
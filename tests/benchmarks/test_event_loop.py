@@ -0,0 +1,82 @@
+"""
+Compare command round-trip overhead and report dispatch throughput between the
+standard asyncio event loop and uvloop.
+"""
+
+import asyncio
+from typing import Generator, Self
+
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz.event_loop import EventLoopType, loop_factory
+from crystalfontz.packet import serialize_packet
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+N_COMMANDS = 100
+N_REPORTS = 1000
+
+
+class CountingReportHandler(ReportHandler):
+    def __init__(self: Self) -> None:
+        self.count = 0
+        self.done: asyncio.Event = asyncio.Event()
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        self.count += 1
+        if self.count >= N_REPORTS:
+            self.done.set()
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        pass
+
+
+@pytest.fixture(params=["asyncio", "uvloop"])
+def loop(request) -> Generator[asyncio.AbstractEventLoop, None, None]:
+    event_loop: EventLoopType = request.param
+    if event_loop == "uvloop":
+        pytest.importorskip("uvloop")
+    factory = loop_factory(event_loop)
+    loop = factory() if factory else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_command_round_trip(benchmark, loop: asyncio.AbstractEventLoop) -> None:
+    client = loop.run_until_complete(loopback_client())
+
+    async def ping() -> None:
+        for _ in range(N_COMMANDS):
+            await client.ping(b"ping!")
+
+    benchmark(lambda: loop.run_until_complete(ping()))
+
+    client.close()
+    loop.run_until_complete(client.closed)
+
+
+def test_report_dispatch(benchmark, loop: asyncio.AbstractEventLoop) -> None:
+    async def setup() -> CountingReportHandler:
+        return CountingReportHandler()
+
+    handler = loop.run_until_complete(setup())
+    # Queue every report, rather than dropping those which arrive while the
+    # queue is full
+    client = loop.run_until_complete(
+        loopback_client(handler, report_queue_size=N_REPORTS)
+    )
+    report = serialize_packet((0x80, b"\x01"))
+
+    async def dispatch() -> None:
+        handler.count = 0
+        handler.done.clear()
+        for _ in range(N_REPORTS):
+            client.data_received(report)
+        await handler.done.wait()
+
+    benchmark(lambda: loop.run_until_complete(dispatch()))
+
+    client.close()
+    loop.run_until_complete(client.closed)
@@ -0,0 +1,82 @@
+"""
+Benchmark the packet codec: CRCs, serializing packets, and parsing streams of
+frames as they arrive from the device.
+"""
+
+from typing import List
+
+import pytest
+
+from crystalfontz.packet import make_crc, Packet, parse_packet, serialize_packet
+
+N_PACKETS = 1000
+
+# A spread of frame sizes, from an empty ack to a full line of data
+PACKETS: List[Packet] = [
+    (0x5F, b""),
+    (0x40, b"ping!"),
+    (0x1F, b"\x00\x00" + b"x" * 16),
+    (0x80, b"\x01"),
+    (0x82, b"\x01\x01\x40\x01"),
+]
+
+
+def stream(packets: List[Packet], n: int) -> bytes:
+    return b"".join(serialize_packet(packets[i % len(packets)]) for i in range(n))
+
+
+@pytest.mark.parametrize("size", [0, 4, 18])
+def test_make_crc(benchmark, size: int) -> None:
+    packet = bytes([0x1F, size]) + b"x" * size
+
+    benchmark(make_crc, packet)
+
+
+@pytest.mark.parametrize("packet", PACKETS, ids=lambda p: f"0x{p[0]:02X}")
+def test_serialize_packet(benchmark, packet: Packet) -> None:
+    benchmark(serialize_packet, packet)
+
+
+def parse_all(buffer: bytes) -> int:
+    count = 0
+    packet, buffer = parse_packet(buffer)
+    while packet:
+        count += 1
+        packet, buffer = parse_packet(buffer)
+    return count
+
+
+def test_parse_stream(benchmark) -> None:
+    buffer = stream(PACKETS, N_PACKETS)
+
+    assert benchmark(parse_all, buffer) == N_PACKETS
+
+
+def test_parse_stream_with_noise(benchmark) -> None:
+    # A byte of line noise before every tenth frame, which the parser has to
+    # resynchronize past
+    buffer = b"".join(
+        (b"\xaa" if i % 10 == 0 else b"") + serialize_packet(PACKETS[i % len(PACKETS)])
+        for i in range(N_PACKETS)
+    )
+
+    assert benchmark(parse_all, buffer) == N_PACKETS
+
+
+def test_parse_chunked_stream(benchmark) -> None:
+    # Frames arriving a few bytes at a time, as they do from a serial port
+    data = stream(PACKETS, N_PACKETS)
+    chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+
+    def run() -> int:
+        count = 0
+        buffer = b""
+        for chunk in chunks:
+            buffer += chunk
+            packet, buffer = parse_packet(buffer)
+            while packet:
+                count += 1
+                packet, buffer = parse_packet(buffer)
+        return count
+
+    assert benchmark(run) == N_PACKETS
@@ -0,0 +1,84 @@
+"""
+Benchmark decoding each response class with `Response.from_packet`. Payloads
+are generated by the emulator, so they're shaped like the device's.
+"""
+
+from typing import Dict
+
+import pytest
+
+from crystalfontz.emulator import Emulator
+from crystalfontz.packet import Packet
+from crystalfontz.response import Response, RESPONSE_CLASSES
+
+# A command which produces each response, by response code
+COMMANDS: Dict[int, Packet] = {
+    0x40: (0x00, b"ping!"),
+    0x41: (0x01, b""),
+    0x42: (0x02, b"\x00" * 16),
+    0x43: (0x03, b""),
+    0x44: (0x04, b""),
+    0x45: (0x05, bytes([12, 28, 97])),
+    0x46: (0x06, b""),
+    0x47: (0x07, b" " * 16),
+    0x48: (0x08, b" " * 16),
+    0x49: (0x09, b"\x00" * 9),
+    0x4A: (0x0A, b"\x80"),
+    0x4B: (0x0B, b"\x00\x00"),
+    0x4C: (0x0C, b"\x00"),
+    0x4D: (0x0D, b"\x10\x80"),
+    0x4E: (0x0E, b"\x64\x64"),
+    0x52: (0x12, b"\x00"),
+    0x53: (0x13, b"\x01\x00\x00\x00"),
+    0x54: (0x14, b"\x00\x09\xbe"),
+    0x55: (0x15, b"\x00\x00"),
+    0x56: (0x16, b"\x00\x01"),
+    0x57: (0x17, b"\x3f\x3f"),
+    0x58: (0x18, b""),
+    0x5C: (0x1C, b"\x00"),
+    0x5D: (0x1D, b"\x00"),
+    0x5E: (0x1E, b""),
+    0x5F: (0x1F, b"\x00\x00hello"),
+    0x61: (0x21, b"\x00"),
+    0x62: (0x22, b"\x00\x01"),
+    0x63: (0x23, b"\x00"),
+}
+
+# Reports aren't responses to commands
+REPORTS: Dict[int, bytes] = {
+    0x80: b"\x01",
+    0x82: b"\x00\x01\x40\x01",
+}
+
+
+def response_packets() -> Dict[int, Packet]:
+    emulator = Emulator(temperature_sensors=1)
+    packets: Dict[int, Packet] = {
+        code: packet
+        for code, packet in (
+            (code, emulator.handle(command)) for code, command in COMMANDS.items()
+        )
+        if packet is not None
+    }
+    packets.update({code: (code, data) for code, data in REPORTS.items()})
+    return packets
+
+
+PACKETS = response_packets()
+
+
+def test_all_responses_covered() -> None:
+    assert set(PACKETS) == set(RESPONSE_CLASSES)
+    for code, packet in PACKETS.items():
+        assert packet[0] == code, f"0x{code:02X} is an error response"
+
+
+@pytest.mark.parametrize(
+    "code", sorted(PACKETS), ids=lambda code: RESPONSE_CLASSES[code].__name__
+)
+def test_from_packet(benchmark, code: int) -> None:
+    packet = PACKETS[code]
+
+    res = benchmark(Response.from_packet, packet)
+
+    assert isinstance(res, RESPONSE_CLASSES[code])
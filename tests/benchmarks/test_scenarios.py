@@ -0,0 +1,50 @@
+"""
+End-to-end throughput and latency, for real workloads through a `Client`
+against an emulated device at each baud rate. See
+`tests/benchmarks/scenarios.py` for the scenarios and their configuration.
+
+Commands per second, p50/p99 latency and CPU per command are saved in each
+benchmark's `extra_info`, and summarized at the end of the session.
+"""
+
+import asyncio
+import os
+from typing import Generator
+
+import pytest
+
+from tests.benchmarks.scenarios import RESULTS, scenario_runner, SCENARIOS
+
+from crystalfontz.baud import BaudRate, FAST_BAUD_RATE, SLOW_BAUD_RATE
+
+ROUNDS = int(os.environ.get("CRYSTALFONTZ_BENCHMARK_ROUNDS", "3"))
+
+
+@pytest.fixture
+def loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.parametrize("baud_rate", [SLOW_BAUD_RATE, FAST_BAUD_RATE])
+@pytest.mark.parametrize("scenario", SCENARIOS.keys())
+def test_scenario(
+    benchmark, loop: asyncio.AbstractEventLoop, scenario: str, baud_rate: BaudRate
+) -> None:
+    benchmark.group = scenario
+    runner = loop.run_until_complete(scenario_runner(scenario, baud_rate))
+
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(runner.run(SCENARIOS[scenario])),
+        rounds=ROUNDS,
+        iterations=1,
+    )
+
+    runner.client.close()
+    loop.run_until_complete(runner.client.closed)
+
+    result = runner.result
+    assert result.commands > 0
+    benchmark.extra_info.update(result.as_dict())
+    RESULTS.append(result)
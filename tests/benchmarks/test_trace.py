@@ -0,0 +1,53 @@
+"""
+Measure the overhead of tracing hooks on the packet codec.
+
+With no subscribers ("idle"), emitting an event is a truthiness check. "eager"
+subscribes hooks which format debug messages whether or not `DEBUG` is enabled,
+the way the codec logged before tracing hooks. "logging" subscribes the logging
+subscriber with `DEBUG` disabled, which calls a hook and checks the log level
+per packet, but formats nothing.
+"""
+
+import logging
+from typing import Generator
+
+import pytest
+
+from crystalfontz import trace
+from crystalfontz.packet import parse_packet, serialize_packet
+
+N_PACKETS = 1000
+
+PACKET = (0x1F, b"hello world")
+
+logger = logging.getLogger("crystalfontz.benchmarks")
+
+
+def eager_tx(data: bytes) -> None:
+    logger.debug(f"Sending packet: {data}")
+
+
+def eager_rx(data: bytes) -> None:
+    logger.debug(f"Received packet: {data}")
+
+
+@pytest.fixture(params=["idle", "logging", "eager"])
+def mode(request) -> Generator[str, None, None]:
+    logging.getLogger().setLevel(logging.WARNING)
+    if request.param == "logging":
+        trace.enable_logging()
+    elif request.param == "eager":
+        trace.subscribe("tx", eager_tx)
+        trace.subscribe("rx", eager_rx)
+    yield request.param
+    trace.disable_logging()
+    trace.unsubscribe("tx", eager_tx)
+    trace.unsubscribe("rx", eager_rx)
+
+
+def test_codec_overhead(benchmark, mode: str) -> None:
+    def run() -> None:
+        for _ in range(N_PACKETS):
+            parse_packet(serialize_packet(PACKET))
+
+    benchmark(run)
@@ -0,0 +1,82 @@
+"""
+Compare the per-packet overhead of the `pyserial-asyncio` transport against the
+direct file descriptor transport, using a pseudo-terminal in place of a device.
+"""
+
+import asyncio
+from typing import Generator
+
+import pytest
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.client import Client, create_connection
+from crystalfontz.response import Pong
+from crystalfontz.transport import TransportType
+
+N_PACKETS = 100
+
+
+@pytest.fixture
+def loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def pty_device(
+    loop: asyncio.AbstractEventLoop,
+) -> Generator[PtyDevice, None, None]:
+    device = PtyDevice(loop)
+    yield device
+    device.close()
+
+
+def connect(
+    loop: asyncio.AbstractEventLoop, pty_device: PtyDevice, transport: TransportType
+) -> Client:
+    async def main() -> Client:
+        return await create_connection(pty_device.port, transport=transport)
+
+    return loop.run_until_complete(main())
+
+
+def disconnect(loop: asyncio.AbstractEventLoop, client: Client) -> None:
+    client.close()
+    loop.run_until_complete(client.closed)
+
+
+@pytest.mark.parametrize("transport", ["serial", "fd"])
+def test_ping_round_trip(
+    benchmark, loop: asyncio.AbstractEventLoop, pty_device: PtyDevice, transport
+) -> None:
+    client = connect(loop, pty_device, transport)
+
+    async def ping() -> None:
+        for _ in range(N_PACKETS):
+            await client.ping(b"ping!")
+
+    benchmark(lambda: loop.run_until_complete(ping()))
+
+    disconnect(loop, client)
+
+
+@pytest.mark.parametrize("transport", ["serial", "fd"])
+def test_receive_burst(
+    benchmark, loop: asyncio.AbstractEventLoop, pty_device: PtyDevice, transport
+) -> None:
+    client = connect(loop, pty_device, transport)
+
+    async def burst() -> None:
+        rcv = client.subscribe(Pong, expect=False)
+        for _ in range(N_PACKETS):
+            pty_device.write((0x40, b"pong!"))
+        for _ in range(N_PACKETS):
+            await rcv.get()
+            rcv.task_done()
+        client.unsubscribe(Pong, rcv)
+
+    benchmark(lambda: loop.run_until_complete(burst()))
+
+    disconnect(loop, client)
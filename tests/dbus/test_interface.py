@@ -0,0 +1,39 @@
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz.spans import SpanRecorder
+
+try:
+    from crystalfontz.dbus.interface import DbusInterface
+except ImportError:
+    DbusInterface = None
+
+
+@pytest.mark.skipif(DbusInterface is None, reason="dbus extra is not installed")
+@pytest.mark.asyncio
+async def test_call_counts_and_spans() -> None:
+    client = await loopback_client()
+    iface = DbusInterface(client)
+    iface.span_recorder = SpanRecorder()
+
+    assert await iface.ping(b"hello", -1.0, -1) == b"hello"
+    with pytest.raises(ValueError):
+        await iface.set_baud_rate(1200, -1.0, -1)
+
+    assert iface.calls.values == dict(ping=1, set_baud_rate=1)
+    assert iface.call_errors.values == dict(set_baud_rate=1)
+
+    ping, set_baud_rate = iface.span_recorder.traces
+    assert ping.name == "dbus.ping"
+    assert [span.name for span in ping.spans] == [
+        "queue",
+        "write",
+        "ack",
+        "dbus.unpack",
+        "dbus.pack",
+    ]
+    assert set_baud_rate.error == "ValueError"
+
+    client.close()
+    await client.closed
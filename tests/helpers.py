@@ -1,11 +1,26 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 from contextlib import contextmanager
 import os
 import subprocess
-from typing import Dict, Generator, List, Optional, Protocol, Self
+from typing import Any, cast, Dict, Generator, List, Optional, Protocol, Self
 
+import pytest
+
+from crystalfontz.baud import BaudRate, SLOW_BAUD_RATE
 from crystalfontz.character import SpecialCharacter
+from crystalfontz.client import Client
+from crystalfontz.device import CFA533
+from crystalfontz.packet import Packet, parse_packet, serialize_packet
+from crystalfontz.report import NoopReportHandler, ReportHandler
+from crystalfontz.telnet import escape, TelnetCommand, TelnetDecoder
+from crystalfontz.transport import Transport
+
+try:
+    import termios
+except ImportError:
+    termios = None
 
 
 class Cli:
@@ -50,3 +65,210 @@ class EnvFactory(Protocol):
 
 def special_character_as_rows(character: SpecialCharacter) -> List[str]:
     return ["".join(["█" if p else " " for p in row]) for row in character.pixels]
+
+
+class EchoDevice:
+    """
+    A stand-in for a device. Every packet fed to it is answered with a response
+    carrying the same payload, which is enough to make pings round-trip. Canned
+    response payloads may be supplied by command code.
+    """
+
+    def __init__(self: Self, responses: Optional[Dict[int, bytes]] = None) -> None:
+        self.received: List[Packet] = []
+        self.responses: Dict[int, bytes] = responses or dict()
+        self._buffer: bytes = b""
+
+    def feed(self: Self, data: bytes) -> bytes:
+        response = b""
+
+        self._buffer += data
+        packet, self._buffer = parse_packet(self._buffer)
+        while packet:
+            self.received.append(packet)
+            code, payload = packet
+            response += serialize_packet(
+                (code | 0x40, self.responses.get(code, payload))
+            )
+            packet, self._buffer = parse_packet(self._buffer)
+
+        return response
+
+
+class PtyDevice(EchoDevice):
+    """
+    A pseudo-terminal standing in for a device. If a baud rate is given, data
+    written while the line is configured for another baud rate is discarded, as
+    it would be garbled on a real serial line.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        responses: Optional[Dict[int, bytes]] = None,
+        baud_rate: Optional[BaudRate] = None,
+    ) -> None:
+        if termios is None:
+            pytest.skip("Emulating a device over a pty requires termios")
+
+        super().__init__(responses)
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.baud_rate: Optional[BaudRate] = baud_rate
+        self.master, self.slave = os.openpty()
+        self.port: str = os.ttyname(self.slave)
+        os.set_blocking(self.master, False)
+        loop.add_reader(self.master, self._read_ready)
+
+    def _read_ready(self: Self) -> None:
+        try:
+            data = os.read(self.master, 1024)
+        except OSError:
+            return
+
+        if self.baud_rate and termios.tcgetattr(self.master)[4] != getattr(
+            termios, f"B{self.baud_rate}"
+        ):
+            return
+
+        response = self.feed(data)
+        if response:
+            os.write(self.master, response)
+
+    def write(self: Self, packet: Packet) -> None:
+        os.write(self.master, serialize_packet(packet))
+
+    def close(self: Self) -> None:
+        self.loop.remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class SocketDevice(EchoDevice):
+    """
+    A TCP server standing in for a device behind a serial server, such as ser2net.
+    When `rfc2217` is set, telnet commands are stripped from the stream and
+    recorded.
+    """
+
+    def __init__(self: Self, rfc2217: bool = False) -> None:
+        super().__init__()
+        self.rfc2217: bool = rfc2217
+        self.commands: List[TelnetCommand] = []
+        self.connections: List[asyncio.Transport] = []
+        self.server: Optional[asyncio.Server] = None
+        self._decoder: TelnetDecoder = TelnetDecoder()
+
+    @property
+    def url(self: Self) -> str:
+        assert self.server is not None
+        _, port = self.server.sockets[0].getsockname()[0:2]
+        scheme = "rfc2217" if self.rfc2217 else "tcp"
+        return f"{scheme}://127.0.0.1:{port}"
+
+    async def start(self: Self) -> None:
+        loop = asyncio.get_running_loop()
+        self.server = await loop.create_server(
+            lambda: _SocketDeviceProtocol(self), "127.0.0.1", 0
+        )
+
+    def _received(self: Self, transport: asyncio.Transport, data: bytes) -> None:
+        if self.rfc2217:
+            data, commands = self._decoder.decode(data)
+            self.commands += commands
+
+        response = self.feed(data)
+        if response:
+            transport.write(escape(response) if self.rfc2217 else response)
+
+    def drop(self: Self) -> None:
+        """
+        Drop all client connections, as if the network went away.
+        """
+
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+
+    async def close(self: Self) -> None:
+        self.drop()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+class _SocketDeviceProtocol(asyncio.Protocol):
+    def __init__(self: Self, device: SocketDevice) -> None:
+        self.device: SocketDevice = device
+        self.transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self: Self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast(asyncio.Transport, transport)
+        self.device.connections.append(self.transport)
+
+    def data_received(self: Self, data: bytes) -> None:
+        assert self.transport is not None
+        self.device._received(self.transport, data)
+
+
+class LoopbackTransport(Transport):
+    """
+    An in-process transport connected to an `EchoDevice`. Responses are delivered
+    on the next iteration of the event loop, with no I/O involved.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        device: Optional[EchoDevice] = None,
+    ) -> None:
+        super().__init__()
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.protocol: asyncio.Protocol = protocol
+        self.device: EchoDevice = device or EchoDevice()
+        self._baud_rate: BaudRate = SLOW_BAUD_RATE
+        self._closing: bool = False
+        loop.call_soon(protocol.connection_made, self)
+
+    @property
+    def baud_rate(self: Self) -> BaudRate:
+        return self._baud_rate
+
+    @baud_rate.setter
+    def baud_rate(self: Self, baud_rate: BaudRate) -> None:
+        self._baud_rate = baud_rate
+
+    def write(self: Self, data: bytes | bytearray | memoryview) -> None:
+        response = self.device.feed(bytes(data))
+        if response:
+            self.loop.call_soon(self.protocol.data_received, response)
+
+    def is_closing(self: Self) -> bool:
+        return self._closing
+
+    def close(self: Self) -> None:
+        if not self._closing:
+            self._closing = True
+            self.loop.call_soon(self.protocol.connection_lost, None)
+
+
+async def loopback_client(
+    report_handler: Optional[ReportHandler] = None, **kwargs: Any
+) -> Client:
+    """
+    Create a client connected to an `EchoDevice` over a `LoopbackTransport`. Extra
+    keyword arguments are passed to the `Client`.
+    """
+
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=report_handler or NoopReportHandler(),
+        timeout=1.0,
+        retry_times=0,
+        loop=loop,
+        **kwargs,
+    )
+    LoopbackTransport(loop, client)
+    await client._connection_made
+    return client
@@ -0,0 +1,396 @@
+"""
+A soak test harness, which drives a client against an emulated device for a
+long time and watches for resources which grow without bound.
+
+The harness runs a weighted mix of operations - commands, key activity and
+temperature reports, and commands which time out - as fast as the client will
+take them. At every sampling interval, it records:
+
+- the process's resident set size
+- the memory traced by `tracemalloc`
+- the number of asyncio tasks
+- the client's receivers, pending receivers and queued reports
+- latency percentiles for operations completed during the interval
+
+Once the run finishes, each resource series is checked for sustained growth.
+The first part of the run is treated as warm-up and ignored. A series has grown
+if the smallest value in the last quarter of the run is larger than the largest
+value in the first quarter, by more than the series' tolerance - a one-off
+spike, or noise which overlaps the starting range, doesn't count.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import gc
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Self,
+    Tuple,
+)
+
+from tests.helpers import EchoDevice
+
+from crystalfontz.client import Client
+from crystalfontz.metrics import Histogram
+from crystalfontz.packet import parse_packet, serialize_packet
+
+Operation = Callable[[Client], Awaitable[Any]]
+
+# A payload which the soak device never answers
+DROP = b"drop"
+
+DEFAULT_MIX: Dict[str, int] = dict(
+    ping=40,
+    send_data=30,
+    set_cursor_position=10,
+    key_report=10,
+    temperature_report=5,
+    timeout=1,
+)
+
+# Allowed growth between the start and the end of a run, by series
+DEFAULT_TOLERANCES: Dict[str, float] = dict(
+    rss=8 * 1024 * 1024,
+    traced=1024 * 1024,
+    tasks=2,
+    receivers=0,
+    receiving=0,
+    queued_reports=0,
+)
+
+
+class SoakDevice(EchoDevice):
+    """
+    An `EchoDevice` which acknowledges display commands with empty payloads, never
+    answers packets carrying the `DROP` payload, and doesn't keep the packets it
+    receives - which would otherwise look like a leak.
+    """
+
+    def __init__(self: Self) -> None:
+        # Set Cursor Position and Send Data
+        super().__init__({0x0B: b"", 0x1F: b""})
+
+    def feed(self: Self, data: bytes) -> bytes:
+        response = b""
+
+        self._buffer += data
+        packet, self._buffer = parse_packet(self._buffer)
+        while packet:
+            code, payload = packet
+            if payload != DROP:
+                response += serialize_packet(
+                    (code | 0x40, self.responses.get(code, payload))
+                )
+            packet, self._buffer = parse_packet(self._buffer)
+
+        return response
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """
+    Parse a command mix, such as "ping=4,send_data=2".
+    """
+
+    mix: Dict[str, int] = dict()
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown soak operation: {name}")
+        mix[name] = int(weight) if weight else 1
+    return mix
+
+
+async def _ping(client: Client) -> None:
+    await client.ping(b"soak")
+
+
+async def _send_data(client: Client) -> None:
+    await client.send_data(random.randrange(2), 0, b"soaking " * 2)
+
+
+async def _set_cursor_position(client: Client) -> None:
+    await client.set_cursor_position(random.randrange(2), random.randrange(16))
+
+
+async def _key_report(client: Client) -> None:
+    # A press and a release, as the device would send them
+    key = random.randrange(1, 7)
+    client.data_received(
+        serialize_packet((0x80, bytes([key])))
+        + serialize_packet((0x80, bytes([key + 6])))
+    )
+
+
+async def _temperature_report(client: Client) -> None:
+    client.data_received(
+        serialize_packet((0x82, bytes([random.randrange(4), 0x01, 0x40, 0x01])))
+    )
+
+
+async def _timeout(client: Client) -> None:
+    try:
+        await client.ping(DROP, timeout=0.01)
+    except TimeoutError:
+        pass
+
+
+OPERATIONS: Dict[str, Operation] = dict(
+    ping=_ping,
+    send_data=_send_data,
+    set_cursor_position=_set_cursor_position,
+    key_report=_key_report,
+    temperature_report=_temperature_report,
+    timeout=_timeout,
+)
+
+
+def rss() -> int:
+    """
+    The process's resident set size, in bytes.
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Not Linux - fall back to the peak, which can only grow
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+@dataclass
+class Sample:
+    """
+    Resource usage at a point in a soak run.
+    """
+
+    elapsed: float
+    operations: int
+    rss: int
+    traced: int
+    tasks: int
+    receivers: int
+    receiving: int
+    queued_reports: int
+    p50: float
+    p99: float
+
+
+@dataclass
+class Growth:
+    """
+    A resource which grew over a soak run.
+    """
+
+    series: str
+    start: float
+    end: float
+    tolerance: float
+
+    def __str__(self: Self) -> str:
+        return (
+            f"{self.series} grew from at most {self.start:g} to at least "
+            f"{self.end:g} (tolerance {self.tolerance:g})"
+        )
+
+
+@dataclass
+class SoakResult:
+    """
+    The result of a soak run.
+    """
+
+    samples: List[Sample]
+    operations: Dict[str, int]
+    errors: Dict[str, int]
+    latency: Histogram
+    growth: List[Growth]
+    top_allocations: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self: Self) -> bool:
+        return not self.growth
+
+    def report(self: Self) -> str:
+        lines = [
+            f"{'elapsed':>8} {'ops':>9} {'rss':>10} {'traced':>10} {'tasks':>5} "
+            f"{'rcv':>4} {'queued':>6} {'p50':>9} {'p99':>9}"
+        ]
+        for s in self.samples:
+            lines.append(
+                f"{s.elapsed:>7.1f}s {s.operations:>9} {s.rss:>10} {s.traced:>10} "
+                f"{s.tasks:>5} {s.receivers:>4} {s.queued_reports:>6} "
+                f"{s.p50 * 1000:>7.3f}ms {s.p99 * 1000:>7.3f}ms"
+            )
+        lines.append(f"operations: {self.operations}")
+        if self.errors:
+            lines.append(f"errors: {self.errors}")
+        for growth in self.growth:
+            lines.append(f"GROWTH: {growth}")
+        if self.top_allocations:
+            lines.append("top allocations since warm-up:")
+            lines.extend(f"  {line}" for line in self.top_allocations)
+        return "\n".join(lines)
+
+
+def detect_growth(
+    samples: List[Sample],
+    tolerances: Dict[str, float],
+    warm_up: float = 0.2,
+) -> List[Growth]:
+    """
+    Find series which grew over a run, ignoring the first `warm_up` fraction of
+    samples.
+    """
+
+    steady = samples[int(len(samples) * warm_up) :]
+    quarter = len(steady) // 4
+    if quarter < 1:
+        return []
+
+    growth: List[Growth] = []
+    for series, tolerance in tolerances.items():
+        values = [getattr(sample, series) for sample in steady]
+        start = max(values[:quarter])
+        end = min(values[-quarter:])
+        if end - start > tolerance:
+            growth.append(Growth(series, start, end, tolerance))
+    return growth
+
+
+class SoakHarness:
+    """
+    Drive a client with a mix of operations for a duration, sampling resource
+    usage as it goes.
+    """
+
+    def __init__(
+        self: Self,
+        client: Client,
+        duration: float,
+        mix: Optional[Dict[str, int]] = None,
+        interval: float = 1.0,
+        concurrency: int = 4,
+        tolerances: Optional[Dict[str, float]] = None,
+        warm_up: float = 0.2,
+        operations: Optional[Dict[str, Operation]] = None,
+    ) -> None:
+        self.client: Client = client
+        self.duration: float = duration
+        self.mix: Dict[str, int] = mix or DEFAULT_MIX
+        self.interval: float = interval
+        self.concurrency: int = concurrency
+        self.tolerances: Dict[str, float] = dict(DEFAULT_TOLERANCES)
+        if tolerances:
+            self.tolerances.update(tolerances)
+        self.warm_up: float = warm_up
+        self.operations: Dict[str, Operation] = operations or OPERATIONS
+
+        self.samples: List[Sample] = []
+        self.counts: Dict[str, int] = {name: 0 for name in self.mix}
+        self.errors: Dict[str, int] = dict()
+        self.latency: Histogram = Histogram()
+        self._window: Histogram = Histogram()
+        self._start: float = 0.0
+
+    def _choices(self: Self) -> Tuple[List[str], List[int]]:
+        return list(self.mix.keys()), list(self.mix.values())
+
+    async def _worker(self: Self, deadline: float) -> None:
+        names, weights = self._choices()
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                await self.operations[name](self.client)
+            except Exception as exc:
+                key = f"{name}: {type(exc).__name__}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+            elapsed = time.perf_counter() - start
+            self.counts[name] += 1
+            self.latency.record(elapsed)
+            self._window.record(elapsed)
+            # Reports complete synchronously, so give the handlers a turn
+            await asyncio.sleep(0)
+
+    def sample(self: Self) -> Sample:
+        client = self.client
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        window = self._window
+        self._window = Histogram()
+
+        sample = Sample(
+            elapsed=time.monotonic() - self._start,
+            operations=sum(self.counts.values()),
+            rss=rss(),
+            traced=traced,
+            tasks=len(asyncio.all_tasks()),
+            receivers=sum(len(rcvs) for rcvs in client._receivers.values()),
+            receiving=len(client._receiving),
+            queued_reports=(
+                client._key_activity_queue.qsize() + client._temperature_queue.qsize()
+            ),
+            p50=window.percentile(50),
+            p99=window.percentile(99),
+        )
+        self.samples.append(sample)
+        return sample
+
+    async def run(self: Self) -> SoakResult:
+        """
+        Run the soak test, and check the samples for growth.
+        """
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+
+        self._start = time.monotonic()
+        deadline = self._start + self.duration
+        warmed_up = self._start + self.duration * self.warm_up
+        baseline: Optional[tracemalloc.Snapshot] = None
+
+        workers = [
+            asyncio.create_task(self._worker(deadline)) for _ in range(self.concurrency)
+        ]
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.interval)
+                # Collect cycles, so that garbage isn't mistaken for a leak
+                gc.collect()
+                self.sample()
+                if baseline is None and time.monotonic() >= warmed_up:
+                    baseline = tracemalloc.take_snapshot()
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        top: List[str] = []
+        if baseline is not None:
+            stats = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+            top = [str(stat) for stat in stats[:10]]
+
+        if not was_tracing:
+            tracemalloc.stop()
+
+        return SoakResult(
+            samples=self.samples,
+            operations=dict(self.counts),
+            errors=dict(self.errors),
+            latency=self.latency,
+            growth=detect_growth(self.samples, self.tolerances, self.warm_up),
+            top_allocations=top,
+        )
@@ -0,0 +1,201 @@
+"""
+Soak tests, which run the client for a long time and fail if resources grow.
+
+These are slow, and aren't run with the rest of the tests. Run them with
+`just soak`. The duration and command mix are set with environment variables:
+
+- `CRYSTALFONTZ_SOAK_DURATION`: seconds to run each test for (default 30)
+- `CRYSTALFONTZ_SOAK_INTERVAL`: seconds between samples (default 1)
+- `CRYSTALFONTZ_SOAK_MIX`: weighted operations, such as `ping=4,key_report=1`
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional, Self
+
+import pytest
+
+from tests.helpers import loopback_client, LoopbackTransport
+from tests.soak.harness import (
+    DEFAULT_MIX,
+    detect_growth,
+    DROP,
+    Operation,
+    parse_mix,
+    Sample,
+    SoakDevice,
+    SoakHarness,
+)
+
+from crystalfontz.client import Client
+from crystalfontz.device import CFA533
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+try:
+    from crystalfontz.dbus.interface import DbusInterface
+except ImportError:
+    DbusInterface = None
+
+DURATION = float(os.environ.get("CRYSTALFONTZ_SOAK_DURATION", "30"))
+INTERVAL = float(os.environ.get("CRYSTALFONTZ_SOAK_INTERVAL", "1"))
+MIX: Dict[str, int] = (
+    parse_mix(os.environ["CRYSTALFONTZ_SOAK_MIX"])
+    if "CRYSTALFONTZ_SOAK_MIX" in os.environ
+    else DEFAULT_MIX
+)
+
+
+class DisplayingReportHandler(ReportHandler):
+    """
+    Update the display on key presses, the way a kiosk would.
+    """
+
+    def __init__(self: Self) -> None:
+        self.client: Optional[Client] = None
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        if self.client is not None and report.activity.name.endswith("PRESS"):
+            await self.client.send_data(0, 0, report.activity.name[:16])
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        pass
+
+
+async def soak_client(**kwargs: Any) -> Client:
+    handler = DisplayingReportHandler()
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=handler,
+        timeout=1.0,
+        retry_times=0,
+        loop=loop,
+        **kwargs,
+    )
+    LoopbackTransport(loop, client, SoakDevice())
+    await client._connection_made
+    handler.client = client
+    return client
+
+
+@pytest.mark.asyncio
+async def test_client_soak() -> None:
+    client = await soak_client(metrics=True, key_latency=True)
+
+    result = await SoakHarness(client, DURATION, mix=MIX, interval=INTERVAL).run()
+    print(result.report())
+
+    assert not result.errors
+    assert result.ok, result.report()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.skipif(DbusInterface is None, reason="dbus extra is not installed")
+@pytest.mark.asyncio
+async def test_dbus_soak() -> None:
+    from crystalfontz.spans import SpanRecorder
+
+    client = await soak_client()
+    iface = DbusInterface(client)
+    # Keep few enough traces that the recorder fills up during warm-up
+    iface.span_recorder = SpanRecorder(maxlen=16)
+
+    async def ping(_: Client) -> None:
+        await iface.ping(b"soak", -1.0, -1)
+
+    async def send_data(_: Client) -> None:
+        await iface.send_data(0, 0, b"soaking", -1.0, -1)
+
+    async def set_cursor_position(_: Client) -> None:
+        await iface.set_cursor_position(1, 4, -1.0, -1)
+
+    async def timeout(_: Client) -> None:
+        try:
+            await iface.ping(DROP, 0.01, 0)
+        except TimeoutError:
+            pass
+
+    operations: Dict[str, Operation] = dict(
+        ping=ping,
+        send_data=send_data,
+        set_cursor_position=set_cursor_position,
+        timeout=timeout,
+    )
+    mix = {name: weight for name, weight in MIX.items() if name in operations}
+
+    result = await SoakHarness(
+        client, DURATION, mix=mix, interval=INTERVAL, operations=operations
+    ).run()
+    print(result.report())
+
+    assert not result.errors
+    assert result.ok, result.report()
+    assert (
+        iface.calls.values["ping"]
+        == result.operations["ping"] + result.operations["timeout"]
+    )
+
+    client.close()
+    await client.closed
+
+
+def sample(elapsed: float, receivers: int) -> Sample:
+    return Sample(
+        elapsed=elapsed,
+        operations=0,
+        rss=0,
+        traced=0,
+        tasks=1,
+        receivers=receivers,
+        receiving=0,
+        queued_reports=0,
+        p50=0.0,
+        p99=0.0,
+    )
+
+
+def test_detect_growth() -> None:
+    tolerances = dict(receivers=0.0)
+
+    steady = [sample(i, 1 + i % 2) for i in range(20)]
+    assert detect_growth(steady, tolerances) == []
+
+    # A one-off spike isn't sustained growth
+    spike = [sample(i, 10 if i == 12 else 1) for i in range(20)]
+    assert detect_growth(spike, tolerances) == []
+
+    # Growth during warm-up doesn't count
+    warming = [sample(i, min(i, 3)) for i in range(20)]
+    assert detect_growth(warming, tolerances) == []
+
+    leaking = [sample(i, i) for i in range(20)]
+    (growth,) = detect_growth(leaking, tolerances)
+    assert growth.series == "receivers"
+    assert growth.end > growth.start
+
+
+@pytest.mark.asyncio
+async def test_harness_detects_leaks() -> None:
+    client = await loopback_client()
+    leaked = []
+
+    async def leak(client: Client) -> None:
+        leaked.append(client.subscribe(KeyActivityReport))
+        await asyncio.sleep(0)
+
+    result = await SoakHarness(
+        client,
+        1.0,
+        mix=dict(leak=1),
+        interval=0.05,
+        concurrency=1,
+        operations=dict(leak=leak),
+    ).run()
+
+    assert "receivers" in [growth.series for growth in result.growth]
+
+    client.close()
+    await client.closed
@@ -1,18 +1,25 @@
 import asyncio
 import logging
-from typing import Self
+from typing import List, Self
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 import pytest_asyncio
-from serial_asyncio import SerialTransport
 
 from crystalfontz.client import Client
 from crystalfontz.device import CFA533, Device
 from crystalfontz.error import DeviceError, ResponseDecodeError, UnknownResponseError
+from crystalfontz.keys import KeyActivity
 from crystalfontz.packet import Packet
 from crystalfontz.report import ReportHandler
-from crystalfontz.response import code, KeyActivityReport, Pong, Response
+from crystalfontz.response import (
+    code,
+    KeyActivityReport,
+    Pong,
+    Response,
+    TemperatureReport,
+)
+from crystalfontz.transport import Transport
 
 logging.basicConfig(level="DEBUG")
 
@@ -33,13 +40,13 @@ def report_handler() -> ReportHandler:
 
 
 @pytest.fixture
-def transport() -> SerialTransport:
-    return Mock(name="SerialTransport()")
+def transport() -> Transport:
+    return Mock(name="Transport()")
 
 
 @pytest_asyncio.fixture
 async def client(
-    device: Device, report_handler: ReportHandler, transport: SerialTransport
+    device: Device, report_handler: ReportHandler, transport: Transport
 ) -> Client:
     client = Client(
         device=device,
@@ -48,7 +55,7 @@ async def client(
         retry_times=0,
         loop=asyncio.get_running_loop(),
     )
-    client._is_serial_transport = Mock(return_value=True)
+    client._is_transport = Mock(return_value=True)
     client.connection_made(transport)
     return client
 
@@ -94,6 +101,18 @@ async def test_ping_success(client: Client) -> None:
     await client.closed
 
 
+@pytest.mark.asyncio
+async def test_expect_timeout_unsubscribes(client: Client) -> None:
+    with pytest.raises(TimeoutError):
+        await client.expect(Pong, timeout=0.01)
+
+    assert client._receivers[Pong] == []
+    assert not client._receiving
+
+    client.close()
+    await client.closed
+
+
 @pytest.mark.asyncio
 async def test_device_error(client: Client) -> None:
     rcv = client.subscribe(Pong)
@@ -243,3 +262,108 @@ async def test_report_handler_exception(
 
     with pytest.raises(exc.__class__):
         await client.closed
+
+
+@pytest.mark.asyncio
+async def test_report_handler_raises(
+    client: Client, report_handler: ReportHandler
+) -> None:
+    exc = Exception("oops")
+    report_handler.on_key_activity.side_effect = exc  # type: ignore
+
+    client._packet_received((0x80, b"\x01"))
+    await asyncio.sleep(0.1)
+
+    client.close()
+
+    with pytest.raises(Exception) as info:
+        await client.closed
+
+    assert info.value is exc
+
+
+@pytest.mark.asyncio
+async def test_report_queue_bounded(device: Device, transport: Transport) -> None:
+    release = asyncio.Event()
+
+    class SlowReportHandler(ReportHandler):
+        async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+            await release.wait()
+
+        async def on_temperature(self: Self, report: TemperatureReport) -> None:
+            await release.wait()
+
+    client = Client(
+        device=device,
+        report_handler=SlowReportHandler(),
+        timeout=0.1,
+        retry_times=0,
+        loop=asyncio.get_running_loop(),
+        report_queue_size=4,
+    )
+    client._is_transport = Mock(return_value=True)
+    client.connection_made(transport)
+
+    # Let the report handler tasks pick up their first reports
+    client._packet_received((0x80, b"\x01"))
+    client._packet_received((0x82, b"\x00\x01\x40\x01"))
+    await asyncio.sleep(0)
+
+    for _ in range(10):
+        client._packet_received((0x80, b"\x01"))
+        client._packet_received((0x82, b"\x00\x01\x40\x01"))
+
+    assert client._key_activity_queue.qsize() == 4
+    assert client._temperature_queue.qsize() == 1
+    assert client.dropped_reports == dict(key_activity=6, temperature=9)
+
+    release.set()
+    client._close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_report_concurrency(device: Device, transport: Transport) -> None:
+    release = asyncio.Event()
+    handled: List[str] = []
+
+    class SlowReportHandler(ReportHandler):
+        async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+            if report.activity == KeyActivity.KEY_UP_PRESS:
+                await release.wait()
+            handled.append(report.activity.name)
+
+        async def on_temperature(self: Self, report: TemperatureReport) -> None:
+            pass
+
+    client = Client(
+        device=device,
+        report_handler=SlowReportHandler(),
+        timeout=0.1,
+        retry_times=0,
+        loop=asyncio.get_running_loop(),
+        report_concurrency=4,
+    )
+    client._is_transport = Mock(return_value=True)
+    client.connection_made(transport)
+
+    # A slow handler for one key doesn't delay another
+    client._packet_received((0x80, b"\x01"))
+    client._packet_received((0x80, b"\x07"))
+    client._packet_received((0x80, b"\x02"))
+    client._packet_received((0x80, b"\x08"))
+    await asyncio.sleep(0.01)
+
+    assert handled == ["KEY_DOWN_PRESS", "KEY_DOWN_RELEASE"]
+    stats = client.report_stats["key_activity"]
+    assert stats.in_flight == 1
+    assert stats.pending == 1
+
+    release.set()
+    await asyncio.sleep(0.01)
+
+    assert handled[2:] == ["KEY_UP_PRESS", "KEY_UP_RELEASE"]
+    assert client.report_stats["key_activity"].completed == 4
+
+    client._close()
+    await client.closed
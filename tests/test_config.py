@@ -21,6 +21,18 @@ def config() -> Config:
         "baud_rate",
         "timeout",
         "retry_times",
+        "event_loop",
+        "hotplug",
+        "demand_reporting",
+        "metrics_port",
+        "metrics_textfile",
+        "metrics_interval",
+        "flight_recorder_size",
+        "flight_recorder_dir",
+        "monitor_loop",
+        "profile_dir",
+        "trace_requests",
+        "trace_file",
     ],
 )
 def test_get(config: Config, name: str) -> None:
@@ -42,6 +54,18 @@ def test_get_unknown(config: Config) -> None:
         ("baud_rate", str(FAST_BAUD_RATE), FAST_BAUD_RATE),
         ("timeout", "1.2", 1.2),
         ("retry_times", "5", 5),
+        ("event_loop", "uvloop", "uvloop"),
+        ("hotplug", "true", True),
+        ("demand_reporting", "true", True),
+        ("metrics_port", "9533", 9533),
+        ("metrics_textfile", "/tmp/crystalfontz.prom", "/tmp/crystalfontz.prom"),
+        ("metrics_interval", "30", 30.0),
+        ("flight_recorder_size", "1024", 1024),
+        ("flight_recorder_dir", "/var/log/crystalfontz", "/var/log/crystalfontz"),
+        ("monitor_loop", "true", True),
+        ("profile_dir", "/var/lib/crystalfontz", "/var/lib/crystalfontz"),
+        ("trace_requests", "true", True),
+        ("trace_file", "/tmp/spans.jsonl", "/tmp/spans.jsonl"),
     ],
 )
 def test_set(config: Config, name: str, value: str, expected: Any) -> None:
@@ -57,6 +81,13 @@ def test_set(config: Config, name: str, value: str, expected: Any) -> None:
             "retry_times",
             "5.5",
         ),
+        ("event_loop", "trio"),
+        ("hotplug", "maybe"),
+        ("demand_reporting", "maybe"),
+        ("metrics_port", "http"),
+        ("flight_recorder_size", "lots"),
+        ("monitor_loop", "maybe"),
+        ("trace_requests", "maybe"),
     ],
 )
 def test_set_value_error(config: Config, name: str, value: str) -> None:
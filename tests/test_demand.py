@@ -0,0 +1,142 @@
+import asyncio
+from typing import List
+
+import pytest
+import pytest_asyncio
+
+from tests.helpers import EchoDevice, LoopbackTransport
+
+from crystalfontz.client import Client
+from crystalfontz.demand import ALL_KEYS, DemandTracker, ReportDemand
+from crystalfontz.device import CFA533
+from crystalfontz.keys import KP_DOWN, KP_UP
+from crystalfontz.report import NoopReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+CONFIGURE_KEY_REPORTING = 0x17
+SETUP_TEMPERATURE_REPORTING = 0x13
+
+
+def test_for_reports() -> None:
+    device = CFA533()
+
+    assert ReportDemand.for_reports([KeyActivityReport], device) == ReportDemand(
+        when_pressed=ALL_KEYS, when_released=ALL_KEYS
+    )
+    assert ReportDemand.for_reports(
+        [KeyActivityReport, TemperatureReport], device, keys=[KP_UP], sensors=[1]
+    ) == ReportDemand(
+        when_pressed=frozenset([KP_UP]),
+        when_released=frozenset([KP_UP]),
+        sensors=frozenset([1]),
+    )
+
+
+def test_union() -> None:
+    a = ReportDemand(when_pressed=frozenset([KP_UP]), sensors=frozenset([0]))
+    b = ReportDemand(when_released=frozenset([KP_DOWN]), sensors=frozenset([3]))
+
+    assert a | b == ReportDemand(
+        when_pressed=frozenset([KP_UP]),
+        when_released=frozenset([KP_DOWN]),
+        sensors=frozenset([0, 3]),
+    )
+
+
+@pytest_asyncio.fixture
+async def echo_device() -> EchoDevice:
+    return EchoDevice({CONFIGURE_KEY_REPORTING: b"", SETUP_TEMPERATURE_REPORTING: b""})
+
+
+@pytest_asyncio.fixture
+async def client(echo_device: EchoDevice) -> Client:
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=NoopReportHandler(),
+        timeout=1.0,
+        retry_times=0,
+        loop=loop,
+        demand_reporting=True,
+    )
+    LoopbackTransport(loop, client, echo_device)
+    await client._connection_made
+    return client
+
+
+def commands(device: EchoDevice, code: int) -> List[bytes]:
+    return [payload for c, payload in device.received if c == code]
+
+
+@pytest.mark.asyncio
+async def test_debounced(client: Client, echo_device: EchoDevice) -> None:
+    tracker = client.report_demand
+    assert tracker
+
+    streams = [
+        client.reports(KeyActivityReport, keys=[KP_UP]),
+        client.reports(KeyActivityReport, keys=[KP_DOWN]),
+        client.reports(TemperatureReport, sensors=[0, 2]),
+    ]
+
+    await asyncio.sleep(tracker.debounce * 2)
+
+    # One round of configuration for all three streams
+    assert commands(echo_device, CONFIGURE_KEY_REPORTING) == [
+        bytes([KP_UP | KP_DOWN, KP_UP | KP_DOWN])
+    ]
+    assert commands(echo_device, SETUP_TEMPERATURE_REPORTING) == [b"\x05\x00\x00\x00"]
+
+    # Closing a temperature stream only reconfigures temperature reporting
+    streams[2].close()
+    await asyncio.sleep(tracker.debounce * 2)
+
+    assert len(commands(echo_device, CONFIGURE_KEY_REPORTING)) == 1
+    assert commands(echo_device, SETUP_TEMPERATURE_REPORTING)[-1] == (
+        b"\x00\x00\x00\x00"
+    )
+
+    streams[0].close()
+    streams[1].close()
+    await tracker.flush()
+
+    assert commands(echo_device, CONFIGURE_KEY_REPORTING)[-1] == b"\x00\x00"
+    assert tracker.applied == ReportDemand()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_no_change(client: Client, echo_device: EchoDevice) -> None:
+    tracker = client.report_demand
+    assert tracker
+
+    await tracker.flush()
+    received = len(echo_device.received)
+
+    # Demand that's already covered doesn't reconfigure the device
+    a = tracker.add(ReportDemand(when_pressed=frozenset([KP_UP])))
+    await tracker.flush()
+    b = tracker.add(ReportDemand(when_pressed=frozenset([KP_UP])))
+    await tracker.flush()
+    tracker.remove(b)
+    await tracker.flush()
+
+    assert len(echo_device.received) == received + 1
+
+    tracker.remove(a)
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_disabled() -> None:
+    class Client:
+        device = CFA533()
+
+    tracker = DemandTracker(Client())  # type: ignore
+    tracker.close()
+
+    tracker.add(ReportDemand())
+    assert tracker._timer is None
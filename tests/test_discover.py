@@ -0,0 +1,82 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncGenerator, List
+
+import pytest
+import pytest_asyncio
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.baud import FAST_BAUD_RATE, SLOW_BAUD_RATE
+from crystalfontz.discover import candidate_ports, discover
+
+VERSIONS = b"CFA533: h1.4, u1v2"
+
+
+@pytest_asyncio.fixture
+async def devices() -> AsyncGenerator[List[PtyDevice], None]:
+    loop = asyncio.get_running_loop()
+    devices = [
+        PtyDevice(loop, responses={0x01: VERSIONS}, baud_rate=SLOW_BAUD_RATE),
+        PtyDevice(loop, responses={0x01: VERSIONS}, baud_rate=FAST_BAUD_RATE),
+    ]
+    yield devices
+    for device in devices:
+        device.close()
+
+
+@pytest_asyncio.fixture
+async def silent_port() -> AsyncGenerator[str, None]:
+    # A pty with nothing listening on the other end
+    master, slave = os.openpty()
+    yield os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+@pytest.mark.asyncio
+async def test_discover(devices: List[PtyDevice], silent_port: str) -> None:
+    ports = [devices[0].port, silent_port, devices[1].port]
+
+    discovered = await discover(ports, timeout=0.1, transport="fd")
+
+    assert [device.port for device in discovered] == [
+        devices[0].port,
+        devices[1].port,
+    ]
+    assert [device.baud_rate for device in discovered] == [
+        SLOW_BAUD_RATE,
+        FAST_BAUD_RATE,
+    ]
+    assert discovered[0].model == "CFA533"
+    assert discovered[0].hardware_rev == "h1.4"
+    assert discovered[0].firmware_rev == "u1v2"
+
+
+@pytest.mark.asyncio
+async def test_discover_concurrent(silent_port: str) -> None:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    # Each silent port costs two timeouts - one at each baud rate
+    await discover([silent_port] * 4, timeout=0.1, transport="fd")
+
+    assert loop.time() - start < 0.8
+
+
+def test_candidate_ports(tmp_path: Path) -> None:
+    dev = tmp_path / "dev"
+    by_id = dev / "serial" / "by-id"
+    by_id.mkdir(parents=True)
+    for name in ["ttyUSB0", "ttyUSB1", "ttyACM0"]:
+        (dev / name).touch()
+    (by_id / "usb-Crystalfontz_CFA533-if00").symlink_to(dev / "ttyUSB1")
+
+    ports = candidate_ports(str(by_id), [str(dev / "ttyUSB*"), str(dev / "ttyACM*")])
+
+    assert ports == [
+        str(by_id / "usb-Crystalfontz_CFA533-if00"),
+        str(dev / "ttyUSB0"),
+        str(dev / "ttyACM0"),
+    ]
@@ -0,0 +1,178 @@
+import asyncio
+from typing import List, Tuple
+
+import pytest
+
+from crystalfontz.dispatch import key_activity_key, ReportDispatcher, temperature_key
+from crystalfontz.keys import KeyActivity
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+
+def key(activity: KeyActivity) -> KeyActivityReport:
+    return KeyActivityReport(activity)
+
+
+def temperature(index: int, celsius: float) -> TemperatureReport:
+    return TemperatureReport(index, celsius, celsius * 9 / 5 + 32)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, str]] = []
+        self.release: asyncio.Event = asyncio.Event()
+
+    async def __call__(self, report: KeyActivityReport) -> None:
+        self.events.append(("start", report.activity.name))
+        if report.activity.keypress == KeyActivity.KEY_UP_PRESS.keypress:
+            await self.release.wait()
+        self.events.append(("end", report.activity.name))
+
+
+@pytest.mark.asyncio
+async def test_serial() -> None:
+    recorder = Recorder()
+    recorder.release.set()
+    dispatcher = ReportDispatcher("key_activity", recorder, key=key_activity_key)
+
+    for activity in [KeyActivity.KEY_DOWN_PRESS, KeyActivity.KEY_DOWN_RELEASE]:
+        await dispatcher.dispatch(key(activity))
+    await dispatcher.join()
+
+    assert recorder.events == [
+        ("start", "KEY_DOWN_PRESS"),
+        ("end", "KEY_DOWN_PRESS"),
+        ("start", "KEY_DOWN_RELEASE"),
+        ("end", "KEY_DOWN_RELEASE"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_per_key_ordering() -> None:
+    recorder = Recorder()
+    dispatcher = ReportDispatcher(
+        "key_activity", recorder, concurrency=4, key=key_activity_key
+    )
+
+    # KEY_UP's handler blocks. Its release must wait for its press, but KEY_DOWN
+    # isn't held up.
+    for activity in [
+        KeyActivity.KEY_UP_PRESS,
+        KeyActivity.KEY_UP_RELEASE,
+        KeyActivity.KEY_DOWN_PRESS,
+        KeyActivity.KEY_DOWN_RELEASE,
+    ]:
+        await dispatcher.dispatch(key(activity))
+
+    await asyncio.sleep(0.01)
+
+    assert recorder.events == [
+        ("start", "KEY_UP_PRESS"),
+        ("start", "KEY_DOWN_PRESS"),
+        ("end", "KEY_DOWN_PRESS"),
+        ("start", "KEY_DOWN_RELEASE"),
+        ("end", "KEY_DOWN_RELEASE"),
+    ]
+    stats = dispatcher.stats()
+    assert stats.in_flight == 1
+    assert stats.pending == 1
+
+    recorder.release.set()
+    await dispatcher.join()
+
+    assert recorder.events[5:] == [
+        ("end", "KEY_UP_PRESS"),
+        ("start", "KEY_UP_RELEASE"),
+        ("end", "KEY_UP_RELEASE"),
+    ]
+    stats = dispatcher.stats()
+    assert stats.dispatched == 4
+    assert stats.completed == 4
+    assert stats.in_flight == 0
+    assert stats.pending == 0
+    assert stats.max_latency >= stats.max_wait > 0
+
+
+@pytest.mark.asyncio
+async def test_no_ordering() -> None:
+    recorder = Recorder()
+    dispatcher = ReportDispatcher(
+        "key_activity", recorder, concurrency=4, ordering="none"
+    )
+
+    await dispatcher.dispatch(key(KeyActivity.KEY_UP_PRESS))
+    await dispatcher.dispatch(key(KeyActivity.KEY_UP_RELEASE))
+    await asyncio.sleep(0.01)
+
+    assert dispatcher.stats().in_flight == 2
+
+    recorder.release.set()
+    await dispatcher.join()
+
+    assert dispatcher.stats().completed == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_bound() -> None:
+    running = 0
+    most = 0
+
+    async def handler(report: TemperatureReport) -> None:
+        nonlocal running, most
+        running += 1
+        most = max(most, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    dispatcher = ReportDispatcher(
+        "temperature", handler, concurrency=2, key=temperature_key
+    )
+
+    for i in range(8):
+        await dispatcher.dispatch(temperature(i, 20.0))
+    await dispatcher.join()
+
+    assert most == 2
+    assert dispatcher.stats().completed == 8
+
+
+@pytest.mark.asyncio
+async def test_handler_error() -> None:
+    exc = Exception("oops")
+
+    async def handler(report: TemperatureReport) -> None:
+        raise exc
+
+    dispatcher = ReportDispatcher("temperature", handler, key=temperature_key)
+
+    await dispatcher.dispatch(temperature(0, 20.0))
+    await dispatcher.join()
+
+    assert dispatcher.stats().failed == 1
+
+    with pytest.raises(Exception) as info:
+        await dispatcher.dispatch(temperature(0, 20.0))
+
+    assert info.value is exc
+
+
+@pytest.mark.asyncio
+async def test_handler_error_callback() -> None:
+    exc = Exception("oops")
+    errors: List[Exception] = []
+
+    async def handler(report: TemperatureReport) -> None:
+        raise exc
+
+    dispatcher = ReportDispatcher(
+        "temperature", handler, key=temperature_key, on_error=errors.append
+    )
+
+    await dispatcher.dispatch(temperature(0, 20.0))
+    await dispatcher.join()
+
+    assert errors == [exc]
+    # The exception was handled, so dispatching continues
+    await dispatcher.dispatch(temperature(0, 20.0))
+    await dispatcher.join()
+
+    assert errors == [exc, exc]
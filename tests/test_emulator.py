@@ -0,0 +1,248 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from crystalfontz.baud import FAST_BAUD_RATE, SLOW_BAUD_RATE
+from crystalfontz.character import SMILEY_FACE
+from crystalfontz.client import Client, create_connection
+from crystalfontz.device import CFA533Status
+from crystalfontz.emulator import (
+    create_emulated_connection,
+    dow_crc8,
+    ds18b20_rom_id,
+    Emulator,
+)
+from crystalfontz.error import DeviceError
+from crystalfontz.keys import KeyActivity, KP_DOWN, KP_UP
+from crystalfontz.packet import serialize_packet
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+from crystalfontz.transport import TransportType
+
+
+@pytest_asyncio.fixture
+async def emulator() -> Emulator:
+    return Emulator(temperature_sensors=4, seed=1)
+
+
+@pytest_asyncio.fixture
+async def client(emulator: Emulator) -> AsyncGenerator[Client, None]:
+    client = await create_emulated_connection(emulator, timeout=0.5)
+    yield client
+    client.close()
+    await client.closed
+
+
+def test_ds18b20_rom_id() -> None:
+    rom = ds18b20_rom_id(1)
+
+    assert rom[0] == 0x28
+    assert dow_crc8(rom) == 0
+
+
+@pytest.mark.asyncio
+async def test_versions(client: Client) -> None:
+    client.device = None  # type: ignore
+    await client.detect_device()
+
+    assert client.device.model == "CFA533"
+    assert client.device.hardware_rev == "h1.4"
+    assert client.device.firmware_rev == "u1v2"
+
+
+@pytest.mark.asyncio
+async def test_display(client: Client, emulator: Emulator) -> None:
+    await client.clear_screen()
+    await client.send_data(0, 2, "Hello")
+    with pytest.warns(DeprecationWarning):
+        await client.set_line_2("world!")
+
+    assert emulator.lines == [b"  Hello         ", b"world!          "]
+
+    memory = await client.read_lcd_memory(0x80)
+    assert memory.data == b"  Hello "
+
+
+@pytest.mark.asyncio
+async def test_special_character(client: Client, emulator: Emulator) -> None:
+    await client.set_special_character_data(3, SMILEY_FACE)
+
+    memory = await client.read_lcd_memory(0x40 + 3 * 8)
+    assert memory.data == SMILEY_FACE.to_bytes(client.device)
+
+
+@pytest.mark.asyncio
+async def test_status(client: Client, emulator: Emulator) -> None:
+    await client.set_backlight(0.5, 0.25)
+    # Sensors are numbered from 1, so these are DOW devices 0 and 2
+    await client.setup_temperature_reporting([1, 3])
+    emulator.tap(KP_DOWN)
+
+    status: CFA533Status = await client.read_status()
+
+    assert status.temperature_sensors_enabled == {1, 3}
+    assert status.lcd_brightness == 0.5
+    assert status.keypad_brightness == 0.25
+    assert status.key_states.down.pressed_since
+    assert status.key_states.down.released_since
+    assert not status.key_states.up.pressed_since
+
+
+@pytest.mark.asyncio
+async def test_boot_state(client: Client, emulator: Emulator) -> None:
+    await client.send_data(0, 0, "boot")
+    await client.store_boot_state()
+    await client.clear_screen()
+    await client.reboot_lcd()
+
+    assert emulator.lines[0] == b"boot            "
+
+
+@pytest.mark.asyncio
+async def test_dow_scan(client: Client, emulator: Emulator) -> None:
+    info = await client.read_dow_device_information(2)
+    assert info.rom_id == int.from_bytes(ds18b20_rom_id(3), "big")
+
+    missing = await client.read_dow_device_information(20)
+    assert missing.rom_id == 0
+
+    emulator.set_temperature(2, 21.5)
+    result = await client.dow_transaction(2, 9, b"\xbe")
+    assert len(result.data) == 9
+    assert int.from_bytes(result.data[:2], "little") / 16 == 21.5
+    assert dow_crc8(result.data) == 0
+    assert result.crc == dow_crc8(result.data)
+
+
+@pytest.mark.asyncio
+async def test_key_reports(client: Client, emulator: Emulator) -> None:
+    expected = asyncio.create_task(client.expect(KeyActivityReport, timeout=1.0))
+    await asyncio.sleep(0)
+    emulator.press(KP_UP)
+
+    report = await expected
+    assert report.activity == KeyActivity.KEY_UP_PRESS
+
+    await client.configure_key_reporting(when_pressed=set(), when_released=set())
+    polled = await client.poll_keypad()
+    assert polled.states.up.pressed
+    assert polled.states.up.pressed_since
+
+
+@pytest.mark.asyncio
+async def test_temperature_reports() -> None:
+    emulator = Emulator(temperature_sensors=2, temperature_interval=0.01)
+    client = await create_emulated_connection(emulator)
+    emulator.set_temperature(1, 30.0)
+
+    await client.setup_temperature_reporting([2])
+    report = await client.expect(TemperatureReport, timeout=1.0)
+
+    assert report.index == 1
+    assert report.celsius == 30.0
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_invalid_command(client: Client) -> None:
+    with pytest.raises(DeviceError):
+        await client.setup_temperature_reporting([10])  # DOW device 9
+
+
+@pytest.mark.asyncio
+async def test_error_injection() -> None:
+    emulator = Emulator(error_rate=1.0)
+    client = await create_emulated_connection(emulator)
+
+    with pytest.raises(DeviceError):
+        await client.ping(b"error")
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_drop() -> None:
+    emulator = Emulator(drop_rate=1.0)
+    client = await create_emulated_connection(emulator, timeout=0.05)
+
+    with pytest.raises(TimeoutError):
+        await client.ping(b"dropped")
+    assert emulator.commands[0x00] == 1
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_noise() -> None:
+    emulator = Emulator(noise_rate=1.0, seed=2)
+    client = await create_emulated_connection(emulator, retry_times=3)
+
+    for i in range(20):
+        pong = await client.ping(f"noisy {i}".encode())
+        assert pong.response == f"noisy {i}".encode()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_latency_and_baud_timing() -> None:
+    emulator = Emulator(latency=0.02, baud_timing=True)
+    client = await create_emulated_connection(emulator)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await client.ping(b"x" * 16)
+    elapsed = loop.time() - start
+
+    # Two 20 byte frames at 19200 baud, plus the latency
+    assert elapsed >= 0.02 + 2 * 20 * 10 / SLOW_BAUD_RATE
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_baud_rate(client: Client, emulator: Emulator) -> None:
+    await client.set_baud_rate(FAST_BAUD_RATE)
+
+    assert emulator.baud_rate == FAST_BAUD_RATE
+    pong = await client.ping(b"fast")
+    assert pong.response == b"fast"
+
+    # Frames sent at the wrong rate are garbled
+    client.baud_rate = SLOW_BAUD_RATE
+    with pytest.raises(TimeoutError):
+        await client.ping(b"slow", timeout=0.05)
+    assert emulator.garbled == len(serialize_packet((0x00, b"slow")))
+
+
+@pytest_asyncio.fixture
+async def pty_emulator() -> AsyncGenerator[Emulator, None]:
+    emulator = Emulator()
+    pty = emulator.open_pty(asyncio.get_running_loop())
+    emulator.port = pty.port  # type: ignore
+    yield emulator
+    pty.close()
+
+
+@pytest.mark.parametrize("transport", ["serial", "fd"])
+@pytest.mark.asyncio
+async def test_pty(pty_emulator: Emulator, transport: TransportType) -> None:
+    client = await create_connection(
+        pty_emulator.port, transport=transport  # type: ignore
+    )
+
+    await client.send_data(1, 0, "over a pty")
+    pong = await client.ping(b"ping!")
+
+    assert pong.response == b"ping!"
+    assert pty_emulator.lines[1] == b"over a pty      "
+
+    client.close()
+    await client.closed
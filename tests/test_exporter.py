@@ -0,0 +1,120 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from crystalfontz.exporter import (
+    CONTENT_TYPE,
+    HttpExporter,
+    LabeledCounter,
+    render,
+    TextfileExporter,
+)
+from crystalfontz.metrics import Metrics
+
+
+@pytest.fixture
+def metrics() -> Metrics:
+    metrics = Metrics()
+    ping = metrics.command("Ping")
+    for _ in range(10):
+        ping.latency.record(0.01)
+    ping.timeouts = 2
+    metrics.report("KeyActivityReport")
+    metrics.retries = 3
+    metrics.bytes_out = 100
+    metrics.gauges["queue_depth"] = lambda: 4
+    return metrics
+
+
+def test_render(metrics: Metrics) -> None:
+    calls = LabeledCounter("dbus_calls", "method", "DBus method calls")
+    calls.inc("ping")
+    calls.inc("ping")
+
+    text = render(metrics, [calls])
+    lines = text.splitlines()
+
+    assert "# TYPE crystalfontz_command_latency_seconds summary" in lines
+    assert any(
+        line.startswith(
+            'crystalfontz_command_latency_seconds{command="Ping",quantile="0.99"} 0.01'
+        )
+        for line in lines
+    )
+    assert 'crystalfontz_command_latency_seconds_count{command="Ping"} 10' in lines
+    assert 'crystalfontz_command_timeouts_total{command="Ping"} 2' in lines
+    assert 'crystalfontz_reports_total{report="KeyActivityReport"} 1' in lines
+    assert "crystalfontz_retries_total 3" in lines
+    assert "crystalfontz_sent_bytes_total 100" in lines
+    assert "crystalfontz_queue_depth 4" in lines
+    assert 'crystalfontz_dbus_calls_total{method="ping"} 2' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_render_prometheus(metrics: Metrics) -> None:
+    text = render(metrics, format_="prometheus")
+    lines = text.splitlines()
+
+    assert "# TYPE crystalfontz_retries_total counter" in lines
+    assert "crystalfontz_retries_total 3" in lines
+    assert "# TYPE crystalfontz_command_timeouts_total counter" in lines
+    assert "# TYPE crystalfontz_command_latency_seconds summary" in lines
+    assert not any(line.startswith("# UNIT") for line in lines)
+    assert "# EOF" not in lines
+
+
+def test_render_without_metrics() -> None:
+    assert render(None) == "# EOF\n"
+    assert render(None, format_="prometheus") == ""
+
+
+def test_render_escapes_labels() -> None:
+    counter = LabeledCounter("things", "name", "Things")
+    counter.inc('a "quoted"\nthing')
+
+    assert 'crystalfontz_things_total{name="a \\"quoted\\"\\nthing"} 1' in render(
+        None, [counter]
+    )
+
+
+@pytest.mark.asyncio
+async def test_http_exporter(metrics: Metrics) -> None:
+    exporter = HttpExporter(lambda: render(metrics), 0)
+    await exporter.start()
+
+    try:
+        reader, writer = await asyncio.open_connection(exporter.host, exporter.port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    finally:
+        await exporter.close()
+
+    head, body = response.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert f"Content-Type: {CONTENT_TYPE}".encode("ascii") in head
+    assert body.decode("utf-8") == render(metrics)
+
+
+@pytest.mark.asyncio
+async def test_textfile_exporter(metrics: Metrics, tmp_path: Path) -> None:
+    path = tmp_path / "crystalfontz.prom"
+    exporter = TextfileExporter(
+        lambda: render(metrics, format_="prometheus"), str(path), interval=0.01
+    )
+    await exporter.start()
+
+    try:
+        assert path.read_text() == render(metrics, format_="prometheus")
+
+        metrics.retries = 5
+        await asyncio.sleep(0.05)
+        assert "crystalfontz_retries_total 5" in path.read_text()
+    finally:
+        await exporter.close()
+
+    # Temporary files are cleaned up
+    assert os.listdir(tmp_path) == ["crystalfontz.prom"]
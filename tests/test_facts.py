@@ -0,0 +1,136 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+import pytest
+
+from tests.helpers import EchoDevice, LoopbackTransport, PtyDevice
+
+from crystalfontz.client import Client, create_connection
+from crystalfontz.command import GetVersions
+from crystalfontz.device import CFA533, CFA533Status
+from crystalfontz.error import ResponseDecodeError
+from crystalfontz.report import NoopReportHandler
+from crystalfontz.response import UserFlashAreaRead, Versions
+
+RESPONSES: Dict[int, bytes] = {
+    0x01: b"CFA533: h1.4, u1v2",
+    0x03: bytes(range(16)),
+    0x18: b"\x01\x00\x00",
+    0x1E: bytes(15),
+}
+
+
+class BatchingLoopbackTransport(LoopbackTransport):
+    """
+    A loopback transport which records the size of each write.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.writes: int = 0
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        self.writes += 1
+        super().write(data)
+
+
+async def connect(device: EchoDevice) -> Tuple[Client, BatchingLoopbackTransport]:
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=NoopReportHandler(),
+        timeout=0.1,
+        retry_times=0,
+        loop=loop,
+    )
+    transport = BatchingLoopbackTransport(loop, client, device)
+    await client._connection_made
+    return client, transport
+
+
+@pytest.mark.asyncio
+async def test_warm_up() -> None:
+    device = EchoDevice(RESPONSES)
+    client, transport = await connect(device)
+
+    facts = await client.warm_up()
+
+    assert facts is client.facts
+    assert isinstance(facts.versions, Versions)
+    assert facts.versions.model == "CFA533"
+    assert isinstance(facts.status, CFA533Status)
+    assert isinstance(facts.user_flash_area, UserFlashAreaRead)
+    assert facts.user_flash_area.data == bytes(range(16))
+    assert facts.keypad is not None
+
+    # Every command was sent in a single write
+    assert transport.writes == 1
+    assert [code for code, _ in device.received] == [0x01, 0x1E, 0x03, 0x18]
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_warm_up_subset() -> None:
+    client, _ = await connect(EchoDevice(RESPONSES))
+
+    await client.warm_up(["versions"])
+
+    assert client.facts.versions is not None
+    assert client.facts.status is None
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fallback() -> None:
+    # The versions response is garbled, so versions are fetched again on their own
+    device = EchoDevice({**RESPONSES, 0x01: b"garbage"})
+    client, _ = await connect(device)
+
+    with pytest.raises(ResponseDecodeError):
+        await client.warm_up(["status", "versions"])
+
+    assert [code for code, _ in device.received] == [0x1E, 0x01, 0x01]
+    assert client.facts.status is not None
+    assert client.facts.versions is None
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_send_commands_distinct() -> None:
+    client, _ = await connect(EchoDevice(RESPONSES))
+
+    with pytest.raises(ValueError):
+        await client.send_commands(
+            [(GetVersions(), Versions), (GetVersions(), Versions)]
+        )
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_closes_client(monkeypatch) -> None:
+    device = PtyDevice(asyncio.get_running_loop())
+    clients: List[Client] = []
+
+    async def fail(self: Client, *args, **kwargs) -> None:
+        clients.append(self)
+        raise ResponseDecodeError(response_cls=Versions, message="oops!")
+
+    monkeypatch.setattr(Client, "warm_up", fail)
+
+    try:
+        with pytest.raises(ResponseDecodeError):
+            await create_connection(device.port, transport="fd", warm_up=["versions"])
+    finally:
+        device.close()
+
+    (client,) = clients
+    # The client finished closing before the error was raised
+    assert client.closed.done()
@@ -0,0 +1,72 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.client import create_connection
+from crystalfontz.hotplug import DeviceWatcher
+
+
+@pytest.mark.asyncio
+async def test_watcher(tmp_path: Path) -> None:
+    by_id = tmp_path / "serial" / "by-id"
+    link = by_id / "usb-Crystalfontz_CFA533-if00"
+
+    # A long poll interval ensures we're woken by inotify, not by polling
+    watcher = DeviceWatcher(str(link), poll_interval=10.0)
+    waiting = asyncio.create_task(watcher.wait())
+
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    by_id.mkdir(parents=True)
+    await asyncio.sleep(0.01)
+    link.symlink_to("/dev/null")
+
+    async with asyncio.timeout(1.0):
+        await waiting
+
+    watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_replug(tmp_path: Path) -> None:
+    loop = asyncio.get_running_loop()
+    link = tmp_path / "ttyCFA533"
+
+    device = PtyDevice(loop)
+    link.symlink_to(device.port)
+
+    client = await create_connection(str(link), transport="fd", hotplug=True)
+    await client.ping(b"before")
+
+    # Unplug the device
+    link.unlink()
+    device.close()
+    await asyncio.sleep(0.05)
+
+    assert not client.closed.done()
+    assert client._transport is not None
+    assert not client._transport.is_reading()
+
+    # Plug it back in
+    device = PtyDevice(loop)
+    os.symlink(device.port, link)
+
+    async with asyncio.timeout(1.0):
+        while True:
+            try:
+                pong = await client.ping(b"after")
+            except TimeoutError:
+                continue
+            else:
+                break
+
+    assert pong.response == b"after"
+
+    client.close()
+    await client.closed
+    device.close()
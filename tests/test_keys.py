@@ -66,3 +66,27 @@ def test_key_activity_to_from_byte(activity: KeyActivity) -> None:
     from_byte = KeyActivity.from_byte(byte)
 
     assert from_byte == activity
+
+
+@pytest.mark.parametrize(
+    "activity,keypress,pressed",
+    [
+        (KeyActivity.KEY_UP_PRESS, KP_UP, True),
+        (KeyActivity.KEY_DOWN_PRESS, KP_DOWN, True),
+        (KeyActivity.KEY_LEFT_PRESS, KP_LEFT, True),
+        (KeyActivity.KEY_RIGHT_PRESS, KP_RIGHT, True),
+        (KeyActivity.KEY_ENTER_PRESS, KP_ENTER, True),
+        (KeyActivity.KEY_EXIT_PRESS, KP_EXIT, True),
+        (KeyActivity.KEY_UP_RELEASE, KP_UP, False),
+        (KeyActivity.KEY_DOWN_RELEASE, KP_DOWN, False),
+        (KeyActivity.KEY_LEFT_RELEASE, KP_LEFT, False),
+        (KeyActivity.KEY_RIGHT_RELEASE, KP_RIGHT, False),
+        (KeyActivity.KEY_ENTER_RELEASE, KP_ENTER, False),
+        (KeyActivity.KEY_EXIT_RELEASE, KP_EXIT, False),
+    ],
+)
+def test_key_activity_keypress(
+    activity: KeyActivity, keypress: int, pressed: bool
+) -> None:
+    assert activity.keypress == keypress
+    assert activity.pressed == pressed
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+from tests.helpers import EchoDevice, LoopbackTransport
+
+from crystalfontz.client import Client
+from crystalfontz.device import CFA533
+from crystalfontz.exporter import render
+from crystalfontz.lag import callback_name, LagMonitor
+from crystalfontz.report import NoopReportHandler
+
+
+@pytest.mark.parametrize(
+    "description,name",
+    [
+        (
+            "<Task pending name='Task-12' coro=<Client._handle_report() running at "
+            "/src/crystalfontz/client.py:1700> cb=[gather()]>",
+            "Client._handle_report",
+        ),
+        (
+            "<Handle LagMonitor._tick() created at /src/crystalfontz/lag.py:160>",
+            "LagMonitor._tick",
+        ),
+        (
+            "<TimerHandle when=123.4 block() created at /tests/test_lag.py:12>",
+            "block",
+        ),
+        ("<thing at 0x7f00deadbeef>", "<thing>"),
+    ],
+)
+def test_callback_name(description: str, name: str) -> None:
+    assert callback_name(description) == name
+
+
+def block() -> None:
+    time.sleep(0.06)
+
+
+@pytest.mark.asyncio
+async def test_lag_warning(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = LagMonitor(0.1, interval=0.01)
+    monitor.start()
+
+    await asyncio.sleep(0.02)
+    block()
+    await asyncio.sleep(0.02)
+
+    monitor.stop()
+
+    assert monitor.lag.count > 1
+    assert monitor.lag.max is not None and monitor.lag.max >= 0.05
+    assert monitor.warnings == 1
+    assert "Event loop lagged" in caplog.text
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_slow_callback_attribution(caplog: pytest.LogCaptureFixture) -> None:
+    loop = asyncio.get_running_loop()
+    debug = loop.get_debug()
+    duration = loop.slow_callback_duration
+    loop.set_debug(True)
+
+    try:
+        monitor = LagMonitor(0.1, interval=0.01)
+        monitor.start()
+
+        await asyncio.sleep(0.02)
+        loop.call_soon(block)
+        await asyncio.sleep(0.05)
+
+        monitor.stop()
+    finally:
+        loop.set_debug(debug)
+        loop.slow_callback_duration = duration
+
+    assert monitor.slow_callback_counts == dict(block=1)
+    assert "slow callbacks: block" in caplog.text
+    assert monitor._handler is None
+
+
+@pytest.mark.asyncio
+async def test_client_lag_metrics() -> None:
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=NoopReportHandler(),
+        timeout=0.25,
+        retry_times=0,
+        loop=loop,
+        metrics=True,
+        monitor_loop=True,
+    )
+    LoopbackTransport(loop, client, EchoDevice())
+    await client._connection_made
+
+    await asyncio.sleep(0.25)
+
+    assert client.lag_monitor is not None
+    assert client.lag_monitor.running
+    assert client.metrics is not None
+    assert client.metrics.loop_lag is client.lag_monitor.lag
+    assert client.metrics.loop_lag.count > 0
+    assert "crystalfontz_loop_lag_seconds_count" in render(client.metrics)
+
+    client.close()
+    await client.closed
+
+    assert not client.lag_monitor.running
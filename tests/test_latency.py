@@ -0,0 +1,88 @@
+import asyncio
+from typing import Optional, Self
+
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz.client import Client
+from crystalfontz.packet import serialize_packet
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+
+class DisplayingReportHandler(ReportHandler):
+    def __init__(self: Self, display: bool = True) -> None:
+        self.client: Optional[Client] = None
+        self.display: bool = display
+        self.handled: asyncio.Event = asyncio.Event()
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        assert self.client is not None
+        await asyncio.sleep(0.01)
+        await self.client.ping(b"not displayed")
+        if self.display:
+            await self.client.send_data(0, 0, "pressed")
+        self.handled.set()
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        pass
+
+
+async def press(client: Client, handler: DisplayingReportHandler) -> None:
+    handler.handled.clear()
+    client.data_received(serialize_packet((0x80, b"\x01")))
+    await handler.handled.wait()
+    # Let the handler's wrapper record the report
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_key_latency() -> None:
+    handler = DisplayingReportHandler()
+    client = await loopback_client(handler, key_latency=True)
+    handler.client = client
+    # SendData is acknowledged with an empty payload
+    client._transport.device.responses[0x1F] = b""  # type: ignore
+
+    await press(client, handler)
+    handler.display = False
+    await press(client, handler)
+
+    latency = client.key_latency
+    assert latency is not None
+    assert latency.reports == 2
+    assert latency.undisplayed == 1
+    assert latency.handler.count == 2
+    assert latency.display.count == 1
+    assert latency.handler.min >= 0.01
+    assert latency.display.max >= 0.01
+    assert "display" in repr(latency)
+    assert latency.as_dict()["display"]["count"] == 1
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_reports_are_timestamped() -> None:
+    client = await loopback_client()
+
+    reports = client.subscribe(KeyActivityReport)
+    client.data_received(serialize_packet((0x80, b"\x01")))
+    _, report = await reports.get()
+
+    # Stamping is opt-in without key latency measurement
+    assert report is not None
+    assert report.received_at is None
+    assert client.key_latency is None
+
+    client.stamp_responses = True
+    client.data_received(serialize_packet((0x80, b"\x01")))
+    _, report = await reports.get()
+
+    assert report is not None
+    assert report.received_at is not None
+
+    client.close()
+    await client.closed
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Tuple
+
+import pytest
+
+from tests.helpers import EchoDevice, LoopbackTransport
+
+from crystalfontz.client import Client
+from crystalfontz.device import CFA533
+from crystalfontz.error import DeviceError
+from crystalfontz.metrics import Histogram
+from crystalfontz.report import NoopReportHandler
+from crystalfontz.response import Pong
+
+
+def test_histogram() -> None:
+    histogram = Histogram()
+
+    for us in range(1, 10001):
+        histogram.record(us / 1_000_000)
+
+    assert histogram.count == 10000
+    assert histogram.min == 0.000001
+    assert histogram.max == 0.01
+    assert histogram.mean == pytest.approx(0.0050005)
+    for percentile in [50.0, 90.0, 99.0]:
+        expected = percentile / 100 * 0.01
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=0.04)
+
+
+def test_histogram_buckets() -> None:
+    histogram = Histogram()
+
+    for value in [0.00001, 0.001, 0.001, 0.1]:
+        histogram.record(value)
+
+    buckets = list(histogram.buckets())
+
+    assert [count for _, count in buckets] == [1, 2, 1]
+    assert [bound for bound, _ in buckets] == sorted(bound for bound, _ in buckets)
+    assert buckets[-1][0] >= 0.1
+
+
+def test_empty_histogram() -> None:
+    histogram = Histogram()
+
+    assert histogram.percentile(99) == 0.0
+    assert histogram.mean == 0.0
+
+
+async def connect(
+    device: EchoDevice, metrics: bool = True
+) -> Tuple[Client, LoopbackTransport]:
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=NoopReportHandler(),
+        timeout=0.05,
+        retry_times=0,
+        loop=loop,
+        metrics=metrics,
+    )
+    transport = LoopbackTransport(loop, client, device)
+    await client._connection_made
+    return client, transport
+
+
+@pytest.mark.asyncio
+async def test_client_metrics() -> None:
+    client, _ = await connect(EchoDevice())
+    metrics = client.metrics
+    assert metrics is not None
+
+    for _ in range(3):
+        await client.ping(b"hello")
+
+    # A report, garbage and a device error
+    pong = client.subscribe(Pong)
+    client.data_received(b"\x80\x01\x04\xdc\x95")
+    client.data_received(b"\xff\x00")
+    client.data_received(b"\xc0\x00\xed\xc5")
+    exc, _ = pong.get_nowait()
+    assert isinstance(exc, DeviceError)
+    client.unsubscribe(Pong, pong)
+
+    ping = metrics.commands["Ping"]
+    assert ping.latency.count == 3
+    assert ping.timeouts == 0
+    assert metrics.packets_out == 3
+    assert metrics.bytes_out == 3 * 9
+    assert metrics.packets_in == 5
+    assert metrics.reports == dict(KeyActivityReport=1)
+    assert metrics.device_errors == 1
+    assert metrics.resync_bytes == 2
+    assert metrics.sample() == dict(queue_depth=0.0)
+    assert metrics.as_dict()["commands"]["Ping"]["latency"]["count"] == 3
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_client_metrics_timeout() -> None:
+    client, transport = await connect(EchoDevice())
+    metrics = client.metrics
+    assert metrics is not None
+
+    # Swallow everything the client sends
+    transport.device.feed = lambda data: b""  # type: ignore
+
+    with pytest.raises(TimeoutError):
+        await client.ping(b"hello", retry_times=2)
+
+    assert metrics.commands["Ping"].timeouts == 3
+    assert metrics.retries == 2
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_client_metrics_disabled() -> None:
+    client, _ = await connect(EchoDevice(), metrics=False)
+
+    await client.ping(b"hello")
+
+    assert client.metrics is None
+
+    client.close()
+    await client.closed
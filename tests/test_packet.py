@@ -1,3 +1,5 @@
+from typing import List
+
 import pytest
 
 from crystalfontz.packet import make_crc, parse_packet
@@ -22,3 +24,14 @@ def test_make_crc(buffer) -> None:
     crc = make_crc(buffer[:-2])
 
     assert crc == buffer[-2:]
+
+
+def test_packet_resync() -> None:
+    reasons: List[str] = []
+
+    # A corrupted packet followed by a good one
+    buffer = b"\x80\x01\x04\xdc\x00" + b"\x80\x01\x04\xdc\x95"
+
+    assert parse_packet(buffer, reasons.append) == ((0x80, b"\x04"), b"")
+    assert len(reasons) == 5
+    assert "crc" in reasons
@@ -0,0 +1,137 @@
+import asyncio
+from typing import AsyncGenerator, List, Self, Tuple
+
+import pytest
+import pytest_asyncio
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.device import CFA533Status
+from crystalfontz.error import DecodeError
+from crystalfontz.keys import KeyActivity
+from crystalfontz.pool import create_pool, DevicePool, PoolReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+NAMES = ["bay-1", "bay-2", "bay-3"]
+
+
+class RecordingPoolReportHandler(PoolReportHandler):
+    def __init__(self: Self) -> None:
+        self.reports: List[Tuple[str, KeyActivityReport]] = []
+        self.received: asyncio.Event = asyncio.Event()
+
+    async def on_key_activity(
+        self: Self, device: str, report: KeyActivityReport
+    ) -> None:
+        self.reports.append((device, report))
+        self.received.set()
+
+    async def on_temperature(
+        self: Self, device: str, report: TemperatureReport
+    ) -> None:
+        pass
+
+
+@pytest_asyncio.fixture
+async def devices() -> AsyncGenerator[List[PtyDevice], None]:
+    loop = asyncio.get_running_loop()
+    devices = [
+        # Ack send_data, but send back an empty (and invalid) status
+        PtyDevice(loop, responses={0x1E: b"", 0x1F: b""})
+        for _ in NAMES
+    ]
+    yield devices
+    for device in devices:
+        device.close()
+
+
+@pytest_asyncio.fixture
+async def handler() -> RecordingPoolReportHandler:
+    return RecordingPoolReportHandler()
+
+
+@pytest_asyncio.fixture
+async def pool(
+    devices: List[PtyDevice], handler: RecordingPoolReportHandler
+) -> AsyncGenerator[DevicePool, None]:
+    pool = await create_pool(
+        {name: device.port for name, device in zip(NAMES, devices)},
+        report_handler=handler,
+        transport="fd",
+    )
+    yield pool
+    pool.close()
+    await pool.closed()
+
+
+@pytest.mark.asyncio
+async def test_open(pool: DevicePool) -> None:
+    assert sorted(pool.clients.keys()) == NAMES
+    assert all(health.healthy for health in pool.health().values())
+
+
+@pytest.mark.asyncio
+async def test_open_partial(devices: List[PtyDevice]) -> None:
+    pool = await create_pool([devices[0].port, "/dev/does-not-exist"], transport="fd")
+
+    assert list(pool.clients.keys()) == [devices[0].port]
+    assert not pool.health()["/dev/does-not-exist"].connected
+    assert pool.health()["/dev/does-not-exist"].last_error is not None
+
+    pool.close()
+    await pool.closed()
+
+
+@pytest.mark.asyncio
+async def test_send_data(pool: DevicePool, devices: List[PtyDevice]) -> None:
+    results = await pool.send_data(0, 0, "hello")
+
+    assert sorted(results.keys()) == NAMES
+    assert all(exc is None for exc, _ in results.values())
+    for device in devices:
+        assert device.received == [(0x1F, b"\x00\x00hello")]
+
+
+@pytest.mark.asyncio
+async def test_read_status_failure(pool: DevicePool) -> None:
+    results = await pool.read_status()
+
+    for exc, status in results.values():
+        assert isinstance(exc, DecodeError)
+        assert status is None
+
+    health = pool.health()["bay-1"]
+    assert not health.healthy
+    assert health.failures == 1
+
+    await pool.ping(b"ping!")
+
+    assert pool.health()["bay-1"].healthy
+
+
+@pytest.mark.asyncio
+async def test_read_status(pool: DevicePool, devices: List[PtyDevice]) -> None:
+    for device in devices:
+        device.responses[0x1E] = bytes(15)
+
+    results = await pool.read_status()
+
+    for exc, status in results.values():
+        assert exc is None
+        assert isinstance(status, CFA533Status)
+
+
+@pytest.mark.asyncio
+async def test_tagged_reports(
+    pool: DevicePool, devices: List[PtyDevice], handler: RecordingPoolReportHandler
+) -> None:
+    devices[1].write((0x80, bytes([KeyActivity.KEY_UP_PRESS.value])))
+
+    async with asyncio.timeout(1.0):
+        await handler.received.wait()
+
+    assert len(handler.reports) == 1
+    device, report = handler.reports[0]
+    assert device == "bay-2"
+    assert report.activity == KeyActivity.KEY_UP_PRESS
+    assert pool.health()["bay-2"].reports == 1
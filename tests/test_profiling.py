@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+import pstats
+import sys
+import time
+import tracemalloc
+from typing import Generator, List
+
+import pytest
+
+from crystalfontz.error import ProfileError
+from crystalfontz.profiling import Profiler, SampledStats
+
+
+def busy(duration: float) -> None:
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        pass
+
+
+async def work() -> None:
+    for _ in range(10):
+        busy(0.01)
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def profiler(tmp_path: Path) -> Profiler:
+    return Profiler(directory=str(tmp_path))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["cprofile", "sampling"])
+async def test_profile_cpu(profiler: Profiler, tmp_path: Path, mode) -> None:
+    task = asyncio.create_task(work())
+    path = await profiler.profile_cpu(0.2, mode, interval=0.001)
+    await task
+
+    assert Path(path).parent == tmp_path
+    stats = pstats.Stats(path)
+    assert any(name == "busy" for _, _, name in stats.stats)  # type: ignore
+    assert not profiler.profiling
+
+
+@pytest.mark.asyncio
+async def test_profile_cpu_errors(profiler: Profiler) -> None:
+    with pytest.raises(ProfileError):
+        await profiler.profile_cpu(1.0, "strace")  # type: ignore
+
+    with pytest.raises(ProfileError):
+        await profiler.profile_cpu(0)
+
+    task = asyncio.create_task(profiler.profile_cpu(0.05))
+    await asyncio.sleep(0)
+    with pytest.raises(ProfileError):
+        await profiler.profile_cpu(0.05)
+    await task
+
+
+def test_sampled_stats() -> None:
+    sampled = SampledStats()
+
+    def inner() -> None:
+        frame = sys._getframe()
+        sampled.add(frame)
+
+    def outer() -> None:
+        inner()
+        inner()
+
+    outer()
+    sampled.elapsed = 1.0
+    stats = sampled.stats()
+
+    inner_stats = next(v for k, v in stats.items() if k[2] == "inner")
+    outer_stats = next(v for k, v in stats.items() if k[2] == "outer")
+
+    # Inner is always the leaf, and outer is always its caller
+    assert inner_stats[:4] == (2, 2, 1.0, 1.0)
+    assert outer_stats[2:4] == (0.0, 1.0)
+    assert list(inner_stats[4].values()) == [2]
+
+
+@pytest.fixture
+def tracing(profiler: Profiler) -> Generator[None, None, None]:
+    was_tracing = tracemalloc.is_tracing()
+    profiler.start_tracing()
+    yield
+    if not was_tracing:
+        profiler.stop_tracing()
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshots(profiler: Profiler, tracing: None) -> None:
+    before = await profiler.take_snapshot()
+    leak: List[bytes] = [b"x" * 1024 for _ in range(256)]
+    after = await profiler.take_snapshot()
+
+    report = await profiler.diff(before, after, limit=3)
+
+    assert report.startswith("Total: +")
+    assert "test_profiling.py" in report
+    assert len(leak) == 256
+
+    with pytest.raises(ProfileError):
+        await profiler.diff(before, 1000)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_without_tracing(profiler: Profiler) -> None:
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already tracing")
+
+    with pytest.raises(ProfileError):
+        await profiler.take_snapshot()
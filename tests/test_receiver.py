@@ -0,0 +1,168 @@
+import asyncio
+from typing import Any, List, Set
+
+import pytest
+
+from crystalfontz.keys import KeyActivity
+from crystalfontz.receiver import Receiver
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+
+
+def key(activity: KeyActivity) -> KeyActivityReport:
+    return KeyActivityReport(activity)
+
+
+def temperature(index: int, celsius: float) -> TemperatureReport:
+    return TemperatureReport(index, celsius, celsius * 9 / 5 + 32)
+
+
+def drain(receiver: Receiver[Any]) -> List[Any]:
+    results = []
+    while not receiver.empty():
+        results.append(receiver.get_nowait())
+    return results
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[KeyActivityReport] = Receiver(
+        receiving, maxsize=2, policy="drop-oldest"
+    )
+
+    for activity in [
+        KeyActivity.KEY_UP_PRESS,
+        KeyActivity.KEY_UP_RELEASE,
+        KeyActivity.KEY_DOWN_PRESS,
+    ]:
+        receiver.put_nowait((None, key(activity)))
+
+    assert [res.activity for _, res in drain(receiver)] == [
+        KeyActivity.KEY_UP_RELEASE,
+        KeyActivity.KEY_DOWN_PRESS,
+    ]
+    assert receiver.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_newest() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[KeyActivityReport] = Receiver(
+        receiving, maxsize=2, policy="drop-newest"
+    )
+
+    for activity in [
+        KeyActivity.KEY_UP_PRESS,
+        KeyActivity.KEY_UP_RELEASE,
+        KeyActivity.KEY_DOWN_PRESS,
+    ]:
+        receiver.put_nowait((None, key(activity)))
+
+    assert [res.activity for _, res in drain(receiver)] == [
+        KeyActivity.KEY_UP_PRESS,
+        KeyActivity.KEY_UP_RELEASE,
+    ]
+    assert receiver.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_keeps_errors() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[KeyActivityReport] = Receiver(
+        receiving, maxsize=1, policy="drop-newest"
+    )
+    exc = Exception("oops")
+
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_PRESS)))
+    receiver.put_nowait((exc, None))
+
+    assert drain(receiver) == [(exc, None)]
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_errors() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[KeyActivityReport] = Receiver(
+        receiving, maxsize=2, policy="drop-oldest"
+    )
+    exc = Exception("oops")
+
+    receiver.put_nowait((exc, None))
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_PRESS)))
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_RELEASE)))
+
+    (first, _), (_, res) = drain(receiver)
+    assert first is exc
+    assert res.activity == KeyActivity.KEY_UP_RELEASE
+
+    other = Exception("oh no")
+    receiver.put_nowait((exc, None))
+    receiver.put_nowait((other, None))
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_PRESS)))
+
+    # A response never takes the place of an exception
+    assert drain(receiver) == [(exc, None), (other, None)]
+    assert receiver.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesce_latest() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[TemperatureReport] = Receiver(
+        receiving,
+        maxsize=2,
+        policy="coalesce-latest",
+        key=lambda report: report.index,
+    )
+
+    receiver.put_nowait((None, temperature(0, 20.0)))
+    receiver.put_nowait((None, temperature(1, 30.0)))
+    receiver.put_nowait((None, temperature(0, 21.0)))
+    receiver.put_nowait((None, temperature(0, 22.0)))
+
+    assert [(res.index, res.celsius) for _, res in drain(receiver)] == [
+        (0, 22.0),
+        (1, 30.0),
+    ]
+    assert receiver.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_unbounded() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[TemperatureReport] = Receiver(receiving)
+
+    for i in range(100):
+        receiver.put_nowait((None, temperature(0, float(i))))
+
+    assert receiver.qsize() == 100
+    assert receiver.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_unbounded_never_coalesces() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[TemperatureReport] = Receiver(
+        receiving, policy="coalesce-latest", key=lambda report: report.index
+    )
+
+    for i in range(10):
+        receiver.put_nowait((None, temperature(0, float(i))))
+
+    assert receiver.qsize() == 10
+    assert receiver.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_join_after_drop() -> None:
+    receiving: Set[Receiver[Any]] = set()
+    receiver: Receiver[KeyActivityReport] = Receiver(receiving, maxsize=1)
+
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_PRESS)))
+    receiver.put_nowait((None, key(KeyActivity.KEY_UP_RELEASE)))
+
+    await receiver.get()
+    receiver.task_done()
+
+    async with asyncio.timeout(0.1):
+        await receiver.join()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+from pathlib import Path
+import signal
+
+import pytest
+
+from tests.helpers import EchoDevice, LoopbackTransport
+
+from crystalfontz.client import Client
+from crystalfontz.device import CFA533
+from crystalfontz.error import DeviceError
+from crystalfontz.recorder import FlightRecorder, format_frames
+from crystalfontz.report import NoopReportHandler
+from crystalfontz.response import Pong
+
+
+def test_ring_buffer() -> None:
+    recorder = FlightRecorder(size=3)
+
+    for i in range(5):
+        recorder.tx(bytes([i]))
+    recorder.rx(b"\xff")
+
+    assert [(direction, data) for _, direction, data in recorder.snapshot()] == [
+        ("tx", b"\x03"),
+        ("tx", b"\x04"),
+        ("rx", b"\xff"),
+    ]
+
+
+def test_format_frames() -> None:
+    frames = [(1.0, "tx", b"\x00\x05hello"), (1.25, "rx", b"\x40\x00")]
+
+    lines = format_frames(frames, reason="testing").splitlines()  # type: ignore
+
+    assert "# reason: testing" in lines
+    assert "# 2 frames" in lines
+    assert lines[-2:] == [
+        "-0.250000 tx 00 05 68 65 6c 6c 6f",
+        "+0.000000 rx 40 00",
+    ]
+
+
+def test_dump(tmp_path: Path) -> None:
+    recorder = FlightRecorder(directory=str(tmp_path))
+    recorder.tx(b"\x00\x00")
+
+    path = recorder.dump(reason="testing")
+
+    assert os.path.dirname(path) == str(tmp_path)
+    assert "tx 00 00" in Path(path).read_text()
+    # Dumps never overwrite each other
+    assert recorder.dump() != path
+
+
+def test_dump_keeps_newest(tmp_path: Path) -> None:
+    recorder = FlightRecorder(directory=str(tmp_path), keep=2)
+    unrelated = tmp_path / "unrelated.log"
+    unrelated.write_text("")
+
+    paths = []
+    for i in range(4):
+        path = recorder.dump()
+        os.utime(path, (i, i))
+        paths.append(path)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(path) for path in paths[-2:]] + ["unrelated.log"]
+    )
+
+
+async def connect(recorder: FlightRecorder) -> Client:
+    loop = asyncio.get_running_loop()
+    client = Client(
+        device=CFA533(),
+        report_handler=NoopReportHandler(),
+        timeout=0.05,
+        retry_times=0,
+        loop=loop,
+        flight_recorder=recorder,
+    )
+    LoopbackTransport(loop, client, EchoDevice())
+    await client._connection_made
+    return client
+
+
+@pytest.mark.asyncio
+async def test_client_records_frames(tmp_path: Path) -> None:
+    recorder = FlightRecorder(directory=str(tmp_path))
+    client = await connect(recorder)
+
+    await client.ping(b"hello")
+
+    assert [direction for _, direction, _ in recorder.snapshot()] == ["tx", "rx"]
+    assert recorder.snapshot()[0][2][:2] == b"\x00\x05"
+    assert os.listdir(tmp_path) == []
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_dump_on_error(tmp_path: Path) -> None:
+    recorder = FlightRecorder(directory=str(tmp_path))
+    client = await connect(recorder)
+
+    pong = client.subscribe(Pong)
+    # Two device errors in a row only result in one dump
+    client.data_received(b"\xc0\x00\xed\xc5")
+    client.data_received(b"\xc0\x00\xed\xc5")
+    exc, _ = pong.get_nowait()
+    assert isinstance(exc, DeviceError)
+    client.unsubscribe(Pong, pong)
+
+    await asyncio.sleep(0.1)
+
+    (dump,) = os.listdir(tmp_path)
+    text = (tmp_path / dump).read_text()
+    assert "# reason: DeviceError" in text
+    assert "rx c0 00 ed c5" in text
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_no_dump_on_error_without_directory() -> None:
+    recorder = FlightRecorder()
+    client = await connect(recorder)
+
+    pong = client.subscribe(Pong)
+    client.data_received(b"\xc0\x00\xed\xc5")
+    exc, _ = pong.get_nowait()
+    assert isinstance(exc, DeviceError)
+    client.unsubscribe(Pong, pong)
+
+    await asyncio.sleep(0.1)
+
+    assert recorder._last_dump is None
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_signal_handler(tmp_path: Path) -> None:
+    loop = asyncio.get_running_loop()
+    recorder = FlightRecorder(directory=str(tmp_path))
+    recorder.rx(b"\x80\x01\x04\xdc\x95")
+    recorder.add_signal_handler(loop)
+
+    try:
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.sleep(0.1)
+    finally:
+        recorder.remove_signal_handler(loop)
+
+    (dump,) = os.listdir(tmp_path)
+    assert "# reason: SIGUSR1" in (tmp_path / dump).read_text()
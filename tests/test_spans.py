@@ -0,0 +1,156 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz.command import ClearScreen, Ping
+from crystalfontz.response import ClearedScreen, Pong
+from crystalfontz.spans import (
+    active_trace,
+    chrome_trace,
+    format_json_lines,
+    JsonLinesExporter,
+    SpanRecorder,
+)
+
+
+@pytest.mark.asyncio
+async def test_command_spans() -> None:
+    recorder = SpanRecorder()
+    client = await loopback_client()
+
+    assert active_trace() is None
+
+    with recorder.trace("ping", caller="test") as trace:
+        assert active_trace() is trace
+        await client.ping(b"hello")
+
+    assert active_trace() is None
+    assert recorder.traces[-1] is trace
+    assert trace.end is not None
+    assert [span.name for span in trace.spans] == ["queue", "write", "ack"]
+    assert all(span.attrs["command"] == "Ping" for span in trace.spans)
+    assert all(span.start >= trace.start for span in trace.spans)
+    assert all(span.end <= trace.end for span in trace.spans)
+    assert trace.spans[0].end == trace.spans[1].start
+    assert trace.spans[1].end == trace.spans[2].start
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_pipelined_command_spans() -> None:
+    recorder = SpanRecorder()
+    client = await loopback_client()
+
+    with recorder.trace("pipeline") as trace:
+        await client.send_commands(
+            [(Ping(b"hello"), Pong), (ClearScreen(), ClearedScreen)]
+        )
+
+    assert [(span.name, span.attrs["command"]) for span in trace.spans] == [
+        ("queue", "Ping"),
+        ("write", "Ping"),
+        ("ack", "Ping"),
+        ("queue", "ClearScreen"),
+        ("write", "ClearScreen"),
+        ("ack", "ClearScreen"),
+    ]
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_error_spans() -> None:
+    recorder = SpanRecorder()
+    client = await loopback_client()
+    # Nothing answers
+    client._transport.device.feed = lambda data: b""  # type: ignore
+
+    with pytest.raises(TimeoutError):
+        with recorder.trace("ping") as trace:
+            await client.ping(b"hello", timeout=0.01)
+
+    assert trace.error == "TimeoutError"
+    assert trace.spans[-1].name == "ack"
+    assert trace.spans[-1].attrs["error"] == "TimeoutError"
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_untraced_commands_have_no_spans() -> None:
+    recorder = SpanRecorder()
+    client = await loopback_client()
+
+    with recorder.trace("outer") as trace:
+        # Tasks copy the current context, so they're traced too
+        await asyncio.create_task(client.ping(b"traced"))
+
+    await client.ping(b"untraced")
+
+    assert len(trace.spans) == 3
+    assert len(recorder.traces) == 1
+
+    client.close()
+    await client.closed
+
+
+def test_formats() -> None:
+    recorder = SpanRecorder()
+    with recorder.trace("request", method="Ping") as trace:
+        trace.add("write", trace.start, trace.start + 0.001, command="Ping")
+
+    lines = [json.loads(line) for line in format_json_lines(trace).splitlines()]
+    assert [line["span"] for line in lines] == ["request", "write"]
+    assert all(line["trace_id"] == trace.id for line in lines)
+    assert lines[0]["method"] == "Ping"
+    assert lines[1]["start"] == 0.0
+    assert lines[1]["duration"] == pytest.approx(0.001)
+
+    events = chrome_trace([trace])["traceEvents"]
+    assert [event["name"] for event in events] == ["request", "write"]
+    assert events[1]["dur"] == pytest.approx(1000)
+    assert events[0]["ts"] == events[1]["ts"]
+
+
+@pytest.mark.asyncio
+async def test_json_lines_exporter(tmp_path: Path) -> None:
+    path = tmp_path / "spans.jsonl"
+    recorder = SpanRecorder()
+    recorder.exporters.append(JsonLinesExporter(str(path)))
+
+    for _ in range(2):
+        with recorder.trace("request"):
+            pass
+
+    # Lines are written from a thread
+    for _ in range(50):
+        if path.exists() and len(path.read_text().splitlines()) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert len(path.read_text().splitlines()) == 2
+
+
+@pytest.mark.asyncio
+async def test_json_lines_exporter_failure(tmp_path: Path, caplog) -> None:
+    recorder = SpanRecorder()
+    # The parent directory doesn't exist
+    recorder.exporters.append(JsonLinesExporter(str(tmp_path / "missing" / "x")))
+
+    with recorder.trace("request"):
+        pass
+
+    for _ in range(50):
+        if "Failed to write trace" in caplog.text:
+            break
+        await asyncio.sleep(0.01)
+
+    assert "Failed to write trace" in caplog.text
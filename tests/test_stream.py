@@ -0,0 +1,138 @@
+import asyncio
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz.keys import KP_DOWN, KP_UP
+from crystalfontz.response import KeyActivityReport, Response, TemperatureReport
+from crystalfontz.stream import ReportStream
+
+KEY_UP_PRESS = (0x80, b"\x01")
+KEY_DOWN_PRESS = (0x80, b"\x02")
+KEY_UP_RELEASE = (0x80, b"\x07")
+TEMPERATURE_0 = (0x82, b"\x00\x01\x40\x01")
+TEMPERATURE_1 = (0x82, b"\x01\x01\x40\x01")
+
+
+async def collect(reports: ReportStream, n: int) -> List[Response]:
+    results: List[Response] = []
+    async for report in reports:
+        results.append(report)
+        if len(results) == n:
+            break
+    return results
+
+
+@pytest.mark.asyncio
+async def test_reports() -> None:
+    client = await loopback_client()
+
+    async with client.reports() as reports:
+        for packet in [KEY_UP_PRESS, TEMPERATURE_0, KEY_UP_RELEASE]:
+            client._packet_received(packet)
+
+        results = await collect(reports, 3)
+
+    assert [type(res) for res in results] == [
+        KeyActivityReport,
+        TemperatureReport,
+        KeyActivityReport,
+    ]
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_reports_fan_out() -> None:
+    client = await loopback_client()
+
+    streams = [client.reports(KeyActivityReport) for _ in range(10)]
+    tasks = [asyncio.create_task(collect(stream, 2)) for stream in streams]
+
+    client._packet_received(KEY_UP_PRESS)
+    client._packet_received(KEY_UP_RELEASE)
+
+    for results in await asyncio.gather(*tasks):
+        assert len(results) == 2
+
+    for stream in streams:
+        stream.close()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_reports_filter() -> None:
+    client = await loopback_client()
+
+    keys = client.reports(KeyActivityReport, keys=[KP_DOWN])
+    sensors = client.reports(TemperatureReport, sensors=[1])
+
+    for packet in [
+        KEY_UP_PRESS,
+        TEMPERATURE_0,
+        KEY_DOWN_PRESS,
+        TEMPERATURE_1,
+        KEY_UP_RELEASE,
+    ]:
+        client._packet_received(packet)
+
+    [key] = await collect(keys, 1)
+    [temperature] = await collect(sensors, 1)
+
+    assert isinstance(key, KeyActivityReport)
+    assert key.activity.keypress == KP_DOWN
+    assert isinstance(temperature, TemperatureReport)
+    assert temperature.index == 1
+
+    assert keys._receiver.empty()
+    assert sensors._receiver.empty()
+
+    keys.close()
+    sensors.close()
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_reports_end_on_close() -> None:
+    client = await loopback_client()
+
+    reports = client.reports(KeyActivityReport, keys=[KP_UP])
+    task = asyncio.create_task(collect(reports, 10))
+    await asyncio.sleep(0)
+
+    client._packet_received(KEY_UP_PRESS)
+    client.close()
+    await client.closed
+
+    results = await task
+
+    assert len(results) == 1
+
+
+@pytest.mark.asyncio
+async def test_reports_skip_decoding(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = await loopback_client()
+
+    from_bytes = Mock(wraps=KeyActivityReport.from_bytes)
+    monkeypatch.setattr(KeyActivityReport, "from_bytes", from_bytes)
+
+    # Nothing is listening
+    client._packet_received(KEY_UP_PRESS)
+
+    from_bytes.assert_not_called()
+
+    async with client.reports(KeyActivityReport) as reports:
+        client._packet_received(KEY_UP_PRESS)
+        await collect(reports, 1)
+
+    from_bytes.assert_called_once()
+
+    client.close()
+    await client.closed
@@ -0,0 +1,151 @@
+import asyncio
+from typing import AsyncGenerator, List, Self, Tuple
+
+import pytest
+import pytest_asyncio
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.client import Client
+from crystalfontz.error import ConnectionError
+from crystalfontz.keys import KeyActivity
+from crystalfontz.pool import PoolReportHandler
+from crystalfontz.response import KeyActivityReport, TemperatureReport
+from crystalfontz.supervisor import create_supervisor, DeviceSupervisor
+
+NAMES = ["bay-1", "bay-2"]
+
+
+class RecordingPoolReportHandler(PoolReportHandler):
+    def __init__(self: Self) -> None:
+        self.reports: List[Tuple[str, KeyActivityReport]] = []
+        self.received: asyncio.Event = asyncio.Event()
+
+    async def on_key_activity(
+        self: Self, device: str, report: KeyActivityReport
+    ) -> None:
+        self.reports.append((device, report))
+        self.received.set()
+
+    async def on_temperature(
+        self: Self, device: str, report: TemperatureReport
+    ) -> None:
+        pass
+
+
+@pytest_asyncio.fixture
+async def devices() -> AsyncGenerator[List[PtyDevice], None]:
+    loop = asyncio.get_running_loop()
+    devices = [PtyDevice(loop, responses={0x1F: b""}) for _ in NAMES]
+    yield devices
+    for device in devices:
+        device.close()
+
+
+@pytest_asyncio.fixture
+async def handler() -> RecordingPoolReportHandler:
+    return RecordingPoolReportHandler()
+
+
+@pytest_asyncio.fixture
+async def supervisor(
+    devices: List[PtyDevice], handler: RecordingPoolReportHandler
+) -> AsyncGenerator[DeviceSupervisor, None]:
+    supervisor = await create_supervisor(
+        {name: device.port for name, device in zip(NAMES, devices)},
+        report_handler=handler,
+        transport="fd",
+    )
+    yield supervisor
+    supervisor.close()
+    await supervisor.closed()
+
+
+@pytest.mark.asyncio
+async def test_call(supervisor: DeviceSupervisor) -> None:
+    pong = await supervisor.call("bay-1", Client.ping, b"ping!")
+
+    assert pong.response == b"ping!"
+    assert supervisor.process("bay-1").pid != supervisor.process("bay-2").pid
+
+
+@pytest.mark.asyncio
+async def test_send_data(
+    supervisor: DeviceSupervisor, devices: List[PtyDevice]
+) -> None:
+    results = await supervisor.send_data(0, 0, "hello")
+
+    assert sorted(results.keys()) == NAMES
+    assert all(exc is None for exc, _ in results.values())
+    for device in devices:
+        assert device.received == [(0x1F, b"\x00\x00hello")]
+
+
+@pytest.mark.asyncio
+async def test_error(supervisor: DeviceSupervisor) -> None:
+    results = await supervisor.read_status()
+
+    for exc, status in results.values():
+        assert exc is not None
+        assert status is None
+    assert not supervisor.health()["bay-1"].healthy
+
+
+@pytest.mark.asyncio
+async def test_tagged_reports(
+    supervisor: DeviceSupervisor,
+    devices: List[PtyDevice],
+    handler: RecordingPoolReportHandler,
+) -> None:
+    devices[1].write((0x80, bytes([KeyActivity.KEY_UP_PRESS.value])))
+
+    async with asyncio.timeout(5.0):
+        await handler.received.wait()
+
+    assert handler.reports[0][0] == "bay-2"
+    assert handler.reports[0][1].activity == KeyActivity.KEY_UP_PRESS
+
+
+@pytest.mark.asyncio
+async def test_restart(supervisor: DeviceSupervisor) -> None:
+    supervisor.process("bay-1").kill()
+
+    async with asyncio.timeout(10.0):
+        while not supervisor.health()["bay-1"].restarts:
+            await asyncio.sleep(0.05)
+
+    pong = await supervisor.call("bay-1", Client.ping, b"again")
+
+    assert pong.response == b"again"
+    assert supervisor.health()["bay-1"].connected
+
+
+@pytest.mark.asyncio
+async def test_close_during_restart(supervisor: DeviceSupervisor) -> None:
+    start = supervisor._start
+
+    async def close_then_start(name: str) -> None:
+        supervisor.close()
+        await start(name)
+
+    supervisor._start = close_then_start  # type: ignore
+    supervisor.process("bay-1").kill()
+
+    async with asyncio.timeout(10.0):
+        await supervisor.closed()
+
+    assert not supervisor.health()["bay-1"].connected
+
+
+@pytest.mark.asyncio
+async def test_startup_timeout(devices: List[PtyDevice]) -> None:
+    supervisor = await create_supervisor(
+        {"bay-1": devices[0].port}, transport="fd", startup_timeout=0.01
+    )
+
+    health = supervisor.health()["bay-1"]
+    assert not health.connected
+    assert isinstance(health.last_error, ConnectionError)
+
+    supervisor.close()
+    await supervisor.closed()
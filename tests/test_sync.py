@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import cast, Generator
+
+import pytest
+
+from tests.helpers import PtyDevice
+
+from crystalfontz.client import Client
+from crystalfontz.command import ClearScreen, Ping
+from crystalfontz.error import ConnectionError
+from crystalfontz.response import ClearedScreen, Pong
+from crystalfontz.sync import SyncClient
+
+
+@pytest.fixture
+def pty_device() -> Generator[PtyDevice, None, None]:
+    # The device runs on its own loop, so that blocking calls from the test don't
+    # starve it
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def create() -> PtyDevice:
+        return PtyDevice(loop)
+
+    device = asyncio.run_coroutine_threadsafe(create(), loop).result()
+
+    yield device
+
+    loop.call_soon_threadsafe(device.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_ping(pty_device: PtyDevice) -> None:
+    with SyncClient(pty_device.port, transport="fd") as client:
+        pong = client.ping(b"ping!")
+
+    assert pong.response == b"ping!"
+    assert pty_device.received == [(0x00, b"ping!")]
+
+
+def test_submit_from_threads(pty_device: PtyDevice) -> None:
+    payloads = [f"ping {i}".encode("ascii") for i in range(32)]
+
+    with SyncClient(pty_device.port, transport="fd") as client:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = list(
+                executor.map(lambda p: client.submit(Client.ping, p), payloads)
+            )
+            pongs = [future.result(timeout=5.0) for future in futures]
+
+    assert [pong.response for pong in pongs] == payloads
+    assert sorted(payload for _, payload in pty_device.received) == sorted(payloads)
+
+
+def test_submit_after_close(pty_device: PtyDevice) -> None:
+    client = SyncClient(pty_device.port, transport="fd")
+    client.close()
+
+    with pytest.raises(ConnectionError):
+        client.submit(Client.ping, b"ping!")
+
+
+def test_send_commands(pty_device: PtyDevice) -> None:
+    with SyncClient(pty_device.port, transport="fd") as client:
+        results = client.send_commands(
+            [(Ping(b"ping!"), Pong), (ClearScreen(), ClearedScreen)]
+        )
+
+    assert all(exc is None for exc, _ in results)
+    assert cast(Pong, results[0][1]).response == b"ping!"
+    assert isinstance(results[1][1], ClearedScreen)
+
+
+def test_call_from_background_thread(pty_device: PtyDevice) -> None:
+    with SyncClient(pty_device.port, transport="fd") as client:
+        future: Future[None] = Future()
+
+        def ping() -> None:
+            try:
+                client.ping(b"ping!")
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(None)
+
+        client.loop.call_soon_threadsafe(ping)
+
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5.0)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Any, Generator, List, Self, Tuple
+
+import pytest
+
+from tests.helpers import loopback_client
+
+from crystalfontz import trace
+from crystalfontz.packet import parse_packet, serialize_packet
+from crystalfontz.report import ReportHandler
+from crystalfontz.response import KeyActivityReport, Pong, TemperatureReport
+
+
+@pytest.fixture(autouse=True)
+def clean_hooks() -> Generator[None, None, None]:
+    yield
+    trace.disable_logging()
+    for event in trace.EVENTS:
+        getattr(trace.hooks, event).clear()
+
+
+class Recorder:
+    def __init__(self: Self) -> None:
+        self.calls: List[Tuple[Any, ...]] = []
+
+    def __call__(self: Self, *args: Any) -> None:
+        self.calls.append(args)
+
+
+def test_packet_events() -> None:
+    tx, rx, resync = Recorder(), Recorder(), Recorder()
+    trace.subscribe("tx", tx)
+    trace.subscribe("rx", rx)
+    trace.subscribe("resync", resync)
+
+    buff = serialize_packet((0x00, b"hi"))
+    packet, _ = parse_packet(b"\xff" + buff)
+
+    assert packet == (0x00, b"hi")
+    assert tx.calls == [(buff,)]
+    assert rx.calls == [(buff,)]
+    assert resync.calls == [("crc", b"\xff" + buff)]
+
+
+def test_unsubscribe() -> None:
+    tx = Recorder()
+    trace.subscribe("tx", tx)
+    trace.unsubscribe("tx", tx)
+
+    serialize_packet((0x00, b""))
+
+    assert tx.calls == []
+    assert not trace.hooks.tx
+
+
+def test_unknown_event() -> None:
+    with pytest.raises(ValueError):
+        trace.subscribe("pony", Recorder())  # type: ignore
+
+
+def test_failing_hook(caplog: pytest.LogCaptureFixture) -> None:
+    def fail(data: bytes) -> None:
+        raise Exception("oops")
+
+    trace.subscribe("tx", fail)
+
+    assert serialize_packet((0x00, b"")) == b"\x00\x00\x47\x0f"
+    assert "failed" in caplog.text
+
+
+def test_logging_subscriber(caplog: pytest.LogCaptureFixture) -> None:
+    trace.enable_logging()
+
+    with caplog.at_level(logging.DEBUG, logger="crystalfontz.trace"):
+        serialize_packet((0x00, b""))
+        parse_packet(b"\xff\x00\x00\x47\x0f")
+
+    assert "Sending packet: b'\\x00\\x00G\\x0f'" in caplog.text
+    assert "Discarding byte 0xff (crc)" in caplog.text
+    assert "Received packet" in caplog.text
+
+    trace.disable_logging()
+
+    assert not trace.hooks.tx
+
+
+class Handler(ReportHandler):
+    def __init__(self: Self) -> None:
+        self.received: asyncio.Event = asyncio.Event()
+
+    async def on_key_activity(self: Self, report: KeyActivityReport) -> None:
+        self.received.set()
+
+    async def on_temperature(self: Self, report: TemperatureReport) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_client_events() -> None:
+    decode, dispatch = Recorder(), Recorder()
+    trace.subscribe("decode", decode)
+    trace.subscribe("dispatch", dispatch)
+
+    handler = Handler()
+    client = await loopback_client(handler)
+
+    await client.ping(b"hello")
+    client.data_received(serialize_packet((0x80, b"\x01")))
+    await asyncio.wait_for(handler.received.wait(), 1.0)
+
+    assert [type(res) for _, res in decode.calls] == [Pong, KeyActivityReport]
+    assert decode.calls[0][0] == (0x40, b"hello")
+    assert [name for name, _ in dispatch.calls] == ["key_activity"]
+
+    client.close()
+    await client.closed
@@ -0,0 +1,168 @@
+import asyncio
+from typing import Any, AsyncGenerator
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+
+from tests.helpers import PtyDevice, SocketDevice
+
+from crystalfontz.baud import FAST_BAUD_RATE
+from crystalfontz.client import create_connection
+from crystalfontz.error import ConnectionError
+from crystalfontz.telnet import (
+    COM_PORT_OPTION,
+    DO,
+    SB,
+    SET_BAUDRATE,
+    TelnetDecoder,
+    WILL,
+)
+from crystalfontz.transport import parse_network_url, TransportType
+
+
+@pytest_asyncio.fixture
+async def pty_device() -> AsyncGenerator[PtyDevice, None]:
+    device = PtyDevice(asyncio.get_running_loop())
+    yield device
+    device.close()
+
+
+@pytest.mark.parametrize("transport", ["serial", "fd"])
+@pytest.mark.asyncio
+async def test_ping(pty_device: PtyDevice, transport: TransportType) -> None:
+    client = await create_connection(pty_device.port, transport=transport)
+
+    pong = await client.ping(b"ping!")
+
+    assert pong.response == b"ping!"
+    assert pty_device.received == [(0x00, b"ping!")]
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_fd_spurious_wakeup(pty_device: PtyDevice) -> None:
+    client = await create_connection(pty_device.port, transport="fd")
+    transport: Any = client._transport
+
+    # A wakeup with no data available isn't a hangup
+    transport._file = Mock(readinto=Mock(return_value=None))
+    transport._read_ready()
+    await asyncio.sleep(0.01)
+
+    assert not transport.is_closing()
+    assert not client.closed.done()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.parametrize("transport", ["serial", "fd"])
+@pytest.mark.asyncio
+async def test_baud_rate(pty_device: PtyDevice, transport: TransportType) -> None:
+    client = await create_connection(pty_device.port, transport=transport)
+
+    client.baud_rate = FAST_BAUD_RATE
+
+    assert client.baud_rate == FAST_BAUD_RATE
+
+    client.close()
+    await client.closed
+
+
+@pytest_asyncio.fixture
+async def socket_device() -> AsyncGenerator[SocketDevice, None]:
+    device = SocketDevice()
+    await device.start()
+    yield device
+    await device.close()
+
+
+@pytest_asyncio.fixture
+async def rfc2217_device() -> AsyncGenerator[SocketDevice, None]:
+    device = SocketDevice(rfc2217=True)
+    await device.start()
+    yield device
+    await device.close()
+
+
+@pytest.mark.asyncio
+async def test_tcp_ping(socket_device: SocketDevice) -> None:
+    client = await create_connection(socket_device.url)
+
+    pong = await client.ping(b"ping!")
+
+    assert pong.response == b"ping!"
+
+    assert client._transport is not None
+    assert client._transport.get_extra_info("host") == "127.0.0.1"
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_tcp_reconnect(socket_device: SocketDevice) -> None:
+    client = await create_connection(socket_device.url)
+
+    await client.ping(b"before")
+
+    socket_device.drop()
+
+    async with asyncio.timeout(1.0):
+        while not socket_device.connections:
+            await asyncio.sleep(0.01)
+
+    pong = await client.ping(b"after")
+
+    assert pong.response == b"after"
+    assert not client.closed.done()
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.asyncio
+async def test_tcp_connection_refused() -> None:
+    with pytest.raises(ConnectionError):
+        await create_connection("tcp://127.0.0.1:1")
+
+
+@pytest.mark.asyncio
+async def test_rfc2217(rfc2217_device: SocketDevice) -> None:
+    client = await create_connection(rfc2217_device.url, baud_rate=FAST_BAUD_RATE)
+
+    # 0xFF must survive escaping in both directions
+    pong = await client.ping(b"\xff\xffping!\xff")
+
+    assert pong.response == b"\xff\xffping!\xff"
+    assert (WILL, COM_PORT_OPTION) in rfc2217_device.commands
+    assert (
+        SB,
+        bytes([COM_PORT_OPTION, SET_BAUDRATE]) + FAST_BAUD_RATE.to_bytes(4, "big"),
+    ) in rfc2217_device.commands
+
+    client.close()
+    await client.closed
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("/dev/ttyUSB0", None),
+        ("tcp://localhost:2000", ("tcp", "localhost", 2000)),
+        ("rfc2217://10.0.0.5:3000", ("rfc2217", "10.0.0.5", 3000)),
+        ("loop://", None),
+    ],
+)
+def test_parse_network_url(url, expected) -> None:
+    assert parse_network_url(url) == expected
+
+
+def test_telnet_decoder_split_command() -> None:
+    decoder = TelnetDecoder()
+
+    assert decoder.decode(b"ab\xff") == (b"ab", [])
+    assert decoder.decode(b"\xfd\x2ccd\xff\xff") == (b"cd\xff", [(DO, 44)])